@@ -0,0 +1,315 @@
+# ---
+# jupyter:
+#   kernelspec:
+#     display_name: Python 3
+#     language: python
+#     name: python3
+# ---
+
+# %% [markdown]
+# # _backup_gc
+#
+# Garbage collection of the sync backups. Every sync moves the files it replaces or deletes into
+# a backup dir, `{backups root}/{ULID}__{box_id}`, which is purged once the sync completes (see
+# `_utils.backup_purge_queue`). Backups are left behind when `delete_backup=False`, when a purge
+# fails, or when a sync is interrupted and never retried. The garbage collection deletes them
+# according to the `sync_backup_retention` policy of the config:
+#
+# - `max_age_days`: backups older than this are deleted.
+# - `max_per_box`: only the most recent backups of each box are kept.
+# - `max_total_size`: the oldest backups are deleted until the backups root fits in this size.
+#
+# Backups younger than `min_age_hours` are never deleted, as they may belong to a sync that is
+# still running on some machine. Neither are the backups of interrupted syncs, which a retry of
+# the sync continues to use: those of this machine, found in its local sync records, and those
+# of any machine that pushed to a storage location, found in the sync records of the storage
+# location. If the sync records of a storage location cannot be read, none of its backups are
+# deleted.
+#
+# Each backups root (the local one, and one per storage location) is listed once, recursively,
+# and the selected backups are deleted in batches that run in parallel.
+
+# %%
+#|default_exp _backup_gc
+
+# %%
+#|hide
+from nblite import nbl_export, show_doc; nbl_export();
+
+# %%
+#|export
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from ulid import ULID
+
+from boxyard import const
+import boxyard.config
+
+# %% [markdown]
+# # Constants
+
+# %%
+#|export
+BACKUP_GC_BATCH_SIZE = 200  # Backups per `rclone delete`
+BACKUP_GC_MAX_CONCURRENT_DELETES = 4  # Per backups root
+
+# %% [markdown]
+# # Listing backups
+
+# %%
+#|export
+@dataclass
+class SyncBackup:
+    name: str
+    ulid: ULID
+    box_id: str | None  # None for the backups made before backups were labelled with the box
+    size: int = 0
+
+    @property
+    def created(self) -> datetime:
+        return self.ulid.datetime
+
+
+def parse_sync_backup_name(name: str) -> SyncBackup | None:
+    """Parse the name of a backup dir. Returns None if it is not one."""
+    ulid_str, _, box_id = name.partition("__")
+    try:
+        ulid = ULID.from_str(ulid_str)
+    except ValueError:
+        return None
+    return SyncBackup(name=name, ulid=ulid, box_id=box_id or None)
+
+
+async def list_sync_backups(
+    rclone_config_path: str,
+    remote: str,
+    backups_path: str | Path,
+) -> list[SyncBackup]:
+    """List the backups in a backups root, with a single recursive listing."""
+    from boxyard._utils import rclone_lsjson
+
+    entries = await rclone_lsjson(
+        rclone_config_path=rclone_config_path,
+        source=remote,
+        source_path=Path(backups_path).as_posix(),
+        recursive=True,
+    )
+    backups: dict[str, SyncBackup] = {}
+    for entry in entries or []:
+        name = entry["Path"].split("/", 1)[0]
+        if name not in backups:
+            backup = parse_sync_backup_name(name)
+            if backup is None:
+                continue
+            backups[name] = backup
+        if not entry["IsDir"]:
+            backups[name].size += max(entry["Size"], 0)
+    return sorted(backups.values(), key=lambda b: b.ulid)
+
+# %% [markdown]
+# # Selecting backups
+
+# %%
+#|export
+def select_expired_backups(
+    backups: list[SyncBackup],
+    retention: "boxyard.config.SyncBackupRetentionConfig",
+    protected_ulids: set[str] = frozenset(),
+    now: datetime | None = None,
+) -> list[SyncBackup]:
+    """Select the backups of a backups root that the retention policy deletes (oldest first)."""
+    now = now or datetime.now(timezone.utc)
+    min_created = now - timedelta(hours=retention.min_age_hours)
+
+    def _is_deletable(backup: SyncBackup) -> bool:
+        return backup.created < min_created and str(backup.ulid) not in protected_ulids
+
+    backups = sorted(backups, key=lambda b: b.ulid)
+    expired: dict[str, SyncBackup] = {}
+
+    if retention.max_age_days is not None:
+        max_age_created = now - timedelta(days=retention.max_age_days)
+        for backup in backups:
+            if backup.created < max_age_created and _is_deletable(backup):
+                expired[backup.name] = backup
+
+    if retention.max_per_box is not None:
+        backups_by_box: dict[str, list[SyncBackup]] = {}
+        for backup in backups:
+            if backup.box_id is not None:
+                backups_by_box.setdefault(backup.box_id, []).append(backup)
+        for box_backups in backups_by_box.values():
+            num_excess = len(box_backups) - retention.max_per_box
+            for backup in box_backups[:max(num_excess, 0)]:
+                if _is_deletable(backup):
+                    expired[backup.name] = backup
+
+    if retention.max_total_size is not None:
+        total_size = sum(backup.size for backup in backups if backup.name not in expired)
+        for backup in backups:
+            if total_size <= retention.max_total_size:
+                break
+            if backup.name not in expired and _is_deletable(backup):
+                expired[backup.name] = backup
+                total_size -= backup.size
+
+    return sorted(expired.values(), key=lambda b: b.ulid)
+
+
+def _get_incomplete_sync_ulids(sync_records_path: Path) -> set[str]:
+    from boxyard._models import SyncRecord
+
+    ulids = set()
+    for record_path in Path(sync_records_path).glob("*/*.rec"):
+        try:
+            record = SyncRecord.model_validate_json(record_path.read_text())
+        except (OSError, ValueError):
+            continue
+        if not record.sync_complete:
+            ulids.add(str(record.ulid))
+    return ulids
+
+
+def get_protected_backup_ulids(config: boxyard.config.Config) -> set[str]:
+    """The ULIDs of the interrupted syncs of this machine, whose backups a retry would use."""
+    return _get_incomplete_sync_ulids(config.boxyard_data_path / const.SYNC_RECORDS_REL_PATH)
+
+
+async def get_remote_protected_backup_ulids(
+    config: boxyard.config.Config,
+    storage_location_name: str,
+) -> set[str] | None:
+    """
+    The ULIDs of the interrupted syncs recorded on a storage location (by any machine), whose
+    backups a retry would use. Returns None if the sync records could not be read.
+    """
+    import tempfile
+    from boxyard._utils import rclone_copy, rclone_lsjson
+
+    sl_config = config.storage_locations[storage_location_name]
+    store_entries = await rclone_lsjson(
+        rclone_config_path=config.rclone_config_path,
+        source=storage_location_name,
+        source_path=sl_config.store_path.as_posix(),
+        dirs_only=True,
+    )
+    if store_entries is None:
+        return None
+    if const.SYNC_RECORDS_REL_PATH not in {entry["Name"] for entry in store_entries}:
+        return set()  # Nothing was ever synced to the storage location
+    with tempfile.TemporaryDirectory(prefix="boxyard_gc_records_") as tmp_dir:
+        # The sync records are small, so they are copied with a single rclone call
+        success, _, _ = await rclone_copy(
+            rclone_config_path=config.rclone_config_path,
+            source=storage_location_name,
+            source_path=(sl_config.store_path / const.SYNC_RECORDS_REL_PATH).as_posix(),
+            dest="",
+            dest_path=tmp_dir,
+            include=["*.rec"],
+        )
+        if not success:
+            return None
+        return _get_incomplete_sync_ulids(Path(tmp_dir))
+
+# %% [markdown]
+# # Garbage collection
+
+# %%
+#|export
+async def delete_sync_backups(
+    rclone_config_path: str,
+    remote: str,
+    backups_path: str | Path,
+    backup_names: list[str],
+) -> list[str]:
+    """Delete backups in batched, parallel deletes. Returns the names of the deleted backups."""
+    from boxyard._utils import rclone_purge_dirs
+
+    semaphore = asyncio.Semaphore(BACKUP_GC_MAX_CONCURRENT_DELETES)
+    batches = [
+        backup_names[i : i + BACKUP_GC_BATCH_SIZE]
+        for i in range(0, len(backup_names), BACKUP_GC_BATCH_SIZE)
+    ]
+
+    async def _delete(batch: list[str]) -> bool:
+        async with semaphore:
+            return await rclone_purge_dirs(
+                rclone_config_path=rclone_config_path,
+                source=remote,
+                source_path=Path(backups_path).as_posix(),
+                dir_names=batch,
+            )
+
+    results = await asyncio.gather(*[_delete(batch) for batch in batches])
+    return [name for batch, success in zip(batches, results, strict=True) if success for name in batch]
+
+
+@dataclass
+class BackupGCResult:
+    backups_root: str  # "local", or the name of the storage location
+    num_backups: int
+    expired: list[SyncBackup]
+    deleted: list[str]
+
+    @property
+    def deleted_size(self) -> int:
+        deleted = set(self.deleted)
+        return sum(backup.size for backup in self.expired if backup.name in deleted)
+
+
+async def gc_sync_backups(
+    config: boxyard.config.Config,
+    storage_locations: list[str] | None = None,
+    include_local: bool = True,
+    dry_run: bool = False,
+) -> list[BackupGCResult]:
+    """
+    Delete the sync backups that the `sync_backup_retention` policy of the config expires, in
+    the local backups root and in the backups roots of the storage locations (all by default).
+    """
+    retention = config.sync_backup_retention
+    if storage_locations is None:
+        storage_locations = list(config.storage_locations)
+
+    backups_roots = [("local", "", config.local_sync_backups_path)] if include_local else []
+    backups_roots += [
+        (sl_name, sl_name, config.storage_locations[sl_name].store_path / const.REMOTE_BACKUP_REL_PATH)
+        for sl_name in storage_locations
+    ]
+    protected_ulids = get_protected_backup_ulids(config)
+
+    async def _gc(backups_root: str, remote: str, backups_path: Path) -> BackupGCResult:
+        backups = await list_sync_backups(config.rclone_config_path, remote, backups_path)
+        root_protected_ulids = protected_ulids
+        if remote:
+            remote_protected_ulids = await get_remote_protected_backup_ulids(config, remote)
+            if remote_protected_ulids is None:
+                return BackupGCResult(backups_root, len(backups), [], [])
+            root_protected_ulids = protected_ulids | remote_protected_ulids
+        expired = select_expired_backups(backups, retention, root_protected_ulids)
+        deleted = []
+        if expired and not dry_run:
+            deleted = await delete_sync_backups(
+                config.rclone_config_path, remote, backups_path, [b.name for b in expired]
+            )
+        return BackupGCResult(backups_root, len(backups), expired, deleted)
+
+    return list(await asyncio.gather(*[_gc(*backups_root) for backups_root in backups_roots]))
+
+# %%
+from tests.integration.conftest import create_boxyards
+from boxyard.config import SyncBackupRetentionConfig
+
+remote_name, remote_rclone_path, config, config_path, data_path = create_boxyards()
+
+_old_ulid = ULID.from_datetime(datetime.now(timezone.utc) - timedelta(days=40))
+(config.local_sync_backups_path / f"{_old_ulid}__box" / "file.txt").parent.mkdir(parents=True)
+(config.local_sync_backups_path / f"{_old_ulid}__box" / "file.txt").write_text("old")
+(config.local_sync_backups_path / f"{ULID()}__box").mkdir()
+
+_results = await gc_sync_backups(config)
+assert [(r.backups_root, r.num_backups, len(r.deleted)) for r in _results][0] == ("local", 2, 1)
+assert len(list(config.local_sync_backups_path.iterdir())) == 1
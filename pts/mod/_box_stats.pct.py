@@ -0,0 +1,188 @@
+# ---
+# jupyter:
+#   kernelspec:
+#     display_name: Python 3
+#     language: python
+#     name: python3
+# ---
+
+# %% [markdown]
+# # _box_stats
+#
+# A local cache of per-box stats (size, last modification and last sync), recorded by
+# `sync_box` whenever it syncs the data of a box. `multi-sync` uses the cache to prioritise
+# boxes without having to walk the tree of every box up front.
+
+# %%
+#|default_exp _box_stats
+
+# %%
+#|hide
+from nblite import nbl_export, show_doc; nbl_export();
+
+# %%
+#|export
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+
+from boxyard import const
+from boxyard._enums import BoxPart, SyncSchedulingPolicy
+import boxyard.config
+
+if TYPE_CHECKING:
+    from boxyard._models import BoxMeta
+
+# %% [markdown]
+# # `BoxStats` Model
+
+# %%
+#|export
+class BoxStats(const.StrictModel):
+    """
+    Stats of the local data of a box, as of its last data sync.
+
+    Stored at: {boxyard_data_path}/box_stats/{box_id}.json
+    """
+    size: int
+    num_files: int
+    last_modified: float | None  # Timestamp of the most recently modified file
+    last_synced_utc: datetime
+    sync_duration: float  # seconds
+
+# %% [markdown]
+# # Cache Utilities
+
+# %%
+#|export
+def get_box_stats_path(config: boxyard.config.Config, box_id: str) -> Path:
+    """Get the path to the cached stats of a box."""
+    return config.box_stats_path / f"{box_id}.json"
+
+# %%
+#|export
+def load_box_stats(config: boxyard.config.Config, box_id: str) -> BoxStats | None:
+    """Load the cached stats of a box. Returns None if there are none (or they are unreadable)."""
+    path = get_box_stats_path(config, box_id)
+    try:
+        return BoxStats.model_validate_json(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+# %%
+#|export
+def save_box_stats(config: boxyard.config.Config, box_id: str, box_stats: BoxStats) -> None:
+    """Save the stats of a box to the cache."""
+    from boxyard._utils import write_text_atomic
+
+    path = get_box_stats_path(config, box_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_text_atomic(path, box_stats.model_dump_json())
+
+# %%
+#|export
+async def record_box_stats(
+    config: boxyard.config.Config,
+    box_meta: "BoxMeta",
+    sync_duration: float,
+) -> BoxStats:
+    """Measure the local data of a box and record it, together with the sync duration, in the cache."""
+    import asyncio
+    from boxyard._utils import get_dir_stats
+
+    dir_stats = await asyncio.to_thread(
+        get_dir_stats, box_meta.get_local_part_path(config, BoxPart.DATA)
+    )
+    box_stats = BoxStats(
+        size=dir_stats.size,
+        num_files=dir_stats.num_files,
+        last_modified=dir_stats.last_modified,
+        last_synced_utc=datetime.now(timezone.utc),
+        sync_duration=sync_duration,
+    )
+    save_box_stats(config, box_meta.box_id, box_stats)
+    return box_stats
+
+# %% [markdown]
+# # Sync Priorities
+
+# %%
+#|export
+# Entries of the data folder of a box that are stat'ed to estimate its last modification
+LAST_MODIFIED_SCAN_MAX_ENTRIES = 1000
+
+
+def get_box_sync_priority(
+    config: boxyard.config.Config,
+    box_meta: "BoxMeta",
+    policy: SyncSchedulingPolicy,
+    group_priority: list[str] | None = None,
+) -> tuple:
+    """
+    Get the sync priority of a box (lower sorts first).
+
+    Boxes in a group listed in `group_priority` come first, in the order of the listed groups.
+    Within that, the boxes are ordered by the scheduling policy, using the cached box stats.
+    Boxes without cached stats (e.g. never synced) are treated as empty and unmodified.
+    """
+    group_rank = len(group_priority or [])
+    for i, group_name in enumerate(group_priority or []):
+        if group_name in box_meta.groups:
+            group_rank = i
+            break
+
+    if policy == SyncSchedulingPolicy.FIFO:
+        return (group_rank,)
+
+    box_stats = load_box_stats(config, box_meta.box_id)
+    if policy == SyncSchedulingPolicy.SHORTEST_FIRST:
+        return (group_rank, box_stats.size if box_stats else 0)
+    if policy == SyncSchedulingPolicy.LARGEST_FIRST:
+        return (group_rank, -box_stats.size if box_stats else 0)
+    if policy == SyncSchedulingPolicy.RECENTLY_MODIFIED_FIRST:
+        return (group_rank, -_get_cheap_last_modified(config, box_meta, box_stats))
+    raise ValueError(f"Unknown scheduling policy: {policy}")
+
+
+def _get_cheap_last_modified(
+    config: boxyard.config.Config, box_meta: "BoxMeta", box_stats: BoxStats | None
+) -> float:
+    """
+    The last modification time of a box, without walking its whole tree: the cached last
+    modification (as of the last data sync), or the latest mtime among the data folder and the
+    first `LAST_MODIFIED_SCAN_MAX_ENTRIES` entries below it (breadth-first), whichever is later.
+
+    This picks up the content edits made since the last sync in the upper levels of the tree.
+    Deeper down it relies on directory mtimes, which change when files are added, removed or
+    saved by replacing them (as most editors do).
+    """
+    import os
+    from collections import deque
+
+    last_modified = (box_stats.last_modified or 0.0) if box_stats else 0.0
+    data_path = box_meta.get_local_part_path(config, BoxPart.DATA)
+    try:
+        last_modified = max(last_modified, data_path.stat().st_mtime)
+    except OSError:
+        return last_modified
+
+    num_entries = 0
+    queue = deque([data_path])
+    while queue and num_entries < LAST_MODIFIED_SCAN_MAX_ENTRIES:
+        try:
+            with os.scandir(queue.popleft()) as entries:
+                for entry in entries:
+                    num_entries += 1
+                    if num_entries > LAST_MODIFIED_SCAN_MAX_ENTRIES:
+                        break
+                    try:
+                        last_modified = max(
+                            last_modified, entry.stat(follow_symlinks=False).st_mtime
+                        )
+                        if entry.is_dir(follow_symlinks=False):
+                            queue.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return last_modified
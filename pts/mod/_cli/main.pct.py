@@ -23,7 +23,7 @@ from typer import Option
 from typing import Literal
 from pathlib import Path
 from enum import Enum
-from boxyard._enums import SyncSetting, SyncDirection, BoxPart, RenameScope, SyncNameDirection
+from boxyard._enums import SyncSetting, SyncDirection, BoxPart, RenameScope, SyncNameDirection, BoxSortKey
 from boxyard._cli.app import app, app_state
 
 # %% [markdown]
@@ -158,44 +158,37 @@ def _get_box_index_name(
     from boxyard.config import get_config
 
     config = get_config(app_state["config_path"])
-    if box_metas is None:
-        box_metas = get_boxyard_meta(config).box_metas
-    boxyard_meta = BoxyardMeta(box_metas=box_metas)
 
     if (box_id is not None or box_name is not None) or search_mode:
+        if box_metas is None:
+            boxyard_meta = get_boxyard_meta(config)
+        else:
+            # The box metas are already validated
+            boxyard_meta = BoxyardMeta.model_construct(box_metas=box_metas)
         if box_id is not None:
             if box_id not in boxyard_meta.by_id:
                 raise typer.Exit(f"Box with id `{box_id}` not found.")
             box_index_name = boxyard_meta.by_id[box_id].index_name
         else:
             if box_name is not None:
+                from boxyard._models import get_name_search_index
+
                 if name_match_mode is None:
                     name_match_mode = NameMatchMode.CONTAINS
-                if name_match_mode == NameMatchMode.EXACT:
-                    cmp = (
-                        lambda x: x.name == box_name
-                        if name_match_case
-                        else x.name.lower() == box_name.lower()
-                    )
-                    boxes_with_name = [x for x in boxyard_meta.box_metas if cmp(x)]
-                elif name_match_mode == NameMatchMode.CONTAINS:
-                    cmp = (
-                        lambda x: box_name in x.name
-                        if name_match_case
-                        else box_name.lower() in x.name.lower()
-                    )
-                    boxes_with_name = [x for x in boxyard_meta.box_metas if cmp(x)]
-                elif name_match_mode == NameMatchMode.SUBSEQUENCE:
-                    cmp = (
-                        lambda x: _is_subsequence_match(box_name, x.name)
-                        if name_match_case
-                        else _is_subsequence_match(box_name.lower(), x.name.lower())
-                    )
-                    boxes_with_name = [x for x in boxyard_meta.box_metas if cmp(x)]
+                if box_metas is None:
+                    name_index = get_name_search_index(config, boxyard_meta)
+                else:
+                    name_index = boxyard_meta.name_index
+                # Best match first
+                rows = name_index.search(
+                    box_name,
+                    mode=name_match_mode.value,
+                    match_case=name_match_case,
+                    tie_key=lambda row: boxyard_meta.box_metas[row].index_name,
+                )
+                boxes_with_name = [boxyard_meta.box_metas[row] for row in rows]
             else:
-                boxes_with_name = boxyard_meta.box_metas
-
-            boxes_with_name = sorted(boxes_with_name, key=lambda x: x.index_name)
+                boxes_with_name = sorted(boxyard_meta.box_metas, key=lambda x: x.index_name)
 
             if len(boxes_with_name) == 0:
                 typer.echo("Box not found.", err=True)
@@ -219,10 +212,7 @@ def _get_box_index_name(
     if box_index_name is None:
         from boxyard._utils import get_box_index_name_from_sub_path
 
-        box_index_name = get_box_index_name_from_sub_path(
-            config=config,
-            sub_path=Path.cwd(),
-        )
+        box_index_name = get_box_index_name_from_sub_path(config=config)
         if box_index_name is None:
             raise typer.Exit(
                 "Box not specified and could not be inferred from current working directory."
@@ -458,12 +448,46 @@ def cli_sync(
         False, "--sync-children", help="Also sync all descendant boxes after syncing the target.",
     ),
     soft_interruption_enabled: bool = Option(True, help="Enable soft interruption."),
+    watch: bool = Option(
+        False,
+        "--watch",
+        "-w",
+        help="Keep running, and push boxes whenever they change locally. Watches the given box (and its descendants with --sync-children), or all included boxes if no box is given.",
+    ),
+    quiet_period: float = Option(
+        5.0, "--quiet-period", help="With --watch: seconds a box must go without changes before it is pushed.",
+    ),
+    min_push_interval: float = Option(
+        30.0, "--min-push-interval", help="With --watch: minimum seconds between two batches of pushes to the same storage location.",
+    ),
+    poll_interval: float | None = Option(
+        None, "--poll-interval", help="With --watch: poll for changes every this many seconds instead of using inotify.",
+    ),
 ):
     """
     Sync a box.
     """
     from boxyard.cmds import sync_box
 
+    if watch:
+        _watch_and_push(
+            box_path=box_path,
+            box_index_name=box_index_name,
+            box_id=box_id,
+            box_name=box_name,
+            name_match_mode=name_match_mode,
+            name_match_case=name_match_case,
+            sync_direction=sync_direction,
+            sync_setting=sync_setting,
+            sync_choices=sync_choices,
+            sync_children=sync_children,
+            quiet_period=quiet_period,
+            min_push_interval=min_push_interval,
+            poll_interval=poll_interval,
+            soft_interruption_enabled=soft_interruption_enabled,
+        )
+        return
+
     if box_path is not None:
         from boxyard._utils import get_box_index_name_from_sub_path
         from boxyard.config import get_config
@@ -525,6 +549,77 @@ def cli_sync(
 
         create_user_symlinks(config_path=app_state["config_path"])
 
+# %%
+#|exporti
+def _watch_and_push(
+    box_path: Path | None,
+    box_index_name: str | None,
+    box_id: str | None,
+    box_name: str | None,
+    name_match_mode: NameMatchMode | None,
+    name_match_case: bool,
+    sync_direction: SyncDirection | None,
+    sync_setting: SyncSetting,
+    sync_choices: list[BoxPart] | None,
+    sync_children: bool,
+    quiet_period: float,
+    min_push_interval: float,
+    poll_interval: float | None,
+    soft_interruption_enabled: bool,
+):
+    """Implementation of `sync --watch`."""
+    from boxyard.cmds import watch_boxes
+    from boxyard._models import get_boxyard_meta
+    from boxyard.config import get_config
+
+    if sync_direction == SyncDirection.PULL:
+        typer.echo("Error: --watch only pushes local changes.", err=True)
+        raise typer.Exit(code=1)
+
+    config = get_config(app_state["config_path"])
+    box_index_names = None
+    if box_path is not None:
+        from boxyard._utils import get_box_index_name_from_sub_path
+
+        box_index_name = get_box_index_name_from_sub_path(config=config, sub_path=box_path)
+    if any(x is not None for x in [box_index_name, box_id, box_name]):
+        box_index_name = _get_box_index_name(
+            box_name=box_name,
+            box_id=box_id,
+            box_index_name=box_index_name,
+            name_match_mode=name_match_mode,
+            name_match_case=name_match_case,
+        )
+        box_index_names = [box_index_name]
+        if sync_children:
+            boxyard_meta = get_boxyard_meta(config)
+            box_index_names += [
+                desc.index_name
+                for desc in boxyard_meta.descendants_of(boxyard_meta.by_index_name[box_index_name].box_id)
+                if desc.check_included(config)
+            ]
+
+    def _on_push_finished(pushed_box_index_name: str, result):
+        if isinstance(result, BaseException):
+            typer.echo(f"Error pushing '{pushed_box_index_name}': {result}", err=True)
+        else:
+            typer.echo(f"Pushed '{pushed_box_index_name}'.")
+
+    _run_with_lock_handling(
+        watch_boxes(
+            config_path=app_state["config_path"],
+            box_index_names=box_index_names,
+            quiet_period=quiet_period,
+            min_push_interval=min_push_interval,
+            sync_setting=sync_setting,
+            sync_choices=sync_choices,
+            poll_interval=poll_interval,
+            verbose=True,
+            soft_interruption_enabled=soft_interruption_enabled,
+            on_push_finished=_on_push_finished,
+        )
+    )
+
 # %% [markdown]
 # # `sync-missing-meta`
 
@@ -1049,6 +1144,16 @@ def cli_remove_parent(
 # %% [markdown]
 # # `tree`
 
+# %%
+#|exporti
+def _get_children_by_parent(box_metas):
+    """The children of every box among `box_metas`, sorted by index name."""
+    children_by_parent = {}
+    for bm in sorted(box_metas, key=lambda x: x.index_name):
+        for parent_id in dict.fromkeys(bm.parents):
+            children_by_parent.setdefault(parent_id, []).append(bm)
+    return children_by_parent
+
 # %%
 #|export
 @app.command(name="tree")
@@ -1081,15 +1186,12 @@ def cli_tree(
 
     config = get_config(app_state["config_path"])
     boxyard_meta = get_boxyard_meta(config)
-    box_metas = list(boxyard_meta.box_metas)
-
-    if storage_locations:
-        box_metas = [bm for bm in box_metas if bm.storage_location in storage_locations]
-
-    box_metas = _get_filtered_box_metas(box_metas, include_groups, exclude_groups, group_filter)
+    table = boxyard_meta.table
+    box_metas = table.select(
+        table.filter(storage_locations or None, include_groups, exclude_groups, group_filter)
+    )
 
     filtered_meta = BoxyardMeta(box_metas=box_metas)
-    filtered_ids = {bm.box_id for bm in box_metas}
 
     if output_format == "json":
         from boxyard._fast import BoxyardFast
@@ -1122,10 +1224,10 @@ def cli_tree(
         groups_str = f" [groups: {', '.join(bm.groups)}]" if bm.groups else ""
         return f"{bm.name} ({bm.box_id}){groups_str}"
 
+    children_by_parent = _get_children_by_parent(box_metas)
+
     def _add_children(rich_node, parent_id):
-        children = [bm for bm in box_metas if parent_id in bm.parents]
-        children.sort(key=lambda x: x.index_name)
-        for child in children:
+        for child in children_by_parent.get(parent_id, []):
             child_node = rich_node.add(_label(child))
             _add_children(child_node, child.box_id)
 
@@ -1157,8 +1259,8 @@ def cli_tree(
 
     # Collect all shown descendants
     def _collect_shown(parent_id):
-        for bm in box_metas:
-            if parent_id in bm.parents and bm.box_id not in shown_ids:
+        for bm in children_by_parent.get(parent_id, []):
+            if bm.box_id not in shown_ids:
                 shown_ids.add(bm.box_id)
                 _collect_shown(bm.box_id)
 
@@ -1431,13 +1533,17 @@ print("\n".join(lines))
 #|exporti
 async def get_formatted_box_status(config_path, box_index_name):
     from boxyard.cmds import get_box_sync_status
-    from pydantic import BaseModel
-    import json
 
     sync_status = await get_box_sync_status(
         config_path=app_state["config_path"],
         box_index_name=box_index_name,
     )
+    return _format_box_sync_status(sync_status)
+
+
+def _format_box_sync_status(sync_status) -> dict:
+    from pydantic import BaseModel
+    import json
 
     data = {}
     for box_part, part_sync_status in sync_status.items():
@@ -1451,6 +1557,16 @@ async def get_formatted_box_status(config_path, box_index_name):
 
     return data
 
+
+def _is_box_sync_status_changed(sync_status) -> bool:
+    """Whether any part of a box is not in sync (excluded parts count as in sync)."""
+    from boxyard._models import SyncCondition
+
+    return any(
+        part_sync_status.sync_condition not in (SyncCondition.SYNCED, SyncCondition.EXCLUDED)
+        for part_sync_status in sync_status.values()
+    )
+
 # %%
 #|export
 @app.command(name="box-status")
@@ -1546,8 +1662,11 @@ def cli_yard_status(
         "-s",
         help="The storage location to get the status of. If not provided, the status of all storage locations will be shown.",
     ),
-    output_format: Literal["text", "json"] = Option(
-        "text", "--output-format", "-o", help="The format of the output."
+    output_format: Literal["text", "json", "ndjson"] = Option(
+        "text",
+        "--output-format",
+        "-o",
+        help="The format of the output. 'ndjson' prints one JSON object per box as soon as its status is known (in no particular order), followed by a summary object.",
     ),
     max_concurrent_rclone_ops: int | None = Option(
         None,
@@ -1555,6 +1674,16 @@ def cli_yard_status(
         "-m",
         help="The maximum number of concurrent rclone operations. If not provided, the default specified in the config will be used.",
     ),
+    only_changed: bool = Option(
+        False,
+        "--only-changed",
+        help="Only show boxes that have a part that is not in sync.",
+    ),
+    max_age: float | None = Option(
+        None,
+        "--max-age",
+        help="Reuse the last known status of a box if it is at most this many seconds old and the box has not changed locally since. Changes pushed from other machines are only picked up once the status is older than this. The status of a box is only recorded for reuse when this option is given.",
+    ),
 ):
     """
     Get the sync status of all boxes in the yard.
@@ -1562,7 +1691,8 @@ def cli_yard_status(
     import asyncio
     from boxyard._models import get_boxyard_meta
     from boxyard.config import get_config
-    from boxyard._utils import async_throttler
+    from boxyard._status_snapshots import get_box_sync_status_with_snapshot
+    from boxyard._utils.scheduling import stream_throttler
     import json
 
     config = get_config(app_state["config_path"])
@@ -1577,38 +1707,108 @@ def cli_yard_status(
     if max_concurrent_rclone_ops is None:
         max_concurrent_rclone_ops = config.max_concurrent_rclone_ops
 
-    box_metas = [
+    boxyard_meta = get_boxyard_meta(config)
+    # Grouped by storage location, and generated lazily so that only the boxes in flight are
+    # held in memory
+    box_metas = (
         box_meta
-        for box_meta in get_boxyard_meta(config).box_metas
-        if box_meta.storage_location in storage_locations
-    ]
-
-    box_sync_statuses = asyncio.run(
-        async_throttler(
-            [
-                get_formatted_box_status(config, box_meta.index_name)
-                for box_meta in box_metas
-            ],
+        for sl_name in storage_locations
+        for box_meta in boxyard_meta.box_metas
+        if box_meta.storage_location == sl_name
+    )
+
+    async def _get_status(box_meta):
+        sync_status, _ = await get_box_sync_status_with_snapshot(config, box_meta, max_age)
+        # Filtered before formatting, so that in-sync boxes are never serialised
+        if only_changed and not _is_box_sync_status_changed(sync_status):
+            return None
+        return _format_box_sync_status(sync_status)
+
+    async def _print_ndjson_statuses() -> int:
+        num_boxes = num_shown = num_errors = 0
+        async for box_meta, box_sync_status in stream_throttler(
+            box_metas,
+            worker=_get_status,
             max_concurrency=max_concurrent_rclone_ops,
+        ):
+            num_boxes += 1
+            line = {
+                "storage_location": box_meta.storage_location,
+                "box_index_name": box_meta.index_name,
+            }
+            if isinstance(box_sync_status, Exception):
+                num_errors += 1
+                line.update(type="error", error=str(box_sync_status))
+            elif box_sync_status is None:
+                continue
+            else:
+                line.update(type="box", status=box_sync_status)
+            num_shown += 1
+            typer.echo(json.dumps(line))
+        typer.echo(
+            json.dumps(
+                {
+                    "type": "summary",
+                    "num_boxes": num_boxes,
+                    "num_shown": num_shown,
+                    "num_errors": num_errors,
+                }
+            )
         )
-    )
+        return num_errors
 
-    box_sync_statuses_by_sl = {}
-    for box_sync_status, box_meta in zip(box_sync_statuses, box_metas):
-        box_sync_statuses_by_sl.setdefault(box_meta.storage_location, {})[
-            box_meta.index_name
-        ] = box_sync_status
+    async def _print_statuses():
+        current_sl_name = None
+        async for box_meta, box_sync_status in stream_throttler(
+            box_metas,
+            worker=_get_status,
+            max_concurrency=max_concurrent_rclone_ops,
+            ordered=True,
+        ):
+            if isinstance(box_sync_status, Exception):
+                raise box_sync_status
+            if box_sync_status is None:
+                continue
+            # The output is written box by box, matching `json.dumps(..., indent=2)` of the
+            # statuses grouped by storage location
+            is_new_sl = box_meta.storage_location != current_sl_name
+            if output_format == "json":
+                if current_sl_name is None:
+                    typer.echo("{")
+                elif is_new_sl:
+                    typer.echo("\n  },")
+                else:
+                    typer.echo(",")
+                if is_new_sl:
+                    typer.echo(f"  {json.dumps(box_meta.storage_location)}: {{")
+                box_json = json.dumps(box_sync_status, indent=2).replace("\n", "\n    ")
+                typer.echo(f"    {json.dumps(box_meta.index_name)}: {box_json}", nl=False)
+            else:
+                if is_new_sl:
+                    if current_sl_name is not None:
+                        typer.echo("\n")
+                    typer.echo(f"{box_meta.storage_location}:")
+                typer.echo(
+                    "\n".join(
+                        _dict_to_hierarchical_text(
+                            {box_meta.index_name: box_sync_status}, indents=1
+                        )
+                    )
+                )
+            current_sl_name = box_meta.storage_location
 
-    if output_format == "json":
-        typer.echo(json.dumps(box_sync_statuses_by_sl, indent=2))
-    else:
-        for sl_name, box_sync_statuses in box_sync_statuses_by_sl.items():
-            typer.echo(f"{sl_name}:")
-            typer.echo(
-                "\n".join(_dict_to_hierarchical_text(box_sync_statuses, indents=1))
-            )
+        if output_format == "json":
+            typer.echo("{}" if current_sl_name is None else "\n  }\n}")
+        elif current_sl_name is not None:
             typer.echo("\n")
 
+    if output_format == "ndjson":
+        # Errors are reported per box, so that one failing box does not end the stream
+        if asyncio.run(_print_ndjson_statuses()) > 0:
+            raise typer.Exit(code=1)
+    else:
+        asyncio.run(_print_statuses())
+
 # %% [markdown]
 # # `list`
 
@@ -1628,12 +1828,13 @@ def _get_filtered_box_metas(box_metas, include_groups, exclude_groups, group_fil
             if not any(group in box_meta.groups for group in exclude_groups)
         ]
     if group_filter:
-        from boxyard._utils.logical_expressions import get_group_filter_func
+        from boxyard._utils.logical_expressions import compile_group_expression
 
-        _filter_func = get_group_filter_func(group_filter)
-        box_metas = [
-            box_meta for box_meta in box_metas if _filter_func(box_meta.groups)
-        ]
+        # Evaluated for all boxes at once, over the bitsets of the groups in the expression
+        selected = compile_group_expression(group_filter).select(
+            [box_meta.groups for box_meta in box_metas]
+        )
+        box_metas = [box_metas[i] for i in selected]
     return box_metas
 
 # %%
@@ -1679,6 +1880,15 @@ def cli_list(
     leaves_only: bool = Option(
         False, "--leaves", help="Only show leaf boxes (no children).",
     ),
+    created_after: str | None = Option(
+        None, "--created-after", help="Only show boxes created at or after this time (e.g. '20250101', '20250101_120000' or '2025-01-01').",
+    ),
+    created_before: str | None = Option(
+        None, "--created-before", help="Only show boxes created before this time (same formats as --created-after).",
+    ),
+    sort_by: BoxSortKey | None = Option(
+        None, "--sort-by", help="Sort the boxes. If not provided, the boxes are listed in the order of the meta.",
+    ),
     tree_view: bool = Option(
         False, "--tree", help="Display as a tree instead of flat list.",
     ),
@@ -1700,17 +1910,18 @@ def cli_list(
         raise typer.Exit(code=1)
 
     all_boxyard_meta = get_boxyard_meta(config)
-    box_metas = [
-        box_meta
-        for box_meta in all_boxyard_meta.box_metas
-        if box_meta.storage_location in storage_locations
-    ]
-    box_metas = _get_filtered_box_metas(
-        box_metas, include_groups, exclude_groups, group_filter
-    )
+    # The filters select rows of the table of the boxes, as bitsets
+    table = all_boxyard_meta.table
+    selection = table.filter(storage_locations, include_groups, exclude_groups, group_filter)
+
+    if created_after or created_before:
+        try:
+            selection &= table.created_between(after=created_after, before=created_before)
+        except ValueError as e:
+            typer.echo(str(e), err=True)
+            raise typer.Exit(code=1)
 
     # Hierarchy filters
-    filtered_meta = BoxyardMeta(box_metas=box_metas)
     if children_of:
         ref = all_boxyard_meta.by_id.get(children_of) or all_boxyard_meta.by_index_name.get(children_of)
         if ref is None:
@@ -1719,8 +1930,7 @@ def cli_list(
         if ref is None:
             typer.echo(f"Box '{children_of}' not found.", err=True)
             raise typer.Exit(code=1)
-        child_ids = {c.box_id for c in all_boxyard_meta.children_of(ref.box_id)}
-        box_metas = [bm for bm in box_metas if bm.box_id in child_ids]
+        selection &= table.children_of(ref.box_id)
 
     if descendants_of:
         ref = all_boxyard_meta.by_id.get(descendants_of) or all_boxyard_meta.by_index_name.get(descendants_of)
@@ -1730,8 +1940,7 @@ def cli_list(
         if ref is None:
             typer.echo(f"Box '{descendants_of}' not found.", err=True)
             raise typer.Exit(code=1)
-        desc_ids = {d.box_id for d in all_boxyard_meta.descendants_of(ref.box_id)}
-        box_metas = [bm for bm in box_metas if bm.box_id in desc_ids]
+        selection &= table.descendants_of(ref.box_id)
 
     if parent_of:
         ref = all_boxyard_meta.by_id.get(parent_of) or all_boxyard_meta.by_index_name.get(parent_of)
@@ -1741,8 +1950,7 @@ def cli_list(
         if ref is None:
             typer.echo(f"Box '{parent_of}' not found.", err=True)
             raise typer.Exit(code=1)
-        parent_ids = set(ref.parents)
-        box_metas = [bm for bm in box_metas if bm.box_id in parent_ids]
+        selection &= table.parents_of(ref.box_id)
 
     if ancestors_of:
         ref = all_boxyard_meta.by_id.get(ancestors_of) or all_boxyard_meta.by_index_name.get(ancestors_of)
@@ -1752,32 +1960,29 @@ def cli_list(
         if ref is None:
             typer.echo(f"Box '{ancestors_of}' not found.", err=True)
             raise typer.Exit(code=1)
-        anc_ids = {a.box_id for a in all_boxyard_meta.ancestors_of(ref.box_id)}
-        box_metas = [bm for bm in box_metas if bm.box_id in anc_ids]
+        selection &= table.ancestors_of(ref.box_id)
 
     if roots_only:
-        box_metas = [bm for bm in box_metas if len(bm.parents) == 0]
+        selection &= table.roots
 
     if leaves_only:
-        all_parent_ids = set()
-        for bm in all_boxyard_meta.box_metas:
-            all_parent_ids.update(bm.parents)
-        box_metas = [bm for bm in box_metas if bm.box_id not in all_parent_ids]
+        selection &= table.leaves
+
+    box_metas = table.select(selection, sort_by=sort_by)
 
     if tree_view:
         from rich.tree import Tree as RichTree
         from rich.console import Console
 
-        filtered_meta = BoxyardMeta(box_metas=box_metas)
         filtered_ids = {bm.box_id for bm in box_metas}
+        children_by_parent = _get_children_by_parent(box_metas)
 
         def _label(bm):
             groups_str = f" [groups: {', '.join(bm.groups)}]" if bm.groups else ""
             return f"{bm.name} ({bm.box_id}){groups_str}"
 
         def _add_children(rich_node, parent_id, shown):
-            children = [bm for bm in box_metas if parent_id in bm.parents]
-            children.sort(key=lambda x: x.index_name)
+            children = children_by_parent.get(parent_id, [])
             for child in children:
                 if child.box_id not in shown:
                     shown.add(child.box_id)
@@ -1915,7 +2120,7 @@ def cli_path(
         False,
         "--pick-first",
         "-1",
-        help="Pick the first box if multiple boxes match the name.",
+        help="Pick the best match if multiple boxes match the name.",
     ),
     name_match_mode: NameMatchMode | None = Option(
         None,
@@ -2038,6 +2243,108 @@ def cli_path(
         typer.echo(f"Invalid path option: {path_option}")
         raise typer.Exit(code=1)
 
+# %% [markdown]
+# # `daemon`
+
+# %%
+#|export
+@app.command(name="daemon")
+def cli_daemon(
+    stop: bool = Option(False, "--stop", help="Stop the running daemon."),
+    status: bool = Option(False, "--status", help="Show whether the daemon is running."),
+):
+    """
+    Run the boxyard daemon in the foreground.
+
+    While the daemon runs, the `path`, `which` and `list` commands are answered by it, which
+    avoids the startup cost of the CLI. Set `BOXYARD_NO_DAEMON=1` to bypass it.
+    """
+    from boxyard.config import get_config
+    from boxyard._daemon import run_daemon, DaemonAlreadyRunningError
+    from boxyard._daemon_client import send_daemon_request
+
+    config = get_config(app_state["config_path"])
+    socket_path = config.daemon_socket_path
+
+    if stop or status:
+        response = send_daemon_request(socket_path, {"type": "stop" if stop else "ping"})
+        if response is None:
+            typer.echo("The daemon is not running.")
+            raise typer.Exit(code=1)
+        if stop:
+            typer.echo(f"Stopped the daemon (pid {response['pid']}).")
+        else:
+            typer.echo(f"The daemon is running (pid {response['pid']}) at '{socket_path}'.")
+        return
+
+    typer.echo(f"Running the daemon at '{socket_path}'. Press Ctrl-C to stop it.")
+    try:
+        run_daemon(socket_path, config_path=app_state["config_path"])
+    except DaemonAlreadyRunningError as e:
+        typer.echo(f"Error: {e}", err=True)
+        raise typer.Exit(code=1)
+
+# %% [markdown]
+# # `gc-backups`
+
+# %%
+#|export
+@app.command(name="gc-backups")
+def cli_gc_backups(
+    storage_locations: list[str] | None = Option(
+        None,
+        "--storage-location",
+        "-s",
+        help="The storage location to collect the backups of. If not provided, all storage locations are collected.",
+    ),
+    include_local: bool = Option(True, "--local/--no-local", help="Collect the local sync backups."),
+    dry_run: bool = Option(False, "--dry-run", help="Only show what would be deleted."),
+):
+    """
+    Delete the sync backups expired by the `sync_backup_retention` policy of the config.
+
+    Suitable for running from cron. The daemon can also run it periodically (see
+    `sync_backup_retention.daemon_interval_hours`).
+    """
+    import asyncio
+    from rich.filesize import decimal as format_size
+    from boxyard.config import get_config
+    from boxyard._backup_gc import gc_sync_backups
+
+    config = get_config(app_state["config_path"])
+    if storage_locations is not None and any(
+        sl not in config.storage_locations for sl in storage_locations
+    ):
+        typer.echo(f"Invalid storage location: {storage_locations}", err=True)
+        raise typer.Exit(code=1)
+
+    results = asyncio.run(
+        gc_sync_backups(
+            config,
+            storage_locations=storage_locations,
+            include_local=include_local,
+            dry_run=dry_run,
+        )
+    )
+    failed = False
+    for result in results:
+        if dry_run:
+            size = sum(backup.size for backup in result.expired)
+            typer.echo(
+                f"{result.backups_root}: would delete {len(result.expired)} of {result.num_backups} backups ({format_size(size)})."
+            )
+            for backup in result.expired:
+                typer.echo(f"    {backup.name}")
+        else:
+            typer.echo(
+                f"{result.backups_root}: deleted {len(result.deleted)} of {result.num_backups} backups ({format_size(result.deleted_size)})."
+            )
+            if len(result.deleted) < len(result.expired):
+                typer.echo(f"{result.backups_root}: failed to delete {len(result.expired) - len(result.deleted)} backups.", err=True)
+                failed = True
+    if failed:
+        raise typer.Exit(code=1)
+
 # %% [markdown]
 # # `create-user-symlinks`
 
@@ -2424,12 +2731,7 @@ def cli_which(
     from boxyard.config import get_config
 
     config = get_config(app_state["config_path"])
-    target_path = path if path is not None else Path.cwd()
-
-    box_index_name = get_box_index_name_from_sub_path(
-        config=config,
-        sub_path=target_path,
-    )
+    box_index_name = get_box_index_name_from_sub_path(config=config, sub_path=path)
 
     if box_index_name is None:
         typer.echo("Not inside a boxyard box.", err=True)
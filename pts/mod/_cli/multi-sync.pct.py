@@ -22,13 +22,18 @@ from nblite import nbl_export, show_doc; nbl_export();
 import typer
 from typer import Option
 
-from boxyard._enums import SyncSetting, SyncDirection, BoxPart
+from boxyard._enums import SyncSetting, SyncDirection, BoxPart, SyncSchedulingPolicy
 from boxyard._cli.app import app, app_state
 
 # %%
 #|export
 from boxyard._models import get_boxyard_meta
 from boxyard.cmds import sync_box
+from boxyard._utils.sync_progress import SyncProgressTracker
+from boxyard._utils.locking import auto_cleanup_stale_locks, get_lock_wait_stats
+from boxyard._utils.push_lease import PushLeaseHeld
+from boxyard._utils.backup_purge_queue import BackupPurgeQueue
+from rich.filesize import decimal as format_size
 from rich.live import Live
 from rich.text import Text
 from rich.console import Console
@@ -49,7 +54,7 @@ def cli_multi_sync(
         None,
         "--max-concurrent",
         "-m",
-        help="The maximum number of concurrent rclone operations. If not provided, the default specified in the config will be used.",
+        help="The maximum number of boxes to sync concurrently. If not provided, the rclone operations of each storage location are limited adaptively, starting at the `max_concurrent_rclone_ops` specified in the config.",
     ),
     sync_direction: SyncDirection | None = Option(
         None,
@@ -65,8 +70,23 @@ def cli_multi_sync(
         "-c",
         help="The parts of the box to sync. If not provided, all parts will be synced. By default, all parts are synced.",
     ),
+    schedule: SyncSchedulingPolicy = Option(
+        SyncSchedulingPolicy.FIFO,
+        "--schedule",
+        help="The order in which to sync the boxes of each storage location. 'shortest-first' and 'largest-first' order by the size of the box as of its last sync, and 'recently-modified-first' by its last modification.",
+    ),
     sync_recently_modified_first: bool = Option(
-        False, help="Sync boxes that have been recently modified first."
+        False,
+        help="Sync boxes that have been recently modified first. Shorthand for `--schedule recently-modified-first`.",
+    ),
+    group_priority: list[str] | None = Option(
+        None,
+        "--group-priority",
+        "-g",
+        help="Sync the boxes of these groups first, in the order given. Can be specified multiple times.",
+    ),
+    parents_first: bool = Option(
+        False, help="Only start syncing a box once all of its parents being synced have finished."
     ),
     refresh_user_symlinks: bool = Option(True, help="Refresh the user symlinks."),
     show_progress: bool = Option(True, help="Show the progress of the sync."),
@@ -109,7 +129,10 @@ max_concurrent_rclone_ops = None
 sync_direction = None
 sync_setting = SyncSetting.CAREFUL
 sync_choices = None
+schedule = SyncSchedulingPolicy.FIFO
 sync_recently_modified_first = True
+group_priority = None
+parents_first = False
 refresh_user_symlinks = True
 show_progress = True
 no_print_skipped = True
@@ -135,6 +158,9 @@ if box_index_names is not None and storage_locations is not None:
 
 config = get_config(app_state["config_path"])
 
+# Remove the locks left behind by crashed syncs (this only looks at the locks that are held)
+auto_cleanup_stale_locks(config.boxyard_data_path)
+
 if storage_locations is None and box_index_names is None:
     storage_locations = list(config.storage_locations.keys())
 if storage_locations is not None and any(
@@ -143,8 +169,6 @@ if storage_locations is not None and any(
     typer.echo(f"Invalid storage location: {storage_locations}")
     raise typer.Exit(code=1)
 
-if max_concurrent_rclone_ops is None:
-    max_concurrent_rclone_ops = config.max_concurrent_rclone_ops
 
 if sync_choices is None:
     sync_choices = [part for part in BoxPart]
@@ -168,6 +192,26 @@ else:
         for box_index_name in box_index_names
     ]
 
+# The rclone operations of each storage location are limited by its adaptive limiter (see
+# `_utils.concurrency`), which grows from `Config.get_initial_concurrent_rclone_ops` up to
+# `Config.get_max_concurrent_rclone_ops`. By default enough boxes are kept in flight for every
+# limiter to be able to reach its maximum.
+from boxyard._utils.concurrency import get_storage_location_limiter, get_storage_location_limiters
+
+storage_location_limiters = {
+    sl_name: get_storage_location_limiter(
+        sl_name,
+        initial_limit=config.get_initial_concurrent_rclone_ops(sl_name),
+        max_limit=config.get_max_concurrent_rclone_ops(sl_name),
+    )
+    for sl_name in {box_meta.storage_location for box_meta in box_metas}
+}
+
+if max_concurrent_rclone_ops is None:
+    max_concurrent_rclone_ops = max(
+        1, sum(limiter.max_limit for limiter in storage_location_limiters.values())
+    )
+
 # %% [markdown]
 # Define syncing task
 
@@ -183,6 +227,8 @@ async def _task(num, box_meta):
             sync_setting=sync_setting,
             sync_choices=sync_choices,
             verbose=False,
+            progress_callback=progress_tracker.update if show_progress else None,
+            defer_backup_purge=True,
         )
         sync_stats[box_meta.index_name] = (
             num,
@@ -199,11 +245,22 @@ async def _task(num, box_meta):
             datetime.now(),
             None,
         )
+    except PushLeaseHeld as e:
+        # Another machine is pushing the box
+        sync_stats[box_meta.index_name] = (num, "Busy", str(e), datetime.now(), None)
     except Exception as e:
         sync_stats[box_meta.index_name] = (num, "Error", str(e), datetime.now(), None)
 
+
+def _on_finished(box_meta):
+    # Only the boxes in flight are kept around, so that memory use does not grow with the
+    # number of synced boxes
+    progress_tracker.finish(box_meta.index_name)
     if show_progress:
         print_finished(box_meta.index_name)
+    _, sync_stat, _, _, _ = sync_stats.pop(box_meta.index_name)
+    sync_stat_counts[sync_stat] += 1
+    progress_tracker.discard(box_meta.index_name)
 
 # %% [markdown]
 # Set up the progress printing (shown if `show_progress == True`)
@@ -212,12 +269,31 @@ async def _task(num, box_meta):
 
 #|export
 import asyncio
+from collections import Counter
 
-sync_stats = {}
+sync_stats = {}  # The boxes being synced
+sync_stat_counts = Counter()  # The number of finished boxes per sync stat
+progress_tracker = SyncProgressTracker()
 
 finish_monitoring_event = asyncio.Event()
 
 
+def format_progress(summary) -> str:
+    parts = []
+    if summary.box_part is not None:
+        parts.append(f"[bold]{summary.box_part.value}:[/bold]")
+    parts.append(
+        f"{format_size(summary.bytes)}/{format_size(summary.total_bytes)},"
+        f" {summary.transfers}/{summary.total_transfers} files,"
+        f" {format_size(int(summary.speed))}/s"
+    )
+    if summary.eta is not None:
+        parts.append(f"ETA {int(summary.eta)}s")
+    if summary.stalled:
+        parts.append("[red]Stalled[/red]")
+    return " ".join(parts)
+
+
 def get_status_lines(box_index_name):
     num, sync_stat, e, timestamp, sync_results = sync_stats[box_index_name]
     lines = []
@@ -228,12 +304,14 @@ def get_status_lines(box_index_name):
         "Syncing": "yellow",
         "Success": "green",
         "Interrupted": "magenta",
+        "Busy": "cyan",
         "Error": "red",
     }.get(sync_stat, "")
 
     name_color = {
         "Success": "green",
         "Interrupted": "magenta",
+        "Busy": "cyan",
         "Error": "red",
     }.get(sync_stat, "")
 
@@ -263,11 +341,13 @@ def get_status_lines(box_index_name):
         lines.append(f"{indent}[red]{e}[/red]")
     elif sync_stat == "Success":
         line = []
-        for box_part, synced in zip(sync_choices, syncs_happened):
+        for box_part, synced in zip(sync_choices, syncs_happened, strict=True):
             line.append(
                 f"[bold]{box_part.value}:[/bold] {'[green]Synced[/green]' if synced else '[blue]Skipped[/blue]'}"
             )
         lines.append(indent + f",{indent}".join(line))
+    elif progress_tracker.get_box_summary(box_index_name) is not None:
+        lines.append(indent + format_progress(progress_tracker.get_box_summary(box_index_name)))
     else:
         lines.append(f"{indent}[yellow]Results pending...[/yellow]")
 
@@ -287,6 +367,36 @@ def get_sync_stat_board(finished: bool):
         if sync_stat != "Syncing...":
             continue
         lines.extend(get_status_lines(box_index_name))
+    if finished and sync_stat_counts:
+        lines.append(
+            "[bold]Boxes:[/bold] "
+            + ", ".join(f"{count} {sync_stat}" for sync_stat, count in sync_stat_counts.items())
+        )
+    if progress_tracker.has_progress:
+        lines.append(f"[bold]Total:[/bold] {format_progress(progress_tracker.get_aggregate_summary())}")
+    if finished:
+        lock_wait_stats = get_lock_wait_stats().values()
+        num_contended = sum(stats.num_contended for stats in lock_wait_stats)
+        if num_contended:
+            lines.append(
+                f"[bold]Lock waits:[/bold] {num_contended} contended, "
+                f"{sum(stats.total_wait for stats in lock_wait_stats):.1f}s in total, "
+                f"{max(stats.max_wait for stats in lock_wait_stats):.1f}s at most"
+            )
+    if not finished and get_storage_location_limiters():
+        lines.append(
+            "[bold]Concurrency limits:[/bold] "
+            + ", ".join(
+                f"{name} {limiter.in_flight}/{limiter.limit}"
+                + (f" [red]({limiter.num_throttled} throttled)[/red]" if limiter.num_throttled else "")
+                + (
+                    f" [yellow]({limiter.num_latency_backoffs} slowdowns)[/yellow]"
+                    if limiter.num_latency_backoffs
+                    else ""
+                )
+                for name, limiter in get_storage_location_limiters().items()
+            )
+        )
     return "\n".join(lines).strip()
 
 
@@ -322,21 +432,63 @@ async def _progress_monitor_task():
 
 # %%
 #|export
-_box_metas = box_metas
 if sync_recently_modified_first:
-    from boxyard._utils import check_last_time_modified
+    schedule = SyncSchedulingPolicy.RECENTLY_MODIFIED_FIRST
+
+# Priorities are based on the cached box stats, so that no box tree has to be walked here.
+# They are computed as the throttler pulls the boxes.
+from boxyard._box_stats import get_box_sync_priority
+
+# Share the slots fairly between the storage locations. A storage location never has more
+# boxes in flight than the current limit of its adaptive limiter. The boxes are pulled lazily
+# by the throttler, so they are interleaved by storage location (parents before their
+# children if `parents_first`) to give every storage location boxes within its lookahead.
+from boxyard._fast import get_topological_ranks
+from boxyard._utils.scheduling import stream_round_robin_throttler
+
+box_depths = [0] * len(box_metas)
+if parents_first:
+    box_rows = {box_meta.box_id: i for i, box_meta in enumerate(box_metas)}
+    box_parent_rows = [
+        [box_rows[p] for p in box_meta.parents if p in box_rows] for box_meta in box_metas
+    ]
+    box_ranks = get_topological_ranks(box_parent_rows)
+    if box_ranks is not None:
+        for i in sorted(range(len(box_metas)), key=box_ranks.__getitem__):
+            box_depths[i] = max((box_depths[p] + 1 for p in box_parent_rows[i]), default=0)
+
+box_group_counts: dict[tuple[int, str], int] = {}
+box_order_keys = []
+for i, box_meta in enumerate(box_metas):
+    group = (box_depths[i], box_meta.storage_location)
+    box_order_keys.append((box_depths[i], box_group_counts.get(group, 0)))
+    box_group_counts[group] = box_group_counts.get(group, 0) + 1
+
+sync_stream = stream_round_robin_throttler(
+    (
+        (i, box_metas[i])
+        for i in sorted(range(len(box_metas)), key=box_order_keys.__getitem__)
+    ),
+    get_key=lambda item: item[1].storage_location,
+    worker=lambda item: _task(*item),
+    max_concurrency=max_concurrent_rclone_ops,
+    get_key_capacity=lambda sl_name: storage_location_limiters[sl_name].limit,
+    get_priority=lambda item: get_box_sync_priority(config, item[1], schedule, group_priority),
+    get_id=lambda item: item[1].box_id,
+    get_dependencies=(lambda item: item[1].parents) if parents_first else None,
+)
 
-    def get_last_modified(box_meta):
-        last_modified = check_last_time_modified(box_meta.get_local_path(config))
-        return last_modified.timestamp() if last_modified else 0
 
-    _box_metas = sorted(_box_metas, key=get_last_modified, reverse=True)
+async def _sync_all():
+    async for (_, box_meta), _ in sync_stream:
+        _on_finished(box_meta)
+    # Purge the backups of all synced boxes at once, with one delete per storage location
+    backup_purge_queue = BackupPurgeQueue(config.sync_backup_purge_queue_path)
+    if backup_purge_queue.has_entries():
+        await backup_purge_queue.drain(config.rclone_config_path)
 
-from boxyard._utils import async_throttler
-sync_task = async_throttler(
-    [_task(num, box_meta) for num, box_meta in enumerate(_box_metas)],
-    max_concurrency=max_concurrent_rclone_ops,
-)
+
+sync_task = _sync_all()
 
 
 async def _runner():
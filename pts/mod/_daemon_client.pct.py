@@ -0,0 +1,184 @@
+# ---
+# jupyter:
+#   kernelspec:
+#     display_name: Python 3
+#     language: python
+#     name: python3
+# ---
+
+# %% [markdown]
+# # _daemon_client
+#
+# The entry point of the `boxyard` command. If a boxyard daemon (see `_daemon`) is running,
+# commands that it can answer are forwarded to it. Otherwise (or if the daemon does not
+# answer in time, or the command needs to prompt the user), simple invocations of the
+# read-only commands are run through the minimal-import code path of `_fast_cli`, and all
+# other commands are run by the regular CLI.
+#
+# No `from boxyard import ...` allowed — only stdlib — so that forwarding a command does not
+# pay for importing the CLI.
+
+# %%
+#|default_exp _daemon_client
+
+# %%
+#|hide
+from nblite import nbl_export, show_doc; nbl_export();
+import boxyard._daemon_client as this_module
+
+# %%
+#|export
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+
+_DEFAULT_CONFIG_PATH = Path("~/.config/boxyard/config.toml")
+DAEMON_SOCKET_FILENAME = "boxyard_daemon.sock"
+
+# Commands that only read the yard, and that the daemon answers. The daemon runs one command
+# at a time, so commands that wait on rclone (e.g. `box-status`) are not forwarded, as they
+# would hold up the quick ones.
+FORWARDED_COMMANDS = frozenset({"path", "which", "list"})
+
+# Set to disable forwarding commands to the daemon
+NO_DAEMON_ENV_VAR = "BOXYARD_NO_DAEMON"
+
+# If the daemon does not answer a forwarded command within this many seconds (e.g. because it
+# is busy with another command), the command is run locally instead
+DAEMON_REQUEST_TIMEOUT = 10.0
+
+# Set to disable the minimal-import code path of `_fast_cli`
+NO_FAST_PATH_ENV_VAR = "BOXYARD_NO_FAST_PATH"
+
+# %% [markdown]
+# # Parsing the command line
+
+# %%
+#|export
+def split_cli_args(argv: list[str]) -> tuple[Path | None, str | None, list[str]]:
+    """
+    Split the arguments of `boxyard` into the value of the global `--config` option, the name
+    of the command, and the arguments of the command.
+    """
+    config_path = None
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "--config" and i + 1 < len(argv):
+            config_path = Path(argv[i + 1])
+            i += 2
+        elif arg.startswith("--config="):
+            config_path = Path(arg.split("=", 1)[1])
+            i += 1
+        elif arg.startswith("-"):
+            i += 1
+        else:
+            return config_path, arg, argv[i + 1:]
+    return config_path, None, []
+
+
+def get_daemon_socket_path(config_path: str | Path | None = None) -> Path:
+    """The socket of the daemon serving the given config (next to the config file)."""
+    config_path = Path(config_path or _DEFAULT_CONFIG_PATH).expanduser()
+    return config_path.parent / DAEMON_SOCKET_FILENAME
+
+
+def get_forwardable_request(argv: list[str], cwd: str) -> tuple[Path, dict] | None:
+    """
+    Get the socket path and request to forward `boxyard <argv>` to the daemon, or None if the
+    command should not be forwarded.
+    """
+    config_path, command_name, command_args = split_cli_args(argv)
+    if command_name not in FORWARDED_COMMANDS:
+        return None
+    # Interactive commands need the terminal
+    if any(
+        arg == "--interactive" or (arg.startswith("-") and not arg.startswith("--") and "I" in arg)
+        for arg in command_args
+    ):
+        return None
+    config_path = Path(config_path or _DEFAULT_CONFIG_PATH).expanduser()
+    if not config_path.is_absolute():
+        config_path = Path(cwd) / config_path
+    request = {
+        "type": "run",
+        "argv": ["--config", config_path.as_posix(), command_name, *command_args],
+        "cwd": cwd,
+    }
+    return get_daemon_socket_path(config_path), request
+
+# %%
+assert split_cli_args(["--config", "c.toml", "list", "-o", "json"]) == (
+    Path("c.toml"), "list", ["-o", "json"]
+)
+assert get_forwardable_request(["sync", "-n", "a"], "/tmp") is None
+assert get_forwardable_request(["path", "-I"], "/tmp") is None
+get_forwardable_request(["path", "-n", "a"], "/tmp")
+
+# %% [markdown]
+# # Talking to the daemon
+
+# %%
+#|hide
+show_doc(this_module.send_daemon_request)
+
+# %%
+#|export
+def send_daemon_request(socket_path: Path, request: dict, timeout: float | None = None) -> dict | None:
+    """
+    Send a request to the daemon listening at `socket_path`, and return its response.
+
+    Returns None if no daemon is listening.
+    """
+    socket_path = Path(socket_path)
+    if not socket_path.exists():
+        return None
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(socket_path.as_posix())
+        except (ConnectionRefusedError, FileNotFoundError):
+            return None
+        sock.sendall((json.dumps(request) + "\n").encode())
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+# %% [markdown]
+# # Entry point
+
+# %%
+#|export
+def main() -> None:
+    """Run `boxyard`, through the daemon or the fast path if possible."""
+    if not os.environ.get(NO_DAEMON_ENV_VAR):
+        forwardable = get_forwardable_request(sys.argv[1:], os.getcwd())
+        if forwardable is not None:
+            socket_path, request = forwardable
+            try:
+                response = send_daemon_request(socket_path, request, timeout=DAEMON_REQUEST_TIMEOUT)
+            except (OSError, ValueError):  # Including timeouts
+                response = None
+            # Commands that need to prompt (`{"needs_terminal": true}`) are run locally
+            if response is not None and "exit_code" in response:
+                sys.stdout.write(response["stdout"])
+                sys.stderr.write(response["stderr"])
+                sys.exit(response["exit_code"])
+
+    if not os.environ.get(NO_FAST_PATH_ENV_VAR):
+        from boxyard._fast_cli import run_fast_command
+
+        result = run_fast_command(sys.argv[1:])
+        if result is not None:
+            exit_code, stdout, stderr = result
+            sys.stdout.write(stdout)
+            sys.stderr.write(stderr)
+            sys.exit(exit_code)
+
+    from boxyard._cli import app
+
+    app()
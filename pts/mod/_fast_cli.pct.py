@@ -0,0 +1,378 @@
+# ---
+# jupyter:
+#   kernelspec:
+#     display_name: Python 3
+#     language: python
+#     name: python3
+# ---
+
+# %% [markdown]
+# # _fast_cli
+#
+# A minimal-import code path for the read-only commands that are called from shell prompts
+# and `cd` helpers (`which`, `path`, `list` and `tree -o json`).
+#
+# The regular CLI imports typer, pydantic (through the config and models) and often rich,
+# which dominates the run time of these commands. Here, the config and `boxyard_meta.json`
+# are read with plain `toml`/`json` and queried through `BoxyardFast`, and the output is
+# identical to the regular CLI's.
+#
+# Only simple invocations are handled. Anything else (unknown options, group filters,
+# interactive selection, a missing meta file, ...) returns None, and the caller falls back to
+# the regular CLI. Unlike the regular CLI, the config is not validated.
+#
+# No `from boxyard import ...` allowed, except for `boxyard._fast` and `boxyard._daemon_client`.
+
+# %%
+#|default_exp _fast_cli
+
+# %%
+#|hide
+from nblite import nbl_export, show_doc; nbl_export();
+import boxyard._fast_cli as this_module
+
+# %%
+#|export
+import json
+from functools import cached_property
+from pathlib import Path
+
+from boxyard._daemon_client import split_cli_args, _DEFAULT_CONFIG_PATH
+from boxyard._fast import BoxyardFast
+
+# Copies of the constants in `const`, which imports pydantic. The tests check that they match.
+_SYNC_RECORDS_REL_PATH = "sync_records"
+_BOX_METAFILE_REL_PATH = "boxmeta.toml"
+_BOX_CONF_REL_PATH = "conf"
+
+# %% [markdown]
+# # Parsing options
+
+# %%
+#|export
+_MULTIPLE = object()
+_VALUE = object()
+
+
+def _parse_options(args: list[str], spec: dict[str, tuple[str, object]]) -> dict | None:
+    """
+    Parse the options of a command. `spec` maps every option string to its destination and
+    kind: `_VALUE` for options that take a value, `_MULTIPLE` for options that can be given
+    several times, or the value to store for flags.
+
+    Returns None if the arguments contain anything not in `spec`.
+    """
+    options: dict = {}
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        value = None
+        if arg.startswith("--") and "=" in arg:
+            arg, value = arg.split("=", 1)
+        if arg not in spec:
+            return None
+        dest, kind = spec[arg]
+        if kind is _VALUE or kind is _MULTIPLE:
+            if value is None:
+                if i + 1 >= len(args):
+                    return None
+                value = args[i + 1]
+                i += 1
+            if kind is _MULTIPLE:
+                options.setdefault(dest, []).append(value)
+            else:
+                options[dest] = value
+        elif value is not None:
+            return None
+        else:
+            options[dest] = kind
+        i += 1
+    return options
+
+# %%
+assert _parse_options(["-j", "--path=/a"], {"-j": ("json", True), "--path": ("path", _VALUE)}) == {
+    "json": True, "path": "/a"
+}
+assert _parse_options(["-s", "a", "-s", "b"], {"-s": ("sl", _MULTIPLE)}) == {"sl": ["a", "b"]}
+assert _parse_options(["--help"], {}) is None
+
+# %% [markdown]
+# # Loading the yard
+
+# %%
+#|export
+class _FastYard:
+    """
+    The parts of the config and meta that the fast commands need. The meta is only read when
+    a command needs it, and `fast` uses the compact snapshot of the meta if it is up to date.
+    """
+
+    def __init__(self, config_path: Path):
+        import toml
+
+        config = toml.load(config_path)
+        self.boxyard_data_path = Path(config["boxyard_data_path"]).expanduser()
+        self.user_boxes_path = Path(config["user_boxes_path"]).expanduser()
+        self.storage_locations = list(config["storage_locations"])
+        self.meta_path = self.boxyard_data_path / "boxyard_meta.json"
+
+    @cached_property
+    def fast(self) -> BoxyardFast:
+        return BoxyardFast.from_file(self.meta_path, user_boxes_path=self.user_boxes_path.as_posix())
+
+    @cached_property
+    def data(self) -> dict:
+        return json.loads(self.meta_path.read_text())
+
+    @cached_property
+    def box_metas(self) -> list[dict]:
+        box_metas = []
+        for bm in self.data["box_metas"]:
+            box_id = f"{bm['creation_timestamp_utc']}_{bm['box_subid']}"
+            box_metas.append({**bm, "_box_id": box_id, "_index_name": f"{box_id}__{bm['name']}"})
+        return box_metas
+
+    @cached_property
+    def by_index_name(self) -> dict[str, dict]:
+        return {bm["_index_name"]: bm for bm in self.box_metas}
+
+    def get_data_path(self, index_name: str) -> Path:
+        return self.user_boxes_path / index_name
+
+    def is_included(self, index_name: str) -> bool:
+        return self.get_data_path(index_name).is_dir()
+
+    def get_local_path(self, bm: dict) -> Path:
+        return self.boxyard_data_path / "local_store" / bm["storage_location"] / bm["_index_name"]
+
+
+# Errors reading the config or meta, on which the regular CLI is used instead
+_LOAD_ERRORS = (OSError, ValueError, KeyError, TypeError)
+
+
+def _load_yard(config_path: Path | None) -> "_FastYard | None":
+    config_path = Path(config_path or _DEFAULT_CONFIG_PATH).expanduser()
+    try:
+        return _FastYard(config_path)
+    except _LOAD_ERRORS:
+        return None
+
+# %% [markdown]
+# # Commands
+#
+# Every command returns `(exit_code, stdout, stderr)`, or None to fall back to the regular
+# CLI. Nothing is written before a command has decided that it can handle the invocation.
+
+# %%
+#|export
+def _fast_which(yard: _FastYard, options: dict):
+    box_index_name = yard.fast.index_name_at(options.get("path"))
+    if box_index_name is None:
+        return 1, "", "Not inside a boxyard box.\n"
+
+    if options.get("index_name_only"):
+        return 0, f"{box_index_name}\n", ""
+
+    box = yard.fast.get_box(box_index_name)
+    if box is None:
+        return 1, "", f"Box directory found ({box_index_name}) but no matching metadata.\n"
+
+    info = {
+        "name": box["name"],
+        "box_id": box["box_id"],
+        "index_name": box["index_name"],
+        "storage_location": box["storage_location"],
+        "groups": box["groups"],
+        "local_data_path": yard.get_data_path(box_index_name).as_posix(),
+        "included": yard.is_included(box_index_name),
+    }
+    if options.get("json"):
+        return 0, json.dumps(info, indent=2) + "\n", ""
+    lines = [
+        f"name: {info['name']}",
+        f"box_id: {info['box_id']}",
+        f"index_name: {info['index_name']}",
+        f"storage_location: {info['storage_location']}",
+        f"groups: {', '.join(info['groups']) if info['groups'] else '(none)'}",
+        f"local_data_path: {info['local_data_path']}",
+        f"included: {info['included']}",
+    ]
+    return 0, "".join(f"{line}\n" for line in lines), ""
+
+
+_WHICH_OPTIONS = {
+    "--path": ("path", _VALUE), "-p": ("path", _VALUE),
+    "--json": ("json", True), "-j": ("json", True),
+    "--index-name": ("index_name_only", True), "-i": ("index_name_only", True),
+}
+
+# %%
+#|export
+def _fast_path(yard: _FastYard, options: dict):
+    path_option = options.get("path_option", "data")
+    if path_option not in _PATH_OPTIONS:
+        return None
+    name_match_mode = options.get("name_match_mode")
+    if name_match_mode not in (None, "exact", "contains", "subsequence"):
+        return None
+    selectors = [options.get(key) for key in ("box_index_name", "box_id", "box_name")]
+    if sum(selector is not None for selector in selectors) != 1:
+        return None  # Errors, and the interactive search, are left to the regular CLI
+    if name_match_mode is not None and options.get("box_name") is None:
+        return None
+    if options.get("pick_first") and options.get("box_name") is None:
+        return None
+
+    only_included = options.get("only_included", True)
+    box_index_name = options.get("box_index_name")
+    if options.get("box_id") is not None:
+        box_metas = yard.box_metas
+        if only_included:
+            box_metas = [bm for bm in box_metas if yard.is_included(bm["_index_name"])]
+        matches = [bm for bm in box_metas if bm["_box_id"] == options["box_id"]]
+        if not matches:
+            return 1, "", f"Box with id `{options['box_id']}` not found.\n"
+        box_index_name = matches[-1]["_index_name"]
+    elif options.get("box_name") is not None:
+        # Best match first, using the name search index of the meta snapshot
+        matches = yard.fast.search_names(
+            options["box_name"],
+            mode=name_match_mode or "contains",
+            match_case=options.get("name_match_case", False),
+        )
+        if only_included:
+            matches = [index_name for index_name in matches if yard.is_included(index_name)]
+        if not matches:
+            return 1, "", "Box not found.\n"
+        if len(matches) > 1 and not options.get("pick_first"):
+            return None  # Needs fzf
+        box_index_name = matches[0]
+
+    bm = yard.by_index_name.get(box_index_name)
+    if bm is None:
+        return 1, f"Box with index name `{box_index_name}` not found.\n", ""
+
+    if path_option == "data":
+        path = yard.get_data_path(box_index_name)
+    elif path_option == "meta":
+        path = yard.get_local_path(bm) / _BOX_METAFILE_REL_PATH
+    elif path_option == "conf":
+        path = yard.get_local_path(bm) / _BOX_CONF_REL_PATH
+    elif path_option == "root":
+        path = yard.get_local_path(bm)
+    else:
+        box_part = path_option.removeprefix("sync-record-")
+        path = yard.boxyard_data_path / _SYNC_RECORDS_REL_PATH / box_index_name / f"{box_part}.rec"
+    return 0, f"{path.as_posix()}\n", ""
+
+
+_PATH_OPTIONS = {
+    "data", "meta", "conf", "root", "sync-record-data", "sync-record-meta", "sync-record-conf"
+}
+
+_PATH_CLI_OPTIONS = {
+    "--box": ("box_index_name", _VALUE), "-r": ("box_index_name", _VALUE),
+    "--box-id": ("box_id", _VALUE), "-i": ("box_id", _VALUE),
+    "--box-name": ("box_name", _VALUE), "-n": ("box_name", _VALUE),
+    "--pick-first": ("pick_first", True), "-1": ("pick_first", True),
+    "--name-match-mode": ("name_match_mode", _VALUE), "-m": ("name_match_mode", _VALUE),
+    "--name-match-case": ("name_match_case", True), "-c": ("name_match_case", True),
+    "--path-option": ("path_option", _VALUE), "-p": ("path_option", _VALUE),
+    "--only-included": ("only_included", True), "-o": ("only_included", True),
+}
+
+# %%
+#|export
+def _fast_list(yard: _FastYard, options: dict):
+    output_format = options.get("output_format", "text")
+    if output_format not in ("text", "json"):
+        return None
+    storage_locations = options.get("storage_locations", yard.storage_locations)
+    if any(sl not in yard.storage_locations for sl in storage_locations):
+        return 1, f"Invalid storage location: {storage_locations}\n", ""
+
+    storage_locations = set(storage_locations)
+    box_metas = [bm for bm in yard.data["box_metas"] if bm["storage_location"] in storage_locations]
+    if output_format == "json":
+        return 0, json.dumps([{**bm, "parents": bm.get("parents", [])} for bm in box_metas], indent=2) + "\n", ""
+    return 0, "".join(
+        f"{bm['creation_timestamp_utc']}_{bm['box_subid']}__{bm['name']}\n" for bm in box_metas
+    ), ""
+
+
+_LIST_OPTIONS = {
+    "--storage-location": ("storage_locations", _MULTIPLE),
+    "-s": ("storage_locations", _MULTIPLE),
+    "--output-format": ("output_format", _VALUE), "-o": ("output_format", _VALUE),
+}
+
+# %%
+#|export
+def _fast_tree(yard: _FastYard, options: dict):
+    # The text tree is rendered with rich, so only the JSON output is handled here
+    if options.get("output_format") != "json":
+        return None
+    return 0, json.dumps(yard.fast.get_dag_nested(), indent=2) + "\n", ""
+
+
+_TREE_OPTIONS = {
+    "--output-format": ("output_format", _VALUE), "-o": ("output_format", _VALUE),
+}
+
+# %% [markdown]
+# # Running commands
+
+# %%
+#|hide
+show_doc(this_module.run_fast_command)
+
+# %%
+#|export
+_FAST_COMMANDS = {
+    "which": (_fast_which, _WHICH_OPTIONS),
+    "path": (_fast_path, _PATH_CLI_OPTIONS),
+    "list": (_fast_list, _LIST_OPTIONS),
+    "tree": (_fast_tree, _TREE_OPTIONS),
+}
+
+
+def run_fast_command(argv: list[str]) -> tuple[int, str, str] | None:
+    """
+    Run `boxyard <argv>` through the fast path, and return the exit code, stdout and stderr.
+
+    Returns None if the invocation is not handled by the fast path.
+    """
+    config_path, command_name, command_args = split_cli_args(argv)
+    if command_name not in _FAST_COMMANDS:
+        return None
+    # Global options other than --config are left to the regular CLI
+    global_args = argv[:len(argv) - len(command_args) - 1]
+    if any(arg.startswith("-") and not arg.startswith("--config") for arg in global_args):
+        return None
+    run_command, option_spec = _FAST_COMMANDS[command_name]
+    options = _parse_options(command_args, option_spec)
+    if options is None:
+        return None
+    yard = _load_yard(config_path)
+    if yard is None:
+        return None
+    try:
+        return run_command(yard, options)
+    except _LOAD_ERRORS:
+        return None
+
+# %%
+from tests.integration.conftest import create_boxyards
+from boxyard.cmds import new_box
+
+remote_name, remote_rclone_path, config, config_path, data_path = create_boxyards()
+box_index_name = new_box(config_path=config_path, box_name="test_box", storage_location=remote_name)
+
+# %%
+run_fast_command(["--config", config_path.as_posix(), "list"])
+
+# %%
+run_fast_command(["--config", config_path.as_posix(), "path", "-n", "test"])
+
+# %%
+run_fast_command(["--config", config_path.as_posix(), "which", "-p", (config.user_boxes_path / box_index_name).as_posix()])
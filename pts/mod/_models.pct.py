@@ -18,10 +18,11 @@ from nblite import nbl_export, show_doc; nbl_export();
 
 # %%
 #|export
-from pydantic import Field, model_validator
+from pydantic import Field, PrivateAttr, model_validator
 from pathlib import Path
 import toml
 from datetime import datetime, timezone
+from functools import cached_property
 import random
 from ulid import ULID
 from enum import Enum
@@ -35,6 +36,8 @@ from boxyard.config import BoxGroupConfig, BoxTimestampFormat
 # %%
 #|export
 from boxyard._enums import BoxPart
+from boxyard._fast import NameSearchIndex, ReachabilityIndex
+from boxyard._box_table import BoxTable, get_timestamp_key
 
 # %%
 #|exporti
@@ -348,44 +351,65 @@ assert box_meta.model_dump_json() == _box_meta.model_dump_json()
 #|export
 class BoxyardMeta(const.StrictModel):
     box_metas: list[BoxMeta]
+    # (mtime_ns, size) of the `boxyard_meta.json` this meta was loaded from, if any
+    _source_stat: tuple[int, int] | None = PrivateAttr(default=None)
 
-    @property
+    @cached_property
     def by_storage_location(self) -> dict[str, dict[str, BoxMeta]]:
-        if not hasattr(self, "__by_storage_location"):
-            storage_location_names = set(rm.storage_location for rm in self.box_metas)
-            self.__by_storage_location = {
-                sl_name: {
-                    box_meta.index_name: box_meta
-                    for box_meta in self.box_metas
-                    if box_meta.storage_location == sl_name
-                }
-                for sl_name in storage_location_names
+        storage_location_names = set(rm.storage_location for rm in self.box_metas)
+        return {
+            sl_name: {
+                box_meta.index_name: box_meta
+                for box_meta in self.box_metas
+                if box_meta.storage_location == sl_name
             }
-        return self.__by_storage_location
+            for sl_name in storage_location_names
+        }
 
-    @property
+    @cached_property
     def by_id(self) -> dict[str, BoxMeta]:
-        if not hasattr(self, "__by_id"):
-            self.__by_id = {
-                box_meta.box_id: box_meta for box_meta in self.box_metas
-            }
-        return self.__by_id
+        return {box_meta.box_id: box_meta for box_meta in self.box_metas}
 
     @property
     def by_box_id(self) -> dict[str, BoxMeta]:
         """Alias for by_id for clarity."""
         return self.by_id
 
-    @property
+    @cached_property
     def by_index_name(self) -> dict[str, BoxMeta]:
-        if not hasattr(self, "__by_index_name"):
-            self.__by_index_name = {
-                box_meta.index_name: box_meta for box_meta in self.box_metas
-            }
-        return self.__by_index_name
+        return {box_meta.index_name: box_meta for box_meta in self.box_metas}
+
+    @cached_property
+    def _children_index(self) -> dict[str, list[BoxMeta]]:
+        children_index: dict[str, list[BoxMeta]] = {}
+        for bm in self.box_metas:
+            for parent_id in dict.fromkeys(bm.parents):
+                children_index.setdefault(parent_id, []).append(bm)
+        return children_index
+
+    @cached_property
+    def reachability(self) -> ReachabilityIndex:
+        """Index for ancestor queries over the boxes, in the order of `box_metas`."""
+        rows = self._rows_by_id
+        parents = [[rows[p] for p in bm.parents if p in rows] for bm in self.box_metas]
+        return ReachabilityIndex(len(parents), parents.__getitem__)
+
+    @cached_property
+    def name_index(self) -> NameSearchIndex:
+        """Index for finding boxes by name, over the rows of `box_metas`."""
+        return NameSearchIndex.from_names([box_meta.name for box_meta in self.box_metas])
+
+    @cached_property
+    def table(self) -> BoxTable:
+        """Columnar view of the boxes, for filtering and sorting them (see `BoxTable`)."""
+        return BoxTable(self.box_metas)
+
+    @cached_property
+    def _rows_by_id(self) -> dict[str, int]:
+        return {box_meta.box_id: row for row, box_meta in enumerate(self.box_metas)}
 
     def children_of(self, box_id: str) -> list[BoxMeta]:
-        return [bm for bm in self.box_metas if box_id in bm.parents]
+        return list(self._children_index.get(box_id, []))
 
     def descendants_of(self, box_id: str) -> list[BoxMeta]:
         visited = set()
@@ -430,8 +454,11 @@ class BoxyardMeta(const.StrictModel):
     def would_create_cycle(self, child_id: str, proposed_parent_id: str) -> bool:
         if child_id == proposed_parent_id:
             return True
-        ancestors = self.ancestors_of(proposed_parent_id)
-        return any(a.box_id == child_id for a in ancestors)
+        child_row = self._rows_by_id.get(child_id)
+        parent_row = self._rows_by_id.get(proposed_parent_id)
+        if child_row is None or parent_row is None:
+            return False
+        return self.reachability.is_ancestor(parent_row, child_row)
 
 # %%
 #|export
@@ -443,6 +470,9 @@ def create_boxyard_meta(config: boxyard.config.Config) -> BoxyardMeta:
         for box_path in local_storage_location_path.glob("*"):
             if box_path.is_file():
                 continue
+            # A box that is still being created (its folder is made before its meta file is saved)
+            if not (box_path / const.BOX_METAFILE_REL_PATH).exists():
+                continue
             box_metas.append(
                 BoxMeta.load(config, storage_location_name, box_path.name)
             )
@@ -454,18 +484,48 @@ def refresh_boxyard_meta(
     config: boxyard.config.Config,
     _skip_lock: bool = False,
 ) -> BoxyardMeta:
+    """
+    Rebuild the meta from the box metas in the local store, and replace `boxyard_meta.json` (and
+    its snapshot) with it.
+
+    The box metas are read under the global lock taken shared, so that refreshes read
+    concurrently, but never while a box is being created. The lock is only taken exclusively to
+    replace the files. The meta file is given the time the reading started as its modification
+    time, so that a refresh that started reading before the one that was last written does not
+    replace it with older metas.
+    """
+    import os
+    import time
     from boxyard._utils.locking import BoxyardLockManager
+    from boxyard._fast import write_meta_snapshot
     from contextlib import nullcontext
 
     lock_manager = BoxyardLockManager(config.boxyard_data_path)
-    lock_context = nullcontext() if _skip_lock else lock_manager.global_lock()
+    read_lock_context = nullcontext() if _skip_lock else lock_manager.global_lock(shared=True)
+    write_lock_context = nullcontext() if _skip_lock else lock_manager.global_lock()
 
-    with lock_context:
+    with read_lock_context:
+        started_ns = time.time_ns()
         boxyard_meta = create_boxyard_meta(config)
+
+    with write_lock_context:
+        try:
+            written_ns = config.boxyard_meta_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            written_ns = None
+        # A modification time in the future is not trusted (e.g. the clock was turned back)
+        if written_ns is not None and started_ns <= written_ns <= time.time_ns():
+            return boxyard_meta
         # Atomic write: temp file + rename
         tmp_path = config.boxyard_meta_path.with_suffix(".tmp")
         tmp_path.write_text(boxyard_meta.model_dump_json())
+        os.utime(tmp_path, ns=(started_ns, started_ns))
         tmp_path.rename(config.boxyard_meta_path)
+        write_meta_snapshot(
+            boxyard_meta.model_dump(mode="json")["box_metas"],
+            config.boxyard_meta_snapshot_path,
+            source_path=config.boxyard_meta_path,
+        )
     return boxyard_meta
 
 # %%
@@ -474,9 +534,44 @@ def get_boxyard_meta(
     config: boxyard.config.Config,
     force_create: bool = False,
 ) -> BoxyardMeta:
+    from boxyard._utils.base import load_file_cached
+
     if not config.boxyard_meta_path.exists() or force_create:
         refresh_boxyard_meta(config)
-    return BoxyardMeta.model_validate_json(config.boxyard_meta_path.read_text())
+    return load_file_cached(config.boxyard_meta_path, _load_boxyard_meta)
+
+
+def _load_boxyard_meta(path: Path) -> BoxyardMeta:
+    import os
+
+    with open(path) as f:
+        # The stat of the file that is actually read, even if it is replaced in the meantime
+        source_stat = os.fstat(f.fileno())
+        boxyard_meta = BoxyardMeta.model_validate_json(f.read())
+    boxyard_meta._source_stat = (source_stat.st_mtime_ns, source_stat.st_size)
+    return boxyard_meta
+
+# %%
+#|export
+def get_name_search_index(
+    config: boxyard.config.Config,
+    boxyard_meta: BoxyardMeta,
+) -> NameSearchIndex:
+    """
+    The name search index of `boxyard_meta` (as returned by `get_boxyard_meta`). It is read from
+    the meta snapshot if the snapshot was written from the same `boxyard_meta.json` that
+    `boxyard_meta` was loaded from, and only built otherwise.
+    """
+    from boxyard._fast import load_meta_snapshot
+
+    snapshot = load_meta_snapshot(config.boxyard_meta_path)
+    if (
+        snapshot is not None
+        and boxyard_meta._source_stat is not None
+        and (snapshot.source_mtime_ns, snapshot.source_size) == boxyard_meta._source_stat
+    ):
+        return snapshot.name_index
+    return boxyard_meta.name_index
 
 # %%
 #|export
@@ -491,28 +586,116 @@ def get_box_group_configs(
                 box_group_configs[group_name] = BoxGroupConfig()
     return box_group_configs, config.virtual_box_groups
 
+# %%
+#|exporti
+class _UserSymlinksManifest(const.StrictModel):
+    """
+    The symlinks last created by `create_user_box_group_symlinks`, and the fingerprint of the
+    state they were created from.
+
+    Stored at: {boxyard_data_path}/user_box_group_symlinks.json
+    """
+    fingerprint: str
+    symlinks: dict[str, str]  # symlink path -> destination path
+
+
+def _load_user_symlinks_manifest(config: boxyard.config.Config) -> _UserSymlinksManifest | None:
+    try:
+        return _UserSymlinksManifest.model_validate_json(
+            config.user_box_group_symlinks_manifest_path.read_text()
+        )
+    except (OSError, ValueError):
+        return None
+
+
+def _save_user_symlinks_manifest(
+    config: boxyard.config.Config, manifest: _UserSymlinksManifest
+) -> None:
+    path = config.user_box_group_symlinks_manifest_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".json.tmp")
+    tmp_path.write_text(manifest.model_dump_json())
+    tmp_path.rename(path)
+
+
+def _get_included_index_names(config: boxyard.config.Config) -> set[str]:
+    """The index names of the included boxes, from a single listing of `user_boxes_path`."""
+    import os
+
+    try:
+        with os.scandir(config.user_boxes_path) as entries:
+            return {entry.name for entry in entries if entry.is_dir()}
+    except FileNotFoundError:
+        return set()
+
+
+def _get_user_symlinks_fingerprint(
+    config: boxyard.config.Config, included_index_names: set[str]
+) -> str | None:
+    """
+    A hash of everything the user symlinks are created from: the meta file, the group configs,
+    the user paths and the included boxes. `None` if there is no meta file yet.
+    """
+    import hashlib
+    import json
+
+    try:
+        meta_bytes = config.boxyard_meta_path.read_bytes()
+    except FileNotFoundError:
+        return None
+    fingerprint = hashlib.sha256(meta_bytes)
+    fingerprint.update(json.dumps([
+        str(config.user_boxes_path),
+        str(config.user_box_groups_path),
+        {name: group.model_dump(mode="json") for name, group in config.box_groups.items()},
+        {name: group.model_dump(mode="json") for name, group in config.virtual_box_groups.items()},
+        sorted(included_index_names),
+    ]).encode())
+    return fingerprint.hexdigest()
+
 # %%
 #|export
 def create_user_box_group_symlinks(
     config: boxyard.config.Config,
 ):
+    """
+    Create the symlinks to the included boxes in the folders of their groups, under
+    `user_box_groups_path`.
+
+    The symlinks that were created are recorded in a manifest, together with a fingerprint of the
+    meta, the group configs and the included boxes. If the fingerprint is unchanged since the last
+    run nothing is done, and otherwise only the symlinks that differ from the manifest are removed
+    or created. Without a manifest (e.g. on the first run, or after it was deleted), the whole of
+    `user_box_groups_path` is scanned and reconciled instead.
+    """
     from collections import defaultdict
     from boxyard.config import BoxGroupTitleMode, VirtualBoxGroupConfig
+    from boxyard._utils.logical_expressions import GroupBitsets
+
+    included_index_names = _get_included_index_names(config)
+    fingerprint = _get_user_symlinks_fingerprint(config, included_index_names)
+    manifest = _load_user_symlinks_manifest(config)
+    if not config.user_box_groups_path.is_dir():
+        manifest = None
+    if manifest is not None and fingerprint is not None and manifest.fingerprint == fingerprint:
+        return
 
     box_metas = [
         box_meta
         for box_meta in get_boxyard_meta(config).box_metas
-        if box_meta.check_included(config)
+        if box_meta.index_name in included_index_names
     ]
-    box_metas.sort(key=lambda x: x.creation_timestamp_datetime)
+    box_metas.sort(key=lambda x: get_timestamp_key(x.creation_timestamp_utc))
     groups, virtual_box_groups = get_box_group_configs(config, box_metas)
-    symlink_paths = []
 
     for vg in virtual_box_groups:
         if vg in groups:
             print(f"Warning: Virtual box group '{vg}' is also a regular box group.")
     groups.update(virtual_box_groups)
 
+    # The boxes of every group, as bitsets over `box_metas`
+    group_bitsets = GroupBitsets([box_meta.groups for box_meta in box_metas])
+
     def _get_symlink_title(box_meta: BoxMeta, group_config: BoxGroupConfig) -> str:
         if group_config.box_title_mode == BoxGroupTitleMode.INDEX_NAME:
             title = box_meta.index_name
@@ -524,32 +707,67 @@ def create_user_box_group_symlinks(
             raise Exception(f"Invalid box title mode: {group_config.box_title_mode}")
         return title
 
-    # Generate all symlink paths to create
-    _symlinks = []
+    # Generate all symlinks to create, as symlink path -> destination path
+    symlinks: dict[Path, Path] = {}
     for group_name, group_config in groups.items():
         title_counter = defaultdict(int)
         group_symlink_name = group_config.symlink_name or group_name
-        for box_meta in box_metas:
-            if not box_meta.check_included(config):
-                continue
-            if isinstance(group_config, VirtualBoxGroupConfig):
-                if not group_config.is_in_group(box_meta.groups):
-                    continue
-            else:
-                if group_name not in box_meta.groups:
-                    continue
+        if isinstance(group_config, VirtualBoxGroupConfig):
+            group_members = group_config.get_filter_expression().evaluate_bitsets(group_bitsets)
+        else:
+            group_members = group_bitsets.get(group_name)
+        for i in GroupBitsets.get_indices(group_members):
+            box_meta = box_metas[i]
             dest_path = box_meta.get_local_part_path(config, BoxPart.DATA)
             title = _get_symlink_title(box_meta, group_config)
             if title_counter[title] > 1:
                 title = f"{title} (CONFLICT {title_counter[title]})"  # TODO this will break if the title contains a `(CONFLICT ...`
             title_counter[title] += 1
             symlink_path = config.user_box_groups_path / group_symlink_name / title
-            _symlinks.append((dest_path, symlink_path))
+            symlinks[symlink_path] = dest_path
+
+    # The manifest is removed while the symlinks are changed, so that the next run does a full
+    # reconciliation if this one is interrupted
+    config.user_box_group_symlinks_manifest_path.unlink(missing_ok=True)
 
-    # Remove all existing symlinks that are not in the _symlinks list
-    _symlink_paths = [symlink_path for _, symlink_path in _symlinks]
+    if manifest is None:
+        _reconcile_all_user_symlinks(config, symlinks, groups)
+    else:
+        previous_symlinks = {Path(p): Path(dest) for p, dest in manifest.symlinks.items()}
+        _reconcile_changed_user_symlinks(config, symlinks, previous_symlinks, groups)
+
+    if fingerprint is not None:
+        _save_user_symlinks_manifest(config, _UserSymlinksManifest(
+            fingerprint=fingerprint,
+            symlinks={str(p): str(dest) for p, dest in symlinks.items()},
+        ))
+
+# %%
+#|exporti
+def _create_user_symlink(config: boxyard.config.Config, symlink_path: Path, dest_path: Path) -> None:
+    import os
+
+    symlink_path.parent.mkdir(parents=True, exist_ok=True)
+    if symlink_path.is_symlink():  # is_symlink() catches broken symlinks
+        if os.readlink(symlink_path) == str(dest_path) or symlink_path.resolve() == dest_path.resolve():
+            return  # The symlink already points to the correct destination so leave it as it is
+        symlink_path.unlink()
+    elif symlink_path.exists():
+        raise Exception(
+            f"'{symlink_path}' is in the user box group path '{config.user_box_groups_path}' but is not a symlink!"
+        )
+    symlink_path.symlink_to(dest_path, target_is_directory=True)
+
+
+def _reconcile_all_user_symlinks(
+    config: boxyard.config.Config,
+    symlinks: dict[Path, Path],
+    groups: dict[str, BoxGroupConfig],
+) -> None:
+    """Reconcile the whole of `user_box_groups_path` with `symlinks`."""
+    # Remove all existing symlinks that are not in `symlinks`
     for path in config.user_box_groups_path.glob("**/*"):
-        if path in _symlink_paths:
+        if path in symlinks:
             continue
         if path.is_symlink():
             path.unlink()
@@ -562,7 +780,7 @@ def create_user_box_group_symlinks(
             if p.is_dir():
                 _inspect_folder(p)
             else:
-                if p not in _symlink_paths:
+                if p not in symlinks:
                     raise Exception(
                         f"File '{p}' is in the user box group path '{config.user_box_groups_path}'."
                     )
@@ -575,22 +793,8 @@ def create_user_box_group_symlinks(
                 f"'{path}' is in the user box group path '{config.user_box_groups_path}' but is not a directory!"
             )
 
-    # Create the symlinks
-    for dest_path, symlink_path in _symlinks:
-        symlink_path.parent.mkdir(parents=True, exist_ok=True)
-        if (
-            symlink_path.exists() or symlink_path.is_symlink()
-        ):  # is_symlink() catches broken symlinks
-            if symlink_path.is_symlink():
-                if symlink_path.resolve() != dest_path.resolve():
-                    symlink_path.unlink()
-                else:
-                    continue  # The symlink already points to the correct destination so leave it as it is
-            else:
-                raise Exception(
-                    f"'{symlink_path}' is in the user box group path '{config.user_box_groups_path}' but is not a symlink!"
-                )
-        symlink_path.symlink_to(dest_path, target_is_directory=True)
+    for symlink_path, dest_path in symlinks.items():
+        _create_user_symlink(config, symlink_path, dest_path)
 
     # Remove all empty group folders that are not existing groups
     def _remove_empty_non_group_folders(path: Path) -> None:
@@ -608,6 +812,34 @@ def create_user_box_group_symlinks(
     for path in config.user_box_groups_path.glob("*"):
         _remove_empty_non_group_folders(path)
 
+
+def _reconcile_changed_user_symlinks(
+    config: boxyard.config.Config,
+    symlinks: dict[Path, Path],
+    previous_symlinks: dict[Path, Path],
+    groups: dict[str, BoxGroupConfig],
+) -> None:
+    """Only remove and create the symlinks that differ between `previous_symlinks` and `symlinks`."""
+    removed = [p for p, dest in previous_symlinks.items() if symlinks.get(p) != dest]
+    for symlink_path in removed:
+        if symlink_path.is_symlink():
+            symlink_path.unlink()
+
+    for symlink_path, dest_path in symlinks.items():
+        if previous_symlinks.get(symlink_path) != dest_path:
+            _create_user_symlink(config, symlink_path, dest_path)
+
+    # Remove the folders that were emptied, unless they are group folders
+    for folder in {p.parent for p in removed}:
+        while folder != config.user_box_groups_path and config.user_box_groups_path in folder.parents:
+            if folder.relative_to(config.user_box_groups_path).as_posix() in groups:
+                break
+            try:
+                folder.rmdir()
+            except OSError:  # Not empty, or already removed
+                break
+            folder = folder.parent
+
 # %% [markdown]
 # # `SyncRecord`
 
@@ -24,6 +24,7 @@ import json
 from enum import Enum
 from boxyard import const
 from pathlib import Path
+from typing import Any, Callable
 
 from boxyard._utils import run_cmd_async
 
@@ -113,7 +114,7 @@ def _rclone_cmd_helper(
         cmd.append("--filter")
         cmd.append(f)
     if filters_file is not None:
-        cmd.append("--filters-file")
+        cmd.append("--filter-from")
         cmd.append(filters_file)
     if progress:
         cmd.append("--progress")
@@ -296,7 +297,14 @@ async def rclone_sync(
     progress: bool = False,
     return_command: bool = False,
     verbose=False,
+    log_line_callback: Callable[[str], Any] | None = None,
+    stats_interval: str | None = None,
 ) -> bool:
+    """
+    If `log_line_callback` is given, rclone is run with `--use-json-log --verbose` and each
+    of its JSON log lines is passed to the callback as it is written. If `stats_interval`
+    is given (e.g. `"1s"`), rclone logs its transfer stats at that interval.
+    """
     cmd = _rclone_cmd_helper(
         "sync",
         rclone_config_path,
@@ -316,8 +324,14 @@ async def rclone_sync(
     if backup_path:
         cmd.append("--backup-dir")
         cmd.append(backup_path)
+    if log_line_callback is not None:
+        cmd.extend(["--use-json-log", "--verbose"])
+    if stats_interval is not None:
+        cmd.extend(["--stats", stats_interval])
     if not return_command:
-        ret_code, stdout, stderr = await run_cmd_async(cmd)
+        ret_code, stdout, stderr = await run_cmd_async(
+            cmd, stderr_line_callback=log_line_callback
+        )
         if verbose:
             print(stdout)
             print(stderr)
@@ -754,3 +768,55 @@ res = await rclone_delete(
 )
 assert res
 assert not (_path / "my_remote" / "to_delete.txt").exists()
+
+# %%
+#|hide
+show_doc(this_module.rclone_purge_dirs)
+
+# %%
+#|export
+async def rclone_purge_dirs(
+    rclone_config_path: str,
+    source: str,
+    source_path: str,
+    dir_names: list[str],
+) -> bool:
+    """
+    Purge several directories directly under `source_path` with a single `rclone delete`.
+    Directories that do not exist are ignored, as is a missing `source_path`.
+    """
+    import tempfile
+    from boxyard._utils.transfer_journal import escape_rclone_filter_pattern
+
+    if not dir_names:
+        return True
+
+    source_str = f"{source}:{source_path}" if source else source_path
+    with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".filter") as f:
+        f.writelines(f"/{escape_rclone_filter_pattern(name)}/**\n" for name in dir_names)
+        include_from_path = f.name
+
+    try:
+        cmd = [
+            "rclone", "delete", "--config", rclone_config_path, source_str,
+            "--include-from", include_from_path, "--rmdirs",
+        ]
+        ret_code, stdout, stderr = await run_cmd_async(cmd)
+    finally:
+        Path(include_from_path).unlink(missing_ok=True)
+    return ret_code == 0 or ret_code == 3  # 3: `source_path` does not exist
+
+# %%
+_path = setup_test_folder("purge_dirs")
+for _name in ["a", "b", "keep"]:
+    (_path / "my_remote" / "backups" / _name / "sub").mkdir(parents=True)
+    (_path / "my_remote" / "backups" / _name / "sub" / "file.txt").write_text("backup")
+
+assert await rclone_purge_dirs(
+    _path / "rclone.conf",
+    source="my_remote",
+    source_path="backups",
+    dir_names=["a", "b", "missing"],
+)
+assert sorted(p.name for p in (_path / "my_remote" / "backups").iterdir()) == ["keep"]
+assert await rclone_purge_dirs(_path / "rclone.conf", "my_remote", "no_backups", ["a"])
@@ -18,6 +18,25 @@
 # 4. If...
 #    - ...sync completes, then delete the backup and create a sync record.
 #    - ...sync is interrupted. Do nothing.
+#
+# If `transfer_journals_path` is given and the synced path is a directory, the files that
+# rclone confirms as transferred are recorded in a transfer journal named after the ULID of
+# the incomplete sync record. When an interrupted sync is safely retried, the retry reuses
+# the incomplete sync record (and thus its journal and backup dir), and the files in the
+# journal that are unchanged locally are excluded from the retried sync.
+#
+# If `progress_callback` is given, it is called with an `RcloneStats` every
+# `RCLONE_STATS_INTERVAL` while rclone runs. The callback may be a coroutine function.
+#
+# If `push_lease` is given, it is acquired before pushing, and `PushLeaseHeld` is raised if
+# another machine is pushing to the same remote location (see `_utils.push_lease`). The lease
+# is not released here, so that the caller can hold it across the pushes of several parts.
+#
+# The backup dir is named after the ULID of the sync record, followed by `__{backup_label}` if
+# given (`sync_box` labels the backups with the box ID, see `_backup_gc`). It is created by
+# rclone when the first file is backed up. If
+# `backup_purge_queue` is given, the backup of a completed sync is added to the queue instead
+# of being purged before returning (see `_utils.backup_purge_queue`).
 
 # %%
 #|default_exp _utils.sync_helper
@@ -30,12 +49,18 @@ from nblite import nbl_export, show_doc; nbl_export();
 # %%
 #|top_export
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
 import textwrap
 from boxyard._utils import check_interrupted, SoftInterruption
 from boxyard._enums import SyncSetting, SyncDirection
 
 from boxyard import const
 
+if TYPE_CHECKING:
+    from boxyard._utils.backup_purge_queue import BackupPurgeQueue
+    from boxyard._utils.push_lease import PushLease
+    from boxyard._utils.sync_progress import RcloneStats
+
 # %%
 #|top_export
 from boxyard._models import SyncStatus
@@ -77,6 +102,11 @@ async def sync_helper(
     verbose: bool = False,
     show_rclone_progress: bool = False,
     allow_missing_source: bool = False,
+    transfer_journals_path: Path | None = None,
+    progress_callback: Callable[["RcloneStats"], Any] | None = None,
+    push_lease: "PushLease | None" = None,
+    backup_purge_queue: "BackupPurgeQueue | None" = None,
+    backup_label: str | None = None,
 ) -> tuple[SyncStatus, bool]:
     """
     Helper to execute the standard routine for syncing a local and remote folder.
@@ -138,6 +168,12 @@ syncer_hostname = None
 verbose = True
 show_rclone_progress = False
 allow_missing_source = False
+transfer_journals_path = test_folder_path / "transfer_journals"
+progress_events = []
+progress_callback = progress_events.append
+push_lease = None
+backup_purge_queue = None
+backup_label = None
 
 # %% [markdown]
 # # Function body
@@ -307,7 +343,22 @@ if allow_missing_source:
 
 # %%
 #|export
-from boxyard._utils import rclone_sync, BisyncResult, rclone_mkdir, rclone_purge
+import inspect
+
+from boxyard._utils import rclone_sync, BisyncResult, rclone_purge
+from boxyard._utils.transfer_journal import TransferJournal, write_resume_filters_file
+from boxyard._utils.sync_progress import parse_rclone_stats_line, RCLONE_STATS_INTERVAL
+
+
+async def _handle_rclone_log_line(line: str, journal: "TransferJournal | None"):
+    if journal is not None:
+        journal.handle_rclone_log_line(line, local_path)
+    if progress_callback is not None:
+        stats = parse_rclone_stats_line(line)
+        if stats is not None:
+            result = progress_callback(stats)
+            if inspect.isawaitable(result):
+                await result
 
 
 async def _sync(
@@ -319,6 +370,7 @@ async def _sync(
     backup_remote: str,
     backup_path: str,
     return_command: bool = False,
+    journal: "TransferJournal | None" = None,
 ) -> BisyncResult:
     if not sync_path_is_dir:
         dest_path = (
@@ -332,31 +384,65 @@ async def _sync(
             f"Syncing {source}:{source_path} to {dest}:{dest_path}.  Backup path: {backup_remote}:{backup_path}"
         )
 
-    # Create backup store directory if it doesn't already exist
-    await rclone_mkdir(
-        rclone_config_path=rclone_config_path,
-        source=backup_remote,
-        source_path=backup_path,
-    )
-
-    return await rclone_sync(
-        rclone_config_path=rclone_config_path,
-        source=source,
-        source_path=source_path,
-        dest=dest,
-        dest_path=dest_path,
-        include=include or [],
-        exclude=exclude or [],
-        filter=filter or [],
-        include_file=include_path,
-        exclude_file=exclude_path,
-        filters_file=filters_path,
-        backup_path=f"{backup_remote}:{backup_path}" if backup_remote else backup_path,
-        dry_run=dry_run,
-        return_command=return_command,
-        verbose=False,
-        progress=show_rclone_progress,
-    )
+    filter_kwargs = {
+        "include": include or [],
+        "exclude": exclude or [],
+        "filter": filter or [],
+        "include_file": include_path,
+        "exclude_file": exclude_path,
+        "filters_file": filters_path,
+    }
+
+    # Skip the files that a previous attempt of this sync session already transferred. The
+    # resume rules must come before all other filter rules, so everything is merged into a
+    # single filters file.
+    resume_filters_path = None
+    if journal is not None:
+        resume_rules = journal.get_resume_filter_rules(local_path)
+        if resume_rules:
+            if verbose:
+                print(f"Resuming sync. Skipping {len(resume_rules)} already transferred files.")
+            resume_filters_path = write_resume_filters_file(
+                resume_rules,
+                filters_path,
+                include=include,
+                include_path=include_path,
+                exclude=exclude,
+                exclude_path=exclude_path,
+                filter=filter,
+            )
+            filter_kwargs = {
+                "include": [],
+                "exclude": [],
+                "filter": [],
+                "include_file": None,
+                "exclude_file": None,
+                "filters_file": resume_filters_path,
+            }
+
+    try:
+        return await rclone_sync(
+            rclone_config_path=rclone_config_path,
+            source=source,
+            source_path=source_path,
+            dest=dest,
+            dest_path=dest_path,
+            **filter_kwargs,
+            backup_path=f"{backup_remote}:{backup_path}" if backup_remote else backup_path,
+            dry_run=dry_run,
+            return_command=return_command,
+            verbose=False,
+            progress=show_rclone_progress,
+            log_line_callback=(
+                (lambda line: _handle_rclone_log_line(line, journal))
+                if journal is not None or progress_callback is not None
+                else None
+            ),
+            stats_interval=RCLONE_STATS_INTERVAL if progress_callback is not None else None,
+        )
+    finally:
+        if resume_filters_path is not None:
+            resume_filters_path.unlink(missing_ok=True)
 
 # %%
 #|export
@@ -365,15 +451,33 @@ from boxyard._models import SyncRecord
 if check_interrupted():
     raise SoftInterruption()
 
-rec = SyncRecord.create(syncer_hostname=syncer_hostname, sync_complete=False)
-backup_name = str(rec.ulid)
+if _can_safely_retry_incomplete(sync_condition, sync_direction, local_sync_record, remote_sync_record):
+    # Retrying an interrupted sync: continue the same sync session (same ULID, backup dir and journal)
+    rec = local_sync_record
+else:
+    rec = SyncRecord.create(syncer_hostname=syncer_hostname, sync_complete=False)
+backup_name = f"{rec.ulid}__{backup_label}" if backup_label else str(rec.ulid)
+
+journal = None
+if transfer_journals_path is not None and sync_path_is_dir:
+    journal = TransferJournal.open(
+        journals_path=transfer_journals_path,
+        ulid=str(rec.ulid),
+        sync_direction=sync_direction,
+        remote_sync_record_ulid=(
+            str(remote_sync_record.ulid)
+            if sync_direction == SyncDirection.PULL and remote_sync_record is not None
+            else None
+        ),
+    )
 
 if sync_direction == SyncDirection.PULL:
     # Save the sync record on local to signify an ongoing sync
     await rec.rclone_save(rclone_config_path, "", local_sync_record_path)
 
     backup_remote = ""
-    backup_path = Path(local_sync_backups_path) / backup_name
+    backups_path = Path(local_sync_backups_path)
+    backup_path = backups_path / backup_name
 
     res, stdout, stderr = await _sync(
         dry_run=False,
@@ -383,6 +487,7 @@ if sync_direction == SyncDirection.PULL:
         dest_path=local_path,
         backup_remote=backup_remote,
         backup_path=backup_path,
+        journal=journal,
     )
 
     if res:
@@ -393,6 +498,10 @@ if sync_direction == SyncDirection.PULL:
         await rec.rclone_save(rclone_config_path, "", local_sync_record_path)
 
 elif sync_direction == SyncDirection.PUSH:
+    # Back off before touching the remote if another machine is pushing
+    if push_lease is not None:
+        await push_lease.acquire(force=sync_setting == SyncSetting.FORCE)
+
     # Save the incomplete sync record on BOTH local and remote to signify an ongoing sync
     # This creates a "sync session" marker - if interrupted, both sides have the same incomplete ULID,
     # proving this machine owns the interrupted sync and can safely retry
@@ -400,7 +509,8 @@ elif sync_direction == SyncDirection.PUSH:
     await rec.rclone_save(rclone_config_path, "", local_sync_record_path)
 
     backup_remote = remote
-    backup_path = Path(remote_sync_backups_path) / backup_name
+    backups_path = Path(remote_sync_backups_path)
+    backup_path = backups_path / backup_name
 
     res, stdout, stderr = await _sync(
         dry_run=False,
@@ -410,6 +520,7 @@ elif sync_direction == SyncDirection.PUSH:
         dest_path=remote_path,
         backup_remote=backup_remote,
         backup_path=backup_path,
+        journal=journal,
     )
 
     if res:
@@ -422,14 +533,21 @@ else:
     raise ValueError(f"Unknown sync direction: {sync_direction}")
 
 if not res:
+    # The journal is kept so that a retry of this sync session can resume from it
     raise SyncFailed(f"Sync failed. Rclone output:\n{stdout}\n{stderr}")
 
+if journal is not None:
+    journal.discard()
+
 if res and delete_backup:
-    await rclone_purge(
-        rclone_config_path=rclone_config_path,
-        source=backup_remote,
-        source_path=backup_path,
-    )
+    if backup_purge_queue is not None:
+        backup_purge_queue.add(backup_remote, backups_path, backup_name)
+    else:
+        await rclone_purge(
+            rclone_config_path=rclone_config_path,
+            source=backup_remote,
+            source_path=backup_path,
+        )
 
 # %% [markdown]
 # Check that the sync worked
@@ -447,6 +565,7 @@ _names = {f["Name"] for f in _lsjson}
 assert "a_folder" in _names
 assert "file1.txt" in _names
 assert "file2.txt" in _names
+assert progress_events and progress_events[-1].transfers == progress_events[-1].total_transfers
 
 # %%
 assert (
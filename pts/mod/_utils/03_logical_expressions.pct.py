@@ -17,6 +17,11 @@
 from nblite import nbl_export, show_doc; nbl_export();
 import boxyard._utils.logical_expressions as this_module
 
+# %%
+#|export
+from functools import lru_cache
+from typing import Iterable
+
 # %%
 #|hide
 show_doc(this_module._tokenize_expression)
@@ -77,37 +82,32 @@ def _tokenize_expression(expression: str) -> list[str]:
     return tokens
 
 
-def _parse_or_expression(
-    tokens: list[str], pos: list[int], box_groups: set[str]
-) -> bool:
+# The parser builds a tree of tuples: `("group", name)`, `("not", operand)`, and
+# `("and", operands)` or `("or", operands)`.
+
+def _parse_or_expression(tokens: list[str], pos: list[int]) -> tuple:
     """Parse OR expressions (lowest precedence)."""
-    left = _parse_and_expression(tokens, pos, box_groups)
+    operands = [_parse_and_expression(tokens, pos)]
 
     while pos[0] < len(tokens) and tokens[pos[0]] == "OR":
         pos[0] += 1
-        right = _parse_and_expression(tokens, pos, box_groups)
-        left = left or right
+        operands.append(_parse_and_expression(tokens, pos))
 
-    return left
+    return operands[0] if len(operands) == 1 else ("or", operands)
 
 
-def _parse_and_expression(
-    tokens: list[str], pos: list[int], box_groups: set[str]
-) -> bool:
+def _parse_and_expression(tokens: list[str], pos: list[int]) -> tuple:
     """Parse AND expressions (medium precedence)."""
-    left = _parse_not_expression(tokens, pos, box_groups)
+    operands = [_parse_not_expression(tokens, pos)]
 
     while pos[0] < len(tokens) and tokens[pos[0]] == "AND":
         pos[0] += 1
-        right = _parse_not_expression(tokens, pos, box_groups)
-        left = left and right
+        operands.append(_parse_not_expression(tokens, pos))
 
-    return left
+    return operands[0] if len(operands) == 1 else ("and", operands)
 
 
-def _parse_not_expression(
-    tokens: list[str], pos: list[int], box_groups: set[str]
-) -> bool:
+def _parse_not_expression(tokens: list[str], pos: list[int]) -> tuple:
     """Parse NOT expressions and atoms (highest precedence)."""
     if pos[0] >= len(tokens):
         raise ValueError("Unexpected end of expression")
@@ -115,12 +115,12 @@ def _parse_not_expression(
     # Handle NOT operator
     if tokens[pos[0]] == "NOT":
         pos[0] += 1
-        return not _parse_not_expression(tokens, pos, box_groups)
+        return ("not", _parse_not_expression(tokens, pos))
 
     # Handle parentheses
     if tokens[pos[0]] == "(":
         pos[0] += 1
-        result = _parse_or_expression(tokens, pos, box_groups)
+        result = _parse_or_expression(tokens, pos)
         if pos[0] >= len(tokens) or tokens[pos[0]] != ")":
             raise ValueError("Unmatched opening parenthesis")
         pos[0] += 1
@@ -132,7 +132,30 @@ def _parse_not_expression(
 
     group_name = tokens[pos[0]]
     pos[0] += 1
-    return group_name in box_groups
+    return ("group", group_name)
+
+
+def _compile_tree(tree: tuple):
+    """Compile a parsed expression into nested closures over a set of groups."""
+    kind, arg = tree
+    if kind == "group":
+        return lambda box_groups: arg in box_groups
+    if kind == "not":
+        operand = _compile_tree(arg)
+        return lambda box_groups: not operand(box_groups)
+    operands = [_compile_tree(operand) for operand in arg]
+    if kind == "and":
+        return lambda box_groups: all(operand(box_groups) for operand in operands)
+    return lambda box_groups: any(operand(box_groups) for operand in operands)
+
+
+def _get_tree_groups(tree: tuple) -> set[str]:
+    kind, arg = tree
+    if kind == "group":
+        return {arg}
+    if kind == "not":
+        return _get_tree_groups(arg)
+    return set().union(*(_get_tree_groups(operand) for operand in arg))
 
 # %%
 _tokenize_expression("group1 AND (group2 OR group3)")
@@ -140,13 +163,155 @@ _tokenize_expression("group1 AND (group2 OR group3)")
 # %%
 _tokenize_expression("group1 AND parent_group/child_group")
 
+# %% [markdown]
+# # Compiled expressions
+#
+# Expressions are parsed once (`compile_group_expression` caches the compiled expressions),
+# and can then be evaluated either against the groups of a single box, or against the
+# `GroupBitsets` of many boxes at once: every group is a Python int with a bit set for each
+# box in the group, so an expression costs a handful of bitwise operations for all boxes
+# together.
+
+# %%
+#|hide
+show_doc(this_module.GroupBitsets)
+
+# %%
+#|export
+class GroupBitsets:
+    """
+    For every group, the bitset of the items (e.g. boxes) that are in it: bit `i` is set if
+    item `i` is in the group.
+    """
+
+    def __init__(self, groups_per_item: list[list[str] | set[str]], groups: Iterable[str] | None = None):
+        """
+        Args:
+            groups_per_item: The groups of every item.
+            groups: Only index these groups. If None, all groups are indexed.
+        """
+        self.num_items = len(groups_per_item)
+        only_groups = None if groups is None else set(groups)
+        members: dict[str, bytearray] = {}
+        for i, item_groups in enumerate(groups_per_item):
+            for group in item_groups:
+                if only_groups is not None and group not in only_groups:
+                    continue
+                bits = members.get(group)
+                if bits is None:
+                    bits = members[group] = bytearray((self.num_items + 7) // 8)
+                bits[i >> 3] |= 1 << (i & 7)
+        self.bitsets = {group: int.from_bytes(bits, "little") for group, bits in members.items()}
+        self.all_items = (1 << self.num_items) - 1
+
+    def get(self, group: str) -> int:
+        return self.bitsets.get(group, 0)
+
+    @staticmethod
+    def get_indices(bitset: int) -> list[int]:
+        """The indices of the set bits, in increasing order."""
+        indices = []
+        # A byte at a time, so that runs of unset bits are skipped cheaply
+        for byte_index, byte in enumerate(bitset.to_bytes((bitset.bit_length() + 7) // 8, "little")):
+            if byte:
+                offset = byte_index << 3
+                indices.extend([offset + i for i in _BYTE_BIT_INDICES[byte]])
+        return indices
+
+    @staticmethod
+    def from_indices(indices: Iterable[int], num_items: int) -> int:
+        """The bitset with the bits of `indices` set."""
+        bits = bytearray((num_items + 7) // 8)
+        for i in indices:
+            bits[i >> 3] |= 1 << (i & 7)
+        return int.from_bytes(bits, "little")
+
+
+_BYTE_BIT_INDICES = [tuple(i for i in range(8) if byte >> i & 1) for byte in range(256)]
+
+# %%
+_bitsets = GroupBitsets([["a"], ["a", "b"], []])
+assert _bitsets.get("a") == 0b011 and _bitsets.get("b") == 0b010 and _bitsets.get("c") == 0
+assert GroupBitsets.get_indices(0b101) == [0, 2]
+assert GroupBitsets.from_indices([0, 2], 3) == 0b101
+
+# %%
+#|hide
+show_doc(this_module.GroupExpression)
+
+# %%
+#|export
+class GroupExpression:
+    """
+    A boolean group expression (see `get_group_filter_func`), parsed once.
+
+    Calling it with the groups of a box evaluates it for that box, and `select` evaluates it
+    for many boxes at once.
+    """
+
+    def __init__(self, expression: str):
+        tokens = _tokenize_expression(expression)
+        if not tokens:
+            raise ValueError("Empty expression")
+
+        pos = [0]  # Use list to allow modification in nested calls
+        tree = _parse_or_expression(tokens, pos)
+
+        # Check if we consumed all tokens
+        if pos[0] < len(tokens):
+            raise ValueError(f"Unexpected token at position {pos[0]}: {tokens[pos[0]]}")
+
+        self.expression = expression
+        self.groups = frozenset(_get_tree_groups(tree))
+        self._tree = tree
+        self._evaluate = _compile_tree(tree)
+
+    def __call__(self, box_groups: set[str] | list[str]) -> bool:
+        if not isinstance(box_groups, (set, frozenset)):
+            box_groups = set(box_groups)
+        return self._evaluate(box_groups)
+
+    def evaluate_bitsets(self, group_bitsets: GroupBitsets) -> int:
+        """The bitset of the items for which the expression is true."""
+
+        def _evaluate(tree: tuple) -> int:
+            kind, arg = tree
+            if kind == "group":
+                return group_bitsets.get(arg)
+            if kind == "not":
+                return group_bitsets.all_items & ~_evaluate(arg)
+            bitsets = [_evaluate(operand) for operand in arg]
+            result = bitsets[0]
+            for bitset in bitsets[1:]:
+                result = result & bitset if kind == "and" else result | bitset
+            return result
+
+        return _evaluate(self._tree)
+
+    def select(self, groups_per_item: list[list[str] | set[str]]) -> list[int]:
+        """The indices of the items (given by their groups) for which the expression is true."""
+        group_bitsets = GroupBitsets(groups_per_item, groups=self.groups)
+        return GroupBitsets.get_indices(self.evaluate_bitsets(group_bitsets))
+
+
+@lru_cache(maxsize=256)
+def compile_group_expression(expression: str) -> GroupExpression:
+    """Compile a group expression, reusing the compiled expression for repeated expressions."""
+    return GroupExpression(expression)
+
+# %%
+_expression = compile_group_expression("a AND NOT (b OR c)")
+assert _expression.groups == {"a", "b", "c"}
+assert _expression.select([["a"], ["a", "b"], ["c"], ["a", "d"]]) == [0, 3]
+assert compile_group_expression("a AND NOT (b OR c)") is _expression
+
 # %%
 #|hide
 show_doc(this_module.get_group_filter_func)
 
 # %%
 #|export
-def get_group_filter_func(expression: str) -> bool:
+def get_group_filter_func(expression: str) -> GroupExpression:
     """
     Get a function that evaluates a boolean expression against a set of box groups.
 
@@ -169,26 +334,7 @@ def get_group_filter_func(expression: str) -> bool:
     Raises:
         ValueError: If the expression is invalid or contains syntax errors
     """
-    # Tokenize the expression
-    tokens = _tokenize_expression(expression)
-    if not tokens:
-        raise ValueError("Empty expression")
-
-    def _filter_func(box_groups: set[str] | list[str]) -> bool:
-        if isinstance(box_groups, list):
-            box_groups = set(box_groups)
-
-        # Parse and evaluate
-        pos = [0]  # Use list to allow modification in nested calls
-        result = _parse_or_expression(tokens, pos, box_groups)
-
-        # Check if we consumed all tokens
-        if pos[0] < len(tokens):
-            raise ValueError(f"Unexpected token at position {pos[0]}: {tokens[pos[0]]}")
-
-        return result
-
-    return _filter_func
+    return compile_group_expression(expression)
 
 # %%
 #|exporti
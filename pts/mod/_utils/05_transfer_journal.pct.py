@@ -0,0 +1,324 @@
+# ---
+# jupyter:
+#   kernelspec:
+#     display_name: Python 3
+#     language: python
+#     name: python3
+# ---
+
+# %% [markdown]
+# # _utils.transfer_journal
+#
+# A transfer journal records which files rclone has confirmed as transferred during
+# a sync session (identified by the ULID of its incomplete sync record). The entries
+# are parsed from rclone's `--use-json-log` output and appended to the journal as they
+# arrive, so they survive an interruption.
+#
+# When an interrupted sync is retried, the journal is used to exclude the files that were
+# already transferred (and have not changed locally since) from the retried `rclone sync`,
+# so that they are not compared against the remote again.
+
+# %%
+#|default_exp _utils.transfer_journal
+
+# %%
+#|hide
+from nblite import nbl_export, show_doc; nbl_export();
+import boxyard._utils.transfer_journal as this_module
+
+# %%
+#|export
+import json
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from boxyard._enums import SyncDirection
+
+# %% [markdown]
+# # Constants
+
+# %%
+#|export
+# rclone evaluates filter rules linearly for every file it lists, so a huge number of resume
+# rules would cost more than the remote checks they save.
+TRANSFER_JOURNAL_MAX_RESUME_RULES = 2000
+
+# Files modified this close to the time their transfer was recorded are never skipped, as a
+# modification in the same tick of a coarse filesystem clock would not change their mtime.
+_RACY_MTIME_WINDOW = 2.0  # seconds
+
+_RCLONE_FILTER_SPECIAL_CHARS = "\\*?[]{}"
+
+# %% [markdown]
+# # `TransferJournal`
+
+# %%
+#|export
+class JournalEntry(NamedTuple):
+    rel_path: str
+    size: int | None
+    recorded_at: float
+    mtime_ns: int | None = None  # Of the local file, when the transfer was recorded
+
+
+class TransferJournal:
+    """
+    Append-only journal of the files confirmed transferred during one sync session.
+
+    File format (JSON lines):
+        {"ulid": ..., "sync_direction": ..., "remote_sync_record_ulid": ...}   # header
+        {"path": ..., "size": ..., "time": ..., "mtime_ns": ...}               # one per file
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ulid: str,
+        sync_direction: SyncDirection,
+        remote_sync_record_ulid: str | None = None,
+    ):
+        self.path = Path(path)
+        self.ulid = ulid
+        self.sync_direction = SyncDirection(sync_direction)
+        self.remote_sync_record_ulid = remote_sync_record_ulid
+        self.entries: dict[str, JournalEntry] = {}
+
+    @classmethod
+    def get_journal_path(cls, journals_path: Path, ulid: str) -> Path:
+        return Path(journals_path) / f"{ulid}.jsonl"
+
+    @classmethod
+    def open(
+        cls,
+        journals_path: Path,
+        ulid: str,
+        sync_direction: SyncDirection,
+        remote_sync_record_ulid: str | None = None,
+    ) -> "TransferJournal":
+        """
+        Open the journal of a sync session, loading the entries of a previous attempt.
+
+        A journal left behind by a previous attempt is only reused if it belongs to the same
+        session: same sync direction and, for pulls, the same remote sync record (otherwise
+        the remote may have changed since the files were transferred). In any other case the
+        journal is started afresh.
+        """
+        journal = cls(
+            path=cls.get_journal_path(journals_path, ulid),
+            ulid=ulid,
+            sync_direction=sync_direction,
+            remote_sync_record_ulid=remote_sync_record_ulid,
+        )
+        if not journal._load():
+            journal._reset()
+        return journal
+
+    def _header(self) -> dict:
+        return {
+            "ulid": self.ulid,
+            "sync_direction": self.sync_direction.value,
+            "remote_sync_record_ulid": self.remote_sync_record_ulid,
+        }
+
+    def _load(self) -> bool:
+        if not self.path.exists():
+            return False
+        try:
+            lines = self.path.read_text().splitlines()
+            if not lines or json.loads(lines[0]) != self._header():
+                return False
+            for line in lines[1:]:
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A partially written last line from an interrupted process
+                self.entries[data["path"]] = JournalEntry(
+                    data["path"], data.get("size"), data["time"], data.get("mtime_ns")
+                )
+        except (OSError, json.JSONDecodeError, KeyError):
+            self.entries = {}
+            return False
+        return True
+
+    def _reset(self) -> None:
+        self.entries = {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self._header()) + "\n")
+
+    def record(self, rel_path: str, size: int | None, mtime_ns: int | None = None) -> None:
+        """Append a confirmed transfer to the journal."""
+        entry = JournalEntry(rel_path, size, time.time(), mtime_ns)
+        self.entries[rel_path] = entry
+        with self.path.open("a") as f:
+            f.write(
+                json.dumps({
+                    "path": rel_path,
+                    "size": size,
+                    "time": entry.recorded_at,
+                    "mtime_ns": mtime_ns,
+                })
+                + "\n"
+            )
+
+    def handle_rclone_log_line(self, line: str, local_path: Path | None = None) -> None:
+        """
+        Record the transfer described by a line of rclone's `--use-json-log` output, if any.
+        If `local_path` is given, the mtime of the local copy of the file is recorded too.
+
+        rclone logs a confirmed transfer as e.g.
+        `{"level":"info","msg":"Copied (new)","size":2,"object":"a/b.txt",...}`.
+        """
+        if not line.startswith("{"):
+            return
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError:
+            return
+        if not isinstance(data, dict):
+            return
+        if not str(data.get("msg", "")).startswith("Copied") or "object" not in data:
+            return
+        mtime_ns = None
+        if local_path is not None:
+            try:
+                mtime_ns = (Path(local_path) / data["object"]).stat().st_mtime_ns
+            except OSError:
+                pass
+        self.record(data["object"], data.get("size"), mtime_ns)
+
+    def get_resumable_paths(self, local_path: Path) -> list[str]:
+        """
+        Get the journaled paths that are safe to skip when retrying the sync.
+
+        An entry is only safe to skip if the local copy of the file (the source of a push,
+        or the destination of a pull) still exists with the journaled size and mtime, and was
+        not modified shortly before the transfer was recorded.
+        """
+        local_path = Path(local_path)
+        resumable = []
+        for entry in self.entries.values():
+            if "\n" in entry.rel_path or entry.size is None:
+                continue
+            try:
+                stat_result = (local_path / entry.rel_path).stat()
+            except OSError:
+                continue
+            if stat_result.st_size != entry.size:
+                continue
+            if entry.mtime_ns is not None and stat_result.st_mtime_ns != entry.mtime_ns:
+                continue
+            if stat_result.st_mtime > entry.recorded_at - _RACY_MTIME_WINDOW:
+                continue
+            resumable.append(entry.rel_path)
+            if len(resumable) >= TRANSFER_JOURNAL_MAX_RESUME_RULES:
+                break
+        return resumable
+
+    def get_resume_filter_rules(self, local_path: Path) -> list[str]:
+        """Get rclone filter rules excluding the files that are safe to skip on a retry."""
+        return [
+            f"- /{escape_rclone_filter_pattern(p)}"
+            for p in self.get_resumable_paths(local_path)
+        ]
+
+    def discard(self) -> None:
+        """Delete the journal. Called once the sync session has completed."""
+        self.path.unlink(missing_ok=True)
+        self.entries = {}
+
+# %% [markdown]
+# # Utility Functions
+
+# %%
+#|hide
+show_doc(this_module.escape_rclone_filter_pattern)
+
+# %%
+#|export
+def escape_rclone_filter_pattern(path: str) -> str:
+    """Escape a literal path so that it can be used in an rclone filter rule."""
+    return "".join(
+        f"\\{c}" if c in _RCLONE_FILTER_SPECIAL_CHARS else c for c in path
+    )
+
+# %%
+assert escape_rclone_filter_pattern("a/b[1]*.txt") == "a/b\\[1\\]\\*.txt"
+
+# %%
+#|hide
+show_doc(this_module.write_resume_filters_file)
+
+# %%
+#|export
+def _read_rule_lines(path: Path | None) -> list[str]:
+    """The rules of an `--include-from`/`--exclude-from` file, without blanks and comments."""
+    if path is None or not Path(path).exists():
+        return []
+    lines = [line.strip() for line in Path(path).read_text().splitlines()]
+    return [line for line in lines if line and not line.startswith(("#", ";"))]
+
+
+def write_resume_filters_file(
+    resume_rules: list[str],
+    filters_path: Path | None = None,
+    include: list[str] | None = None,
+    include_path: Path | None = None,
+    exclude: list[str] | None = None,
+    exclude_path: Path | None = None,
+    filter: list[str] | None = None,
+) -> Path:
+    """
+    Write the resume rules, followed by all the other filter rules of the sync, to a single
+    temporary filters file, to be passed as the only filter of the sync. The caller is
+    responsible for deleting the returned file.
+
+    rclone applies the include rules before any `--filter-from` rules, so the resume rules
+    only take precedence if everything is merged into one file. The other rules are added in
+    the order rclone applies them: includes, excludes, filters, and the implicit exclude of
+    everything else that comes with include rules.
+    """
+    import tempfile
+
+    include_rules = [*(include or []), *_read_rule_lines(include_path)]
+    exclude_rules = [*(exclude or []), *_read_rule_lines(exclude_path)]
+    rules = [
+        *resume_rules,
+        *(f"+ {rule}" for rule in include_rules),
+        *(f"- {rule}" for rule in exclude_rules),
+        *(filter or []),
+    ]
+    content = "\n".join(rules) + "\n"
+    if filters_path is not None and Path(filters_path).exists():
+        content += Path(filters_path).read_text().rstrip("\n") + "\n"
+    if include_rules:
+        content += "- /**\n"
+
+    with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".rclone_filters") as f:
+        f.write(content)
+        return Path(f.name)
+
+# %% [markdown]
+# # Tests
+
+# %%
+import tempfile
+
+_tmp_path = Path(tempfile.mkdtemp(prefix="transfer_journal"))
+(_tmp_path / "local").mkdir()
+(_tmp_path / "local" / "file1.txt").write_text("Hello")
+
+journal = TransferJournal.open(_tmp_path / "journals", "01TESTULID", SyncDirection.PUSH)
+journal.handle_rclone_log_line(
+    '{"level":"info","msg":"Copied (new)","size":5,"object":"file1.txt"}'
+)
+journal.handle_rclone_log_line(
+    '{"level":"info","msg":"Copied (new)","size":3,"object":"deleted.txt"}'
+)
+
+_reopened = TransferJournal.open(_tmp_path / "journals", "01TESTULID", SyncDirection.PUSH)
+assert set(_reopened.entries) == {"file1.txt", "deleted.txt"}
+assert _reopened.get_resume_filter_rules(_tmp_path / "local") == ["- /file1.txt"]
+
+_reopened.discard()
+assert not _reopened.path.exists()
@@ -0,0 +1,290 @@
+# ---
+# jupyter:
+#   kernelspec:
+#     display_name: Python 3
+#     language: python
+#     name: python3
+# ---
+
+# %% [markdown]
+# # _utils.concurrency
+#
+# Adaptive concurrency limits for rclone operations.
+#
+# Each storage location gets an `AdaptiveLimiter` that uses AIMD (additive increase,
+# multiplicative decrease). The limit starts low (the `max_concurrent_rclone_ops` of the config)
+# and probes upward, up to the `max_concurrent_ops` of the storage location, or
+# `ADAPTIVE_LIMIT_MAX`:
+#
+# - Until the first back-off ("slow start"), every successful operation grows the limit by one,
+#   which doubles it with every "round" of operations. Afterwards, every successful operation
+#   grows it by `1/limit`, so roughly by one per round.
+# - The limit is halved when an operation hits throttling errors (e.g. HTTP 429/503 reported in
+#   rclone's stderr), or when latency rises: the median duration of the last
+#   `ADAPTIVE_LIMIT_LATENCY_WINDOW` successful operations exceeds
+#   `ADAPTIVE_LIMIT_LATENCY_RATIO` times the lowest such median since the last back-off. The
+#   baseline is reset by every back-off, so that a remote that stays slower does not keep
+#   pushing the limit down to its minimum.
+#
+# `run_cmd_async` takes a slot of the limiter in `current_limiter` (a context variable) for
+# every subprocess it runs, and reports the outcome of the subprocess back to it. `sync_box`
+# sets `current_limiter` to the limiter of the storage location of the box being synced.
+
+# %%
+#|default_exp _utils.concurrency
+
+# %%
+#|hide
+from nblite import nbl_export, show_doc; nbl_export();
+import boxyard._utils.concurrency as this_module
+
+# %%
+#|export
+import asyncio
+import re
+import statistics
+import time
+from collections import deque
+from contextvars import ContextVar
+from enum import Enum
+
+# %% [markdown]
+# # Constants
+
+# %%
+#|export
+ADAPTIVE_LIMIT_MIN = 1
+ADAPTIVE_LIMIT_MAX = 32
+ADAPTIVE_LIMIT_BACKOFF_FACTOR = 0.5
+ADAPTIVE_LIMIT_BACKOFF_COOLDOWN = 5.0  # seconds. Throttling within this window only backs off once.
+ADAPTIVE_LIMIT_LATENCY_WINDOW = 20  # Successful operations whose median duration is compared
+ADAPTIVE_LIMIT_LATENCY_RATIO = 2.0  # Back off when the median duration rises this much above its minimum
+
+# Error codes of common backends (case-sensitive, to not match file names in rclone's logs),
+# HTTP 429/503 statuses, and SFTP/SSH servers refusing more sessions
+_THROTTLING_PATTERN = re.compile(
+    r"\b(?:SlowDown|TooManyRequests|RequestLimitExceeded|ThrottlingException|rateLimitExceeded)\b|"
+    r"(?i:too many requests|service unavailable|\b(?:http|status|error|code)[ :=]*(?:429|503)\b|"
+    r"administratively prohibited|too many (?:connections|sessions))"
+)
+
+# %% [markdown]
+# # Outcomes
+
+# %%
+#|export
+class OpOutcome(Enum):
+    SUCCESS = "success"
+    THROTTLED = "throttled"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+# %%
+#|hide
+show_doc(this_module.is_throttling_error)
+
+# %%
+#|export
+def is_throttling_error(stderr: str) -> bool:
+    """Check if the stderr of an rclone command reports throttling by the remote."""
+    return _THROTTLING_PATTERN.search(stderr) is not None
+
+
+def get_op_outcome(returncode: int, stderr: str) -> OpOutcome:
+    """Classify the outcome of a finished subprocess."""
+    # rclone retries throttled requests internally, so throttling can be reported even on success
+    if is_throttling_error(stderr):
+        return OpOutcome.THROTTLED
+    return OpOutcome.SUCCESS if returncode == 0 else OpOutcome.FAILED
+
+# %%
+assert is_throttling_error("ERROR : file.txt: Failed to copy: HTTP error 429 (429 Too Many Requests)")
+assert is_throttling_error("SlowDown: Please reduce your request rate. status code: 503")
+assert not is_throttling_error('{"msg":"Copied (new)","object":"503.txt"}')
+assert not is_throttling_error('{"msg":"Copied (new)","object":"slowdown/throttle.py"}')
+assert get_op_outcome(1, "failed: directory not found") == OpOutcome.FAILED
+
+# %% [markdown]
+# # `AdaptiveLimiter`
+
+# %%
+#|export
+class AdaptiveLimiter:
+    """
+    An AIMD concurrency limiter, that backs off on throttling and on rising latency.
+
+    Usage:
+        await limiter.acquire()
+        try:
+            ...
+        finally:
+            limiter.release(outcome, duration)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int,
+        min_limit: int = ADAPTIVE_LIMIT_MIN,
+        max_limit: int = ADAPTIVE_LIMIT_MAX,
+        backoff_factor: float = ADAPTIVE_LIMIT_BACKOFF_FACTOR,
+        backoff_cooldown: float = ADAPTIVE_LIMIT_BACKOFF_COOLDOWN,
+        latency_window: int = ADAPTIVE_LIMIT_LATENCY_WINDOW,
+        latency_ratio: float = ADAPTIVE_LIMIT_LATENCY_RATIO,
+    ):
+        if min_limit < 1 or max_limit < min_limit:
+            raise ValueError(f"Invalid limits: min_limit={min_limit}, max_limit={max_limit}")
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_factor = backoff_factor
+        self.backoff_cooldown = backoff_cooldown
+        self.latency_ratio = latency_ratio
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._slow_start = True
+        self._last_backoff_at = float("-inf")
+        self._durations: deque[float] = deque(maxlen=latency_window)
+        self._min_median_duration = float("inf")
+        self._waiters: deque[asyncio.Future] = deque()
+        self.in_flight = 0
+        self.num_throttled = 0
+        self.num_latency_backoffs = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def set_max_limit(self, max_limit: int) -> None:
+        if max_limit < self.min_limit:
+            raise ValueError(f"Invalid limits: min_limit={self.min_limit}, max_limit={max_limit}")
+        self.max_limit = max_limit
+        self._limit = min(self._limit, max_limit)
+
+    async def acquire(self) -> None:
+        while self.in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif waiter.done() and not waiter.cancelled():
+                    self._wake_waiters()  # Pass on the wake-up we were given
+                raise
+        self.in_flight += 1
+
+    def release(self, outcome: OpOutcome = OpOutcome.SUCCESS, duration: float | None = None) -> None:
+        """Release a slot, reporting the outcome and duration (in seconds) of the operation."""
+        self.in_flight -= 1
+        if outcome == OpOutcome.SUCCESS:
+            if duration is not None and self._is_latency_rising(duration):
+                if self._back_off():
+                    self.num_latency_backoffs += 1
+            elif self._slow_start:
+                self._limit = min(self.max_limit, self._limit + 1)
+            else:
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+        elif outcome == OpOutcome.THROTTLED:
+            self.num_throttled += 1
+            self._back_off()
+        self._wake_waiters()
+
+    def _is_latency_rising(self, duration: float) -> bool:
+        self._durations.append(duration)
+        if len(self._durations) < self._durations.maxlen:
+            return False
+        median_duration = statistics.median(self._durations)
+        self._min_median_duration = min(self._min_median_duration, median_duration)
+        return median_duration > self.latency_ratio * self._min_median_duration
+
+    def _back_off(self) -> bool:
+        """Halve the limit, unless it was already halved within the cooldown. Returns whether it was."""
+        now = time.monotonic()
+        if now - self._last_backoff_at < self.backoff_cooldown:
+            return False
+        self._last_backoff_at = now
+        self._slow_start = False
+        self._limit = max(self.min_limit, self._limit * self.backoff_factor)
+        # Judge the latency at the new limit on fresh durations, against a fresh baseline
+        self._durations.clear()
+        self._min_median_duration = float("inf")
+        return True
+
+    def _wake_waiters(self) -> None:
+        free_slots = self.limit - self.in_flight
+        while free_slots > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free_slots -= 1
+
+    def __repr__(self) -> str:
+        return f"AdaptiveLimiter({self.name!r}, limit={self.limit}, in_flight={self.in_flight})"
+
+# %%
+async def _example():
+    limiter = AdaptiveLimiter("example", initial_limit=2)
+    max_in_flight = 0
+
+    async def _op():
+        nonlocal max_in_flight
+        await limiter.acquire()
+        max_in_flight = max(max_in_flight, limiter.in_flight)
+        await asyncio.sleep(0.01)
+        limiter.release(OpOutcome.SUCCESS)
+
+    await asyncio.gather(*[_op() for _ in range(20)])
+    assert limiter.limit > 2
+    assert max_in_flight > 2
+
+    limit_before = limiter._limit
+    await limiter.acquire()
+    limiter.release(OpOutcome.THROTTLED)
+    assert limiter.limit == max(1, int(limit_before * 0.5))
+    return limiter
+
+await _example()
+
+# %% [markdown]
+# # Per-storage-location limiters
+
+# %%
+#|export
+current_limiter: ContextVar[AdaptiveLimiter | None] = ContextVar(
+    "current_limiter", default=None
+)
+
+_storage_location_limiters: dict[str, AdaptiveLimiter] = {}
+
+
+def get_storage_location_limiter(
+    storage_location: str,
+    initial_limit: int,
+    max_limit: int | None = None,
+) -> AdaptiveLimiter:
+    """
+    Get the limiter of a storage location, creating it on first use.
+
+    The limiter is shared by all syncs of the storage location within the process. It starts
+    at `initial_limit`, and grows up to `max_limit`, the cap configured for the storage location
+    (`StorageConfig.max_concurrent_ops`), or `ADAPTIVE_LIMIT_MAX` if there is none.
+    """
+    max_limit = max_limit if max_limit is not None else ADAPTIVE_LIMIT_MAX
+    if storage_location not in _storage_location_limiters:
+        _storage_location_limiters[storage_location] = AdaptiveLimiter(
+            name=storage_location, initial_limit=initial_limit, max_limit=max_limit
+        )
+    limiter = _storage_location_limiters[storage_location]
+    if limiter.max_limit != max_limit:
+        limiter.set_max_limit(max_limit)
+    return limiter
+
+
+def get_storage_location_limiters() -> dict[str, AdaptiveLimiter]:
+    return dict(_storage_location_limiters)
+
+# %%
+assert get_storage_location_limiter("sl", 3) is get_storage_location_limiter("sl", 5)
+assert get_storage_location_limiter("sl", 3).limit == 3
+assert get_storage_location_limiter("sl", 3, max_limit=2).limit == 2
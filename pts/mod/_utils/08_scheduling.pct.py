@@ -0,0 +1,466 @@
+# ---
+# jupyter:
+#   kernelspec:
+#     display_name: Python 3
+#     language: python
+#     name: python3
+# ---
+
+# %% [markdown]
+# # _utils.scheduling
+#
+# Scheduling of many concurrent jobs (e.g. box syncs in `multi-sync`) that are grouped by a
+# key (e.g. the storage location of the box).
+#
+# `round_robin_throttler` keeps one queue per key and, whenever a slot frees up, starts the
+# next job of the next key (in round-robin order) that is below its capacity. A slow key can
+# therefore not hold every slot while the jobs of other keys wait.
+#
+# Within a key, jobs are started in order of their priority (lowest first). Jobs can depend on
+# other jobs, in which case they are held back until those have finished.
+#
+# The `stream_*` variants pull their items lazily and yield the results as the jobs finish
+# instead of collecting them, so that memory use does not grow with the number of jobs.
+# `stream_round_robin_throttler` only holds `lookahead` queued items at a time, so priorities
+# and dependencies only apply among the items within the lookahead.
+
+# %%
+#|default_exp _utils.scheduling
+
+# %%
+#|hide
+from nblite import nbl_export, show_doc; nbl_export();
+import boxyard._utils.scheduling as this_module
+
+# %%
+#|export
+import asyncio
+import heapq
+import itertools
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Coroutine, Hashable, Iterable, TypeVar
+
+from boxyard._fast import get_topological_ranks
+
+T = TypeVar("T")
+
+ROUND_ROBIN_LOOKAHEAD = 1000  # Items queued at once by `stream_round_robin_throttler`
+
+# %% [markdown]
+# # `RoundRobinQueue`
+
+# %%
+#|export
+class RoundRobinQueue:
+    """
+    Per-key priority queues that are popped from in round-robin order of the keys.
+
+    - Within a key, items are popped in order of `priority` (lowest first), and in the order
+      they were pushed for equal priorities.
+    - A key is skipped while its number of in-flight items is at its capacity.
+    - An item that `depends_on` the ids of other items is held back until all of them are
+      `done`. If `remember_done` is False, the ids of done items are not kept, and an item
+      must only be pushed with dependencies on items that are not done yet.
+    """
+
+    def __init__(
+        self,
+        get_key_capacity: Callable[[Hashable], int] | None = None,
+        remember_done: bool = True,
+    ):
+        self.get_key_capacity = get_key_capacity
+        self.remember_done = remember_done
+        self._queues: dict[Hashable, list] = {}
+        self._key_order: deque[Hashable] = deque()
+        self._counter = itertools.count()
+        self._blocked: dict[Hashable, tuple[set, tuple]] = {}  # item_id -> (pending deps, entry)
+        self._dependents: dict[Hashable, list[Hashable]] = {}  # item_id -> blocked item ids
+        self._done_ids: set[Hashable] = set()
+        self.in_flight: dict[Hashable, int] = {}
+
+    def push(
+        self,
+        key: Hashable,
+        item: Any,
+        priority: Any = 0,
+        item_id: Hashable | None = None,
+        depends_on: Iterable[Hashable] = (),
+    ) -> None:
+        if depends_on and item_id is None:
+            raise ValueError("An item with dependencies needs an `item_id`.")
+        entry = (key, (priority, next(self._counter), item_id, item))
+        pending_deps = {d for d in depends_on if d not in self._done_ids and d != item_id}
+        if pending_deps:
+            self._blocked[item_id] = (pending_deps, entry)
+            for dep in pending_deps:
+                self._dependents.setdefault(dep, []).append(item_id)
+        else:
+            self._enqueue(*entry)
+
+    def _enqueue(self, key: Hashable, heap_entry: tuple) -> None:
+        if key not in self._queues:
+            self._queues[key] = []
+            self._key_order.append(key)
+            self.in_flight.setdefault(key, 0)
+        heapq.heappush(self._queues[key], heap_entry)
+
+    def pop(self) -> tuple[Hashable, Any] | None:
+        """Pop the next item of the next key with spare capacity, and mark it in flight."""
+        for _ in range(len(self._key_order)):
+            key = self._key_order[0]
+            self._key_order.rotate(-1)
+            capacity = self.get_key_capacity(key) if self.get_key_capacity else None
+            if capacity is not None and self.in_flight[key] >= capacity:
+                continue
+            _, _, _, item = heapq.heappop(self._queues[key])
+            if not self._queues[key]:
+                del self._queues[key]
+                self._key_order.remove(key)
+            self.in_flight[key] += 1
+            return key, item
+        return None
+
+    def done(self, key: Hashable, item_id: Hashable | None = None) -> None:
+        """Mark an in-flight item as done, releasing the items that only waited for it."""
+        self.in_flight[key] -= 1
+        if item_id is None:
+            return
+        if self.remember_done:
+            self._done_ids.add(item_id)
+        for dependent_id in self._dependents.pop(item_id, []):
+            pending_deps, entry = self._blocked[dependent_id]
+            pending_deps.discard(item_id)
+            if not pending_deps:
+                del self._blocked[dependent_id]
+                self._enqueue(*entry)
+
+    def release_blocked(self) -> None:
+        """Release all items held back by dependencies (e.g. to break a dependency cycle)."""
+        for pending_deps, entry in self._blocked.values():
+            self._enqueue(*entry)
+        self._blocked.clear()
+        self._dependents.clear()
+
+    @property
+    def num_blocked(self) -> int:
+        return len(self._blocked)
+
+    def __len__(self) -> int:
+        return sum(len(q) for q in self._queues.values()) + len(self._blocked)
+
+# %%
+_q = RoundRobinQueue(get_key_capacity=lambda key: 1 if key == "slow" else None)
+for i in range(3):
+    _q.push("slow", f"slow_{i}")
+    _q.push("fast", f"fast_{i}")
+
+assert [_q.pop()[1] for _ in range(4)] == ["slow_0", "fast_0", "fast_1", "fast_2"]
+assert _q.pop() is None  # "slow" is at capacity
+_q.done("slow")
+assert _q.pop() == ("slow", "slow_1")
+
+# %%
+_q = RoundRobinQueue()
+_q.push("k", "child", priority=0, item_id="child", depends_on=["parent"])
+_q.push("k", "parent", priority=2, item_id="parent")
+_q.push("k", "other", priority=1, item_id="other")
+assert _q.pop() == ("k", "other")
+assert _q.pop() == ("k", "parent")
+assert _q.pop() is None  # "child" waits for "parent"
+_q.done("k", "parent")
+assert _q.pop() == ("k", "child")
+
+# %% [markdown]
+# # `stream_throttler`
+
+# %%
+#|hide
+show_doc(this_module.stream_throttler)
+
+# %%
+#|export
+async def stream_throttler(
+    items: Iterable[T],
+    worker: Callable[[T], Coroutine],
+    max_concurrency: int,
+    ordered: bool = False,
+) -> AsyncIterator[tuple[T, Any]]:
+    """
+    Run `worker(item)` for all items with at most `max_concurrency` running at once, and
+    yield `(item, result)` as the workers finish.
+
+    Items are pulled from `items` only once there is a free slot for them, so `items` can be
+    a lazy iterator over any number of items. If a worker raised, the exception is yielded as
+    its result.
+
+    If `ordered`, the results are yielded in the order of `items`. A finished item then keeps
+    its slot until all items before it have been yielded, so that at most `max_concurrency`
+    results are ever held back.
+
+    Workers that are still running when the consumer stops iterating are cancelled.
+    """
+    if max_concurrency < 1:
+        raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+    iterator = iter(items)
+    exhausted = False
+
+    async def _run(item: T) -> Any:
+        try:
+            return await worker(item)
+        except Exception as e:
+            return e
+
+    def _start_next() -> tuple[T, asyncio.Task] | None:
+        nonlocal exhausted
+        if exhausted:
+            return None
+        for item in iterator:
+            return item, asyncio.create_task(_run(item))
+        exhausted = True
+        return None
+
+    window: deque[tuple[T, asyncio.Task]] = deque()
+    running: dict[asyncio.Task, T] = {}
+    try:
+        if ordered:
+            while True:
+                while len(window) < max_concurrency and (started := _start_next()):
+                    window.append(started)
+                if not window:
+                    break
+                item, task = window[0]
+                result = await task
+                window.popleft()
+                yield item, result
+        else:
+            while True:
+                while len(running) < max_concurrency and (started := _start_next()):
+                    running[started[1]] = started[0]
+                if not running:
+                    break
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield running.pop(task), task.result()
+    finally:
+        for _, task in window:
+            task.cancel()
+        for task in running:
+            task.cancel()
+
+# %%
+async def _job(i):
+    await asyncio.sleep(0.01 * (3 - i % 3))
+    return i * 2
+
+
+_res = [r async for _, r in stream_throttler(range(6), _job, max_concurrency=3)]
+assert sorted(_res) == [0, 2, 4, 6, 8, 10] and _res != sorted(_res)
+
+_res = [r async for _, r in stream_throttler(range(6), _job, max_concurrency=3, ordered=True)]
+assert _res == [0, 2, 4, 6, 8, 10]
+
+# %% [markdown]
+# # `round_robin_throttler`
+
+# %%
+#|hide
+show_doc(this_module.stream_round_robin_throttler)
+
+# %%
+#|export
+async def stream_round_robin_throttler(
+    items: Iterable[T],
+    get_key: Callable[[T], Hashable],
+    worker: Callable[[T], Coroutine],
+    max_concurrency: int,
+    get_key_capacity: Callable[[Hashable], int] | None = None,
+    get_priority: Callable[[T], Any] | None = None,
+    get_id: Callable[[T], Hashable] | None = None,
+    get_dependencies: Callable[[T], Iterable[Hashable]] | None = None,
+    lookahead: int = ROUND_ROBIN_LOOKAHEAD,
+) -> AsyncIterator[tuple[T, Any]]:
+    """
+    Run `worker(item)` for all items, with at most `max_concurrency` running at once and at
+    most `get_key_capacity(key)` running at once per key, and yield `(item, result)` as the
+    workers finish. Free slots are handed out to the keys in round-robin order.
+
+    The capacity of a key is re-evaluated every time a slot frees up, so it can change while
+    the jobs run (e.g. the current limit of an `AdaptiveLimiter`).
+
+    Items are pulled from `items` lazily, so that at most `lookahead` of them are queued at
+    once, and `get_key`, `get_priority`, `get_id` and `get_dependencies` are called on an item
+    when it is pulled. Within a key, the queued items are started in order of
+    `get_priority(item)` (lowest first), and in the order of `items` otherwise.
+
+    If `get_dependencies` is given, an item is only started once the items whose `get_id(item)`
+    it depends on have finished (whether or not they succeeded). Only the items that were
+    pulled before it count, so `items` should list dependencies first. Dependencies on other
+    ids are ignored, and dependency cycles are broken by starting the blocked items once nothing
+    else can run.
+
+    If a worker raised, the exception is yielded as its result.
+    """
+    if get_dependencies is not None and get_id is None:
+        raise ValueError("`get_dependencies` requires `get_id`.")
+    if lookahead < 1:
+        raise ValueError(f"lookahead must be at least 1, got {lookahead}")
+    queue = RoundRobinQueue(get_key_capacity, remember_done=False)
+    iterator = iter(items)
+    exhausted = False
+    unfinished_ids: set[Hashable] = set()  # The ids of the pulled items that have not finished
+
+    def _pull() -> None:
+        nonlocal exhausted
+        for item in iterator:
+            item_id = get_id(item) if get_id else None
+            depends_on = get_dependencies(item) if get_dependencies else ()
+            queue.push(
+                get_key(item),
+                (item, item_id),
+                priority=get_priority(item) if get_priority else 0,
+                item_id=item_id,
+                depends_on=[d for d in depends_on if d in unfinished_ids],
+            )
+            if item_id is not None:
+                unfinished_ids.add(item_id)
+            return
+        exhausted = True
+
+    async def _run(key: Hashable, entry: tuple[T, Hashable]) -> Any:
+        item, item_id = entry
+        try:
+            return await worker(item)
+        except Exception as e:
+            return e
+        finally:
+            unfinished_ids.discard(item_id)
+            queue.done(key, item_id)
+
+    running: dict[asyncio.Task, T] = {}
+    try:
+        while True:
+            while not exhausted and len(queue) < lookahead:
+                _pull()
+            while len(running) < max_concurrency:
+                popped = queue.pop()
+                if popped is None:
+                    break
+                running[asyncio.create_task(_run(*popped))] = popped[1][0]
+            if not running:
+                if queue.num_blocked:
+                    # Only items in a dependency cycle are left
+                    queue.release_blocked()
+                    continue
+                if len(queue):
+                    # Every key with pending items reports a capacity of zero
+                    raise RuntimeError("No capacity left to run the remaining items.")
+                break
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield running.pop(task), task.result()
+    finally:
+        for task in running:
+            task.cancel()
+
+# %%
+#|hide
+show_doc(this_module.round_robin_throttler)
+
+# %%
+#|export
+async def round_robin_throttler(
+    items: Iterable[T],
+    get_key: Callable[[T], Hashable],
+    worker: Callable[[T], Coroutine],
+    max_concurrency: int,
+    get_key_capacity: Callable[[Hashable], int] | None = None,
+    get_priority: Callable[[T], Any] | None = None,
+    get_id: Callable[[T], Hashable] | None = None,
+    get_dependencies: Callable[[T], Iterable[Hashable]] | None = None,
+) -> list[Any]:
+    """
+    Like `stream_round_robin_throttler`, but returns the results in the order of `items`.
+    All items are queued at once, so priorities apply across all of them, and dependencies
+    are honoured in whichever order the items are listed.
+
+    As with `async_throttler`, if any worker raised, the first exception is raised once all
+    workers have finished.
+    """
+    items = list(items)
+    results: list[Any] = [None] * len(items)
+    order = range(len(items))
+    if get_dependencies is not None and get_id is not None:
+        # Pull the items with their dependencies first (unless there is a cycle)
+        rows = {get_id(item): i for i, item in enumerate(items)}
+        ranks = get_topological_ranks([
+            [rows[d] for d in get_dependencies(item) if d in rows and rows[d] != i]
+            for i, item in enumerate(items)
+        ])
+        if ranks is not None:
+            order = sorted(order, key=ranks.__getitem__)
+    async for (i, _), result in stream_round_robin_throttler(
+        ((i, items[i]) for i in order),
+        get_key=lambda pair: get_key(pair[1]),
+        worker=lambda pair: worker(pair[1]),
+        max_concurrency=max_concurrency,
+        get_key_capacity=get_key_capacity,
+        get_priority=(lambda pair: get_priority(pair[1])) if get_priority else None,
+        get_id=(lambda pair: get_id(pair[1])) if get_id else None,
+        get_dependencies=(lambda pair: get_dependencies(pair[1])) if get_dependencies else None,
+        lookahead=max(len(items), 1),
+    ):
+        results[i] = result
+
+    for r in results:
+        if isinstance(r, Exception):
+            raise r
+    return results
+
+# %%
+_order = []
+
+
+async def _job(item):
+    key, i = item
+    _order.append(item)
+    await asyncio.sleep(0.05 if key == "slow" else 0.01)
+    return item
+
+
+_items = [("slow", i) for i in range(4)] + [("fast", i) for i in range(4)]
+_res = await round_robin_throttler(
+    _items,
+    get_key=lambda item: item[0],
+    worker=_job,
+    max_concurrency=2,
+    get_key_capacity=lambda key: 1,
+)
+assert _res == _items
+# The fast jobs are not stuck behind the slow ones
+assert _order[:3] == [("slow", 0), ("fast", 0), ("fast", 1)]
+
+# %%
+_order = []
+
+
+async def _job(item):
+    _order.append(item["name"])
+    await asyncio.sleep(0.01)
+
+
+_items = [
+    {"name": "child", "parent": "parent", "size": 1},
+    {"name": "big", "parent": None, "size": 100},
+    {"name": "parent", "parent": None, "size": 10},
+]
+await round_robin_throttler(
+    _items,
+    get_key=lambda item: "sl",
+    worker=_job,
+    max_concurrency=1,
+    get_priority=lambda item: item["size"],
+    get_id=lambda item: item["name"],
+    get_dependencies=lambda item: [item["parent"]] if item["parent"] else [],
+)
+# Smallest first, but the child waits for its parent
+assert _order == ["parent", "child", "big"]
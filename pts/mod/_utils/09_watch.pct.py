@@ -0,0 +1,368 @@
+# ---
+# jupyter:
+#   kernelspec:
+#     display_name: Python 3
+#     language: python
+#     name: python3
+# ---
+
+# %% [markdown]
+# # _utils.watch
+#
+# Watching directory trees for changes, and debouncing the changes (used by `sync --watch`).
+#
+# Watchers report changes per *key* (e.g. a box), where a key can watch several paths:
+#
+# - `InotifyWatcher` uses Linux's inotify (through ctypes, so no extra dependency), with one
+#   watch per directory of the watched trees. Directories that are created later are watched
+#   as they appear.
+# - `PollingWatcher` is the fallback on other platforms (or when inotify runs out of
+#   watches): it compares the size, number of files and last modification of the watched
+#   trees every `poll_interval` seconds.
+#
+# `ChangeDebouncer` turns the stream of changes into batches of keys to act on: a key is
+# ready once it has been quiet for `quiet_period` seconds, and the ready keys of a group (e.g.
+# a storage location) are released together, at most once every `min_interval` seconds.
+
+# %%
+#|default_exp _utils.watch
+
+# %%
+#|hide
+from nblite import nbl_export, show_doc; nbl_export();
+import boxyard._utils.watch as this_module
+
+# %%
+#|export
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Callable, Hashable
+
+# %% [markdown]
+# # `ChangeDebouncer`
+
+# %%
+#|hide
+show_doc(this_module.ChangeDebouncer)
+
+# %%
+#|export
+class ChangeDebouncer:
+    """
+    Debounces changes per key, and coalesces and rate-limits the ready keys per group.
+
+    - A key is ready once no change was recorded for it for `quiet_period` seconds.
+    - A key that is in flight (popped, but not yet `finish`ed) is never ready. Changes
+      recorded while it is in flight make it ready again after it has finished.
+    - All ready keys of a group are popped together, and a group is popped from at most once
+      every `min_interval` seconds.
+
+    Times are passed in explicitly (e.g. `time.monotonic()`), which keeps the class free of
+    any clock.
+    """
+
+    def __init__(self, quiet_period: float, min_interval: float = 0.0):
+        self.quiet_period = quiet_period
+        self.min_interval = min_interval
+        self._last_change: dict[Hashable, float] = {}
+        self._key_groups: dict[Hashable, Hashable] = {}
+        self._group_last_popped: dict[Hashable, float] = {}
+        self.in_flight: set[Hashable] = set()
+
+    def record_change(self, key: Hashable, group: Hashable, now: float) -> None:
+        self._last_change[key] = now
+        self._key_groups[key] = group
+
+    def finish(self, key: Hashable) -> None:
+        self.in_flight.discard(key)
+
+    def discard(self, key: Hashable) -> None:
+        """Forget the pending change of a key (e.g. one that is no longer watched)."""
+        self._last_change.pop(key, None)
+        self._key_groups.pop(key, None)
+
+    @property
+    def num_pending(self) -> int:
+        return len(self._last_change)
+
+    def _get_ready_time(self, key: Hashable) -> float:
+        group_ready_time = self._group_last_popped.get(self._key_groups[key])
+        ready_time = self._last_change[key] + self.quiet_period
+        if group_ready_time is not None:
+            ready_time = max(ready_time, group_ready_time + self.min_interval)
+        return ready_time
+
+    def pop_ready(self, now: float) -> dict[Hashable, list[Hashable]]:
+        """Pop the ready keys, grouped by their group, and mark them as in flight."""
+        ready: dict[Hashable, list[Hashable]] = {}
+        for key in list(self._last_change):
+            if key not in self.in_flight and self._get_ready_time(key) <= now:
+                ready.setdefault(self._key_groups[key], []).append(key)
+        for group, keys in ready.items():
+            self._group_last_popped[group] = now
+            for key in keys:
+                del self._last_change[key]
+                self.in_flight.add(key)
+        return ready
+
+    def get_next_ready_time(self) -> float | None:
+        """The time at which the next key becomes ready, or None if no key is waiting."""
+        ready_times = [
+            self._get_ready_time(key) for key in self._last_change if key not in self.in_flight
+        ]
+        return min(ready_times, default=None)
+
+# %%
+debouncer = ChangeDebouncer(quiet_period=2, min_interval=10)
+debouncer.record_change("a", "sl1", now=0)
+debouncer.record_change("b", "sl1", now=1)
+debouncer.record_change("a", "sl1", now=1.5)  # Burst of writes to "a"
+assert debouncer.pop_ready(now=2) == {}
+assert debouncer.get_next_ready_time() == 3
+assert debouncer.pop_ready(now=3.5) == {"sl1": ["a", "b"]}  # Coalesced
+
+debouncer.record_change("a", "sl1", now=4)  # Changed while in flight
+debouncer.finish("a")
+assert debouncer.get_next_ready_time() == 13.5  # Rate-limited
+assert debouncer.pop_ready(now=13.5) == {"sl1": ["a"]}
+
+# %% [markdown]
+# # inotify
+
+# %%
+#|export
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_DONT_FOLLOW = 0x02000000
+_IN_ISDIR = 0x40000000
+
+_IN_WATCH_MASK = (
+    _IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE
+    | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR | _IN_DONT_FOLLOW
+)
+
+_INOTIFY_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (followed by the name)
+_INOTIFY_READ_SIZE = 64 * 1024
+
+_libc = None
+
+
+def _get_libc():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    return _libc
+
+
+def is_inotify_available() -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        return hasattr(_get_libc(), "inotify_init1")
+    except OSError:
+        return False
+
+# %% [markdown]
+# # Watchers
+
+# %%
+#|hide
+show_doc(this_module.InotifyWatcher)
+
+# %%
+#|export
+class InotifyWatcher:
+    """
+    Watches directory trees with inotify, and calls `on_change(key)` from the event loop
+    whenever something in a tree of `key` changed.
+
+    Raises `OSError` if inotify is not available, or if a watch can not be added (e.g.
+    because `fs.inotify.max_user_watches` is exhausted).
+    """
+
+    def __init__(self, on_change: Callable[[Hashable], None]):
+        if not is_inotify_available():
+            raise OSError("inotify is not available on this platform.")
+        self.on_change = on_change
+        self._fd = _get_libc().inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._watches: dict[int, tuple[Hashable, Path]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _add_watch(self, key: Hashable, path: Path) -> None:
+        wd = _get_libc().inotify_add_watch(self._fd, os.fsencode(path), _IN_WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"Could not watch '{path}': {os.strerror(errno)}")
+        self._watches[wd] = (key, path)
+
+    def _add_tree(self, key: Hashable, path: Path) -> None:
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            try:
+                self._add_watch(key, current)
+                with os.scandir(current) as entries:
+                    stack.extend(
+                        Path(entry.path) for entry in entries if entry.is_dir(follow_symlinks=False)
+                    )
+            except (FileNotFoundError, NotADirectoryError):
+                continue  # Removed while we were walking it
+
+    def add(self, key: Hashable, path: Path) -> None:
+        """Watch the directory tree at `path` for `key`."""
+        self._add_tree(key, Path(path))
+
+    def remove(self, key: Hashable) -> None:
+        """Stop watching the trees of `key`."""
+        for wd, (watch_key, _) in list(self._watches.items()):
+            if watch_key == key:
+                _get_libc().inotify_rm_watch(self._fd, wd)
+                del self._watches[wd]
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self._fd, self._read_events)
+
+    def _read_events(self) -> None:
+        changed_keys = set()
+        while True:
+            try:
+                data = os.read(self._fd, _INOTIFY_READ_SIZE)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, name_len = _INOTIFY_EVENT.unpack_from(data, offset)
+                offset += _INOTIFY_EVENT.size
+                name = data[offset:offset + name_len].rstrip(b"\0")
+                offset += name_len
+                if mask & _IN_Q_OVERFLOW:
+                    # Events were dropped, so anything could have changed
+                    changed_keys.update(key for key, _ in self._watches.values())
+                    continue
+                if wd not in self._watches:
+                    continue
+                key, dir_path = self._watches[wd]
+                if mask & _IN_IGNORED:
+                    del self._watches[wd]
+                    continue
+                changed_keys.add(key)
+                if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO):
+                    try:
+                        self._add_tree(key, dir_path / os.fsdecode(name))
+                    except OSError:
+                        pass  # The change is reported regardless
+        for key in changed_keys:
+            self.on_change(key)
+
+    def close(self) -> None:
+        if self._loop is not None:
+            self._loop.remove_reader(self._fd)
+            self._loop = None
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+# %%
+#|hide
+show_doc(this_module.PollingWatcher)
+
+# %%
+#|export
+class PollingWatcher:
+    """
+    Watches directory trees (or files) by comparing their size, number of files and last
+    modification every `poll_interval` seconds, and calls `on_change(key)` whenever something
+    in a tree of `key` changed.
+    """
+
+    def __init__(self, on_change: Callable[[Hashable], None], poll_interval: float = 5.0):
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self._paths: dict[Hashable, list[Path]] = {}
+        self._fingerprints: dict[Hashable, list] = {}
+        self._task: asyncio.Task | None = None
+
+    def _get_fingerprint(self, paths: list[Path]) -> list:
+        from boxyard._utils.base import get_dir_stats
+
+        fingerprint = []
+        for path in paths:
+            if path.is_dir():
+                fingerprint.append(tuple(get_dir_stats(path)))
+            elif path.exists():
+                stat_result = path.stat()
+                fingerprint.append((stat_result.st_size, 1, stat_result.st_mtime))
+            else:
+                fingerprint.append(None)
+        return fingerprint
+
+    def add(self, key: Hashable, path: Path) -> None:
+        """Watch the directory tree (or file) at `path` for `key`."""
+        self._paths.setdefault(key, []).append(Path(path))
+        self._fingerprints[key] = self._get_fingerprint(self._paths[key])
+
+    def remove(self, key: Hashable) -> None:
+        """Stop watching the trees (or files) of `key`."""
+        self._paths.pop(key, None)
+        self._fingerprints.pop(key, None)
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            for key, paths in list(self._paths.items()):
+                fingerprint = await asyncio.to_thread(self._get_fingerprint, paths)
+                if key not in self._fingerprints:
+                    continue  # Removed while it was being polled
+                if fingerprint != self._fingerprints[key]:
+                    self._fingerprints[key] = fingerprint
+                    self.on_change(key)
+
+    def start(self) -> None:
+        self._task = asyncio.get_running_loop().create_task(self._poll())
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+# %%
+import tempfile
+
+async def _demo(watcher_cls, **kwargs):
+    changes = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        (tmp_dir / "box" / "sub").mkdir(parents=True)
+        watcher = watcher_cls(changes.append, **kwargs)
+        watcher.add("box", tmp_dir / "box")
+        watcher.start()
+        await asyncio.sleep(0.1)
+        (tmp_dir / "box" / "sub" / "new_dir").mkdir()
+        await asyncio.sleep(0.2)
+        (tmp_dir / "box" / "sub" / "new_dir" / "file.txt").write_text("hello")
+        await asyncio.sleep(0.2)
+        watcher.close()
+    return changes
+
+if is_inotify_available():
+    print(await _demo(InotifyWatcher))
+print(await _demo(PollingWatcher, poll_interval=0.05))
@@ -0,0 +1,180 @@
+# ---
+# jupyter:
+#   kernelspec:
+#     display_name: Python 3
+#     language: python
+#     name: python3
+# ---
+
+# %% [markdown]
+# # _utils.backup_purge_queue
+#
+# Once a sync has completed, its backup dir (the files that the sync replaced or deleted) is no
+# longer needed. Instead of purging it on the critical path of every part sync, `sync_helper`
+# appends it to a persistent purge queue, which is drained in the background or at the end of a
+# batch of syncs, with a single `rclone delete` per backups root (i.e. per storage location, and
+# one for the local backups).
+#
+# Only the backups of completed syncs are queued, so deferring the purge does not change what a
+# retry of an interrupted sync can rely on. As the queue is persisted, a crash before the queue
+# is drained only delays the purge, and entries that fail to purge are put back in the queue.
+#
+# A drain renames the queue file to a `.draining` file, which it only deletes once the entries
+# that failed to purge are back in the queue, so the entries of a drain that crashes are picked
+# up by the next drain. A drain that runs at the same time as another may purge the other's
+# entries too, which is harmless, as missing backups are ignored.
+
+# %%
+#|default_exp _utils.backup_purge_queue
+
+# %%
+#|hide
+from nblite import nbl_export, show_doc; nbl_export();
+import boxyard._utils.backup_purge_queue as this_module
+
+# %%
+#|export
+import asyncio
+import json
+from pathlib import Path
+from typing import NamedTuple
+
+from filelock import FileLock
+
+# %% [markdown]
+# # `BackupPurgeQueue`
+
+# %%
+#|export
+class PurgeQueueEntry(NamedTuple):
+    remote: str  # "" for local backups
+    backups_path: str
+    backup_name: str
+
+
+class BackupPurgeQueue:
+    """
+    Persistent queue of the sync backup dirs to purge.
+
+    File format (JSON lines):
+        {"remote": ..., "backups_path": ..., "backup_name": ...}
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.draining_path = self.path.with_name(self.path.name + ".draining")
+
+    def _get_lock(self) -> FileLock:
+        return FileLock(self.path.with_name(self.path.name + ".lock"))
+
+    def _append(self, entries: list[PurgeQueueEntry]) -> None:
+        with self._get_lock():
+            self._append_unlocked(entries)
+
+    def _append_unlocked(self, entries: list[PurgeQueueEntry]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a") as f:
+            f.writelines(json.dumps(entry._asdict()) + "\n" for entry in entries)
+
+    def add(self, remote: str, backups_path: str | Path, backup_name: str) -> None:
+        self._append([PurgeQueueEntry(remote, Path(backups_path).as_posix(), backup_name)])
+
+    def has_entries(self) -> bool:
+        """Whether there are queued entries, or entries left behind by a drain that crashed."""
+        for path in (self.path, self.draining_path):
+            try:
+                if path.stat().st_size > 0:
+                    return True
+            except FileNotFoundError:
+                pass
+        return False
+
+    def get_entries(self) -> list[PurgeQueueEntry]:
+        return self._read_entries(self.path)
+
+    @staticmethod
+    def _read_entries(path: Path) -> list[PurgeQueueEntry]:
+        if not path.exists():
+            return []
+        entries = []
+        for line in path.read_text().splitlines():
+            try:
+                entries.append(PurgeQueueEntry(**json.loads(line)))
+            except (json.JSONDecodeError, TypeError):
+                continue  # A line torn by a crash
+        return entries
+
+    def _take_entries(self) -> list[PurgeQueueEntry]:
+        """
+        Move the queued entries to the `.draining` file, and return all of its entries,
+        including those left behind by a drain that crashed.
+        """
+        with self._get_lock():
+            if self.path.exists():
+                if self.draining_path.exists():
+                    with self.draining_path.open("a") as f:
+                        # After a newline, in case the last line was torn by a crash
+                        f.write("\n" + self.path.read_text())
+                    self.path.unlink()
+                else:
+                    self.path.rename(self.draining_path)
+            entries = self._read_entries(self.draining_path)
+        return list(dict.fromkeys(entries))
+
+    def _finish_draining(self, failed_entries: list[PurgeQueueEntry]) -> None:
+        with self._get_lock():
+            if failed_entries:
+                self._append_unlocked(failed_entries)
+            self.draining_path.unlink(missing_ok=True)
+
+    async def drain(self, rclone_config_path: str) -> int:
+        """
+        Purge the queued backups, with one `rclone delete` per backups root. The entries that
+        fail to purge are put back in the queue. Returns the number of purged backups.
+        """
+        from boxyard._utils import rclone_purge_dirs
+
+        entries = self._take_entries()
+        groups: dict[tuple[str, str], list[PurgeQueueEntry]] = {}
+        for entry in entries:
+            groups.setdefault((entry.remote, entry.backups_path), []).append(entry)
+
+        results = await asyncio.gather(*[
+            rclone_purge_dirs(
+                rclone_config_path=rclone_config_path,
+                source=remote,
+                source_path=backups_path,
+                dir_names=[entry.backup_name for entry in group],
+            )
+            for (remote, backups_path), group in groups.items()
+        ])
+
+        failed_entries = [
+            entry
+            for success, group in zip(results, groups.values(), strict=True)
+            if not success
+            for entry in group
+        ]
+        self._finish_draining(failed_entries)
+        return len(entries) - len(failed_entries)
+
+# %%
+import tempfile
+
+_path = Path(tempfile.mkdtemp(prefix="backup_purge_queue", dir="/tmp"))
+(_path / "rclone.conf").write_text(f"""
+[my_remote]
+type = alias
+remote = {_path / "my_remote"}
+""")
+for _name in ["a", "b"]:
+    (_path / "my_remote" / "sync_backups" / _name).mkdir(parents=True)
+    (_path / "my_remote" / "sync_backups" / _name / "file.txt").write_text("backup")
+
+_queue = BackupPurgeQueue(_path / "purge_queue.jsonl")
+_queue.add("my_remote", "sync_backups", "a")
+_queue.add("my_remote", "sync_backups", "b")
+assert _queue.has_entries()
+assert await _queue.drain((_path / "rclone.conf").as_posix()) == 2
+assert list((_path / "my_remote" / "sync_backups").iterdir()) == []
+assert not _queue.has_entries()
@@ -20,7 +20,9 @@ from nblite import nbl_export, show_doc; nbl_export();
 # %%
 #|top_export
 from pathlib import Path
+from typing import Any, Callable
 import asyncio
+import time
 
 from boxyard._utils.sync_helper import sync_helper, SyncSetting, SyncDirection
 from boxyard._models import SyncStatus, BoxPart, BoxMeta, SyncCondition
@@ -34,6 +36,10 @@ from boxyard._utils.locking import BoxyardLockManager, LockAcquisitionError, BOX
 from boxyard import const
 from boxyard._tombstones import is_tombstoned, get_tombstone
 from boxyard._remote_index import find_remote_box_by_id, update_remote_index_cache
+from boxyard._utils.sync_progress import SyncProgressEvent
+from boxyard._utils.concurrency import current_limiter, get_storage_location_limiter
+from boxyard._utils.push_lease import PushLease
+from boxyard._utils.backup_purge_queue import BackupPurgeQueue
 
 # %%
 #|set_func_signature
@@ -46,6 +52,8 @@ async def sync_box(
     verbose: bool = False,
     show_rclone_progress: bool = False,
     soft_interruption_enabled: bool = True,
+    progress_callback: Callable[[SyncProgressEvent], Any] | None = None,
+    defer_backup_purge: bool = False,
     _skip_lock: bool = False,
 ) -> dict[BoxPart, tuple[SyncStatus, bool]]:
     """
@@ -60,6 +68,11 @@ async def sync_box(
         force: Force syncing, possibly overwriting changes.
         verbose: Print verbose output during sync.
         show_rclone_progress: Show rclone progress during sync.
+        progress_callback: Called with a `SyncProgressEvent` every time rclone reports its
+            transfer stats. May be a coroutine function.
+        defer_backup_purge: Leave the backups of the synced parts in the purge queue, for the
+            caller to drain once for a whole batch of syncs. Otherwise the queue is drained
+            before returning.
     """
     ...
 
@@ -85,6 +98,9 @@ sync_choices = None
 verbose = True
 show_rclone_progress = False
 soft_interruption_enabled = True
+progress_events = []
+progress_callback = progress_events.append
+defer_backup_purge = False
 _skip_lock = False
 
 # %%
@@ -218,6 +234,16 @@ def _get_remote_sync_record_path_for_index(idx_name: str, part: BoxPart) -> Path
         / f"{part.value}.rec"
     )
 
+# %% [markdown]
+# Tag the progress reported by `sync_helper` with the box and part being synced
+
+# %%
+#|export
+def _get_part_progress_callback(part: BoxPart):
+    if progress_callback is None:
+        return None
+    return lambda stats: progress_callback(SyncProgressEvent(box_index_name, part, stats))
+
 # %% [markdown]
 # Acquire per-box sync lock
 
@@ -227,8 +253,7 @@ _sync_lock = None
 if not _skip_lock:
     _lock_manager = BoxyardLockManager(config.boxyard_data_path)
     _lock_path = _lock_manager.box_sync_lock_path(box_index_name)
-    _lock_manager._ensure_lock_dir(_lock_path)
-    _sync_lock = __import__('filelock').FileLock(_lock_path, timeout=0)
+    _sync_lock = _lock_manager.get_box_sync_lock(box_index_name)
     await acquire_lock_async(
         _sync_lock,
         f"box sync ({box_index_name})",
@@ -236,7 +261,37 @@ if not _skip_lock:
         BOX_SYNC_LOCK_TIMEOUT,
     )
 
+# Everything that is set up after the sync lock is acquired is inside the try, so that the lock
+# is always released
+_limiter_token = None
+_push_lease = None
+_sync_start_time = time.monotonic()
+_should_record_box_stats = False
 try:
+    # Run the rclone operations of the sync under the adaptive limiter of the storage location
+    _limiter_token = current_limiter.set(
+        get_storage_location_limiter(
+            storage_location,
+            initial_limit=config.get_initial_concurrent_rclone_ops(storage_location),
+            max_limit=config.get_max_concurrent_rclone_ops(storage_location),
+        )
+    )
+
+    # Held across the pushes of all parts, if the storage location uses push leases
+    if config.storage_locations[storage_location].push_leases:
+        _push_lease = PushLease(
+            rclone_config_path=config.rclone_config_path,
+            remote=storage_location,
+            lease_path=(
+                config.storage_locations[storage_location].store_path
+                / const.SYNC_RECORDS_REL_PATH
+                / remote_index_name
+                / "push.lease"
+            ).as_posix(),
+        )
+
+    _backup_purge_queue = BackupPurgeQueue(config.sync_backup_purge_queue_path)
+
     # Prints
     if verbose:
         print(f"Syncing box {box_index_name} at {box_meta.storage_location}.")
@@ -271,6 +326,10 @@ try:
             remote_sync_backups_path=remote_sync_backups_path,
             verbose=verbose,
             show_rclone_progress=show_rclone_progress,
+            progress_callback=_get_part_progress_callback(sync_part),
+            push_lease=_push_lease,
+            backup_purge_queue=_backup_purge_queue,
+            backup_label=box_id,
         )
 
     # Sync the boxconf
@@ -297,6 +356,10 @@ try:
             verbose=verbose,
             show_rclone_progress=show_rclone_progress,
             allow_missing_source=True,  # CONF is optional - may not exist on either side
+            progress_callback=_get_part_progress_callback(sync_part),
+            push_lease=_push_lease,
+            backup_purge_queue=_backup_purge_queue,
+            backup_label=box_id,
         )
 
     # Get the now locally synced conf files for the sync of the box data
@@ -344,19 +407,49 @@ try:
             filters_path=_rclone_filters_path,
             verbose=verbose,
             show_rclone_progress=show_rclone_progress,
+            transfer_journals_path=config.transfer_journals_path,
+            progress_callback=_get_part_progress_callback(sync_part),
+            push_lease=_push_lease,
+            backup_purge_queue=_backup_purge_queue,
+            backup_label=box_id,
         )
 
     # Update remote index cache
     update_remote_index_cache(config, storage_location, box_id, remote_index_name)
 
+    # The box stats used to schedule syncs are only re-measured if the data changed. The tree
+    # is walked after the sync lock is released.
+    _sync_duration = time.monotonic() - _sync_start_time
+    if BoxPart.DATA in sync_results and box_meta.get_local_part_path(config, BoxPart.DATA).exists():
+        from boxyard._box_stats import load_box_stats
+
+        _should_record_box_stats = (
+            sync_results[BoxPart.DATA][1] or load_box_stats(config, box_id) is None
+        )
+
+    # Purge the backups of the synced parts, with one delete per backups root
+    if not defer_backup_purge and _backup_purge_queue.has_entries():
+        await _backup_purge_queue.drain(config.rclone_config_path)
+
     # Refresh the boxyard meta file
     if BoxPart.META in sync_choices:
         from boxyard._models import refresh_boxyard_meta
 
         refresh_boxyard_meta(config)
 finally:
-    if _sync_lock is not None:
-        _sync_lock.release()
+    try:
+        if _push_lease is not None:
+            await _push_lease.release()
+    finally:
+        if _limiter_token is not None:
+            current_limiter.reset(_limiter_token)
+        if _sync_lock is not None:
+            _sync_lock.release()
+
+if _should_record_box_stats:
+    from boxyard._box_stats import record_box_stats
+
+    await record_box_stats(config, box_meta, _sync_duration)
 
 # %%
 # Check that the synced worked
@@ -392,6 +485,11 @@ _lsjson = await rclone_lsjson(
 assert ".git" in {f["Name"] for f in _lsjson}
 assert ".venv" not in {f["Name"] for f in _lsjson}
 
+# %%
+# Check that progress was reported for the synced parts
+assert BoxPart.DATA in {e.box_part for e in progress_events}
+assert all(e.box_index_name == box_index_name for e in progress_events)
+
 # %%
 #|func_return
 sync_results
@@ -141,13 +141,10 @@ for g in modified_box_meta.groups:
 # %%
 #|export
 if "parents" in modifications:
-    from boxyard._models import BoxyardMeta as _BM
-
-    _temp_meta = _BM(box_metas=_box_metas)
-
-    # Cycle detection
+    # Cycle detection. A path from a parent up to the box never uses the box's own parent
+    # edges, so the check can use the (indexed) meta from before the modification
     for parent_id in modified_box_meta.parents:
-        if _temp_meta.would_create_cycle(modified_box_meta.box_id, parent_id):
+        if boxyard_meta.would_create_cycle(modified_box_meta.box_id, parent_id):
             raise ValueError(
                 f"Adding parent '{parent_id}' to box '{box_index_name}' would create a cycle."
             )
@@ -162,7 +159,7 @@ if "parents" in modifications:
     # Dangling parent warning
     import sys
     for parent_id in modified_box_meta.parents:
-        if parent_id not in _temp_meta.by_id:
+        if parent_id not in boxyard_meta.by_id:
             print(
                 f"Warning: parent '{parent_id}' not found locally. It may not be synced yet.",
                 file=sys.stderr,
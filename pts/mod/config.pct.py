@@ -38,11 +38,21 @@ class StorageType(Enum):
 class StorageConfig(const.StrictModel):
     storage_type: StorageType
     store_path: Path
+    # Cap on the concurrent rclone operations (and box syncs in `multi-sync`) of this storage
+    # location. The concurrency starts at the global `max_concurrent_rclone_ops`, and grows
+    # adaptively up to this cap (`_utils.concurrency.ADAPTIVE_LIMIT_MAX` if not set).
+    max_concurrent_ops: int | None = None
+    # Take a lease on the remote before pushing a box, so that a second machine pushing the
+    # same box at the same time backs off (see `_utils.push_lease`). Useful for storage
+    # locations shared by several machines that sync unattended.
+    push_leases: bool = False
 
     @model_validator(mode="after")
     def validate_config(self):
         # Expand paths
         self.store_path = self.store_path.expanduser()
+        if self.max_concurrent_ops is not None and self.max_concurrent_ops < 1:
+            raise ValueError("`max_concurrent_ops` must be at least 1.")
         return self
 
 
@@ -63,12 +73,36 @@ class VirtualBoxGroupConfig(const.StrictModel):
     box_title_mode: BoxGroupTitleMode = BoxGroupTitleMode.INDEX_NAME
     filter_expr: str
 
-    def is_in_group(self, groups: list[str]) -> bool:
+    def get_filter_expression(self):
+        """The compiled `filter_expr` (a `GroupExpression`)."""
         if not hasattr(self, "_filter_func"):
-            from boxyard._utils.logical_expressions import get_group_filter_func
+            from boxyard._utils.logical_expressions import compile_group_expression
+
+            self._filter_func = compile_group_expression(self.filter_expr)
+        return self._filter_func
+
+    def is_in_group(self, groups: list[str]) -> bool:
+        return self.get_filter_expression()(groups)
 
-            self._filter_func = get_group_filter_func(self.filter_expr)
-        return self._filter_func(groups)
+
+class SyncBackupRetentionConfig(const.StrictModel):
+    """Retention policy of the sync backups (see `_backup_gc`)."""
+    # Backups younger than this are never deleted, as they may belong to syncs that are running
+    min_age_hours: float = 24
+    max_age_days: float | None = 30
+    max_per_box: int | None = None
+    max_total_size: int | None = None  # In bytes, per backups root
+    # If set, `boxyard daemon` runs the garbage collection at this interval
+    daemon_interval_hours: float | None = None
+
+    @model_validator(mode="after")
+    def validate_config(self):
+        for name in ["min_age_hours", "max_age_days", "max_per_box", "max_total_size"]:
+            if getattr(self, name) is not None and getattr(self, name) < 0:
+                raise ValueError(f"`{name}` cannot be negative.")
+        if self.daemon_interval_hours is not None and self.daemon_interval_hours <= 0:
+            raise ValueError("`daemon_interval_hours` must be positive.")
+        return self
 
 
 class BoxTimestampFormat(Enum):
@@ -98,6 +132,8 @@ class Config(const.StrictModel):
     # New box creation settings
     sync_before_new_box: bool = False  # If True, sync boxmetas before creating new box to check for ID collisions on remote
 
+    sync_backup_retention: SyncBackupRetentionConfig = SyncBackupRetentionConfig()
+
     @property
     def local_store_path(self) -> Path:
         return self.boxyard_data_path / "local_store"
@@ -106,10 +142,30 @@ class Config(const.StrictModel):
     def local_sync_backups_path(self) -> Path:
         return self.boxyard_data_path / "sync_backups"
 
+    @property
+    def sync_backup_purge_queue_path(self) -> Path:
+        """Path to the queue of sync backups to purge (see `_utils.backup_purge_queue`)."""
+        return self.boxyard_data_path / "sync_backup_purge_queue.jsonl"
+
+    @property
+    def transfer_journals_path(self) -> Path:
+        """Path to the journals of files transferred by ongoing or interrupted syncs."""
+        return self.boxyard_data_path / "transfer_journals"
+
     @property
     def boxyard_meta_path(self) -> Path:
         return self.boxyard_data_path / "boxyard_meta.json"
 
+    @property
+    def boxyard_meta_snapshot_path(self) -> Path:
+        """Path to the compact snapshot of the meta that `BoxyardFast` loads (see `boxyard._fast`)."""
+        return self.boxyard_data_path / "boxyard_meta.snapshot"
+
+    @property
+    def user_box_group_symlinks_manifest_path(self) -> Path:
+        """Path to the manifest of the symlinks in `user_box_groups_path` (see `create_user_box_group_symlinks`)."""
+        return self.boxyard_data_path / "user_box_group_symlinks.json"
+
     @property
     def rclone_config_path(self) -> Path:
         return Path(self.config_path).parent / "boxyard_rclone.conf"
@@ -123,6 +179,39 @@ class Config(const.StrictModel):
         """Path to cached remote index lookups (box_id -> remote index_name)."""
         return self.boxyard_data_path / "remote_indexes"
 
+    @property
+    def box_stats_path(self) -> Path:
+        """Path to cached per-box stats (size, last modification, last sync) used to schedule syncs."""
+        return self.boxyard_data_path / "box_stats"
+
+    @property
+    def status_snapshots_path(self) -> Path:
+        """Path to cached per-box sync statuses (used by `yard-status --max-age`)."""
+        return self.boxyard_data_path / "status_snapshots"
+
+    @property
+    def daemon_socket_path(self) -> Path:
+        """Path to the socket of the boxyard daemon (see `boxyard daemon`)."""
+        return Path(self.config_path).parent / "boxyard_daemon.sock"
+
+    def get_initial_concurrent_rclone_ops(self, storage_location: str) -> int:
+        """
+        The concurrency that the rclone operations of a storage location start at: the global
+        `max_concurrent_rclone_ops`, or the `max_concurrent_ops` of the storage location if lower.
+        """
+        max_ops = self.get_max_concurrent_rclone_ops(storage_location)
+        if max_ops is None:
+            return self.max_concurrent_rclone_ops
+        return min(self.max_concurrent_rclone_ops, max_ops)
+
+    def get_max_concurrent_rclone_ops(self, storage_location: str) -> int | None:
+        """
+        The cap on the concurrent rclone operations of a storage location: its
+        `max_concurrent_ops`, or None if it has none (see `_utils.concurrency.ADAPTIVE_LIMIT_MAX`).
+        """
+        sl_config = self.storage_locations.get(storage_location)
+        return sl_config.max_concurrent_ops if sl_config is not None else None
+
     @model_validator(mode="after")
     def validate_config(self):
         # Expand all paths
@@ -165,6 +254,12 @@ def get_config(path: Path | None = None) -> Config:
     if path is None:
         path = const.DEFAULT_CONFIG_PATH
     path = Path(path).expanduser()
+    from boxyard._utils.base import load_file_cached
+
+    return load_file_cached(path, _load_config)
+
+
+def _load_config(path: Path) -> Config:
     return Config(**{"config_path": path, **toml.load(path)})
 
 # %%
@@ -0,0 +1,141 @@
+# ---
+# jupyter:
+#   kernelspec:
+#     display_name: Python 3
+#     language: python
+#     name: python3
+# ---
+
+# %% [markdown]
+# # Daemon Integration Tests
+#
+# Tests for forwarding CLI commands to the boxyard daemon.
+#
+# Tests:
+# - Forwarded commands give the same output as the regular CLI
+# - Changes to the yard are picked up by the daemon
+# - Commands that need to prompt the user are handed back to the client
+# - Commands that are not forwarded are rejected by the daemon
+
+# %%
+#|default_exp integration.cmds.test_daemon
+#|export_as_func true
+
+# %%
+#|hide
+from nblite import nbl_export, show_doc; nbl_export();
+
+# %%
+#|top_export
+import os
+import threading
+import pytest
+
+from boxyard.cmds import new_box
+from boxyard._daemon import create_daemon_server, run_cli_command, DaemonAlreadyRunningError
+from boxyard._daemon_client import send_daemon_request, get_forwardable_request
+import boxyard._utils.base as base_module
+
+from tests.integration.conftest import create_boxyards
+
+# %%
+#|top_export
+@pytest.mark.integration
+def test_daemon():
+    """Test forwarding CLI commands to the daemon."""
+    try:
+        _test_daemon()
+    finally:
+        # The daemon enables the file cache for the whole process
+        base_module._file_cache = None
+
+# %%
+#|set_func_signature
+def _test_daemon(): ...
+
+# %% [markdown]
+# ## Initialize boxyard and start the daemon
+
+# %%
+#|export
+remote_name, remote_rclone_path, config, config_path, data_path = create_boxyards()
+box1 = new_box(config_path=config_path, box_name="box-one", storage_location=remote_name)
+
+server = create_daemon_server(config.daemon_socket_path)
+server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+server_thread.start()
+
+# %% [markdown]
+# ## Forwarded commands give the same output as the regular CLI
+
+# %%
+#|export
+def forward(*args):
+    socket_path, request = get_forwardable_request(
+        ["--config", config_path.as_posix(), *args], os.getcwd()
+    )
+    assert socket_path == config.daemon_socket_path
+    return send_daemon_request(socket_path, request, timeout=60)
+
+for args in [
+    ["list"],
+    ["list", "-o", "json"],
+    ["path", "-r", box1],
+]:
+    response = forward(*args)
+    exit_code, stdout, stderr = run_cli_command(["--config", config_path.as_posix(), *args])
+    assert response == {"exit_code": exit_code, "stdout": stdout, "stderr": stderr}, args
+    assert response["exit_code"] == 0, response
+
+assert box1 in forward("list")["stdout"]
+
+# Commands that wait on rclone are run by the client
+assert get_forwardable_request(
+    ["--config", config_path.as_posix(), "box-status", "-r", box1], os.getcwd()
+) is None
+
+# %% [markdown]
+# ## Changes to the yard are picked up by the daemon
+
+# %%
+#|export
+box2 = new_box(config_path=config_path, box_name="box-two", storage_location=remote_name)
+assert box2 in forward("list")["stdout"]
+
+# %% [markdown]
+# ## Commands that need to prompt are handed back to the client
+
+# %%
+#|export
+# Both boxes match, so picking one needs fzf
+assert forward("path", "-n", "box") == {"needs_terminal": True}
+assert forward("path", "-n", "box-one")["exit_code"] == 0
+
+# %% [markdown]
+# ## Errors and rejected commands
+
+# %%
+#|export
+response = forward("path", "-r", "does-not-exist")
+assert response["exit_code"] != 0
+
+response = send_daemon_request(
+    config.daemon_socket_path,
+    {"type": "run", "argv": ["--config", config_path.as_posix(), "delete", "-r", box1]},
+)
+assert response["exit_code"] == 1
+assert "does not run the command 'delete'" in response["stderr"]
+
+# %% [markdown]
+# ## Only one daemon per socket, and stopping the daemon
+
+# %%
+#|export
+with pytest.raises(DaemonAlreadyRunningError):
+    create_daemon_server(config.daemon_socket_path)
+
+assert send_daemon_request(config.daemon_socket_path, {"type": "stop"})["pid"] == os.getpid()
+server_thread.join(timeout=10)
+server.server_close()
+assert not config.daemon_socket_path.exists()
+assert send_daemon_request(config.daemon_socket_path, {"type": "ping"}) is None
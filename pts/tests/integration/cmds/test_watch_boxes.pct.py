@@ -0,0 +1,130 @@
+# ---
+# jupyter:
+#   kernelspec:
+#     display_name: Python 3
+#     language: python
+#     name: python3
+# ---
+
+# %% [markdown]
+# # Watch Boxes Integration Tests
+#
+# Tests for `watch_boxes` (`sync --watch`):
+# - Modifying a watched box pushes it, and only it
+# - A box that is removed while it is watched is no longer watched
+
+# %%
+#|default_exp integration.cmds.test_watch_boxes
+
+# %%
+#|export
+import asyncio
+import pytest
+
+from boxyard.cmds import new_box, sync_box, exclude_box, watch_boxes
+from boxyard._models import get_boxyard_meta, BoxPart
+from boxyard._utils import rclone_path_exists
+
+from tests.integration.conftest import create_boxyards
+
+# %%
+#|export
+async def _create_synced_boxes(*box_names: str):
+    sl_name, sl_rclone_path, config, config_path, data_path = create_boxyards()
+    box_index_names = []
+    for box_name in box_names:
+        box_index_name = new_box(config_path=config_path, box_name=box_name, storage_location=sl_name)
+        await sync_box(config_path=config_path, box_index_name=box_index_name)
+        box_index_names.append(box_index_name)
+    return sl_name, config, config_path, box_index_names
+
+
+async def _wait_for(condition, timeout: float = 30.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.05)
+
+
+def _start_watching(config_path, poll_interval, pushed: list) -> asyncio.Task:
+    return asyncio.create_task(
+        watch_boxes(
+            config_path=config_path,
+            quiet_period=0.3,
+            min_push_interval=0.0,
+            poll_interval=poll_interval,
+            soft_interruption_enabled=False,
+            on_push_finished=lambda box_index_name, result: pushed.append((box_index_name, result)),
+        )
+    )
+
+
+async def _stop_watching(task: asyncio.Task) -> None:
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+# %%
+#|export
+@pytest.mark.integration
+@pytest.mark.parametrize("poll_interval", [None, 0.1], ids=["inotify", "polling"])
+def test_modified_box_is_pushed(poll_interval):
+    """Modifying a watched box pushes it to its remote, and leaves the other boxes alone."""
+    asyncio.run(_test_modified_box_is_pushed(poll_interval))
+
+
+async def _test_modified_box_is_pushed(poll_interval):
+    sl_name, config, config_path, (box_a, box_b) = await _create_synced_boxes("box_a", "box_b")
+    box_meta = get_boxyard_meta(config).by_index_name[box_a]
+
+    pushed = []
+    task = _start_watching(config_path, poll_interval, pushed)
+    try:
+        await asyncio.sleep(0.3)
+        (box_meta.get_local_part_path(config, BoxPart.DATA) / "new_file.txt").write_text("hello")
+        await _wait_for(lambda: pushed)
+        await asyncio.sleep(0.5)  # Give any other push time to start
+    finally:
+        await _stop_watching(task)
+
+    assert [box_index_name for box_index_name, _ in pushed] == [box_a]
+    assert not isinstance(pushed[0][1], Exception)
+    exists, _ = await rclone_path_exists(
+        config.rclone_config_path,
+        sl_name,
+        (box_meta.get_remote_part_path(config, BoxPart.DATA) / "new_file.txt").as_posix(),
+    )
+    assert exists
+
+# %%
+#|export
+@pytest.mark.integration
+@pytest.mark.parametrize("poll_interval", [None, 0.1], ids=["inotify", "polling"])
+def test_removed_box_is_no_longer_watched(poll_interval):
+    """A box that is excluded while it is watched is neither pushed nor watched any more."""
+    asyncio.run(_test_removed_box_is_no_longer_watched(poll_interval))
+
+
+async def _test_removed_box_is_no_longer_watched(poll_interval):
+    sl_name, config, config_path, (box_a, box_b) = await _create_synced_boxes("box_a", "box_b")
+    boxyard_meta = get_boxyard_meta(config)
+    data_path_a = boxyard_meta.by_index_name[box_a].get_local_part_path(config, BoxPart.DATA)
+    data_path_b = boxyard_meta.by_index_name[box_b].get_local_part_path(config, BoxPart.DATA)
+
+    pushed = []
+    task = _start_watching(config_path, poll_interval, pushed)
+    try:
+        await asyncio.sleep(0.3)
+        await exclude_box(config_path=config_path, box_index_name=box_a, skip_sync=True)
+        await asyncio.sleep(1.0)
+
+        # Changes at the old location of the box are not picked up
+        data_path_a.mkdir()
+        (data_path_a / "new_file.txt").write_text("hello")
+        # ...while the other boxes are still watched
+        (data_path_b / "new_file.txt").write_text("hello")
+        await _wait_for(lambda: pushed)
+        await asyncio.sleep(1.0)
+    finally:
+        await _stop_watching(task)
+
+    assert [box_index_name for box_index_name, _ in pushed] == [box_b]
@@ -91,6 +91,32 @@ class TestGetBoxIndexNameFromSubPath:
 
         assert result == "20240101_120000_abcde__mybox"
 
+    def test_defaults_to_cwd(self, mock_config, monkeypatch):
+        """Uses the current working directory if no path is given."""
+        sub_path = mock_config.user_boxes_path / "20240101_120000_abcde__mybox" / "src"
+        sub_path.mkdir(parents=True)
+        monkeypatch.chdir(sub_path)
+
+        result = get_box_index_name_from_sub_path(mock_config)
+
+        assert result == "20240101_120000_abcde__mybox"
+
+    def test_symlinked_boxes_path(self, tmp_path, monkeypatch):
+        """Works when user_boxes_path is a symlink to the real boxes folder."""
+        real_boxes_path = tmp_path / "real_boxes"
+        box_path = real_boxes_path / "20240101_120000_abcde__mybox"
+        box_path.mkdir(parents=True)
+        config = MagicMock()
+        config.user_boxes_path = tmp_path / "boxes"
+        config.user_boxes_path.symlink_to(real_boxes_path)
+
+        assert get_box_index_name_from_sub_path(config, str(box_path)) == box_path.name
+        assert get_box_index_name_from_sub_path(
+            config, str(config.user_boxes_path / box_path.name)
+        ) == box_path.name
+        monkeypatch.chdir(config.user_boxes_path / box_path.name)
+        assert get_box_index_name_from_sub_path(config) == box_path.name
+
 
 # ============================================================================
 # Tests for get_hostname
@@ -226,6 +252,45 @@ class TestCheckLastTimeModified:
         assert result is not None
 
 
+# ============================================================================
+# Tests for get_dir_stats
+# ============================================================================
+
+# %%
+#|export
+from boxyard._utils import get_dir_stats
+
+
+class TestGetDirStats:
+    """Tests for get_dir_stats function."""
+
+    def test_nested_directory(self, tmp_path):
+        """Counts the sizes and files of the whole tree."""
+        (tmp_path / "a.txt").write_text("12345")
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "b.txt").write_text("123")
+
+        result = get_dir_stats(tmp_path)
+
+        assert result.size == 8
+        assert result.num_files == 2
+        assert result.last_modified == max(
+            (tmp_path / "a.txt").stat().st_mtime, (tmp_path / "sub" / "b.txt").stat().st_mtime
+        )
+
+    def test_empty_directory(self, tmp_path):
+        """An empty directory has no size and no last modification."""
+        result = get_dir_stats(tmp_path)
+
+        assert result == (0, 0, None)
+
+    def test_nonexistent_path(self, tmp_path):
+        """A nonexistent path is treated as empty."""
+        result = get_dir_stats(tmp_path / "nonexistent")
+
+        assert result.num_files == 0
+
+
 # ============================================================================
 # Tests for run_cmd_async
 # ============================================================================
@@ -281,6 +346,21 @@ class TestRunCmdAsync:
 
         asyncio.run(_test())
 
+    def test_stderr_line_callback(self):
+        """Streams stderr lines to the callback and still returns the full output."""
+        async def _test():
+            lines = []
+            returncode, stdout, stderr = await run_cmd_async(
+                ["python", "-c", "import sys; print('out'); sys.stderr.write('a\\nb\\n')"],
+                stderr_line_callback=lines.append,
+            )
+            assert returncode == 0
+            assert lines == ["a", "b"]
+            assert stderr == "a\nb\n"
+            assert "out" in stdout
+
+        asyncio.run(_test())
+
 
 # ============================================================================
 # Tests for async_throttler
@@ -504,3 +584,63 @@ class TestSoftInterruptionHandling:
 
         # Cleanup
         base_module._interrupted = False
+
+
+# ============================================================================
+# Tests for load_file_cached
+# ============================================================================
+
+# %%
+#|export
+from boxyard._utils import load_file_cached
+
+
+class TestLoadFileCached:
+    """Tests for the mtime-validated file cache."""
+
+    @pytest.fixture
+    def file_cache(self, monkeypatch):
+        monkeypatch.setattr(base_module, "_file_cache", {})
+
+    @staticmethod
+    def _make_loader():
+        calls = []
+
+        def loader(path):
+            calls.append(path)
+            return path.read_text()
+
+        return loader, calls
+
+    def test_disabled_by_default(self, tmp_path, monkeypatch):
+        """Without the cache enabled, the loader is called every time."""
+        monkeypatch.setattr(base_module, "_file_cache", None)
+        path = tmp_path / "file.txt"
+        path.write_text("a")
+        loader, calls = self._make_loader()
+
+        load_file_cached(path, loader)
+        load_file_cached(path, loader)
+
+        assert len(calls) == 2
+
+    def test_reuses_unchanged_file(self, tmp_path, file_cache):
+        path = tmp_path / "file.txt"
+        path.write_text("a")
+        loader, calls = self._make_loader()
+
+        assert load_file_cached(path, loader) == "a"
+        assert load_file_cached(path, loader) == "a"
+        assert len(calls) == 1
+
+    def test_reloads_changed_file(self, tmp_path, file_cache):
+        """A change of the size or modification time of the file invalidates the cache."""
+        path = tmp_path / "file.txt"
+        path.write_text("a")
+        loader, calls = self._make_loader()
+
+        load_file_cached(path, loader)
+        path.write_text("bb")
+
+        assert load_file_cached(path, loader) == "bb"
+        assert len(calls) == 2
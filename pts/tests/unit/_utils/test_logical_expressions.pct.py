@@ -18,7 +18,11 @@
 # %%
 #|export
 import pytest
-from boxyard._utils.logical_expressions import get_group_filter_func
+from boxyard._utils.logical_expressions import (
+    GroupBitsets,
+    compile_group_expression,
+    get_group_filter_func,
+)
 
 # %% [markdown]
 # ## 1. Basic Operators - Single Group
@@ -635,3 +639,53 @@ def test_scenario_complex_project_filter():
     assert filter_func(["backend", "prod", "deprecated"]) == False
     # Should not match - archived
     assert filter_func(["frontend", "staging", "archived"]) == False
+
+# %% [markdown]
+# ## 13. Compiled Expressions and Group Bitsets
+
+# %%
+#|export
+def test_invalid_expression_raises_when_compiled():
+    """Syntax errors are reported when the expression is compiled, before any evaluation."""
+    with pytest.raises(ValueError, match="[Uu]nmatched"):
+        get_group_filter_func("(a AND b")
+
+# %%
+#|export
+def test_compiled_expression_is_reused():
+    """Compiling the same expression twice returns the same compiled expression."""
+    assert compile_group_expression("a OR b") is compile_group_expression("a OR b")
+
+# %%
+#|export
+def test_group_bitsets():
+    """Every group maps to the bitset of the items in it."""
+    bitsets = GroupBitsets([["a"], ["a", "b"], [], ["b"]])
+    assert bitsets.get("a") == 0b0011
+    assert bitsets.get("b") == 0b1010
+    assert bitsets.get("missing") == 0
+    assert GroupBitsets.get_indices(bitsets.get("b")) == [1, 3]
+    assert GroupBitsets([["a"], ["b"]], groups=["b"]).bitsets == {"b": 0b10}
+
+# %%
+#|export
+@pytest.mark.parametrize("expr", [
+    "a",
+    "NOT a",
+    "a AND b",
+    "a OR NOT b",
+    "(a OR b) AND NOT (c OR d)",
+    "NOT (a AND (b OR NOT c)) OR d",
+    "missing OR NOT missing",
+])
+def test_select_matches_per_item_evaluation(expr):
+    """Evaluating over the group bitsets of all items gives the same result as per item."""
+    import itertools
+
+    groups_per_item = [
+        [g for g, included in zip("abcd", flags) if included]
+        for flags in itertools.product([False, True], repeat=4)
+    ] * 20
+    expression = compile_group_expression(expr)
+    expected = [i for i, groups in enumerate(groups_per_item) if expression(groups)]
+    assert expression.select(groups_per_item) == expected
@@ -201,7 +201,7 @@ class TestRcloneCopyCommand:
         asyncio.run(_test())
 
     def test_copy_with_filters_file(self):
-        """Copy command with filters-file."""
+        """Copy command with a filters file."""
         async def _test():
             result = await rclone_copy(
                 rclone_config_path="/tmp/rclone.conf",
@@ -212,7 +212,7 @@ class TestRcloneCopyCommand:
                 filters_file="/tmp/filters.txt",
                 return_command=True,
             )
-            assert "--filters-file /tmp/filters.txt" in result
+            assert "--filter-from /tmp/filters.txt" in result
 
         asyncio.run(_test())
 
@@ -347,13 +347,31 @@ class TestRcloneSyncCommand:
             assert "--filter '+ important/'" in result
             assert "--include-from /inc.txt" in result
             assert "--exclude-from /exc.txt" in result
-            assert "--filters-file /filters.txt" in result
+            assert "--filter-from /filters.txt" in result
             assert "--backup-dir /backup" in result
             assert "--dry-run" in result
             assert "--progress" in result
 
         asyncio.run(_test())
 
+    def test_sync_with_json_log_and_stats(self):
+        """Sync command with a log line callback and a stats interval."""
+        async def _test():
+            result = await rclone_sync(
+                rclone_config_path="/tmp/rclone.conf",
+                source="",
+                source_path="/source",
+                dest="",
+                dest_path="/dest",
+                log_line_callback=lambda line: None,
+                stats_interval="1s",
+                return_command=True,
+            )
+            assert "--use-json-log --verbose" in result
+            assert "--stats 1s" in result
+
+        asyncio.run(_test())
+
 
 # ============================================================================
 # Tests for rclone_bisync command building
@@ -1086,6 +1104,65 @@ class TestRclonePurge:
         asyncio.run(_test())
 
 
+# ============================================================================
+# Tests for rclone_purge_dirs
+# ============================================================================
+
+# %%
+#|export
+from boxyard._utils import rclone_purge_dirs
+
+
+class TestRclonePurgeDirs:
+    """Tests for rclone_purge_dirs function."""
+
+    def test_purge_dirs_builds_single_delete(self):
+        """rclone_purge_dirs deletes all dirs with one filtered rclone delete."""
+        async def _test():
+            filter_lines = []
+
+            async def _run(cmd):
+                filter_lines.extend(Path(cmd[cmd.index("--include-from") + 1]).read_text().splitlines())
+                return 0, "", ""
+
+            with patch("boxyard._utils.rclone.run_cmd_async", new=AsyncMock(side_effect=_run)) as mock_run:
+                result = await rclone_purge_dirs(
+                    rclone_config_path="/tmp/rclone.conf",
+                    source="remote",
+                    source_path="sync_backups",
+                    dir_names=["01AAA", "01BBB"],
+                )
+
+            assert result is True
+            mock_run.assert_called_once()
+            cmd = mock_run.call_args[0][0]
+            assert cmd[:2] == ["rclone", "delete"]
+            assert "remote:sync_backups" in cmd
+            assert "--rmdirs" in cmd
+            assert filter_lines == ["/01AAA/**", "/01BBB/**"]
+
+        asyncio.run(_test())
+
+    def test_purge_dirs_without_dirs_is_noop(self):
+        """rclone_purge_dirs does not run rclone without dirs."""
+        async def _test():
+            with patch("boxyard._utils.rclone.run_cmd_async", new=AsyncMock()) as mock_run:
+                assert await rclone_purge_dirs("/tmp/rclone.conf", "remote", "sync_backups", [])
+            mock_run.assert_not_called()
+
+        asyncio.run(_test())
+
+    def test_purge_dirs_missing_root_is_success(self):
+        """rclone_purge_dirs treats a missing backups root as nothing to purge."""
+        async def _test():
+            with patch("boxyard._utils.rclone.run_cmd_async", new=AsyncMock(return_value=(3, "", "directory not found"))):
+                assert await rclone_purge_dirs("/tmp/rclone.conf", "remote", "missing", ["01AAA"])
+            with patch("boxyard._utils.rclone.run_cmd_async", new=AsyncMock(return_value=(1, "", "error"))):
+                assert not await rclone_purge_dirs("/tmp/rclone.conf", "remote", "sync_backups", ["01AAA"])
+
+        asyncio.run(_test())
+
+
 # ============================================================================
 # Tests for rclone_cat
 # ============================================================================
@@ -0,0 +1,158 @@
+# ---
+# jupyter:
+#   kernelspec:
+#     display_name: Python 3
+#     language: python
+#     name: python3
+# ---
+
+# %% [markdown]
+# # Unit Tests for Sync Progress
+
+# %%
+#|default_exp unit._utils.test_sync_progress
+
+# %%
+#|export
+import json
+import time
+import pytest
+
+from boxyard._enums import BoxPart
+from boxyard._utils.sync_progress import (
+    RcloneStats,
+    SyncProgressEvent,
+    SyncProgressTracker,
+    parse_rclone_stats_line,
+)
+
+
+# ============================================================================
+# Tests for parse_rclone_stats_line
+# ============================================================================
+
+# %%
+#|export
+def _stats_line(**stats) -> str:
+    return json.dumps({"level": "info", "msg": "\nTransferred: ...", "stats": stats})
+
+
+class TestParseRcloneStatsLine:
+    """Tests for parse_rclone_stats_line function."""
+
+    def test_parses_stats(self):
+        """Parses the stats of a stats line."""
+        stats = parse_rclone_stats_line(
+            _stats_line(
+                bytes=10, totalBytes=20, transfers=1, totalTransfers=2, checks=3,
+                totalChecks=4, speed=5.5, eta=2, elapsedTime=1.5, errors=0,
+            )
+        )
+        assert stats == RcloneStats(
+            bytes=10, total_bytes=20, transfers=1, total_transfers=2, checks=3,
+            total_checks=4, speed=5.5, eta=2, elapsed_time=1.5, errors=0,
+        )
+        assert not stats.is_done
+
+    def test_missing_fields_default(self):
+        """Missing stats fields default to zero."""
+        stats = parse_rclone_stats_line(_stats_line(bytes=10, totalBytes=10))
+        assert stats.transfers == 0
+        assert stats.eta is None
+        assert stats.is_done
+
+    @pytest.mark.parametrize(
+        "line",
+        [
+            "",
+            "Transferred: 10 B / 20 B",
+            '{"level":"info","msg":"Copied (new)","object":"a.txt"}',
+            '{"stats": "not a dict"}',
+            '{"stats": {',
+        ],
+    )
+    def test_non_stats_lines(self, line):
+        """Returns None for lines that are not stats lines."""
+        assert parse_rclone_stats_line(line) is None
+
+
+# ============================================================================
+# Tests for SyncProgressTracker
+# ============================================================================
+
+# %%
+#|export
+def _stats(bytes=0, total_bytes=100, transfers=0, total_transfers=1, speed=10.0, eta=5.0):
+    return RcloneStats(
+        bytes=bytes, total_bytes=total_bytes, transfers=transfers,
+        total_transfers=total_transfers, checks=0, total_checks=0, speed=speed,
+        eta=eta, elapsed_time=1.0, errors=0,
+    )
+
+
+class TestSyncProgressTracker:
+    """Tests for the SyncProgressTracker class."""
+
+    def test_box_summary_sums_parts(self):
+        """A box summary sums the bytes of all parts, with the rate of the current part."""
+        tracker = SyncProgressTracker()
+        tracker.update(SyncProgressEvent("box", BoxPart.META, _stats(100, 100, 1, 1, speed=1.0)))
+        tracker.update(SyncProgressEvent("box", BoxPart.DATA, _stats(50, 200, speed=20.0)))
+
+        summary = tracker.get_box_summary("box")
+        assert summary.box_part == BoxPart.DATA
+        assert summary.bytes == 150
+        assert summary.total_bytes == 300
+        assert summary.speed == 20.0
+
+    def test_unknown_box(self):
+        """Boxes without progress have no summary."""
+        assert SyncProgressTracker().get_box_summary("box") is None
+        assert SyncProgressTracker().tracked_boxes == []
+
+    def test_aggregate_summary(self):
+        """The aggregate summary sums over boxes and excludes the rate of finished boxes."""
+        tracker = SyncProgressTracker()
+        tracker.update(SyncProgressEvent("a", BoxPart.DATA, _stats(10, speed=1.0, eta=3.0)))
+        tracker.update(SyncProgressEvent("b", BoxPart.DATA, _stats(20, speed=2.0, eta=7.0)))
+        tracker.update(SyncProgressEvent("c", BoxPart.DATA, _stats(30, speed=4.0)))
+        tracker.finish("c")
+
+        summary = tracker.get_aggregate_summary()
+        assert summary.bytes == 60
+        assert summary.total_bytes == 300
+        assert summary.speed == 3.0
+        assert summary.eta == 7.0
+
+    def test_discard_keeps_totals(self):
+        """Discarded boxes are forgotten but still count towards the aggregate totals."""
+        tracker = SyncProgressTracker()
+        tracker.update(SyncProgressEvent("a", BoxPart.DATA, _stats(10, speed=1.0)))
+        tracker.update(SyncProgressEvent("b", BoxPart.DATA, _stats(20, speed=2.0)))
+        tracker.finish("a")
+        tracker.discard("a")
+        tracker.discard("unknown")
+
+        assert tracker.tracked_boxes == ["b"]
+        assert tracker.get_box_summary("a") is None
+        summary = tracker.get_aggregate_summary()
+        assert summary.bytes == 30
+        assert summary.total_bytes == 200
+        assert summary.speed == 2.0
+        assert tracker.has_progress
+
+    def test_stalled_detection(self):
+        """Boxes whose stats have not changed within the stall timeout are stalled."""
+        tracker = SyncProgressTracker(stall_timeout=0.05)
+        tracker.update(SyncProgressEvent("stuck", BoxPart.DATA, _stats(10)))
+        tracker.update(SyncProgressEvent("moving", BoxPart.DATA, _stats(10)))
+        tracker.update(SyncProgressEvent("done", BoxPart.DATA, _stats(100, transfers=1)))
+        tracker.update(SyncProgressEvent("finished", BoxPart.DATA, _stats(10)))
+        tracker.finish("finished")
+        assert tracker.stalled_boxes == []
+
+        time.sleep(0.1)
+        tracker.update(SyncProgressEvent("stuck", BoxPart.DATA, _stats(10)))
+        tracker.update(SyncProgressEvent("moving", BoxPart.DATA, _stats(20)))
+        assert tracker.stalled_boxes == ["stuck"]
+        assert tracker.get_aggregate_summary().stalled
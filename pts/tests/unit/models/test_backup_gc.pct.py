@@ -0,0 +1,199 @@
+# ---
+# jupyter:
+#   kernelspec:
+#     display_name: Python 3
+#     language: python
+#     name: python3
+# ---
+
+# %% [markdown]
+# # Unit Tests for the Garbage Collection of Sync Backups
+#
+# Tests for the retention policy of the sync backups, and for collecting the backups of a
+# local-directory remote.
+
+# %%
+#|default_exp unit.models.test_backup_gc
+
+# %%
+#|export
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+from ulid import ULID
+
+import boxyard._backup_gc as backup_gc
+from boxyard._backup_gc import (
+    SyncBackup,
+    gc_sync_backups,
+    list_sync_backups,
+    parse_sync_backup_name,
+    select_expired_backups,
+)
+from boxyard._models import SyncRecord
+from boxyard.config import SyncBackupRetentionConfig, StorageConfig
+
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+def _make_backup(days_old: float, box_id: str | None = "box", size: int = 0) -> SyncBackup:
+    ulid = ULID.from_datetime(NOW - timedelta(days=days_old))
+    name = f"{ulid}__{box_id}" if box_id else str(ulid)
+    return SyncBackup(name=name, ulid=ulid, box_id=box_id, size=size)
+
+
+def _select(backups, protected_ulids=frozenset(), **retention) -> list[SyncBackup]:
+    retention.setdefault("max_age_days", None)
+    return select_expired_backups(
+        backups, SyncBackupRetentionConfig(**retention), set(protected_ulids), now=NOW
+    )
+
+
+@pytest.fixture
+def yard(tmp_path):
+    """A config with a local-directory storage location."""
+    remote_path = tmp_path / "my_remote"
+    remote_path.mkdir()
+    config = MagicMock()
+    config.rclone_config_path = (tmp_path / "rclone.conf").as_posix()
+    (tmp_path / "rclone.conf").write_text(f"[my_remote]\ntype = alias\nremote = {remote_path}\n")
+    config.boxyard_data_path = tmp_path / "data"
+    config.local_sync_backups_path = tmp_path / "data" / "sync_backups"
+    config.storage_locations = {"my_remote": StorageConfig(storage_type="rclone", store_path="store")}
+    config.sync_backup_retention = SyncBackupRetentionConfig(max_age_days=30)
+    return config, remote_path / "store" / "sync_backups"
+
+
+def _write_backup(backups_path, days_old: float, box_id: str = "box", content: str = "backup") -> str:
+    ulid = ULID.from_datetime(datetime.now(timezone.utc) - timedelta(days=days_old))
+    name = f"{ulid}__{box_id}"
+    (backups_path / name / "sub").mkdir(parents=True)
+    (backups_path / name / "sub" / "file.txt").write_text(content)
+    return name
+
+
+# ============================================================================
+# Tests for select_expired_backups
+# ============================================================================
+
+# %%
+#|export
+class TestSelectExpiredBackups:
+    """Tests for the retention policy."""
+
+    def test_parse_name(self):
+        backup = _make_backup(1, box_id="20251122_143022_aaaaa")
+        assert parse_sync_backup_name(backup.name) == backup
+        assert parse_sync_backup_name(str(backup.ulid)).box_id is None
+        assert parse_sync_backup_name("not_a_backup") is None
+
+    def test_max_age(self):
+        old, new = _make_backup(40), _make_backup(10)
+        assert _select([new, old], max_age_days=30) == [old]
+
+    def test_max_per_box_keeps_most_recent(self):
+        a1, a2, a3 = _make_backup(3, "a"), _make_backup(2, "a"), _make_backup(1.5, "a")
+        b1 = _make_backup(3, "b")
+        unlabelled = _make_backup(3, None)
+        assert _select([a3, b1, a1, unlabelled, a2], max_per_box=2) == [a1]
+
+    def test_max_total_size_deletes_oldest(self):
+        backups = [_make_backup(days, size=100) for days in [5, 4, 3, 2]]
+        assert _select(backups, max_total_size=250) == backups[:2]
+
+    def test_young_and_protected_backups_are_kept(self):
+        young = _make_backup(0.5, size=100)
+        protected = _make_backup(40, size=100)
+        old = _make_backup(40, size=100)
+        assert _select([young, protected, old], {str(protected.ulid)}, max_age_days=30) == [old]
+        # The kept backups still count towards the total size
+        assert _select([young, protected, old], {str(protected.ulid)}, max_total_size=0) == [old]
+
+
+# ============================================================================
+# Tests for gc_sync_backups
+# ============================================================================
+
+# %%
+#|export
+class TestGCSyncBackups:
+    """Tests for collecting the backups of the backups roots."""
+
+    def test_list_groups_entries_by_backup(self, yard, tmp_path):
+        config, remote_backups_path = yard
+        name = _write_backup(remote_backups_path, 1, content="12345")
+        (remote_backups_path / name / "other.txt").write_text("123")
+        (remote_backups_path / "not_a_backup").mkdir()
+
+        [backup] = asyncio.run(list_sync_backups(config.rclone_config_path, "my_remote", "store/sync_backups"))
+        assert (backup.name, backup.box_id, backup.size) == (name, "box", 8)
+        assert asyncio.run(list_sync_backups(config.rclone_config_path, "my_remote", "missing")) == []
+
+    def test_gc_deletes_expired_backups(self, yard):
+        config, remote_backups_path = yard
+        old_remote = _write_backup(remote_backups_path, 40)
+        new_remote = _write_backup(remote_backups_path, 2)
+        old_local = _write_backup(config.local_sync_backups_path, 40)
+
+        results = asyncio.run(gc_sync_backups(config))
+        assert [(r.backups_root, r.num_backups, r.deleted) for r in results] == [
+            ("local", 1, [old_local]),
+            ("my_remote", 2, [old_remote]),
+        ]
+        assert [p.name for p in remote_backups_path.iterdir()] == [new_remote]
+        assert list(config.local_sync_backups_path.iterdir()) == []
+
+    def test_dry_run_deletes_nothing(self, yard):
+        config, remote_backups_path = yard
+        old_remote = _write_backup(remote_backups_path, 40)
+
+        [_, result] = asyncio.run(gc_sync_backups(config, dry_run=True))
+        assert [b.name for b in result.expired] == [old_remote] and result.deleted == []
+        assert (remote_backups_path / old_remote).exists()
+
+    def test_backups_of_interrupted_syncs_are_kept(self, yard):
+        config, _ = yard
+        record = SyncRecord.create(sync_complete=False)
+        record_path = config.boxyard_data_path / "sync_records" / "box" / "data.rec"
+        record_path.parent.mkdir(parents=True)
+        record_path.write_text(record.model_dump_json())
+        (config.local_sync_backups_path / f"{record.ulid}__box").mkdir(parents=True)
+        config.sync_backup_retention = SyncBackupRetentionConfig(min_age_hours=0, max_age_days=0)
+
+        [result] = asyncio.run(gc_sync_backups(config, storage_locations=[]))
+        assert result.num_backups == 1 and result.expired == []
+
+    def test_backups_of_interrupted_remote_syncs_are_kept(self, yard):
+        """The backups of the interrupted pushes of other machines are kept."""
+        config, remote_backups_path = yard
+        record = SyncRecord.create(sync_complete=False, syncer_hostname="other_host")
+        record_path = remote_backups_path.parent / "sync_records" / "box" / "data.rec"
+        record_path.parent.mkdir(parents=True)
+        record_path.write_text(record.model_dump_json())
+        (remote_backups_path / f"{record.ulid}__box").mkdir(parents=True)
+        old_remote = _write_backup(remote_backups_path, 40)
+        config.sync_backup_retention = SyncBackupRetentionConfig(min_age_hours=0, max_age_days=0)
+
+        [result] = asyncio.run(gc_sync_backups(config, include_local=False, dry_run=True))
+        assert result.num_backups == 2 and [b.name for b in result.expired] == [old_remote]
+
+    def test_nothing_is_deleted_if_remote_records_cannot_be_read(self, yard, monkeypatch):
+        config, remote_backups_path = yard
+        old_remote = _write_backup(remote_backups_path, 40)
+        monkeypatch.setattr(backup_gc, "get_remote_protected_backup_ulids", AsyncMock(return_value=None))
+
+        [result] = asyncio.run(gc_sync_backups(config, include_local=False))
+        assert result.num_backups == 1 and result.expired == [] and result.deleted == []
+        assert (remote_backups_path / old_remote).exists()
+
+    def test_deletes_are_batched(self, yard, monkeypatch):
+        config, remote_backups_path = yard
+        monkeypatch.setattr(backup_gc, "BACKUP_GC_BATCH_SIZE", 2)
+        for _ in range(5):
+            _write_backup(remote_backups_path, 40)
+
+        with patch("boxyard._utils.rclone_purge_dirs", new=AsyncMock(return_value=True)) as mock_purge:
+            [result] = asyncio.run(gc_sync_backups(config, include_local=False))
+        assert len(result.deleted) == 5
+        assert [len(call.kwargs["dir_names"]) for call in mock_purge.call_args_list] == [2, 2, 1]
@@ -0,0 +1,234 @@
+# ---
+# jupyter:
+#   kernelspec:
+#     display_name: Python 3
+#     language: python
+#     name: python3
+# ---
+
+# %% [markdown]
+# # Unit Tests for Box Stats Cache Module
+
+# %%
+#|default_exp unit.models.test_box_stats
+
+# %%
+#|export
+import asyncio
+import os
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import boxyard._box_stats as box_stats_module
+from boxyard._box_stats import (
+    BoxStats,
+    get_box_stats_path,
+    load_box_stats,
+    save_box_stats,
+    record_box_stats,
+    get_box_sync_priority,
+)
+from boxyard._enums import SyncSchedulingPolicy
+from boxyard._models import BoxMeta
+
+
+def _make_config(tmp_path):
+    config = MagicMock()
+    config.box_stats_path = tmp_path / "box_stats"
+    config.user_boxes_path = tmp_path / "boxes"
+    return config
+
+
+def _make_box_meta(subid: str, groups: list[str] | None = None) -> BoxMeta:
+    return BoxMeta(
+        creation_timestamp_utc="20251122_143022",
+        box_subid=subid,
+        name=f"box_{subid}",
+        storage_location="default",
+        creator_hostname="myhost",
+        groups=groups or [],
+    )
+
+
+def _make_box_stats(size: int, last_modified: float | None = None) -> BoxStats:
+    return BoxStats(
+        size=size,
+        num_files=1,
+        last_modified=last_modified,
+        last_synced_utc=datetime.now(timezone.utc),
+        sync_duration=1.0,
+    )
+
+
+# ============================================================================
+# Tests for the cache
+# ============================================================================
+
+# %%
+#|export
+class TestBoxStatsCache:
+    """Tests for saving and loading box stats."""
+
+    def test_path(self, tmp_path):
+        """The stats of a box are stored by box_id."""
+        config = _make_config(tmp_path)
+
+        assert get_box_stats_path(config, "abc") == tmp_path / "box_stats" / "abc.json"
+
+    def test_save_and_load(self, tmp_path):
+        """Saved stats round-trip through the cache."""
+        config = _make_config(tmp_path)
+        box_stats = _make_box_stats(size=123, last_modified=1000.0)
+
+        save_box_stats(config, "abc", box_stats)
+
+        assert load_box_stats(config, "abc") == box_stats
+
+    def test_load_missing(self, tmp_path):
+        """Loading stats that were never saved returns None."""
+        assert load_box_stats(_make_config(tmp_path), "abc") is None
+
+    def test_save_leaves_no_temporary_files(self, tmp_path):
+        """Stats are written atomically through a uniquely named temporary file."""
+        config = _make_config(tmp_path)
+        save_box_stats(config, "abc", _make_box_stats(size=1))
+        save_box_stats(config, "abc", _make_box_stats(size=2))
+
+        assert [p.name for p in config.box_stats_path.iterdir()] == ["abc.json"]
+        assert load_box_stats(config, "abc").size == 2
+
+    def test_load_corrupt(self, tmp_path):
+        """Unreadable stats are treated as missing."""
+        config = _make_config(tmp_path)
+        config.box_stats_path.mkdir()
+        get_box_stats_path(config, "abc").write_text("{not json")
+
+        assert load_box_stats(config, "abc") is None
+
+    def test_record_box_stats(self, tmp_path):
+        """record_box_stats measures the local data of the box."""
+        config = _make_config(tmp_path)
+        box_meta = _make_box_meta("a7kx9")
+        data_path = config.user_boxes_path / box_meta.index_name
+        data_path.mkdir(parents=True)
+        (data_path / "file.txt").write_text("12345")
+
+        box_stats = asyncio.run(record_box_stats(config, box_meta, sync_duration=2.5))
+
+        assert box_stats.size == 5
+        assert box_stats.num_files == 1
+        assert box_stats.sync_duration == 2.5
+        assert load_box_stats(config, box_meta.box_id) == box_stats
+
+
+# ============================================================================
+# Tests for get_box_sync_priority
+# ============================================================================
+
+# %%
+#|export
+class TestGetBoxSyncPriority:
+    """Tests for the get_box_sync_priority function."""
+
+    @pytest.fixture
+    def setup(self, tmp_path):
+        config = _make_config(tmp_path)
+        small = _make_box_meta("small")
+        large = _make_box_meta("large")
+        unknown = _make_box_meta("unknown")
+        save_box_stats(config, small.box_id, _make_box_stats(size=10, last_modified=100.0))
+        save_box_stats(config, large.box_id, _make_box_stats(size=1000, last_modified=200.0))
+        return config, [large, unknown, small]
+
+    def _sort(self, config, box_metas, policy, group_priority=None):
+        return [
+            bm.box_subid
+            for bm in sorted(
+                box_metas,
+                key=lambda bm: get_box_sync_priority(config, bm, policy, group_priority),
+            )
+        ]
+
+    def test_fifo_keeps_order(self, setup):
+        """FIFO gives all boxes the same priority."""
+        config, box_metas = setup
+        assert self._sort(config, box_metas, SyncSchedulingPolicy.FIFO) == [
+            "large", "unknown", "small"
+        ]
+
+    def test_shortest_first(self, setup):
+        """Boxes without cached stats count as empty."""
+        config, box_metas = setup
+        assert self._sort(config, box_metas, SyncSchedulingPolicy.SHORTEST_FIRST) == [
+            "unknown", "small", "large"
+        ]
+
+    def test_largest_first(self, setup):
+        config, box_metas = setup
+        assert self._sort(config, box_metas, SyncSchedulingPolicy.LARGEST_FIRST) == [
+            "large", "small", "unknown"
+        ]
+
+    def test_recently_modified_first(self, setup):
+        """The cached last modification orders the boxes."""
+        config, box_metas = setup
+        assert self._sort(config, box_metas, SyncSchedulingPolicy.RECENTLY_MODIFIED_FIRST) == [
+            "large", "small", "unknown"
+        ]
+
+    def test_recently_modified_uses_data_folder_mtime(self, setup):
+        """A change to the top level of the data folder counts as a modification."""
+        config, box_metas = setup
+        unknown = box_metas[1]
+        data_path = config.user_boxes_path / unknown.index_name
+        data_path.mkdir(parents=True)
+        os.utime(data_path, (300.0, 300.0))
+
+        assert self._sort(config, box_metas, SyncSchedulingPolicy.RECENTLY_MODIFIED_FIRST) == [
+            "unknown", "large", "small"
+        ]
+
+    def test_recently_modified_uses_edits_since_last_sync(self, setup):
+        """An in-place edit below the top level of the data folder counts as a modification."""
+        config, box_metas = setup
+        small = box_metas[2]
+        nested_path = config.user_boxes_path / small.index_name / "a" / "b"
+        nested_path.mkdir(parents=True)
+        (nested_path / "file.txt").write_text("edited")
+        for path in [nested_path.parent.parent, nested_path.parent, nested_path]:
+            os.utime(path, (50.0, 50.0))
+        os.utime(nested_path / "file.txt", (300.0, 300.0))
+
+        assert self._sort(config, box_metas, SyncSchedulingPolicy.RECENTLY_MODIFIED_FIRST) == [
+            "small", "large", "unknown"
+        ]
+
+    def test_recently_modified_scan_is_bounded(self, setup, monkeypatch):
+        """Only a bounded number of entries of the data folder are checked."""
+        monkeypatch.setattr(box_stats_module, "LAST_MODIFIED_SCAN_MAX_ENTRIES", 1)
+        config, box_metas = setup
+        small = box_metas[2]
+        nested_path = config.user_boxes_path / small.index_name / "a"
+        nested_path.mkdir(parents=True)
+        (nested_path / "file.txt").write_text("edited")
+        for path in [nested_path.parent, nested_path]:
+            os.utime(path, (50.0, 50.0))
+        os.utime(nested_path / "file.txt", (300.0, 300.0))
+
+        assert self._sort(config, box_metas, SyncSchedulingPolicy.RECENTLY_MODIFIED_FIRST) == [
+            "large", "small", "unknown"
+        ]
+
+    def test_group_priority(self, tmp_path):
+        """Boxes in prioritised groups come first, in the order of the groups."""
+        config = _make_config(tmp_path)
+        box_metas = [
+            _make_box_meta("none"),
+            _make_box_meta("second", groups=["g2"]),
+            _make_box_meta("first", groups=["g2", "g1"]),
+        ]
+
+        assert self._sort(
+            config, box_metas, SyncSchedulingPolicy.FIFO, group_priority=["g1", "g2"]
+        ) == ["first", "second", "none"]
@@ -203,6 +203,7 @@ class TestBoxyardMetaParentChild:
         meta = BoxyardMeta(box_metas=[box])
         # Should not raise, just return empty
         assert meta.ancestors_of(box.box_id) == []
+        assert meta.would_create_cycle(box.box_id, "nonexistent_id") is False
 
     def test_multiple_roots(self):
         a = _make_box("20251122", "aaaaa", "root1")
@@ -0,0 +1,158 @@
+# ---
+# jupyter:
+#   kernelspec:
+#     display_name: Python 3
+#     language: python
+#     name: python3
+# ---
+
+# %% [markdown]
+# # Unit Tests for Refreshing the Boxyard Meta
+#
+# Tests that concurrent refreshes of `boxyard_meta.json` never replace it with older box metas.
+
+# %%
+#|default_exp unit.models.test_refresh_boxyard_meta
+
+# %%
+#|export
+import pytest
+from unittest.mock import MagicMock
+
+import boxyard._models as models
+from boxyard._models import BoxMeta, BoxyardMeta, get_name_search_index, refresh_boxyard_meta
+
+
+def _make_box_meta(subid: str, name: str = "box") -> BoxMeta:
+    return BoxMeta(
+        creation_timestamp_utc="20251122_143022",
+        box_subid=subid,
+        name=name,
+        storage_location="default",
+        creator_hostname="host",
+        groups=[],
+    )
+
+
+@pytest.fixture
+def config(tmp_path):
+    config = MagicMock()
+    config.boxyard_data_path = tmp_path
+    config.boxyard_meta_path = tmp_path / "boxyard_meta.json"
+    config.boxyard_meta_snapshot_path = tmp_path / "boxyard_meta.snapshot"
+    return config
+
+
+def _load(config) -> list[str]:
+    return [bm.box_id for bm in BoxyardMeta.model_validate_json(config.boxyard_meta_path.read_text()).box_metas]
+
+
+# ============================================================================
+# Tests for refresh_boxyard_meta
+# ============================================================================
+
+# %%
+#|export
+class TestRefreshBoxyardMeta:
+    """Tests for the versioned writes of refresh_boxyard_meta."""
+
+    def test_writes_meta_and_snapshot(self, config, monkeypatch):
+        monkeypatch.setattr(models, "create_boxyard_meta", lambda config: BoxyardMeta(box_metas=[_make_box_meta("aaaaa")]))
+        refresh_boxyard_meta(config)
+        assert _load(config) == ["20251122_143022_aaaaa"]
+        assert config.boxyard_meta_snapshot_path.exists()
+
+    def test_older_refresh_does_not_overwrite_newer(self, config, monkeypatch):
+        def _create_during_newer_refresh(config):
+            # Another refresh starts reading after this one, and finishes first (without the lock,
+            # which this refresh holds shared while it reads)
+            monkeypatch.setattr(models, "create_boxyard_meta", lambda config: BoxyardMeta(box_metas=[_make_box_meta("bbbbb")]))
+            refresh_boxyard_meta(config, _skip_lock=True)
+            return BoxyardMeta(box_metas=[_make_box_meta("aaaaa")])
+
+        monkeypatch.setattr(models, "create_boxyard_meta", _create_during_newer_refresh)
+        refresh_boxyard_meta(config)
+        assert _load(config) == ["20251122_143022_bbbbb"]
+
+    def test_later_refresh_overwrites(self, config, monkeypatch):
+        for subid in ["aaaaa", "bbbbb"]:
+            monkeypatch.setattr(models, "create_boxyard_meta", lambda config, subid=subid: BoxyardMeta(box_metas=[_make_box_meta(subid)]))
+            refresh_boxyard_meta(config)
+        assert _load(config) == ["20251122_143022_bbbbb"]
+
+    def test_box_metas_are_read_under_shared_lock(self, config, monkeypatch):
+        from boxyard._utils.locking import BoxyardLockManager, LockAcquisitionError
+
+        lock_manager = BoxyardLockManager(config.boxyard_data_path)
+
+        def _create(config):
+            # Other readers can read, but no box can be created
+            with lock_manager.global_lock(shared=True, timeout=0.1):
+                pass
+            with pytest.raises(LockAcquisitionError):
+                with lock_manager.global_lock(timeout=0.1):
+                    pass
+            return BoxyardMeta(box_metas=[_make_box_meta("aaaaa")])
+
+        monkeypatch.setattr(models, "create_boxyard_meta", _create)
+        refresh_boxyard_meta(config)
+        assert _load(config) == ["20251122_143022_aaaaa"]
+
+    def test_box_without_meta_file_is_skipped(self, config, tmp_path):
+        config.local_store_path = tmp_path / "store"
+        config.storage_locations = {"default": None}
+        _make_box_meta("aaaaa").save(config)
+        # A box that is being created, whose meta file is not saved yet
+        (tmp_path / "store" / "default" / "20251122_143022_bbbbb__box").mkdir()
+
+        refresh_boxyard_meta(config)
+        assert _load(config) == ["20251122_143022_aaaaa"]
+
+    def test_meta_from_the_future_is_overwritten(self, config, monkeypatch):
+        import os
+        import time
+
+        config.boxyard_meta_path.write_text(BoxyardMeta(box_metas=[]).model_dump_json())
+        future_ns = time.time_ns() + 3600 * 10**9
+        os.utime(config.boxyard_meta_path, ns=(future_ns, future_ns))
+        monkeypatch.setattr(models, "create_boxyard_meta", lambda config: BoxyardMeta(box_metas=[_make_box_meta("aaaaa")]))
+        refresh_boxyard_meta(config)
+        assert _load(config) == ["20251122_143022_aaaaa"]
+
+
+# ============================================================================
+# Tests for get_name_search_index
+# ============================================================================
+
+# %%
+#|export
+class TestGetNameSearchIndex:
+    """Tests that the name search index is only read from a snapshot of the loaded meta."""
+
+    def _refresh(self, config, monkeypatch, names: list[str]) -> None:
+        box_metas = [_make_box_meta(f"{i:05d}", name) for i, name in enumerate(names)]
+        monkeypatch.setattr(models, "create_boxyard_meta", lambda config: BoxyardMeta(box_metas=box_metas))
+        refresh_boxyard_meta(config)
+
+    def test_snapshot_of_loaded_meta_is_used(self, config, monkeypatch):
+        self._refresh(config, monkeypatch, ["alpha", "beta"])
+        boxyard_meta = models._load_boxyard_meta(config.boxyard_meta_path)
+
+        assert get_name_search_index(config, boxyard_meta).find("beta") == [1]
+        # The index was not built from the metas
+        assert "name_index" not in boxyard_meta.__dict__
+
+    def test_snapshot_of_other_meta_is_not_used(self, config, monkeypatch):
+        self._refresh(config, monkeypatch, ["alpha", "beta"])
+        boxyard_meta = models._load_boxyard_meta(config.boxyard_meta_path)
+        # The meta is replaced by one with the same number of boxes, but other names
+        self._refresh(config, monkeypatch, ["gamma", "delta"])
+
+        name_index = get_name_search_index(config, boxyard_meta)
+        assert name_index.find("beta") == [1]
+
+    def test_meta_that_was_not_loaded_from_file(self, config, monkeypatch):
+        self._refresh(config, monkeypatch, ["alpha", "beta"])
+        boxyard_meta = BoxyardMeta(box_metas=[_make_box_meta("00000", "gamma")])
+
+        assert get_name_search_index(config, boxyard_meta).find("gamma") == [0]
@@ -0,0 +1,160 @@
+# ---
+# jupyter:
+#   kernelspec:
+#     display_name: Python 3
+#     language: python
+#     name: python3
+# ---
+
+# %% [markdown]
+# # Unit Tests for User Box Group Symlinks
+#
+# Tests for the incremental reconciliation of the symlinks in `user_box_groups_path` against
+# the manifest of the last run.
+
+# %%
+#|default_exp unit.models.test_user_symlinks
+
+# %%
+#|export
+import os
+import pytest
+from unittest.mock import MagicMock
+
+import boxyard._models as models
+from boxyard._models import BoxMeta, BoxyardMeta, create_user_box_group_symlinks
+from boxyard.config import VirtualBoxGroupConfig
+
+
+def _make_box_meta(subid: str, name: str, groups: list[str]) -> BoxMeta:
+    return BoxMeta(
+        creation_timestamp_utc="20251122_143022",
+        box_subid=subid,
+        name=name,
+        storage_location="default",
+        creator_hostname="host",
+        groups=groups,
+    )
+
+
+class _Yard:
+    """A yard on disk with just enough of a config for `create_user_box_group_symlinks`."""
+
+    def __init__(self, tmp_path):
+        self.config = MagicMock()
+        self.config.user_boxes_path = tmp_path / "boxes"
+        self.config.user_box_groups_path = tmp_path / "groups"
+        self.config.boxyard_meta_path = tmp_path / "data" / "boxyard_meta.json"
+        self.config.user_box_group_symlinks_manifest_path = tmp_path / "data" / "user_box_group_symlinks.json"
+        self.config.box_groups = {}
+        self.config.virtual_box_groups = {}
+        self.config.user_boxes_path.mkdir()
+        self.config.boxyard_meta_path.parent.mkdir()
+
+    def set_boxes(self, box_metas: list[BoxMeta]) -> None:
+        self.config.boxyard_meta_path.write_text(BoxyardMeta(box_metas=box_metas).model_dump_json())
+        for box_meta in box_metas:
+            (self.config.user_boxes_path / box_meta.index_name).mkdir(exist_ok=True)
+
+    def get_links(self) -> dict[str, str]:
+        root = self.config.user_box_groups_path
+        return {
+            p.relative_to(root).as_posix(): os.readlink(p).rsplit("/", 1)[-1]
+            for p in root.glob("**/*")
+            if p.is_symlink()
+        }
+
+
+@pytest.fixture
+def yard(tmp_path):
+    return _Yard(tmp_path)
+
+
+@pytest.fixture
+def boxes():
+    return [
+        _make_box_meta("aaaaa", "alpha", ["work"]),
+        _make_box_meta("bbbbb", "beta", ["work", "play"]),
+    ]
+
+
+# ============================================================================
+# Tests for create_user_box_group_symlinks
+# ============================================================================
+
+# %%
+#|export
+class TestUserSymlinks:
+    """Tests for creating and reconciling the user box group symlinks."""
+
+    def test_creates_symlinks_and_manifest(self, yard, boxes):
+        yard.set_boxes(boxes)
+        create_user_box_group_symlinks(yard.config)
+        alpha, beta = (bm.index_name for bm in boxes)
+        assert yard.get_links() == {f"work/{alpha}": alpha, f"work/{beta}": beta, f"play/{beta}": beta}
+        assert yard.config.user_box_group_symlinks_manifest_path.exists()
+
+    def test_skips_when_unchanged(self, yard, boxes, monkeypatch):
+        yard.set_boxes(boxes)
+        create_user_box_group_symlinks(yard.config)
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("The meta should not be loaded")
+
+        monkeypatch.setattr(models, "get_boxyard_meta", _fail)
+        create_user_box_group_symlinks(yard.config)
+
+    def test_only_changed_symlinks_are_touched(self, yard, boxes):
+        yard.set_boxes(boxes)
+        create_user_box_group_symlinks(yard.config)
+        alpha, beta = (bm.index_name for bm in boxes)
+        kept_inode = (yard.config.user_box_groups_path / "work" / alpha).lstat().st_ino
+
+        boxes[0].groups = ["work", "new"]
+        boxes[1].groups = ["work"]
+        yard.set_boxes(boxes)
+        create_user_box_group_symlinks(yard.config)
+
+        assert yard.get_links() == {f"work/{alpha}": alpha, f"work/{beta}": beta, f"new/{alpha}": alpha}
+        assert (yard.config.user_box_groups_path / "work" / alpha).lstat().st_ino == kept_inode
+        # The folder of a group without boxes is removed
+        assert not (yard.config.user_box_groups_path / "play").exists()
+
+    def test_excluded_boxes_are_removed(self, yard, boxes):
+        yard.set_boxes(boxes)
+        create_user_box_group_symlinks(yard.config)
+        (yard.config.user_boxes_path / boxes[1].index_name).rmdir()
+        create_user_box_group_symlinks(yard.config)
+        alpha = boxes[0].index_name
+        assert yard.get_links() == {f"work/{alpha}": alpha}
+
+    def test_group_config_changes_are_applied(self, yard, boxes):
+        yard.set_boxes(boxes)
+        create_user_box_group_symlinks(yard.config)
+        yard.config.virtual_box_groups = {"both": VirtualBoxGroupConfig(filter_expr="work AND play")}
+        create_user_box_group_symlinks(yard.config)
+        beta = boxes[1].index_name
+        assert yard.get_links()[f"both/{beta}"] == beta
+
+    def test_full_reconciliation_without_manifest(self, yard, boxes):
+        yard.set_boxes(boxes)
+        stale_link = yard.config.user_box_groups_path / "old" / "stale"
+        stale_link.parent.mkdir(parents=True)
+        stale_link.symlink_to(yard.config.user_boxes_path / "missing")
+        create_user_box_group_symlinks(yard.config)
+        assert not (yard.config.user_box_groups_path / "old").exists()
+
+        # Deleting the manifest forces a full reconciliation, which restores removed symlinks
+        alpha = boxes[0].index_name
+        (yard.config.user_box_groups_path / "work" / alpha).unlink()
+        yard.config.user_box_group_symlinks_manifest_path.unlink()
+        create_user_box_group_symlinks(yard.config)
+        assert f"work/{alpha}" in yard.get_links()
+
+    def test_files_in_group_folders_raise(self, yard, boxes):
+        yard.set_boxes(boxes)
+        (yard.config.user_box_groups_path / "work").mkdir(parents=True)
+        (yard.config.user_box_groups_path / "work" / "notes.txt").write_text("")
+        with pytest.raises(Exception, match="is in the user box group path"):
+            create_user_box_group_symlinks(yard.config)
+        assert not yard.config.user_box_group_symlinks_manifest_path.exists()
@@ -0,0 +1,191 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: pts/mod/_box_table.pct.py
+
+__all__ = ['BoxTable', 'get_timestamp_key']
+
+# %% pts/mod/_box_table.pct.py 3
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from functools import cached_property
+from typing import TYPE_CHECKING
+
+from ._enums import BoxSortKey
+from ._fast import ReachabilityIndex
+from ._utils.logical_expressions import GroupBitsets, compile_group_expression
+
+if TYPE_CHECKING:
+    from ._models import BoxMeta
+
+# %% pts/mod/_box_table.pct.py 6
+def get_timestamp_key(timestamp: str | datetime) -> int:
+    """
+    The creation timestamp of a box as an integer `YYYYMMDDHHMMSS`, which orders like the
+    timestamps do.
+
+    Accepts the formats of `creation_timestamp_utc` (`%Y%m%d_%H%M%S` and `%Y%m%d`, the latter
+    being midnight), ISO 8601 strings and datetimes.
+    """
+    if isinstance(timestamp, datetime):
+        return int(timestamp.strftime("%Y%m%d%H%M%S"))
+    # Not parsed with `strptime`, which is slow when done for every box
+    if timestamp.isdecimal() and len(timestamp) == 8:
+        return int(timestamp) * 1000000
+    if len(timestamp) == 15 and timestamp[8] == "_" and timestamp[:8].isdecimal() and timestamp[9:].isdecimal():
+        return int(timestamp)  # `int` skips the underscore
+    try:
+        return get_timestamp_key(datetime.fromisoformat(timestamp))
+    except ValueError:
+        raise ValueError(f"Invalid timestamp: '{timestamp}'") from None
+
+# %% pts/mod/_box_table.pct.py 10
+class BoxTable:
+    """
+    The boxes of a yard, stored column by column.
+
+    Every column holds one value per box, in the order of `box_metas` (the *row* of the box).
+    The filters return bitsets over the rows (bit `i` is set if row `i` is selected), which
+    are combined with `&`, `|` and `~`, and turned back into boxes with `select`.
+    """
+
+    def __init__(self, box_metas: list["BoxMeta"]):
+        self.box_metas = box_metas
+        self.num_rows = len(box_metas)
+        self.all_rows = (1 << self.num_rows) - 1
+        self.box_ids = [bm.box_id for bm in box_metas]
+        self.names = [bm.name for bm in box_metas]
+        self.rows_by_id = {box_id: row for row, box_id in enumerate(self.box_ids)}
+        self.creation_keys = array("q", [get_timestamp_key(bm.creation_timestamp_utc) for bm in box_metas])
+        self.storage_location_bitsets = GroupBitsets([(bm.storage_location,) for bm in box_metas])
+        self.group_bitsets = GroupBitsets([bm.groups for bm in box_metas])
+
+        rows = self.rows_by_id
+        self.parent_rows = [
+            [rows[p] for p in dict.fromkeys(bm.parents) if p in rows] if bm.parents else ()
+            for bm in box_metas
+        ]
+        # Only the boxes that have children are in `_child_rows`
+        self._child_rows: dict[int, list[int]] = {}
+        for row, parent_rows in enumerate(self.parent_rows):
+            for parent_row in parent_rows:
+                self._child_rows.setdefault(parent_row, []).append(row)
+        # Boxes with a parent that is not in the yard are not roots
+        self.roots = GroupBitsets.from_indices(
+            (row for row, bm in enumerate(box_metas) if not bm.parents), self.num_rows
+        )
+        self.leaves = self.all_rows & ~GroupBitsets.from_indices(self._child_rows, self.num_rows)
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    @cached_property
+    def index_names(self) -> list[str]:
+        return [f"{box_id}__{name}" for box_id, name in zip(self.box_ids, self.names, strict=True)]
+
+    @cached_property
+    def reachability(self) -> ReachabilityIndex:
+        return ReachabilityIndex(self.num_rows, self.parent_rows.__getitem__)
+
+    @cached_property
+    def _rows_by_creation(self) -> tuple[list[int], list[int]]:
+        """The rows sorted by creation timestamp, and their sorted timestamps."""
+        rows = sorted(range(self.num_rows), key=self.creation_keys.__getitem__)
+        return rows, [self.creation_keys[row] for row in rows]
+
+    # Filters
+
+    def filter(
+        self,
+        storage_locations: list[str] | None = None,
+        include_groups: list[str] | None = None,
+        exclude_groups: list[str] | None = None,
+        group_filter: str | None = None,
+    ) -> int:
+        """
+        The boxes in any of `storage_locations`, in any of `include_groups`, in none of
+        `exclude_groups`, and matching the group expression `group_filter`. Filters that are
+        not given do not restrict the selection.
+        """
+        selection = self.all_rows
+        if storage_locations is not None:
+            selection &= self._get_union(self.storage_location_bitsets, storage_locations)
+        if include_groups:
+            selection &= self._get_union(self.group_bitsets, include_groups)
+        if exclude_groups:
+            selection &= ~self._get_union(self.group_bitsets, exclude_groups)
+        if group_filter:
+            selection &= compile_group_expression(group_filter).evaluate_bitsets(self.group_bitsets)
+        return selection
+
+    @staticmethod
+    def _get_union(bitsets: GroupBitsets, names: list[str]) -> int:
+        union = 0
+        for name in names:
+            union |= bitsets.get(name)
+        return union
+
+    def created_between(
+        self,
+        after: str | datetime | None = None,
+        before: str | datetime | None = None,
+    ) -> int:
+        """The boxes created at or after `after`, and strictly before `before`."""
+        rows, keys = self._rows_by_creation
+        start = 0 if after is None else bisect_left(keys, get_timestamp_key(after))
+        end = len(keys) if before is None else bisect_left(keys, get_timestamp_key(before))
+        if start == 0 and end == len(keys):
+            return self.all_rows
+        return GroupBitsets.from_indices(rows[start:end], self.num_rows)
+
+    def children_of(self, box_id: str) -> int:
+        row = self.rows_by_id.get(box_id)
+        if row is None:
+            return 0
+        return GroupBitsets.from_indices(self._child_rows.get(row, ()), self.num_rows)
+
+    def descendants_of(self, box_id: str) -> int:
+        row = self.rows_by_id.get(box_id)
+        if row is None:
+            return 0
+        descendants = set()
+        stack = [row]
+        while stack:
+            for child_row in self._child_rows.get(stack.pop(), ()):
+                if child_row not in descendants:
+                    descendants.add(child_row)
+                    stack.append(child_row)
+        return GroupBitsets.from_indices(descendants, self.num_rows)
+
+    def parents_of(self, box_id: str) -> int:
+        row = self.rows_by_id.get(box_id)
+        if row is None:
+            return 0
+        return GroupBitsets.from_indices(self.parent_rows[row], self.num_rows)
+
+    def ancestors_of(self, box_id: str) -> int:
+        row = self.rows_by_id.get(box_id)
+        if row is None:
+            return 0
+        return self.reachability.get_ancestors(row)
+
+    # Selections
+
+    def get_rows(self, selection: int, sort_by: BoxSortKey | None = None) -> list[int]:
+        """
+        The rows of `selection`, in the order of `box_metas` or sorted by `sort_by` (ties are
+        kept in the order of `box_metas`).
+        """
+        rows = GroupBitsets.get_indices(selection & self.all_rows)
+        if sort_by is None:
+            return rows
+        sort_by = BoxSortKey(sort_by)
+        if sort_by == BoxSortKey.INDEX_NAME:
+            column = self.index_names
+        elif sort_by == BoxSortKey.NAME:
+            column = self.names
+        else:
+            column = self.creation_keys
+        return sorted(rows, key=column.__getitem__)
+
+    def select(self, selection: int, sort_by: BoxSortKey | None = None) -> list["BoxMeta"]:
+        """The boxes of `selection` (see `get_rows`)."""
+        return [self.box_metas[row] for row in self.get_rows(selection, sort_by)]
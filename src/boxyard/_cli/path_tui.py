@@ -1,14 +1,110 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: pts/mod/_cli/path_tui.pct.py
 
-__all__ = ['BoxPathSelector']
+__all__ = ['BoxPathSelector', 'BoxTreeModel']
 
 # %% pts/mod/_cli/path_tui.pct.py 3
+from textual import work
 from textual.app import App, ComposeResult
 from textual.widgets import Tree, Header, Footer, Input
 from textual.binding import Binding
+from textual.worker import get_current_worker
+from rich.text import Text
 from pathlib import Path
 
+# Seconds to wait for the next keystroke before filtering
+_FILTER_DEBOUNCE = 0.15
+# Trees showing at most this many nodes are fully expanded
+_AUTO_EXPAND_LIMIT = 500
 
+# %% pts/mod/_cli/path_tui.pct.py 5
+class BoxTreeModel:
+    """
+    The tree of boxes shown by `BoxPathSelector`: the boxes of every group (mode "groups"), or
+    the children of every box (mode "tree"), sorted by name.
+
+    Nodes are identified by keys: `None` is the root, `("group", name)` a group (with `name`
+    None for the boxes without groups), and `("box", row)` the box in row `row` of `box_metas`.
+    A filter is a set of visible keys (see `get_visible`), or None to show all nodes.
+    """
+
+    def __init__(self, box_metas, mode="groups"):
+        self.box_metas = box_metas
+        self.mode = mode
+        self._children: dict = {}
+        self._parents: dict = {}
+        rows_by_name = sorted(range(len(box_metas)), key=lambda row: box_metas[row].name)
+        if mode == "groups":
+            groups: dict[str, list] = {}
+            ungrouped = []
+            for row in rows_by_name:
+                bm = box_metas[row]
+                if bm.groups:
+                    for g in dict.fromkeys(bm.groups):
+                        groups.setdefault(g, []).append(("box", row))
+                else:
+                    ungrouped.append(("box", row))
+            top = []
+            for g in sorted(groups):
+                top.append(("group", g))
+                self._children[("group", g)] = groups[g]
+            if ungrouped:
+                top.append(("group", None))
+                self._children[("group", None)] = ungrouped
+            self._children[None] = top
+        else:
+            rows_by_id = {bm.box_id: row for row, bm in enumerate(box_metas)}
+            top = []
+            for row in rows_by_name:
+                key = ("box", row)
+                parent_rows = [rows_by_id[p] for p in dict.fromkeys(box_metas[row].parents) if p in rows_by_id]
+                # Boxes whose parents are not in `box_metas` are shown at the top
+                if not parent_rows:
+                    top.append(key)
+                for parent_row in parent_rows:
+                    self._children.setdefault(("box", parent_row), []).append(key)
+                    self._parents.setdefault(key, []).append(("box", parent_row))
+            self._children[None] = top
+
+    def get_children(self, key, visible: set | None = None) -> list:
+        children = self._children.get(key, [])
+        if visible is None:
+            return children
+        return [child for child in children if child in visible]
+
+    def has_children(self, key, visible: set | None = None) -> bool:
+        children = self._children.get(key, [])
+        if visible is None:
+            return bool(children)
+        return any(child in visible for child in children)
+
+    def get_visible(self, rows) -> set:
+        """
+        The keys to show for the boxes in `rows`: their groups (mode "groups"), or their
+        ancestors (mode "tree"), so that every matching box can be reached from the root.
+        """
+        visible = {("box", row) for row in rows}
+        if self.mode == "groups":
+            for group_key in self._children[None]:
+                if any(child in visible for child in self._children[group_key]):
+                    visible.add(group_key)
+        else:
+            stack = list(visible)
+            while stack:
+                for parent_key in self._parents.get(stack.pop(), []):
+                    if parent_key not in visible:
+                        visible.add(parent_key)
+                        stack.append(parent_key)
+        return visible
+
+    def get_label(self, key, dimmed: bool = False):
+        kind, value = key
+        if kind == "group":
+            return "[dim](ungrouped)[/dim]" if value is None else f"[bold]{value}[/bold]"
+        bm = self.box_metas[value]
+        label = f"{bm.name} ({bm.box_id})"
+        return Text(label, style="dim") if dimmed else label
+
+# %% pts/mod/_cli/path_tui.pct.py 8
 class BoxPathSelector(App):
     """Interactive TUI for selecting a box and returning its path."""
 
@@ -40,6 +136,15 @@ class BoxPathSelector(App):
         self._path_option = path_option
         self._selected_path = None
         self._filter_text = ""
+        self._filter_timer = None
+        self._search_index = None
+        self._model = BoxTreeModel(box_metas, mode="groups" if mode == "groups" else "tree")
+        # The visible keys of the model and the boxes matching the filter (None if not filtering)
+        self._visible = None
+        self._matches = None
+        # The key of every node, and the (key, node) children of the nodes that were filled in
+        self._node_keys = {}
+        self._shown_children = {}
 
     def compose(self) -> ComposeResult:
         yield Header()
@@ -51,8 +156,10 @@ class BoxPathSelector(App):
         yield Footer()
 
     def on_mount(self) -> None:
-        self._build_tree()
         tree = self.query_one(Tree)
+        tree.root.expand()
+        self._node_keys[tree.root.id] = None
+        self._update_tree()
         tree.focus()
         # Position cursor on the first line without triggering selection
         tree.cursor_line = 0
@@ -71,76 +178,107 @@ class BoxPathSelector(App):
         else:
             return box_meta.get_local_part_path(self._config, BoxPart.DATA).as_posix()
 
-    def _build_tree(self, filter_text: str = "") -> None:
-        tree = self.query_one(Tree)
-        tree.clear()
-        tree.root.expand()
+    def _get_search_index(self):
+        from .._fast import NameSearchIndex
 
-        metas = self._box_metas
-        if filter_text:
-            ft = filter_text.lower()
-            metas = [bm for bm in metas if ft in bm.name.lower() or ft in bm.box_id.lower()]
+        if self._search_index is None:
+            # The filter matches the name or the id of a box (a line break never matches)
+            self._search_index = NameSearchIndex.from_names(
+                [f"{bm.name}\n{bm.box_id}" for bm in self._box_metas]
+            )
+        return self._search_index
 
-        if self._mode == "groups":
-            self._build_groups_tree(tree, metas)
-        else:
-            self._build_hierarchy_tree(tree, metas)
-
-    def _build_groups_tree(self, tree, metas) -> None:
-        groups: dict[str, list] = {}
-        ungrouped = []
-        for bm in metas:
-            if bm.groups:
-                for g in bm.groups:
-                    groups.setdefault(g, []).append(bm)
+    # Tree nodes
+
+    def _update_tree(self) -> None:
+        num_shown = len(self._box_metas) if self._visible is None else len(self._visible)
+        self._sync_children(self.query_one(Tree).root, None, num_shown <= _AUTO_EXPAND_LIMIT, ())
+
+    def _sync_children(self, node, key, auto_expand: bool, ancestor_keys: tuple) -> None:
+        """
+        Show the visible children of `node` (the node of `key`), keeping the nodes that are
+        already shown, and update the children that were filled in.
+        """
+        wanted = self._model.get_children(key, self._visible)
+        wanted_keys = set(wanted)
+        existing = {}
+        for child_key, child_node in self._shown_children.get(node.id, []):
+            if child_key in wanted_keys:
+                existing[child_key] = child_node
             else:
-                ungrouped.append(bm)
-
-        for group_name in sorted(groups.keys()):
-            group_node = tree.root.add(f"[bold]{group_name}[/bold]", expand=True)
-            for bm in sorted(groups[group_name], key=lambda x: x.name):
-                group_node.add_leaf(
-                    f"{bm.name} ({bm.box_id})",
-                    data=bm,
-                )
+                self._forget(child_node)
+                child_node.remove()
 
-        if ungrouped:
-            ungrouped_node = tree.root.add("[dim](ungrouped)[/dim]", expand=True)
-            for bm in sorted(ungrouped, key=lambda x: x.name):
-                ungrouped_node.add_leaf(
-                    f"{bm.name} ({bm.box_id})",
-                    data=bm,
+        shown = []
+        previous = None
+        for child_key in wanted:
+            has_children = self._model.has_children(child_key, self._visible)
+            child_node = existing.get(child_key)
+            if child_node is None:
+                position = {"before": 0} if previous is None else {"after": previous}
+                child_node = node.add(
+                    self._get_label(child_key),
+                    data=self._get_data(child_key),
+                    allow_expand=has_children,
+                    **position,
                 )
+                self._node_keys[child_node.id] = child_key
+            else:
+                child_node.set_label(self._get_label(child_key))
+                child_node.allow_expand = has_children
+            shown.append((child_key, child_node))
+            previous = child_node
 
-    def _build_hierarchy_tree(self, tree, metas) -> None:
-        meta_ids = {bm.box_id for bm in metas}
-        by_id = {bm.box_id: bm for bm in metas}
-
-        def _add_children(parent_node, parent_id, visited):
-            children = [bm for bm in metas if parent_id in bm.parents]
-            children.sort(key=lambda x: x.name)
-            for child in children:
-                if child.box_id not in visited:
-                    visited.add(child.box_id)
-                    child_node = parent_node.add(
-                        f"{child.name} ({child.box_id})",
-                        data=child,
-                    )
+            # Cycles in the parents are expanded once
+            can_expand = has_children and child_key not in ancestor_keys
+            if child_node.id in self._shown_children or (auto_expand and can_expand):
+                self._sync_children(child_node, child_key, auto_expand and can_expand, (*ancestor_keys, child_key))
+                if auto_expand and can_expand:
                     child_node.expand()
-                    _add_children(child_node, child.box_id, visited)
+        self._shown_children[node.id] = shown
 
-        roots = [bm for bm in metas if not bm.parents or not any(p in meta_ids for p in bm.parents)]
-        roots.sort(key=lambda x: x.name)
-        visited = set()
+    def _forget(self, node) -> None:
+        self._node_keys.pop(node.id, None)
+        for _, child_node in self._shown_children.pop(node.id, []):
+            self._forget(child_node)
 
-        for root in roots:
-            visited.add(root.box_id)
-            root_node = tree.root.add(
-                f"{root.name} ({root.box_id})",
-                data=root,
-            )
-            root_node.expand()
-            _add_children(root_node, root.box_id, visited)
+    def _get_label(self, key):
+        # In the tree mode, the ancestors of the matching boxes are shown dimmed
+        dimmed = self._matches is not None and key[0] == "box" and key[1] not in self._matches
+        return self._model.get_label(key, dimmed=dimmed)
+
+    def _get_data(self, key):
+        return self._box_metas[key[1]] if key[0] == "box" else None
+
+    def on_tree_node_expanded(self, event: Tree.NodeExpanded) -> None:
+        node = event.node
+        if node.id not in self._shown_children and node.id in self._node_keys:
+            self._sync_children(node, self._node_keys[node.id], False, ())
+
+    # Filtering
+
+    def on_input_changed(self, event: Input.Changed) -> None:
+        if self._filter_timer is not None:
+            self._filter_timer.stop()
+        filter_text = event.value
+        self._filter_timer = self.set_timer(_FILTER_DEBOUNCE, lambda: self._filter(filter_text))
+
+    @work(thread=True, exclusive=True, group="filter")
+    def _filter(self, filter_text: str) -> None:
+        matches = visible = None
+        if filter_text:
+            matches = set(self._get_search_index().find(filter_text))
+            visible = self._model.get_visible(matches)
+        if not get_current_worker().is_cancelled:
+            self.call_from_thread(self._apply_filter, filter_text, matches, visible)
+
+    def _apply_filter(self, filter_text: str, matches, visible) -> None:
+        self._filter_text = filter_text
+        self._matches = matches
+        self._visible = visible
+        self._update_tree()
+
+    # Actions
 
     def on_tree_node_selected(self, event: Tree.NodeSelected) -> None:
         if event.node.data is not None:
@@ -158,6 +296,3 @@ class BoxPathSelector(App):
         else:
             filter_input.add_class("visible")
             filter_input.focus()
-
-    def on_input_changed(self, event: Input.Changed) -> None:
-        self._build_tree(filter_text=event.value)
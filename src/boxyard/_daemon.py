@@ -0,0 +1,191 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: pts/mod/_daemon.pct.py
+
+__all__ = ['DaemonAlreadyRunningError', 'DaemonServer', 'create_daemon_server', 'run_cli_command', 'run_daemon']
+
+# %% pts/mod/_daemon.pct.py 3
+import io
+import json
+import os
+import socketserver
+import sys
+import threading
+import traceback
+import contextlib
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+from ._daemon_client import FORWARDED_COMMANDS, send_daemon_request, split_cli_args
+
+# %% pts/mod/_daemon.pct.py 5
+_run_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _redirect_stdin(stream):
+    prev_stdin = sys.stdin
+    sys.stdin = stream
+    try:
+        yield
+    finally:
+        sys.stdin = prev_stdin
+
+
+def run_cli_command(argv: list[str], cwd: str | None = None) -> tuple[int, str, str]:
+    """
+    Run `boxyard <argv>` in this process, and return the exit code and the captured stdout
+    and stderr.
+
+    Commands are run one at a time, since the working directory and the standard streams are
+    global to the process. They are run without a terminal: stdin is empty, and with
+    interactive prompts disabled, a command that needs to prompt raises `NeedsTerminalError`.
+    """
+    from ._utils.base import NeedsTerminalError
+    import typer.main
+    from ._cli import app
+
+    command = typer.main.get_command(app)
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with _run_lock:
+        prev_cwd = os.getcwd()
+        try:
+            if cwd is not None:
+                os.chdir(cwd)
+            with redirect_stdout(stdout), redirect_stderr(stderr), _redirect_stdin(io.StringIO()):
+                # In standalone mode, click reports usage errors and aborts itself and always
+                # exits through SystemExit
+                try:
+                    command.main(args=argv, prog_name="boxyard", standalone_mode=True)
+                    exit_code = 0
+                except SystemExit as e:
+                    if isinstance(e.code, int) or e.code is None:
+                        exit_code = e.code or 0
+                    else:
+                        # Like the interpreter does for `sys.exit("message")`
+                        print(e.code, file=sys.stderr)
+                        exit_code = 1
+                except NeedsTerminalError:
+                    raise
+                except Exception:
+                    traceback.print_exc()
+                    exit_code = 1
+        finally:
+            os.chdir(prev_cwd)
+    return exit_code, stdout.getvalue(), stderr.getvalue()
+
+# %% pts/mod/_daemon.pct.py 9
+class _DaemonRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return
+        request_type = request.get("type")
+        if request_type == "run":
+            argv = request.get("argv", [])
+            _, command_name, _ = split_cli_args(argv)
+            if command_name not in self.server.forwarded_commands:
+                response = {
+                    "exit_code": 1,
+                    "stdout": "",
+                    "stderr": f"The daemon does not run the command '{command_name}'.\n",
+                }
+            else:
+                from ._utils.base import NeedsTerminalError
+
+                try:
+                    exit_code, stdout, stderr = run_cli_command(argv, request.get("cwd"))
+                    response = {"exit_code": exit_code, "stdout": stdout, "stderr": stderr}
+                except NeedsTerminalError:
+                    response = {"needs_terminal": True}
+        elif request_type in ("ping", "stop"):
+            response = {"pid": os.getpid()}
+        else:
+            response = {"error": f"Unknown request type: {request_type}"}
+        try:
+            self.wfile.write((json.dumps(response) + "\n").encode())
+        except BrokenPipeError:
+            pass  # The client went away
+        if request_type == "stop":
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    """A Unix socket server that runs forwarded CLI commands (one at a time)."""
+
+    def __init__(self, socket_path: Path, forwarded_commands=FORWARDED_COMMANDS):
+        self.socket_path = Path(socket_path)
+        self.forwarded_commands = set(forwarded_commands)
+        super().__init__(self.socket_path.as_posix(), _DaemonRequestHandler)
+
+    def server_bind(self):
+        # Only the user running the daemon can connect to it
+        old_umask = os.umask(0o077)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(old_umask)
+
+    def server_close(self):
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+# %% pts/mod/_daemon.pct.py 12
+class DaemonAlreadyRunningError(Exception):
+    pass
+
+
+def create_daemon_server(socket_path: Path) -> DaemonServer:
+    """
+    Create the server of the daemon, removing a stale socket left behind by a daemon that did
+    not shut down cleanly.
+    """
+    from ._utils.base import enable_file_cache, disable_interactive_prompts
+
+    socket_path = Path(socket_path)
+    if socket_path.exists():
+        if send_daemon_request(socket_path, {"type": "ping"}) is not None:
+            raise DaemonAlreadyRunningError(f"A daemon is already running at '{socket_path}'.")
+        socket_path.unlink()
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    enable_file_cache()
+    disable_interactive_prompts()
+    # Import the CLI up front, so that the first forwarded command is fast too
+    import boxyard._cli  # noqa: F401
+
+    return DaemonServer(socket_path)
+
+
+def _run_backup_gc_periodically(config_path: Path, stop_event: threading.Event) -> None:
+    """Garbage collect the sync backups every `sync_backup_retention.daemon_interval_hours`."""
+    import asyncio
+    from .config import get_config
+    from ._backup_gc import gc_sync_backups
+
+    while True:
+        interval_hours = get_config(config_path).sync_backup_retention.daemon_interval_hours
+        if interval_hours is None or stop_event.wait(interval_hours * 3600):
+            return
+        try:
+            asyncio.run(gc_sync_backups(get_config(config_path)))
+        except Exception:
+            # The output of the forwarded commands is redirected, so report to the real stderr
+            traceback.print_exc(file=sys.__stderr__)
+
+
+def run_daemon(socket_path: Path, config_path: Path | None = None) -> None:
+    """
+    Run the daemon in the foreground until it is stopped. If `config_path` is given, the sync
+    backups are also garbage collected periodically, if the config asks for it.
+    """
+    stop_event = threading.Event()
+    with create_daemon_server(socket_path) as server:
+        if config_path is not None:
+            threading.Thread(
+                target=_run_backup_gc_periodically, args=(config_path, stop_event), daemon=True
+            ).start()
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stop_event.set()
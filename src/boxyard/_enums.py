@@ -1,6 +1,6 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: pts/mod/_enums.pct.py
 
-__all__ = ['BoxPart', 'RenameScope', 'SyncDirection', 'SyncNameDirection', 'SyncSetting']
+__all__ = ['BoxPart', 'BoxSortKey', 'RenameScope', 'SyncDirection', 'SyncNameDirection', 'SyncSchedulingPolicy', 'SyncSetting']
 
 # %% pts/mod/_enums.pct.py 3
 from enum import Enum
@@ -32,3 +32,16 @@ class RenameScope(str, Enum):
 class SyncNameDirection(str, Enum):
     TO_LOCAL = "to_local"
     TO_REMOTE = "to_remote"
+
+
+class SyncSchedulingPolicy(str, Enum):
+    FIFO = "fifo"  # In the order the boxes are listed
+    SHORTEST_FIRST = "shortest-first"  # Smallest boxes first (by cached size)
+    LARGEST_FIRST = "largest-first"  # Largest boxes first (by cached size)
+    RECENTLY_MODIFIED_FIRST = "recently-modified-first"  # By cached/cheaply checked modification time
+
+
+class BoxSortKey(str, Enum):
+    INDEX_NAME = "index-name"
+    NAME = "name"
+    CREATED = "created"  # By creation timestamp
@@ -1,172 +1,751 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: pts/mod/_fast.pct.py
 
-__all__ = ['BoxyardFast']
+__all__ = ['BoxyardFast', 'META_SNAPSHOT_FILENAME', 'NAME_MATCH_MODES', 'NameSearchIndex', 'ReachabilityIndex', 'build_meta_snapshot', 'build_name_postings', 'get_name_grams', 'get_topological_ranks', 'load_meta_snapshot', 'write_meta_snapshot']
 
 # %% pts/mod/_fast.pct.py 3
 import json
+import mmap
+import os
+import struct
 import toml
+from array import array
 from pathlib import Path
 from collections import deque
 
 _DEFAULT_CONFIG_PATH = Path("~/.config/boxyard/config.toml")
+META_SNAPSHOT_FILENAME = "boxyard_meta.snapshot"
+
+# %% pts/mod/_fast.pct.py 5
+_SNAPSHOT_MAGIC = b"BXYSNAP3"
+_SNAPSHOT_BYTE_ORDER_MARK = 0x01020304
+# magic, byte order mark, source mtime (ns), source size, num_boxes, num_strings, num_groups,
+# num_parent_links, num_child_links, num_box_groups, num_topo_ranks, num_grams,
+# num_gram_rows
+_SNAPSHOT_HEADER = struct.Struct("=8sIqqIIIIIIIII")
+
+
+def _get_box_id(bm: dict) -> str:
+    return f"{bm['creation_timestamp_utc']}_{bm['box_subid']}"
+
+
+def build_meta_snapshot(box_metas: list[dict], source_mtime_ns: int = 0, source_size: int = 0) -> bytes:
+    """Build the compact snapshot of a list of box meta dicts (as in `boxyard_meta.json`)."""
+    box_ids = [_get_box_id(bm) for bm in box_metas]
+    num_boxes = len(box_ids)
+    row_by_box_id = {box_id: row for row, box_id in enumerate(box_ids)}
+
+    strings = list(box_ids)
+    string_ids: dict[str, int] = {}
+    for row, box_id in enumerate(box_ids):
+        string_ids.setdefault(box_id, row)
+
+    def _intern(s: str) -> int:
+        string_id = string_ids.get(s)
+        if string_id is None:
+            string_id = string_ids[s] = len(strings)
+            strings.append(s)
+        return string_id
+
+    group_names = sorted({g for bm in box_metas for g in bm.get("groups", [])})
+    group_ids = {g: i for i, g in enumerate(group_names)}
+    num_group_words = (len(group_names) + 31) // 32
+
+    box_fields = array("I")
+    parent_offsets, parents = array("I", [0]), array("I")
+    group_offsets, box_groups = array("I", [0]), array("I")
+    group_bits = array("I", [0]) * (num_boxes * num_group_words)
+    children_lists: list[list[int]] = [[] for _ in range(num_boxes)]
+    for row, bm in enumerate(box_metas):
+        box_fields.append(_intern(bm["name"]))
+        box_fields.append(_intern(bm.get("storage_location", "")))
+        for parent_id in bm.get("parents", []):
+            parents.append(_intern(parent_id))
+            if parent_id in row_by_box_id:
+                children_lists[row_by_box_id[parent_id]].append(row)
+        parent_offsets.append(len(parents))
+        for g in bm.get("groups", []):
+            group_id = group_ids[g]
+            box_groups.append(group_id)
+            group_bits[row * num_group_words + group_id // 32] |= 1 << (group_id % 32)
+        group_offsets.append(len(box_groups))
+
+    child_offsets, children = array("I", [0]), array("I")
+    for child_rows in children_lists:
+        children.extend(child_rows)
+        child_offsets.append(len(children))
+    group_name_ids = array("I", [_intern(g) for g in group_names])
+    box_order = array("I", sorted(range(num_boxes), key=box_ids.__getitem__))
+    topo_ranks = array("I", get_topological_ranks([
+        [row_by_box_id[p] for p in bm.get("parents", []) if p in row_by_box_id] for bm in box_metas
+    ]) or [])
+    name_postings = build_name_postings([bm["name"] for bm in box_metas])
+    gram_ids, gram_offsets, gram_rows = array("I"), array("I", [0]), array("I")
+    for gram in sorted(name_postings):
+        gram_ids.append(_intern(gram))
+        gram_rows.extend(name_postings[gram])
+        gram_offsets.append(len(gram_rows))
+
+    encoded_strings = [s.encode() for s in strings]
+    string_offsets = array("I", [0])
+    for encoded in encoded_strings:
+        string_offsets.append(string_offsets[-1] + len(encoded))
+
+    header = _SNAPSHOT_HEADER.pack(
+        _SNAPSHOT_MAGIC, _SNAPSHOT_BYTE_ORDER_MARK, source_mtime_ns, source_size,
+        num_boxes, len(strings), len(group_names), len(parents), len(children), len(box_groups),
+        len(topo_ranks), len(gram_ids), len(gram_rows),
+    )
+    sections = [
+        string_offsets, box_fields, box_order, parent_offsets, parents, child_offsets, children,
+        group_offsets, box_groups, group_name_ids, group_bits, topo_ranks, gram_ids, gram_offsets,
+        gram_rows,
+    ]
+    return b"".join([header, *(a.tobytes() for a in sections), *encoded_strings])
+
+
+def write_meta_snapshot(box_metas: list[dict], snapshot_path: Path, source_path: Path) -> None:
+    """
+    Write the snapshot of `box_metas` to `snapshot_path`, recording the modification time and
+    size of `source_path` (the `boxyard_meta.json` the metas were written to).
+    """
+    snapshot_path = Path(snapshot_path)
+    source_stat = Path(source_path).stat()
+    # Atomic write: temp file + rename
+    tmp_path = snapshot_path.with_suffix(".snapshot.tmp")
+    tmp_path.write_bytes(build_meta_snapshot(box_metas, source_stat.st_mtime_ns, source_stat.st_size))
+    tmp_path.rename(snapshot_path)
+
+
+def load_meta_snapshot(meta_path: Path) -> "_MetaSnapshot | None":
+    """The snapshot next to the `boxyard_meta.json` at `meta_path`, if it is up to date."""
+    meta_path = Path(meta_path)
+    try:
+        snapshot = _MetaSnapshot.from_file(meta_path.parent / META_SNAPSHOT_FILENAME)
+        source_stat = meta_path.stat()
+    except (OSError, ValueError):
+        return None
+    if (snapshot.source_mtime_ns, snapshot.source_size) != (source_stat.st_mtime_ns, source_stat.st_size):
+        return None
+    return snapshot
+
+
+class _MetaSnapshot:
+    """Read-only, array-backed view of a snapshot built by `build_meta_snapshot`."""
+
+    def __init__(self, buffer):
+        self._buffer = buffer  # Keeps the mmap alive
+        view = memoryview(buffer)
+        if len(view) < _SNAPSHOT_HEADER.size:
+            raise ValueError("Truncated boxyard meta snapshot.")
+        (
+            magic, byte_order_mark, self.source_mtime_ns, self.source_size, num_boxes,
+            num_strings, num_groups, num_parent_links, num_child_links, num_box_groups,
+            num_topo_ranks, num_grams, num_gram_rows,
+        ) = _SNAPSHOT_HEADER.unpack_from(view)
+        if magic != _SNAPSHOT_MAGIC or byte_order_mark != _SNAPSHOT_BYTE_ORDER_MARK:
+            raise ValueError("Not a boxyard meta snapshot (or written on another platform).")
+        self.num_boxes = num_boxes
+        self.num_group_words = (num_groups + 31) // 32
+
+        section_sizes = [
+            num_strings + 1, 2 * num_boxes, num_boxes, num_boxes + 1, num_parent_links,
+            num_boxes + 1, num_child_links, num_boxes + 1, num_box_groups, num_groups,
+            num_boxes * self.num_group_words, num_topo_ranks, num_grams, num_grams + 1,
+            num_gram_rows,
+        ]
+        offset = _SNAPSHOT_HEADER.size
+        if len(view) < offset + 4 * sum(section_sizes):
+            raise ValueError("Truncated boxyard meta snapshot.")
+        sections = []
+        for size in section_sizes:
+            sections.append(view[offset:offset + 4 * size].cast("I"))
+            offset += 4 * size
+        (
+            self._string_offsets, self._box_fields, self._box_order, self.parent_offsets,
+            self.parents, self.child_offsets, self.children, self.group_offsets,
+            self.box_groups, self._group_name_ids, self.group_bits, topo_ranks, self._gram_ids,
+            self._gram_offsets, self._gram_rows,
+        ) = sections
+        # None if the parents have a cycle
+        self.topo_ranks = topo_ranks if num_topo_ranks == num_boxes else None
+        self._string_data = view[offset:]
+        if len(self._string_data) < self._string_offsets[num_strings]:
+            raise ValueError("Truncated boxyard meta snapshot.")
+        self._strings: dict[int, str] = {}
+        self._rows_by_box_id: dict[str, int | None] = {}
+        self._group_ids: dict[str, int] | None = None
+        self._name_index: NameSearchIndex | None = None
+
+    @classmethod
+    def from_data(cls, box_metas: list[dict]) -> "_MetaSnapshot":
+        return cls(build_meta_snapshot(box_metas))
+
+    @classmethod
+    def from_file(cls, path: Path) -> "_MetaSnapshot":
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def get_string(self, string_id: int) -> str:
+        s = self._strings.get(string_id)
+        if s is None:
+            start, end = self._string_offsets[string_id], self._string_offsets[string_id + 1]
+            s = self._strings[string_id] = str(self._string_data[start:end], "utf-8")
+        return s
+
+    def get_box_id(self, row: int) -> str:
+        return self.get_string(row)
+
+    def get_name(self, row: int) -> str:
+        return self.get_string(self._box_fields[2 * row])
+
+    def get_storage_location(self, row: int) -> str:
+        return self.get_string(self._box_fields[2 * row + 1])
+
+    def get_index_name(self, row: int) -> str:
+        return f"{self.get_box_id(row)}__{self.get_name(row)}"
+
+    def get_parent_ids(self, row: int) -> list[str]:
+        start, end = self.parent_offsets[row], self.parent_offsets[row + 1]
+        return [self.get_string(string_id) for string_id in self.parents[start:end]]
+
+    def get_parent_rows(self, row: int) -> list[int]:
+        start, end = self.parent_offsets[row], self.parent_offsets[row + 1]
+        return [string_id for string_id in self.parents[start:end] if string_id < self.num_boxes]
+
+    def get_child_rows(self, row: int) -> list[int]:
+        return self.children[self.child_offsets[row]:self.child_offsets[row + 1]].tolist()
+
+    def get_groups(self, row: int) -> list[str]:
+        start, end = self.group_offsets[row], self.group_offsets[row + 1]
+        return [self.get_group_name(group_id) for group_id in self.box_groups[start:end]]
+
+    def get_group_name(self, group_id: int) -> str:
+        return self.get_string(self._group_name_ids[group_id])
+
+    @property
+    def group_names(self) -> list[str]:
+        return [self.get_group_name(group_id) for group_id in range(len(self._group_name_ids))]
+
+    def get_group_mask(self, groups: set[str]) -> list[int]:
+        """The bitset (one int per word) of the given group names."""
+        if self._group_ids is None:
+            self._group_ids = {g: group_id for group_id, g in enumerate(self.group_names)}
+        mask = [0] * self.num_group_words
+        for g in groups:
+            group_id = self._group_ids.get(g)
+            if group_id is not None:
+                mask[group_id // 32] |= 1 << (group_id % 32)
+        return mask
+
+    def has_any_group(self, row: int, mask: list[int]) -> bool:
+        base = row * self.num_group_words
+        return any(self.group_bits[base + i] & word for i, word in enumerate(mask) if word)
+
+    def find_row(self, box_id: str) -> int | None:
+        """The row of the box with the given id (by binary search over the sorted box ids)."""
+        if box_id in self._rows_by_box_id:
+            return self._rows_by_box_id[box_id]
+        lo, hi = 0, self.num_boxes
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.get_box_id(self._box_order[mid]) < box_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        row = None
+        if lo < self.num_boxes and self.get_box_id(self._box_order[lo]) == box_id:
+            row = self._box_order[lo]
+        self._rows_by_box_id[box_id] = row
+        return row
+
+    def find_row_by_index_name(self, index_name: str) -> int | None:
+        box_id, sep, name = index_name.partition("__")
+        if not sep:
+            return None
+        row = self.find_row(box_id)
+        if row is None or self.get_name(row) != name:
+            return None
+        return row
+
+    def get_name_postings(self, gram: str):
+        """The rows whose (case-folded) name contains `gram` (by binary search over the grams)."""
+        lo, hi = 0, len(self._gram_ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.get_string(self._gram_ids[mid]) < gram:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(self._gram_ids) or self.get_string(self._gram_ids[lo]) != gram:
+            return ()
+        return self._gram_rows[self._gram_offsets[lo]:self._gram_offsets[lo + 1]]
+
+    @property
+    def name_index(self) -> "NameSearchIndex":
+        if self._name_index is None:
+            self._name_index = NameSearchIndex(self.num_boxes, self.get_name, self.get_name_postings)
+        return self._name_index
+
+# %% pts/mod/_fast.pct.py 9
+def get_topological_ranks(parents: list[list[int]]) -> list[int] | None:
+    """
+    The rank of every node in a topological order (parents before their children), where
+    `parents[i]` are the parents of node `i`. Returns None if there is a cycle.
+    """
+    num_nodes = len(parents)
+    children: list[list[int]] = [[] for _ in range(num_nodes)]
+    in_degree = [0] * num_nodes
+    for node, node_parents in enumerate(parents):
+        for parent in node_parents:
+            children[parent].append(node)
+            in_degree[node] += 1
+
+    # Kahn's algorithm
+    queue = deque(node for node in range(num_nodes) if in_degree[node] == 0)
+    ranks = [0] * num_nodes
+    rank = 0
+    while queue:
+        node = queue.popleft()
+        ranks[node] = rank
+        rank += 1
+        for child in children[node]:
+            in_degree[child] -= 1
+            if in_degree[child] == 0:
+                queue.append(child)
+    return ranks if rank == num_nodes else None
+
+
+_NOT_COMPUTED = object()
+
+
+class ReachabilityIndex:
+    """
+    Answers whether a node of a directed graph (the boxes, with edges to their parents) is an
+    ancestor of another, in O(1) once the ancestors of the node have been memoized.
 
+    Nodes are the integers `0..num_nodes - 1`, and `get_parents(node)` returns the parents of
+    a node. The parents of a node can be changed with `set_parents`, which updates the
+    memoized ancestors (and the topological order) instead of discarding them. Graphs with
+    cycles are supported, in which case a node in a cycle is its own ancestor.
+    """
 
+    def __init__(self, num_nodes: int, get_parents, topo_ranks=None):
+        self.num_nodes = num_nodes
+        self._get_parents = get_parents
+        self._changed_parents: dict[int, list[int]] = {}
+        self._ranks = _NOT_COMPUTED if topo_ranks is None else topo_ranks
+        self._ancestors: dict[int, int] = {}
+
+    def get_parents(self, node: int) -> list[int]:
+        parents = self._changed_parents.get(node)
+        return list(self._get_parents(node)) if parents is None else parents
+
+    def _get_ranks(self):
+        if self._ranks is _NOT_COMPUTED:
+            self._ranks = get_topological_ranks([self.get_parents(node) for node in range(self.num_nodes)])
+        return self._ranks
+
+    def has_cycle(self) -> bool:
+        return self._get_ranks() is None
+
+    def get_ancestors(self, node: int) -> int:
+        """The ancestors of `node`, as a bitset (bit `i` is set if node `i` is an ancestor)."""
+        ancestors = self._ancestors.get(node)
+        if ancestors is not None:
+            return ancestors
+        ancestors = 0
+        stack = [node]
+        while stack:
+            for parent in self.get_parents(stack.pop()):
+                parent_bit = 1 << parent
+                if ancestors & parent_bit:
+                    continue
+                ancestors |= parent_bit
+                parent_ancestors = self._ancestors.get(parent)
+                if parent_ancestors is None:
+                    stack.append(parent)
+                else:
+                    ancestors |= parent_ancestors  # Already complete, no need to walk it
+        self._ancestors[node] = ancestors
+        return ancestors
+
+    def is_ancestor(self, node: int, potential_ancestor: int) -> bool:
+        ranks = self._get_ranks()
+        if ranks is not None and ranks[potential_ancestor] >= ranks[node]:
+            return False
+        return bool(self.get_ancestors(node) >> potential_ancestor & 1)
+
+    def would_create_cycle(self, child: int, proposed_parent: int) -> bool:
+        return child == proposed_parent or self.is_ancestor(proposed_parent, child)
+
+    def set_parents(self, node: int, parents: list[int]) -> None:
+        """Change the parents of `node`, updating the index incrementally."""
+        old_parents = set(self.get_parents(node))
+        added_parents = [p for p in parents if p not in old_parents]
+        removed_any = bool(old_parents - set(parents))
+        creates_cycle = any(self.would_create_cycle(node, p) for p in added_parents)
+        # Nodes whose memoized ancestors include `node` are its descendants
+        node_bit = 1 << node
+        affected = [n for n, ancestors in self._ancestors.items() if n == node or ancestors & node_bit]
+
+        if creates_cycle:
+            self._ancestors.clear()
+        elif removed_any:
+            for n in affected:
+                del self._ancestors[n]
+        elif added_parents:
+            # The ancestors of the new parents do not depend on `node`, since there is no cycle
+            added_ancestors = 0
+            for p in added_parents:
+                added_ancestors |= (1 << p) | self.get_ancestors(p)
+            for n in affected:
+                self._ancestors[n] |= added_ancestors
+
+        ranks = self._ranks
+        if ranks is None and removed_any:
+            self._ranks = _NOT_COMPUTED  # The cycle might be gone
+        elif ranks is not None and ranks is not _NOT_COMPUTED:
+            if creates_cycle:
+                self._ranks = None
+            elif any(ranks[p] >= ranks[node] for p in added_parents):
+                self._ranks = _NOT_COMPUTED
+        self._changed_parents[node] = list(parents)
+
+# %% pts/mod/_fast.pct.py 13
+NAME_MATCH_MODES = ("exact", "contains", "subsequence")
+# Characters after which a match starts a new word of a name
+_WORD_SEPARATORS = frozenset(" -_./")
+# Longer candidate postings are intersected with the other postings of the term
+_MAX_UNNARROWED_CANDIDATES = 256
+_BYTE_BIT_INDICES = [tuple(i for i in range(8) if byte >> i & 1) for byte in range(256)]
+
+
+def _get_bit_indices(bitset: int) -> list[int]:
+    indices = []
+    for byte_index, byte in enumerate(bitset.to_bytes((bitset.bit_length() + 7) // 8, "little")):
+        if byte:
+            offset = byte_index << 3
+            indices.extend([offset + i for i in _BYTE_BIT_INDICES[byte]])
+    return indices
+
+
+def get_name_grams(name: str) -> set[str]:
+    """The characters and trigrams of a case-folded name."""
+    return {*name, *(name[i:i + 3] for i in range(len(name) - 2))}
+
+
+def build_name_postings(names: list[str]) -> dict[str, list[int]]:
+    """For every gram of the case-folded `names`, the rows (indices) of the names containing it."""
+    postings: dict[str, list[int]] = {}
+    for row, name in enumerate(names):
+        for gram in get_name_grams(name.casefold()):
+            rows = postings.get(gram)
+            if rows is None:
+                postings[gram] = [row]
+            else:
+                rows.append(row)
+    return postings
+
+
+def _is_subsequence_match(term: str, name: str) -> bool:
+    it = iter(name)
+    return all(ch in it for ch in term)
+
+
+def _matches_name(term: str, name: str, mode: str) -> bool:
+    if mode == "exact":
+        return name == term
+    if mode == "subsequence":
+        return _is_subsequence_match(term, name)
+    return term in name
+
+
+class NameSearchIndex:
+    """
+    Index for finding boxes by name (see `NAME_MATCH_MODES`), and ranking the matches.
+
+    Rows are the integers `0..num_rows - 1`, `get_name(row)` returns the name of a row, and
+    `get_postings(gram)` the rows whose case-folded name contains `gram` (see
+    `build_name_postings`).
+    """
+
+    def __init__(self, num_rows: int, get_name, get_postings):
+        self.num_rows = num_rows
+        self._get_name = get_name
+        self._get_postings = get_postings
+        self._folded_names: dict[int, str] = {}
+        self._bitsets: dict[str, int] = {}
+
+    @classmethod
+    def from_names(cls, names: list[str]) -> "NameSearchIndex":
+        postings = build_name_postings(names)
+        return cls(len(names), names.__getitem__, lambda gram: postings.get(gram, ()))
+
+    def _get_folded_name(self, row: int) -> str:
+        name = self._folded_names.get(row)
+        if name is None:
+            name = self._folded_names[row] = self._get_name(row).casefold()
+        return name
+
+    def _get_bitset(self, gram: str) -> int:
+        bitset = self._bitsets.get(gram)
+        if bitset is None:
+            bits = bytearray((self.num_rows + 7) // 8)
+            for row in self._get_postings(gram):
+                bits[row >> 3] |= 1 << (row & 7)
+            bitset = self._bitsets[gram] = int.from_bytes(bits, "little")
+        return bitset
+
+    def _get_candidates(self, folded_term: str, mode: str):
+        if mode == "subsequence" or len(folded_term) < 3:
+            grams = set(folded_term)
+        else:
+            grams = {folded_term[i:i + 3] for i in range(len(folded_term) - 2)}
+        if not grams:
+            return range(self.num_rows)
+        postings = sorted(((self._get_postings(gram), gram) for gram in grams), key=lambda p: len(p[0]))
+        candidates = postings[0][0]
+        if len(candidates) <= _MAX_UNNARROWED_CANDIDATES or len(postings) == 1:
+            return candidates
+        bitset = self._get_bitset(postings[0][1])
+        for _, gram in postings[1:]:
+            bitset &= self._get_bitset(gram)
+        return _get_bit_indices(bitset)
+
+    def find(self, term: str, mode: str = "contains", match_case: bool = False) -> list[int]:
+        """The rows whose name matches `term`, in increasing order."""
+        if mode not in NAME_MATCH_MODES:
+            raise ValueError(f"Invalid name match mode: '{mode}'")
+        folded_term = term.casefold()
+        rows = []
+        for row in self._get_candidates(folded_term, mode):
+            if match_case:
+                matched = _matches_name(term, self._get_name(row), mode)
+            else:
+                matched = _matches_name(folded_term, self._get_folded_name(row), mode)
+            if matched:
+                rows.append(row)
+        return rows
+
+    def get_score(self, term: str, row: int, match_case: bool = False) -> tuple[int, int, int]:
+        """
+        How well the name of `row` matches `term`, lower being better: exact matches first, then
+        prefixes, matches at the start of a word, other substrings, and subsequences (the less
+        spread out the better). Ties go to the shorter name.
+        """
+        if match_case:
+            name = self._get_name(row)
+        else:
+            name, term = self._get_folded_name(row), term.casefold()
+        if name == term:
+            return (0, 0, len(name))
+        position = name.find(term)
+        if position == 0:
+            return (1, 0, len(name))
+        if position > 0:
+            tier = 2 if name[position - 1] in _WORD_SEPARATORS else 3
+            return (tier, position, len(name))
+        # The span of the leftmost match of the subsequence
+        start = end = -1
+        for ch in term:
+            end = name.find(ch, end + 1)
+            if end == -1:
+                return (5, 0, len(name))
+            if start == -1:
+                start = end
+        return (4, end - start + 1 - len(term), len(name))
+
+    def search(
+        self,
+        term: str,
+        mode: str = "contains",
+        match_case: bool = False,
+        tie_key=None,
+    ) -> list[int]:
+        """
+        The rows whose name matches `term`, best match first (see `get_score`). Ties are broken
+        by `tie_key(row)`, or by row.
+        """
+        tie_key = tie_key or (lambda row: row)
+        return sorted(
+            self.find(term, mode, match_case),
+            key=lambda row: (self.get_score(term, row, match_case), tie_key(row)),
+        )
+
+# %% pts/mod/_fast.pct.py 17
 class BoxyardFast:
     """Lightweight query interface for boxyard metadata.
 
-    Reads the boxyard_meta.json file and provides fast lookups for
-    parent-child relationships, groups, and DAG traversal without
-    importing any boxyard modules.
+    Reads the boxyard_meta.json file (or its compact snapshot) and provides
+    fast lookups for parent-child relationships, groups, and DAG traversal
+    without importing any boxyard modules.
     """
 
     def __init__(self, data: dict, user_boxes_path: str | None = None):
+        self._init(_MetaSnapshot.from_data(data.get("box_metas", [])), user_boxes_path)
+
+    def _init(self, snapshot: _MetaSnapshot, user_boxes_path: str | None) -> None:
         self._user_boxes_path = user_boxes_path
-        box_metas = data.get("box_metas", [])
-        self._boxes = box_metas
-        self._by_id: dict[str, dict] = {}
-        self._children_index: dict[str, list[str]] = {}
-
-        for bm in box_metas:
-            ts = bm["creation_timestamp_utc"]
-            subid = bm["box_subid"]
-            box_id = f"{ts}_{subid}"
-            bm["_box_id"] = box_id
-            bm["_index_name"] = f"{box_id}__{bm['name']}"
-            self._by_id[box_id] = bm
-
-        # Build children index from parents
-        for bm in box_metas:
-            for parent_id in bm.get("parents", []):
-                self._children_index.setdefault(parent_id, []).append(bm["_box_id"])
+        self._snapshot = snapshot
+        self._boxes_roots: dict[str, Path] = {}
+        self._reachability_index: ReachabilityIndex | None = None
+
+    @classmethod
+    def from_snapshot(cls, snapshot: _MetaSnapshot, user_boxes_path: str | None = None) -> "BoxyardFast":
+        fast = cls.__new__(cls)
+        fast._init(snapshot, user_boxes_path)
+        return fast
 
     @classmethod
-    def from_file(cls, path: str | Path | None = None, config_path: str | Path | None = None) -> "BoxyardFast":
+    def from_file(
+        cls,
+        path: str | Path | None = None,
+        config_path: str | Path | None = None,
+        user_boxes_path: str | None = None,
+        use_snapshot: bool = True,
+    ) -> "BoxyardFast":
         """Load from boxyard_meta.json, optionally reading config for user_boxes_path.
 
+        If an up-to-date ``boxyard_meta.snapshot`` exists next to the JSON
+        file, it is memory-mapped instead of parsing the JSON.
+
         Args:
             path: Path to boxyard_meta.json. Defaults to ~/.boxyard/boxyard_meta.json,
                 or reads boxyard_data_path from the config file if available.
             config_path: Path to config.toml. Defaults to ~/.config/boxyard/config.toml.
+                Not read if both path and user_boxes_path are given.
+            user_boxes_path: Overrides the user_boxes_path of the config file.
+            use_snapshot: Use the snapshot if it is up to date.
         """
-        config_path = Path(config_path or _DEFAULT_CONFIG_PATH).expanduser()
         config = {}
-        if config_path.exists():
-            config = toml.load(config_path)
+        if path is None or user_boxes_path is None:
+            config_path = Path(config_path or _DEFAULT_CONFIG_PATH).expanduser()
+            if config_path.exists():
+                config = toml.load(config_path)
 
         if path is None:
             data_path = config.get("boxyard_data_path", "~/.boxyard")
             path = Path(data_path).expanduser() / "boxyard_meta.json"
         path = Path(path)
+        user_boxes_path = user_boxes_path or config.get("user_boxes_path")
 
+        if use_snapshot:
+            snapshot = load_meta_snapshot(path)
+            if snapshot is not None:
+                return cls.from_snapshot(snapshot, user_boxes_path=user_boxes_path)
         data = json.loads(path.read_text())
-        user_boxes_path = config.get("user_boxes_path")
         return cls(data, user_boxes_path=user_boxes_path)
 
+    def __len__(self) -> int:
+        return self._snapshot.num_boxes
+
     # ── helpers ──
 
-    def _filter_by_groups(self, boxes: list[dict], groups: set[str] | None) -> list[dict]:
+    def _filter_by_groups(self, rows: list[int], groups: set[str] | None) -> list[int]:
         if groups is None:
-            return boxes
-        return [b for b in boxes if set(b.get("groups", [])) & groups]
+            return rows
+        mask = self._snapshot.get_group_mask(groups)
+        return [row for row in rows if self._snapshot.has_any_group(row, mask)]
 
-    def _to_result(self, bm: dict) -> dict:
+    def _to_result(self, row: int) -> dict:
+        snapshot = self._snapshot
         return {
-            "name": bm["name"],
-            "box_id": bm["_box_id"],
-            "index_name": bm["_index_name"],
-            "groups": bm.get("groups", []),
-            "parents": bm.get("parents", []),
-            "storage_location": bm.get("storage_location", ""),
+            "name": snapshot.get_name(row),
+            "box_id": snapshot.get_box_id(row),
+            "index_name": snapshot.get_index_name(row),
+            "groups": snapshot.get_groups(row),
+            "parents": snapshot.get_parent_ids(row),
+            "storage_location": snapshot.get_storage_location(row),
         }
 
-    # ── parent-child queries ──
+    def _to_results(self, rows: list[int], groups: set[str] | None = None) -> list[dict]:
+        return [self._to_result(row) for row in self._filter_by_groups(rows, groups)]
 
-    def children_of(self, box_id: str, groups: set[str] | None = None) -> list[dict]:
-        child_ids = self._children_index.get(box_id, [])
-        children = [self._by_id[cid] for cid in child_ids if cid in self._by_id]
-        return [self._to_result(c) for c in self._filter_by_groups(children, groups)]
+    @property
+    def _reachability(self) -> ReachabilityIndex:
+        if self._reachability_index is None:
+            self._reachability_index = ReachabilityIndex(
+                len(self), self._snapshot.get_parent_rows, topo_ranks=self._snapshot.topo_ranks,
+            )
+        return self._reachability_index
 
-    def descendants_of(self, box_id: str, groups: set[str] | None = None) -> list[dict]:
-        visited: set[str] = set()
-        queue = deque([box_id])
+    def _bfs(self, row: int, get_next_rows) -> list[int]:
+        visited: set[int] = set()
+        queue = deque([row])
         result = []
         while queue:
             current = queue.popleft()
-            for child_id in self._children_index.get(current, []):
-                if child_id not in visited and child_id in self._by_id:
-                    visited.add(child_id)
-                    result.append(self._by_id[child_id])
-                    queue.append(child_id)
-        return [self._to_result(r) for r in self._filter_by_groups(result, groups)]
+            for next_row in get_next_rows(current):
+                if next_row not in visited:
+                    visited.add(next_row)
+                    result.append(next_row)
+                    queue.append(next_row)
+        return result
+
+    def _get_child_rows(self, box_id: str) -> list[int]:
+        row = self._snapshot.find_row(box_id)
+        if row is not None:
+            return self._snapshot.get_child_rows(row)
+        # Boxes can still list a parent that is no longer in the metadata
+        return [
+            row for row in range(len(self)) if box_id in self._snapshot.get_parent_ids(row)
+        ]
+
+    # ── parent-child queries ──
+
+    def children_of(self, box_id: str, groups: set[str] | None = None) -> list[dict]:
+        return self._to_results(self._get_child_rows(box_id), groups)
+
+    def descendants_of(self, box_id: str, groups: set[str] | None = None) -> list[dict]:
+        rows = self._get_child_rows(box_id)
+        visited = set(rows)
+        for row in list(rows):
+            for descendant_row in self._bfs(row, self._snapshot.get_child_rows):
+                if descendant_row not in visited:
+                    visited.add(descendant_row)
+                    rows.append(descendant_row)
+        return self._to_results(rows, groups)
 
     def parents_of(self, box_id: str, groups: set[str] | None = None) -> list[dict]:
-        bm = self._by_id.get(box_id)
-        if bm is None:
+        row = self._snapshot.find_row(box_id)
+        if row is None:
             return []
-        parent_boxes = [self._by_id[pid] for pid in bm.get("parents", []) if pid in self._by_id]
-        return [self._to_result(p) for p in self._filter_by_groups(parent_boxes, groups)]
+        return self._to_results(self._snapshot.get_parent_rows(row), groups)
 
     def ancestors_of(self, box_id: str, groups: set[str] | None = None) -> list[dict]:
-        visited: set[str] = set()
-        queue = deque([box_id])
-        result = []
-        while queue:
-            current = queue.popleft()
-            bm = self._by_id.get(current)
-            if bm is None:
-                continue
-            for parent_id in bm.get("parents", []):
-                if parent_id not in visited and parent_id in self._by_id:
-                    visited.add(parent_id)
-                    result.append(self._by_id[parent_id])
-                    queue.append(parent_id)
-        return [self._to_result(r) for r in self._filter_by_groups(result, groups)]
+        row = self._snapshot.find_row(box_id)
+        if row is None:
+            return []
+        return self._to_results(self._bfs(row, self._snapshot.get_parent_rows), groups)
 
     def roots(self, groups: set[str] | None = None) -> list[dict]:
-        root_boxes = [bm for bm in self._boxes if len(bm.get("parents", [])) == 0]
-        return [self._to_result(r) for r in self._filter_by_groups(root_boxes, groups)]
+        parent_offsets = self._snapshot.parent_offsets
+        root_rows = [
+            row for row in range(len(self)) if parent_offsets[row] == parent_offsets[row + 1]
+        ]
+        return self._to_results(root_rows, groups)
 
     def leaves(self, groups: set[str] | None = None) -> list[dict]:
-        all_parent_ids: set[str] = set()
-        for bm in self._boxes:
-            all_parent_ids.update(bm.get("parents", []))
-        leaf_boxes = [bm for bm in self._boxes if bm["_box_id"] not in all_parent_ids]
-        return [self._to_result(r) for r in self._filter_by_groups(leaf_boxes, groups)]
+        child_offsets = self._snapshot.child_offsets
+        leaf_rows = [row for row in range(len(self)) if child_offsets[row] == child_offsets[row + 1]]
+        return self._to_results(leaf_rows, groups)
 
     def is_ancestor(self, box_id: str, potential_ancestor_id: str) -> bool:
-        ancestors = self.ancestors_of(box_id)
-        return any(a["box_id"] == potential_ancestor_id for a in ancestors)
+        row = self._snapshot.find_row(box_id)
+        ancestor_row = self._snapshot.find_row(potential_ancestor_id)
+        if row is None or ancestor_row is None:
+            return False
+        return self._reachability.is_ancestor(row, ancestor_row)
 
     def is_descendant(self, box_id: str, potential_descendant_id: str) -> bool:
-        descendants = self.descendants_of(box_id)
-        return any(d["box_id"] == potential_descendant_id for d in descendants)
+        if self._snapshot.find_row(box_id) is None:
+            # A parent that is no longer in the metadata can still have descendants
+            descendants = self.descendants_of(box_id)
+            return any(d["box_id"] == potential_descendant_id for d in descendants)
+        return self.is_ancestor(potential_descendant_id, box_id)
 
     def has_cycle(self) -> bool:
-        # Kahn's algorithm for topological sort — cycle exists if not all nodes processed
-        in_degree: dict[str, int] = {bid: 0 for bid in self._by_id}
-        for bm in self._boxes:
-            for parent_id in bm.get("parents", []):
-                if parent_id in in_degree:
-                    in_degree[bm["_box_id"]] = in_degree.get(bm["_box_id"], 0) + 1
-
-        # Recalculate properly: in_degree counts how many parents each node has (within known set)
-        in_degree = {bid: 0 for bid in self._by_id}
-        for bm in self._boxes:
-            for parent_id in bm.get("parents", []):
-                if parent_id in self._by_id:
-                    in_degree[bm["_box_id"]] += 1
-
-        queue = deque([bid for bid, deg in in_degree.items() if deg == 0])
-        processed = 0
-        while queue:
-            node = queue.popleft()
-            processed += 1
-            for child_id in self._children_index.get(node, []):
-                if child_id in in_degree:
-                    in_degree[child_id] -= 1
-                    if in_degree[child_id] == 0:
-                        queue.append(child_id)
-        return processed != len(self._by_id)
+        return self._reachability.has_cycle()
 
     def would_create_cycle(self, child_id: str, proposed_parent_id: str) -> bool:
         if child_id == proposed_parent_id:
@@ -176,99 +755,134 @@ class BoxyardFast:
     # ── DAG representation ──
 
     def get_dag(self) -> dict:
+        snapshot = self._snapshot
         result = {}
-        for bm in self._boxes:
-            box_id = bm["_box_id"]
+        for row in range(len(self)):
+            box_id = snapshot.get_box_id(row)
             result[box_id] = {
-                "name": bm["name"],
-                "index_name": bm["_index_name"],
+                "name": snapshot.get_name(row),
+                "index_name": snapshot.get_index_name(row),
                 "box_id": box_id,
-                "groups": bm.get("groups", []),
-                "parents": bm.get("parents", []),
-                "children": self._children_index.get(box_id, []),
+                "groups": snapshot.get_groups(row),
+                "parents": snapshot.get_parent_ids(row),
+                "children": [snapshot.get_box_id(c) for c in snapshot.get_child_rows(row)],
             }
         return result
 
     def get_dag_nested(self, root_id: str | None = None) -> dict:
-        def _build_subtree(box_id: str, visited: set[str]) -> dict | None:
-            if box_id in visited or box_id not in self._by_id:
+        snapshot = self._snapshot
+
+        def _build_subtree(row: int, visited: set[int]) -> dict | None:
+            if row in visited:
                 return None
-            visited.add(box_id)
-            bm = self._by_id[box_id]
+            visited.add(row)
             children = {}
-            for child_id in self._children_index.get(box_id, []):
-                child_tree = _build_subtree(child_id, visited)
+            for child_row in snapshot.get_child_rows(row):
+                child_tree = _build_subtree(child_row, visited)
                 if child_tree is not None:
-                    children[child_id] = child_tree
+                    children[snapshot.get_box_id(child_row)] = child_tree
             return {
-                "name": bm["name"],
-                "index_name": bm["_index_name"],
-                "box_id": box_id,
-                "groups": bm.get("groups", []),
+                "name": snapshot.get_name(row),
+                "index_name": snapshot.get_index_name(row),
+                "box_id": snapshot.get_box_id(row),
+                "groups": snapshot.get_groups(row),
                 "children": children,
             }
 
         if root_id is not None:
-            visited: set[str] = set()
-            tree = _build_subtree(root_id, visited)
+            root_row = snapshot.find_row(root_id)
+            if root_row is None:
+                return {}
+            tree = _build_subtree(root_row, set())
             return {root_id: tree} if tree else {}
 
         # Build from all roots
-        visited: set[str] = set()
+        visited: set[int] = set()
         result = {}
-        for bm in self._boxes:
-            if len(bm.get("parents", [])) == 0:
-                tree = _build_subtree(bm["_box_id"], visited)
+        parent_offsets = snapshot.parent_offsets
+        for row in range(len(self)):
+            if parent_offsets[row] == parent_offsets[row + 1]:
+                tree = _build_subtree(row, visited)
                 if tree is not None:
-                    result[bm["_box_id"]] = tree
+                    result[snapshot.get_box_id(row)] = tree
         return result
 
     # ── group queries ──
 
     def groups_of(self, box_id: str) -> list[str]:
-        bm = self._by_id.get(box_id)
-        if bm is None:
+        row = self._snapshot.find_row(box_id)
+        if row is None:
             return []
-        return list(bm.get("groups", []))
+        return self._snapshot.get_groups(row)
 
     def boxes_by_group(self, group_name: str) -> list[dict]:
-        return [self._to_result(bm) for bm in self._boxes if group_name in bm.get("groups", [])]
+        return self._to_results(list(range(len(self))), {group_name})
 
     def all_boxes_with_groups(self) -> dict[str, list[str]]:
-        return {bm["_index_name"]: list(bm.get("groups", [])) for bm in self._boxes}
+        snapshot = self._snapshot
+        return {snapshot.get_index_name(row): snapshot.get_groups(row) for row in range(len(self))}
 
     def all_groups(self) -> list[str]:
-        groups: set[str] = set()
-        for bm in self._boxes:
-            groups.update(bm.get("groups", []))
-        return sorted(groups)
+        return self._snapshot.group_names
 
     # ── path-based queries ──
 
-    def which(self, path: str, user_boxes_path: str | None = None) -> dict | None:
+    def _get_boxes_root(self, user_boxes_path: str | None = None) -> Path:
+        boxes_path = user_boxes_path or self._user_boxes_path or "~/boxes"
+        boxes_root = self._boxes_roots.get(boxes_path)
+        if boxes_root is None:
+            boxes_root = Path(boxes_path).expanduser().resolve()
+            self._boxes_roots[boxes_path] = boxes_root
+        return boxes_root
+
+    def index_name_at(self, path: str | None = None, user_boxes_path: str | None = None) -> str | None:
+        """The index name of the box directory that *path* is in.
+
+        *path* defaults to the current working directory, which is already
+        canonical and so does not need to be resolved. Returns ``None`` when
+        the path is outside the boxes directory. The box need not be in the
+        metadata.
+        """
+        if path is None:
+            resolved = Path(os.getcwd())
+        else:
+            resolved = Path(path).expanduser().resolve()
+        boxes_root = self._get_boxes_root(user_boxes_path)
+
+        if not resolved.is_relative_to(boxes_root) or resolved == boxes_root:
+            return None
+        return resolved.relative_to(boxes_root).parts[0]
+
+    def get_box(self, index_name: str) -> dict | None:
+        """The box with the given index name, or ``None`` if it is not in the metadata."""
+        row = self._snapshot.find_row_by_index_name(index_name)
+        return self._to_result(row) if row is not None else None
+
+    def search_names(self, term: str, mode: str = "contains", match_case: bool = False) -> list[str]:
+        """The index names of the boxes whose name matches *term*, best match first.
+
+        See ``NameSearchIndex`` for the match modes and the ranking. Ties are
+        broken by index name.
+        """
+        snapshot = self._snapshot
+        rows = snapshot.name_index.search(term, mode, match_case, tie_key=snapshot.get_index_name)
+        return [snapshot.get_index_name(row) for row in rows]
+
+    def which(self, path: str | None = None, user_boxes_path: str | None = None) -> dict | None:
         """Resolve a filesystem path to the box it belongs to.
 
-        Mirrors the CLI ``which`` command: checks whether *path* falls under
-        *user_boxes_path* and, if so, extracts the first directory component
-        as the index_name and returns the matching box result dict.
+        Mirrors the CLI ``which`` command: checks whether *path* (by default
+        the current working directory) falls under *user_boxes_path* and, if
+        so, extracts the first directory component as the index_name and
+        returns the matching box result dict.
 
         Uses the user_boxes_path from the config file if not provided
         (set during ``from_file()``). Falls back to ``~/boxes`` if neither
-        is available.
+        is available. The resolved boxes directory is cached, so repeated
+        lookups only resolve *path* and look up the box by its id.
 
         Returns ``None`` when the path is outside the boxes directory or when
         no matching box is found in the metadata.
         """
-        boxes_path = user_boxes_path or self._user_boxes_path or "~/boxes"
-        resolved = Path(path).expanduser().resolve()
-        boxes_root = Path(boxes_path).expanduser().resolve()
-
-        if not resolved.is_relative_to(boxes_root) or resolved == boxes_root:
-            return None
-
-        index_name = resolved.relative_to(boxes_root).parts[0]
-
-        for bm in self._boxes:
-            if bm["_index_name"] == index_name:
-                return self._to_result(bm)
-        return None
+        index_name = self.index_name_at(path, user_boxes_path)
+        return self.get_box(index_name) if index_name is not None else None
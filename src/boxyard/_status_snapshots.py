@@ -0,0 +1,195 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: pts/mod/_status_snapshots.pct.py
+
+__all__ = ['BoxStatusSnapshot', 'PartStatusSnapshot', 'get_box_status_snapshot_path', 'get_box_sync_status_with_snapshot', 'get_fresh_box_status_snapshot', 'get_local_fingerprints', 'get_local_part_fingerprint', 'load_box_status_snapshot', 'save_box_status_snapshot']
+
+# %% pts/mod/_status_snapshots.pct.py 3
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+
+from . import const
+from ._enums import BoxPart
+from ._models import SyncCondition, SyncRecord, SyncStatus
+import boxyard.config
+
+if TYPE_CHECKING:
+    from ._models import BoxMeta
+
+# %% pts/mod/_status_snapshots.pct.py 5
+class PartStatusSnapshot(const.StrictModel):
+    """The sync status of a part of a box, and the fingerprint of its local state."""
+    sync_condition: SyncCondition
+    local_path_exists: bool
+    remote_path_exists: bool
+    local_sync_record: SyncRecord | None
+    remote_sync_record: SyncRecord | None
+    is_dir: bool
+    error_message: str | None = None
+    local_fingerprint: list
+
+    @classmethod
+    def from_sync_status(cls, sync_status: SyncStatus, local_fingerprint: list) -> "PartStatusSnapshot":
+        return cls(**sync_status._asdict(), local_fingerprint=local_fingerprint)
+
+    def to_sync_status(self) -> SyncStatus:
+        return SyncStatus(
+            **{field: getattr(self, field) for field in SyncStatus._fields}
+        )
+
+
+class BoxStatusSnapshot(const.StrictModel):
+    """
+    The sync status of all parts of a box at a point in time.
+
+    Stored at: {boxyard_data_path}/status_snapshots/{box_id}.json
+    """
+    taken_at_utc: datetime
+    parts: dict[BoxPart, PartStatusSnapshot]
+
+    def get_age(self) -> float:
+        """Age of the snapshot in seconds."""
+        return (datetime.now(timezone.utc) - self.taken_at_utc).total_seconds()
+
+    def to_sync_status(self) -> dict[BoxPart, SyncStatus]:
+        return {box_part: part.to_sync_status() for box_part, part in self.parts.items()}
+
+# %% pts/mod/_status_snapshots.pct.py 7
+def get_local_part_fingerprint(
+    config: boxyard.config.Config, box_meta: "BoxMeta", box_part: BoxPart
+) -> list:
+    """
+    A fingerprint of the local state of a part of a box, that changes whenever the part is
+    modified locally or synced: the size, number of files and last modification of the part,
+    and the ULID of its local sync record. Only reads the local filesystem.
+    """
+    from ._utils import get_dir_stats
+
+    local_path = box_meta.get_local_part_path(config, box_part)
+    if local_path.is_dir():
+        dir_stats = get_dir_stats(local_path)
+        local_state = [dir_stats.size, dir_stats.num_files, dir_stats.last_modified]
+    elif local_path.is_file():
+        stat_result = local_path.stat()
+        local_state = [stat_result.st_size, 1, stat_result.st_mtime]
+    else:
+        local_state = None
+
+    sync_record_path = box_meta.get_local_sync_record_path(config, box_part)
+    try:
+        sync_record_ulid = str(SyncRecord.model_validate_json(sync_record_path.read_text()).ulid)
+    except (OSError, ValueError):
+        sync_record_ulid = None
+
+    return [local_state, sync_record_ulid]
+
+
+def get_local_fingerprints(
+    config: boxyard.config.Config, box_meta: "BoxMeta"
+) -> dict[BoxPart, list]:
+    return {
+        box_part: get_local_part_fingerprint(config, box_meta, box_part)
+        for box_part in BoxPart
+    }
+
+# %% pts/mod/_status_snapshots.pct.py 9
+def get_box_status_snapshot_path(config: boxyard.config.Config, box_id: str) -> Path:
+    """Get the path to the status snapshot of a box."""
+    return config.status_snapshots_path / f"{box_id}.json"
+
+# %% pts/mod/_status_snapshots.pct.py 10
+def load_box_status_snapshot(
+    config: boxyard.config.Config, box_id: str
+) -> BoxStatusSnapshot | None:
+    """Load the status snapshot of a box. Returns None if there is none (or it is unreadable)."""
+    path = get_box_status_snapshot_path(config, box_id)
+    try:
+        return BoxStatusSnapshot.model_validate_json(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+# %% pts/mod/_status_snapshots.pct.py 11
+def save_box_status_snapshot(
+    config: boxyard.config.Config,
+    box_meta: "BoxMeta",
+    box_sync_status: dict[BoxPart, SyncStatus],
+    local_fingerprints: dict[BoxPart, list],
+    taken_at_utc: datetime,
+) -> BoxStatusSnapshot:
+    """
+    Save the status snapshot of a box.
+
+    `local_fingerprints` and `taken_at_utc` should be taken *before* the sync status was
+    determined, so that changes made while it was being determined invalidate the snapshot.
+    """
+    snapshot = BoxStatusSnapshot(
+        taken_at_utc=taken_at_utc,
+        parts={
+            box_part: PartStatusSnapshot.from_sync_status(
+                sync_status, local_fingerprints[box_part]
+            )
+            for box_part, sync_status in box_sync_status.items()
+        },
+    )
+    from ._utils import write_text_atomic
+
+    path = get_box_status_snapshot_path(config, box_meta.box_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_text_atomic(path, snapshot.model_dump_json())
+    return snapshot
+
+# %% pts/mod/_status_snapshots.pct.py 12
+def get_fresh_box_status_snapshot(
+    config: boxyard.config.Config,
+    box_meta: "BoxMeta",
+    max_age: float,
+) -> BoxStatusSnapshot | None:
+    """
+    Get the status snapshot of a box if it is younger than `max_age` seconds and the local
+    state of the box has not changed since it was taken. Returns None otherwise.
+    """
+    snapshot = load_box_status_snapshot(config, box_meta.box_id)
+    if snapshot is None or snapshot.get_age() > max_age:
+        return None
+    if set(snapshot.parts) != set(BoxPart):
+        return None
+    for box_part, part in snapshot.parts.items():
+        if part.local_fingerprint != get_local_part_fingerprint(config, box_meta, box_part):
+            return None
+    return snapshot
+
+# %% pts/mod/_status_snapshots.pct.py 14
+async def get_box_sync_status_with_snapshot(
+    config: boxyard.config.Config,
+    box_meta: "BoxMeta",
+    max_age: float | None = None,
+) -> tuple[dict[BoxPart, SyncStatus], bool]:
+    """
+    Get the sync status of a box. If `max_age` is given, it is taken from a fresh snapshot
+    (see `get_fresh_box_status_snapshot`) if there is one, and otherwise probed and saved as a
+    new snapshot. Without `max_age`, the status is only probed, as fingerprinting the local
+    state of the box (which walks its tree) is only worth it if snapshots are used.
+
+    Returns the sync status, and whether it is from a snapshot.
+    """
+    import asyncio
+    from .cmds import get_box_sync_status
+
+    if max_age is None:
+        box_sync_status = await get_box_sync_status(
+            config_path=config.config_path,
+            box_index_name=box_meta.index_name,
+        )
+        return box_sync_status, False
+
+    snapshot = await asyncio.to_thread(get_fresh_box_status_snapshot, config, box_meta, max_age)
+    if snapshot is not None:
+        return snapshot.to_sync_status(), True
+
+    taken_at_utc = datetime.now(timezone.utc)
+    local_fingerprints = await asyncio.to_thread(get_local_fingerprints, config, box_meta)
+    box_sync_status = await get_box_sync_status(
+        config_path=config.config_path,
+        box_index_name=box_meta.index_name,
+    )
+    save_box_status_snapshot(config, box_meta, box_sync_status, local_fingerprints, taken_at_utc)
+    return box_sync_status, False
@@ -0,0 +1,124 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: pts/mod/_utils/11_backup_purge_queue.pct.py
+
+__all__ = ['BackupPurgeQueue', 'PurgeQueueEntry']
+
+# %% pts/mod/_utils/11_backup_purge_queue.pct.py 3
+import asyncio
+import json
+from pathlib import Path
+from typing import NamedTuple
+
+from filelock import FileLock
+
+# %% pts/mod/_utils/11_backup_purge_queue.pct.py 5
+class PurgeQueueEntry(NamedTuple):
+    remote: str  # "" for local backups
+    backups_path: str
+    backup_name: str
+
+
+class BackupPurgeQueue:
+    """
+    Persistent queue of the sync backup dirs to purge.
+
+    File format (JSON lines):
+        {"remote": ..., "backups_path": ..., "backup_name": ...}
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.draining_path = self.path.with_name(self.path.name + ".draining")
+
+    def _get_lock(self) -> FileLock:
+        return FileLock(self.path.with_name(self.path.name + ".lock"))
+
+    def _append(self, entries: list[PurgeQueueEntry]) -> None:
+        with self._get_lock():
+            self._append_unlocked(entries)
+
+    def _append_unlocked(self, entries: list[PurgeQueueEntry]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a") as f:
+            f.writelines(json.dumps(entry._asdict()) + "\n" for entry in entries)
+
+    def add(self, remote: str, backups_path: str | Path, backup_name: str) -> None:
+        self._append([PurgeQueueEntry(remote, Path(backups_path).as_posix(), backup_name)])
+
+    def has_entries(self) -> bool:
+        """Whether there are queued entries, or entries left behind by a drain that crashed."""
+        for path in (self.path, self.draining_path):
+            try:
+                if path.stat().st_size > 0:
+                    return True
+            except FileNotFoundError:
+                pass
+        return False
+
+    def get_entries(self) -> list[PurgeQueueEntry]:
+        return self._read_entries(self.path)
+
+    @staticmethod
+    def _read_entries(path: Path) -> list[PurgeQueueEntry]:
+        if not path.exists():
+            return []
+        entries = []
+        for line in path.read_text().splitlines():
+            try:
+                entries.append(PurgeQueueEntry(**json.loads(line)))
+            except (json.JSONDecodeError, TypeError):
+                continue  # A line torn by a crash
+        return entries
+
+    def _take_entries(self) -> list[PurgeQueueEntry]:
+        """
+        Move the queued entries to the `.draining` file, and return all of its entries,
+        including those left behind by a drain that crashed.
+        """
+        with self._get_lock():
+            if self.path.exists():
+                if self.draining_path.exists():
+                    with self.draining_path.open("a") as f:
+                        # After a newline, in case the last line was torn by a crash
+                        f.write("\n" + self.path.read_text())
+                    self.path.unlink()
+                else:
+                    self.path.rename(self.draining_path)
+            entries = self._read_entries(self.draining_path)
+        return list(dict.fromkeys(entries))
+
+    def _finish_draining(self, failed_entries: list[PurgeQueueEntry]) -> None:
+        with self._get_lock():
+            if failed_entries:
+                self._append_unlocked(failed_entries)
+            self.draining_path.unlink(missing_ok=True)
+
+    async def drain(self, rclone_config_path: str) -> int:
+        """
+        Purge the queued backups, with one `rclone delete` per backups root. The entries that
+        fail to purge are put back in the queue. Returns the number of purged backups.
+        """
+        from .._utils import rclone_purge_dirs
+
+        entries = self._take_entries()
+        groups: dict[tuple[str, str], list[PurgeQueueEntry]] = {}
+        for entry in entries:
+            groups.setdefault((entry.remote, entry.backups_path), []).append(entry)
+
+        results = await asyncio.gather(*[
+            rclone_purge_dirs(
+                rclone_config_path=rclone_config_path,
+                source=remote,
+                source_path=backups_path,
+                dir_names=[entry.backup_name for entry in group],
+            )
+            for (remote, backups_path), group in groups.items()
+        ])
+
+        failed_entries = [
+            entry
+            for success, group in zip(results, groups.values(), strict=True)
+            if not success
+            for entry in group
+        ]
+        self._finish_draining(failed_entries)
+        return len(entries) - len(failed_entries)
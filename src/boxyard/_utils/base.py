@@ -1,41 +1,55 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: pts/mod/_utils/00_base.pct.py
 
-__all__ = ['SoftInterruption', 'async_throttler', 'check_interrupted', 'check_last_time_modified', 'count_files_in_dir', 'enable_soft_interruption', 'get_box_index_name_from_sub_path', 'get_hostname', 'is_in_event_loop', 'run_cmd_async', 'run_fzf']
+__all__ = ['DirStats', 'NeedsTerminalError', 'SoftInterruption', 'async_throttler', 'check_interrupted', 'check_last_time_modified', 'count_files_in_dir', 'disable_interactive_prompts', 'enable_file_cache', 'enable_soft_interruption', 'get_box_index_name_from_sub_path', 'get_dir_stats', 'get_hostname', 'is_in_event_loop', 'load_file_cached', 'run_cmd_async', 'run_fzf', 'write_text_atomic']
 
 # %% pts/mod/_utils/00_base.pct.py 3
 import subprocess
 import asyncio
+import inspect
+import time
 from .. import const
 from pathlib import Path
-from typing import Any, Coroutine
+from typing import Any, Callable, Coroutine, NamedTuple
 
 import boxyard.config
+from .._utils.concurrency import current_limiter, get_op_outcome, OpOutcome
 
 # %% pts/mod/_utils/00_base.pct.py 5
+_resolved_user_boxes_paths: dict[Path, Path] = {}
+
+
+def _get_resolved_user_boxes_path(user_boxes_path: Path) -> Path:
+    """Resolve the user boxes path once per process (once it exists)."""
+    resolved = _resolved_user_boxes_paths.get(user_boxes_path)
+    if resolved is None:
+        resolved = Path(user_boxes_path).expanduser().resolve()
+        if resolved.exists():
+            _resolved_user_boxes_paths[user_boxes_path] = resolved
+    return resolved
+
+
 def get_box_index_name_from_sub_path(
     config: boxyard.config.Config,
-    sub_path: str,
+    sub_path: str | Path | None = None,
 ) -> str | None:
     """
     Get the index name of a synced box from a path inside of the box.
-    """
-    sub_path = (
-        Path(sub_path).expanduser().resolve()
-    )  # Need to resolve to replace symlinks
-    is_in_local_store_path = sub_path.is_relative_to(config.user_boxes_path)
 
-    if not is_in_local_store_path:
-        return None
+    If `sub_path` is None, the current working directory is used. It is already resolved by
+    the kernel, so this does not need to resolve any path.
+    """
+    import os
 
-    rel_path = sub_path.relative_to(config.user_boxes_path)
+    if sub_path is None:
+        sub_path = Path(os.getcwd())
+    else:
+        sub_path = Path(sub_path).expanduser().resolve()  # Need to resolve to replace symlinks
+    user_boxes_path = _get_resolved_user_boxes_path(config.user_boxes_path)
 
-    if (
-        config.user_boxes_path.as_posix() == sub_path.as_posix()
-    ):  # The path is not inside a box but is in the box store root
+    if not sub_path.is_relative_to(user_boxes_path) or sub_path == user_boxes_path:
+        # Not inside a box (or in the box store root)
         return None
-
-    box_index_name = rel_path.parts[0]
-    return box_index_name
+    return sub_path.relative_to(user_boxes_path).parts[0]
 
 # %% pts/mod/_utils/00_base.pct.py 7
 import platform
@@ -61,6 +75,22 @@ def get_hostname():
     return hostname
 
 # %% pts/mod/_utils/00_base.pct.py 9
+_interactive_prompts_enabled = True
+
+
+class NeedsTerminalError(Exception):
+    """Raised when an interactive prompt is needed while interactive prompts are disabled."""
+
+
+def disable_interactive_prompts() -> None:
+    """
+    Make interactive prompts (e.g. `run_fzf`) raise `NeedsTerminalError` for the rest of the
+    process. Used by processes without a terminal (e.g. the daemon) that must never block on one.
+    """
+    global _interactive_prompts_enabled
+    _interactive_prompts_enabled = False
+
+
 def run_fzf(terms: list[str], disp_terms: list[str] | None = None):
     """
     Launches the fzf command-line fuzzy finder with a list of terms and returns
@@ -78,6 +108,8 @@ def run_fzf(terms: list[str], disp_terms: list[str] | None = None):
     """
     import subprocess
 
+    if not _interactive_prompts_enabled:
+        raise NeedsTerminalError("Selecting a box with fzf needs a terminal.")
     if disp_terms is None:
         disp_terms = terms
     try:
@@ -134,9 +166,46 @@ def check_last_time_modified(path: str | Path) -> float | None:
     )
 
 # %% pts/mod/_utils/00_base.pct.py 13
-# Semaphore to limit concurrent subprocess creation and avoid fd exhaustion
+class DirStats(NamedTuple):
+    size: int
+    num_files: int
+    last_modified: float | None  # Timestamp of the most recently modified file
+
+
+def get_dir_stats(path: str | Path) -> DirStats:
+    """Get the total size, number of files and last modification time of a directory tree."""
+    import os
+
+    size = 0
+    num_files = 0
+    max_mtime = None
+    stack = [str(Path(path).expanduser().resolve())]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False):
+                        try:
+                            stat_result = entry.stat(follow_symlinks=False)
+                        except (OSError, PermissionError):
+                            continue
+                        size += stat_result.st_size
+                        num_files += 1
+                        if max_mtime is None or stat_result.st_mtime > max_mtime:
+                            max_mtime = stat_result.st_mtime
+                    elif entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+        except (OSError, PermissionError):
+            continue
+    return DirStats(size=size, num_files=num_files, last_modified=max_mtime)
+
+# %% pts/mod/_utils/00_base.pct.py 16
+# Semaphore to limit concurrent subprocess creation and avoid fd exhaustion.
+# This is only a process-wide ceiling: the concurrency of rclone operations is governed by the
+# adaptive per-storage-location limiters (see `_utils.concurrency`).
 _subprocess_semaphore: asyncio.Semaphore | None = None
-_MAX_CONCURRENT_SUBPROCESSES = 10
+_MAX_CONCURRENT_SUBPROCESSES = 64
 
 
 def _get_subprocess_semaphore() -> asyncio.Semaphore:
@@ -147,18 +216,73 @@ def _get_subprocess_semaphore() -> asyncio.Semaphore:
     return _subprocess_semaphore
 
 
-async def run_cmd_async(cmd: list[str]) -> subprocess.Popen:
+# Max length of a single streamed stderr line (rclone JSON log lines can be long)
+_STREAM_LINE_LIMIT = 2**20
+
+
+async def run_cmd_async(
+    cmd: list[str],
+    stderr_line_callback: Callable[[str], Any] | None = None,
+) -> subprocess.Popen:
+    """
+    Run a command asynchronously and return `(returncode, stdout, stderr)`.
+
+    If `stderr_line_callback` is given, stderr is read line by line while the command
+    runs and each line (without the trailing newline) is passed to the callback as soon as
+    it is written. The callback may be a coroutine function, in which case it is awaited
+    before the next line is read. The full stderr is still returned.
+
+    If an `AdaptiveLimiter` is set in `current_limiter`, the command waits for a slot of the
+    limiter, and its outcome (success, throttled or failed) and duration are reported back to it.
+    """
+    limiter = current_limiter.get()
+    if limiter is None:
+        return await _run_subprocess(cmd, stderr_line_callback)
+
+    await limiter.acquire()
+    outcome = OpOutcome.CANCELLED
+    start = time.monotonic()
+    try:
+        returncode, stdout, stderr = await _run_subprocess(cmd, stderr_line_callback)
+        outcome = get_op_outcome(returncode, stderr)
+        return returncode, stdout, stderr
+    finally:
+        limiter.release(outcome, time.monotonic() - start)
+
+
+async def _run_subprocess(
+    cmd: list[str],
+    stderr_line_callback: Callable[[str], Any] | None,
+) -> tuple[int, str, str]:
     semaphore = _get_subprocess_semaphore()
     async with semaphore:
         proc = await asyncio.create_subprocess_exec(
-            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=_STREAM_LINE_LIMIT,
         )
-        stdout, stderr = await proc.communicate()
-        stdout = stdout.decode("utf-8")
-        stderr = stderr.decode("utf-8")
-        return proc.returncode, stdout, stderr
-
-# %% pts/mod/_utils/00_base.pct.py 16
+        if stderr_line_callback is None:
+            stdout, stderr = await proc.communicate()
+            stdout = stdout.decode("utf-8")
+            stderr = stderr.decode("utf-8")
+            return proc.returncode, stdout, stderr
+
+        stderr_lines = []
+
+        async def _read_stderr():
+            async for raw_line in proc.stderr:
+                line = raw_line.decode("utf-8", errors="replace")
+                stderr_lines.append(line)
+                result = stderr_line_callback(line.rstrip("\n"))
+                if inspect.isawaitable(result):
+                    await result
+
+        stdout, _ = await asyncio.gather(proc.stdout.read(), _read_stderr())
+        await proc.wait()
+        return proc.returncode, stdout.decode("utf-8"), "".join(stderr_lines)
+
+# %% pts/mod/_utils/00_base.pct.py 20
 async def async_throttler(
     coros: list[Coroutine],
     max_concurrency: int,
@@ -189,7 +313,7 @@ async def async_throttler(
             raise r
     return res
 
-# %% pts/mod/_utils/00_base.pct.py 19
+# %% pts/mod/_utils/00_base.pct.py 23
 def is_in_event_loop():
     try:
         asyncio.get_running_loop()
@@ -197,7 +321,7 @@ def is_in_event_loop():
     except RuntimeError:
         return False
 
-# %% pts/mod/_utils/00_base.pct.py 21
+# %% pts/mod/_utils/00_base.pct.py 25
 import signal
 import sys
 
@@ -235,10 +359,63 @@ def check_interrupted():
     global _interrupted
     return _interrupted
 
-# %% pts/mod/_utils/00_base.pct.py 24
+# %% pts/mod/_utils/00_base.pct.py 28
 def count_files_in_dir(path: Path) -> int:
     import os
     num_files = 0
     for path, dirs, filenames in os.walk(path):
         num_files += len(filenames)
     return num_files
+
+# %% pts/mod/_utils/00_base.pct.py 30
+_file_cache: dict[tuple[Path, Callable], tuple[tuple[int, int], Any]] | None = None
+
+
+def enable_file_cache() -> None:
+    """
+    Keep the results of `load_file_cached` in memory for the rest of the process. Used by
+    long-running processes (e.g. the daemon) to not re-parse unchanged config and meta files.
+    """
+    global _file_cache
+    if _file_cache is None:
+        _file_cache = {}
+
+
+def load_file_cached(path: Path, loader: Callable[[Path], Any]) -> Any:
+    """
+    Return `loader(path)`. If the file cache is enabled, the result is reused for as long as
+    the modification time and size of the file are unchanged.
+
+    Cached results are shared between callers, so they must not be mutated.
+    """
+    if _file_cache is None:
+        return loader(path)
+    stat_result = Path(path).stat()
+    file_key = (stat_result.st_mtime_ns, stat_result.st_size)
+    cache_key = (Path(path), loader)
+    cached = _file_cache.get(cache_key)
+    if cached is not None and cached[0] == file_key:
+        return cached[1]
+    value = loader(path)
+    _file_cache[cache_key] = (file_key, value)
+    return value
+
+# %% pts/mod/_utils/00_base.pct.py 32
+def write_text_atomic(path: Path, text: str) -> None:
+    """
+    Write a text file atomically, through a uniquely named temporary file in the same
+    directory, so that concurrent writers never interleave and readers never see a partial file.
+    """
+    import os
+    import tempfile
+
+    path = Path(path)
+    with tempfile.NamedTemporaryFile(
+        "w", dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False
+    ) as f:
+        f.write(text)
+    try:
+        os.replace(f.name, path)
+    except BaseException:
+        Path(f.name).unlink(missing_ok=True)
+        raise
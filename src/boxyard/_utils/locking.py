@@ -1,13 +1,26 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: pts/mod/_utils/04_locking.pct.py
 
-__all__ = ['BOX_SYNC_LOCK_TIMEOUT', 'BoxyardLockManager', 'GLOBAL_LOCK_TIMEOUT', 'LOCK_POLL_INTERVAL', 'LockAcquisitionError', 'acquire_lock_async', 'async_box_sync_lock', 'async_global_lock', 'auto_cleanup_stale_locks', 'cleanup_stale_locks']
+__all__ = ['BOX_SYNC_LOCK_TIMEOUT', 'BoxyardFileLock', 'BoxyardLockManager', 'GLOBAL_LOCK_TIMEOUT', 'LOCK_POLL_INTERVAL', 'LockAcquisitionError', 'LockHolder', 'LockRegistry', 'LockWaitStats', 'acquire_lock', 'acquire_lock_async', 'async_box_sync_lock', 'async_global_lock', 'auto_cleanup_stale_locks', 'cleanup_stale_locks', 'get_lock_wait_stats', 'reset_lock_wait_stats']
 
 # %% pts/mod/_utils/04_locking.pct.py 3
 from pathlib import Path
 from contextlib import contextmanager, asynccontextmanager
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime
 from filelock import FileLock, Timeout
 import asyncio
-from typing import Iterator
+import io
+import json
+import os
+import socket
+import threading
+import time
+from typing import Callable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 # %% pts/mod/_utils/04_locking.pct.py 5
 GLOBAL_LOCK_TIMEOUT = 30  # seconds
@@ -30,6 +43,147 @@ class LockAcquisitionError(Exception):
         super().__init__(message)
 
 # %% pts/mod/_utils/04_locking.pct.py 9
+_HOSTNAME = socket.gethostname()
+
+
+@dataclass
+class LockHolder:
+    lock_path: str
+    lock_type: str
+    pid: int
+    hostname: str
+    started: float  # Unix timestamp
+
+
+class LockRegistry:
+    """
+    The locks that are held, and their holders, in a single JSON file.
+
+    Holders add themselves after acquiring a lock, and remove themselves before releasing it, so
+    an entry whose lock is not held belongs to a holder that crashed. Updates of the registry
+    are serialized with a flock on the registry file itself. Requires `fcntl`.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    @contextmanager
+    def _open(self, exclusive: bool) -> Iterator[tuple["io.BufferedRandom", dict[str, LockHolder]]]:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with os.fdopen(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644), "r+b") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                data = json.loads(f.read() or b"{}")
+                holders = {token: LockHolder(**holder) for token, holder in data.items()}
+            except (ValueError, TypeError):  # A write was interrupted
+                holders = {}
+            yield f, holders
+
+    def _update(self, func: Callable[[dict[str, LockHolder]], None]) -> None:
+        with self._open(exclusive=True) as (f, holders):
+            func(holders)
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps({token: asdict(holder) for token, holder in holders.items()}).encode())
+
+    def add(self, lock_path: Path, lock_type: str) -> str:
+        """Record that this process holds the lock at `lock_path`. Returns the token of the entry."""
+        token = os.urandom(8).hex()
+        holder = LockHolder(str(lock_path), lock_type, os.getpid(), _HOSTNAME, time.time())
+        self._update(lambda holders: holders.__setitem__(token, holder))
+        return token
+
+    def remove(self, token: str) -> None:
+        self._update(lambda holders: holders.pop(token, None))
+
+    def get_holders(self, lock_path: Path | None = None) -> dict[str, LockHolder]:
+        """The holders of the lock at `lock_path` (or of all locks), by token."""
+        if not self.path.exists():
+            return {}
+        with self._open(exclusive=False) as (_, holders):
+            pass
+        if lock_path is None:
+            return holders
+        return {token: holder for token, holder in holders.items() if holder.lock_path == str(lock_path)}
+
+# %% pts/mod/_utils/04_locking.pct.py 11
+class BoxyardFileLock:
+    """
+    A lock on a lock file, taken with `flock`, either exclusive or shared (any number of shared
+    holders at once, but not while it is held exclusively). Exclusive locks exclude `FileLock`s
+    on the same file too. Requires `fcntl`.
+
+    Holders are recorded in `registry`, if given. With `remove_on_release`, the lock file is
+    removed when the (exclusive) lock is released, so that lock files do not pile up. Acquiring
+    checks that the file that was locked is still the one at `lock_file`, and retries if it was
+    removed meanwhile.
+
+    Has the part of the interface of `FileLock` that is used by `acquire_lock`: `acquire` only
+    tries once, and raises `filelock.Timeout` if the lock is held by someone else.
+    """
+
+    def __init__(
+        self,
+        lock_file: Path,
+        lock_type: str,
+        shared: bool = False,
+        registry: LockRegistry | None = None,
+        remove_on_release: bool = False,
+    ):
+        if shared and remove_on_release:
+            raise ValueError("Shared locks cannot remove their lock file on release.")
+        self.lock_file = str(lock_file)
+        self.lock_type = lock_type
+        self.shared = shared
+        self.registry = registry
+        self.remove_on_release = remove_on_release
+        self._fd: int | None = None
+        self._token: str | None = None
+
+    @property
+    def is_locked(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self, timeout: float = 0) -> None:
+        if self._fd is not None:
+            return
+        while True:
+            fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, (fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                raise Timeout(self.lock_file) from None
+            try:
+                is_current = os.fstat(fd).st_ino == os.stat(self.lock_file).st_ino
+            except FileNotFoundError:
+                is_current = False
+            if is_current:
+                break
+            os.close(fd)  # The file was removed by its previous holder
+        self._fd = fd
+        if self.registry is not None:
+            try:
+                self._token = self.registry.add(Path(self.lock_file), self.lock_type)
+            except BaseException:
+                self.release()
+                raise
+
+    def release(self) -> None:
+        fd, self._fd = self._fd, None
+        if fd is None:
+            return
+        try:
+            if self._token is not None:
+                token, self._token = self._token, None
+                self.registry.remove(token)
+            if self.remove_on_release:
+                Path(self.lock_file).unlink(missing_ok=True)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+# %% pts/mod/_utils/04_locking.pct.py 13
 class BoxyardLockManager:
     """
     Manages file-based locks for boxyard operations.
@@ -37,28 +191,68 @@ class BoxyardLockManager:
     Lock Directory Structure:
         ~/.boxyard/locks/
             global.lock                    # Protects boxyard_meta.json
-            boxes/{index_name}/
-                sync.lock                  # Per-box sync operations
+            registry.json                  # The held locks and their holders (see `LockRegistry`)
+            boxes/
+                {index_name}.lock          # Per-box sync operations
+
+    The global lock can be taken shared, by any number of readers at once, or exclusive, by a
+    single writer. Writers only hold it for as long as it takes to replace the meta files (see
+    `refresh_boxyard_meta`, and `new_box` while it saves the meta of a new box), and the meta
+    files are replaced atomically, so reading the meta does not need the lock at all. It is
+    taken shared to scan the box metas of the local store (see `refresh_boxyard_meta`), or to
+    keep the meta from being replaced while working from it.
+
+    The lock file of a box is removed when its lock is released, so `boxes/` only holds the
+    locks that are held (and those left behind by crashed holders, see `cleanup_stale_locks`).
     """
 
     def __init__(self, boxyard_data_path: Path):
         self.boxyard_data_path = Path(boxyard_data_path)
         self.locks_path = self.boxyard_data_path / "locks"
-        self._active_locks: dict[Path, FileLock] = {}
+        self.registry = LockRegistry(self.locks_path / "registry.json")
 
     @property
     def global_lock_path(self) -> Path:
         return self.locks_path / "global.lock"
 
+    @property
+    def box_locks_path(self) -> Path:
+        return self.locks_path / "boxes"
+
     def box_sync_lock_path(self, index_name: str) -> Path:
-        return self.locks_path / "boxes" / index_name / "sync.lock"
+        return self.box_locks_path / f"{index_name}.lock"
 
     def _ensure_lock_dir(self, lock_path: Path) -> None:
         """Ensure the parent directory for a lock file exists."""
         lock_path.parent.mkdir(parents=True, exist_ok=True)
 
+    def _get_lock(
+        self,
+        lock_path: Path,
+        lock_type: str,
+        shared: bool = False,
+        remove_on_release: bool = False,
+    ) -> FileLock | BoxyardFileLock:
+        """A lock on `lock_path`. Without `fcntl`, it is a `FileLock` (and shared locks are exclusive)."""
+        self._ensure_lock_dir(lock_path)
+        if fcntl is None:
+            return FileLock(lock_path)
+        return BoxyardFileLock(
+            lock_path, lock_type, shared=shared, registry=self.registry, remove_on_release=remove_on_release
+        )
+
+    def get_global_lock(self, shared: bool = False) -> FileLock | BoxyardFileLock:
+        """The global lock, to be acquired with `acquire_lock` or `acquire_lock_async`."""
+        return self._get_lock(self.global_lock_path, "shared global" if shared else "global", shared=shared)
+
+    def get_box_sync_lock(self, index_name: str) -> FileLock | BoxyardFileLock:
+        """The sync lock of a box, to be acquired with `acquire_lock` or `acquire_lock_async`."""
+        return self._get_lock(
+            self.box_sync_lock_path(index_name), f"box sync ({index_name})", remove_on_release=True
+        )
+
     @contextmanager
-    def global_lock(self, timeout: float = GLOBAL_LOCK_TIMEOUT) -> Iterator[None]:
+    def global_lock(self, timeout: float = GLOBAL_LOCK_TIMEOUT, shared: bool = False) -> Iterator[None]:
         """
         Context manager for acquiring the global lock.
 
@@ -67,20 +261,17 @@ class BoxyardLockManager:
 
         Args:
             timeout: Maximum time to wait for the lock in seconds.
+            shared: Take the lock shared (for reading) instead of exclusive.
 
         Raises:
             LockAcquisitionError: If the lock cannot be acquired within the timeout.
         """
-        self._ensure_lock_dir(self.global_lock_path)
-        lock = FileLock(self.global_lock_path, timeout=timeout)
+        lock = self.get_global_lock(shared)
+        acquire_lock(lock, "shared global" if shared else "global", self.global_lock_path, timeout)
         try:
-            lock.acquire()
             yield
-        except Timeout:
-            raise LockAcquisitionError("global", self.global_lock_path, timeout)
         finally:
-            if lock.is_locked:
-                lock.release()
+            lock.release()
 
     @contextmanager
     def box_sync_lock(
@@ -101,24 +292,21 @@ class BoxyardLockManager:
             LockAcquisitionError: If the lock cannot be acquired within the timeout.
         """
         lock_path = self.box_sync_lock_path(index_name)
-        self._ensure_lock_dir(lock_path)
-        lock = FileLock(lock_path, timeout=timeout)
+        lock = self.get_box_sync_lock(index_name)
+        acquire_lock(
+            lock,
+            f"box sync ({index_name})",
+            lock_path,
+            timeout,
+            message=(
+                f"Could not acquire sync lock for box '{index_name}' within {timeout}s. "
+                f"Another sync, include, exclude, or delete operation may be in progress on this box."
+            )
+        )
         try:
-            lock.acquire()
             yield
-        except Timeout:
-            raise LockAcquisitionError(
-                f"box sync ({index_name})",
-                lock_path,
-                timeout,
-                message=(
-                    f"Could not acquire sync lock for box '{index_name}' within {timeout}s. "
-                    f"Another sync, include, exclude, or delete operation may be in progress on this box."
-                )
-            )
         finally:
-            if lock.is_locked:
-                lock.release()
+            lock.release()
 
     @contextmanager
     def multiple_box_sync_locks(
@@ -140,26 +328,23 @@ class BoxyardLockManager:
         """
         # Sort to prevent deadlocks
         sorted_names = sorted(set(index_names))
-        acquired_locks: list[FileLock] = []
+        acquired_locks: list[FileLock | BoxyardFileLock] = []
 
         try:
             for name in sorted_names:
                 lock_path = self.box_sync_lock_path(name)
-                self._ensure_lock_dir(lock_path)
-                lock = FileLock(lock_path, timeout=timeout)
-                try:
-                    lock.acquire()
-                    acquired_locks.append(lock)
-                except Timeout:
-                    raise LockAcquisitionError(
-                        f"box sync ({name})",
-                        lock_path,
-                        timeout,
-                        message=(
-                            f"Could not acquire sync lock for box '{name}' within {timeout}s. "
-                            f"Another operation may be in progress on this box."
-                        )
+                lock = self.get_box_sync_lock(name)
+                acquire_lock(
+                    lock,
+                    f"box sync ({name})",
+                    lock_path,
+                    timeout,
+                    message=(
+                        f"Could not acquire sync lock for box '{name}' within {timeout}s. "
+                        f"Another operation may be in progress on this box."
                     )
+                )
+                acquired_locks.append(lock)
             yield
         finally:
             # Release in reverse order
@@ -167,23 +352,23 @@ class BoxyardLockManager:
                 if lock.is_locked:
                     lock.release()
 
-# %% pts/mod/_utils/04_locking.pct.py 11
+# %% pts/mod/_utils/04_locking.pct.py 15
 @asynccontextmanager
 async def async_global_lock(
     lock_manager: BoxyardLockManager,
-    timeout: float = GLOBAL_LOCK_TIMEOUT
+    timeout: float = GLOBAL_LOCK_TIMEOUT,
+    shared: bool = False,
 ):
     """
-    Async context manager for acquiring the global lock.
+    Async context manager for acquiring the global lock (see `BoxyardLockManager.global_lock`).
 
-    Uses polling-based acquisition to keep lock in main thread,
+    The lock is acquired in the calling thread (see `acquire_lock_async`),
     avoiding thread-local state issues with filelock.
     """
-    lock_path = lock_manager.global_lock_path
-    lock_manager._ensure_lock_dir(lock_path)
-    lock = FileLock(lock_path, timeout=0)
-
-    await acquire_lock_async(lock, "global", lock_path, timeout)
+    lock = lock_manager.get_global_lock(shared)
+    await acquire_lock_async(
+        lock, "shared global" if shared else "global", lock_manager.global_lock_path, timeout
+    )
     try:
         yield
     finally:
@@ -199,17 +384,15 @@ async def async_box_sync_lock(
     """
     Async context manager for acquiring a per-box sync lock.
 
-    Uses polling-based acquisition to keep lock in main thread,
+    The lock is acquired in the calling thread (see `acquire_lock_async`),
     avoiding thread-local state issues with filelock.
     """
-    lock_path = lock_manager.box_sync_lock_path(index_name)
-    lock_manager._ensure_lock_dir(lock_path)
-    lock = FileLock(lock_path, timeout=0)
+    lock = lock_manager.get_box_sync_lock(index_name)
 
     await acquire_lock_async(
         lock,
         f"box sync ({index_name})",
-        lock_path,
+        lock_manager.box_sync_lock_path(index_name),
         timeout,
     )
     try:
@@ -217,52 +400,72 @@ async def async_box_sync_lock(
     finally:
         lock.release()
 
-# %% pts/mod/_utils/04_locking.pct.py 13
+# %% pts/mod/_utils/04_locking.pct.py 17
 def cleanup_stale_locks(
     boxyard_data_path: Path,
     max_age_hours: float = 24
 ) -> list[Path]:
     """
-    Remove lock files that are older than the specified age AND not currently held.
+    Remove the leftovers of crashed lock holders: registry entries of locks that are not held,
+    and box lock files that are not held.
 
-    This safely cleans up locks from crashed processes without affecting
-    long-running operations that legitimately hold locks.
+    This is driven by the lock registry and the box lock folder, which only hold the locks that
+    are currently held (plus leftovers), so it costs O(active locks). Box lock folders of the
+    old layout (`boxes/{index_name}/sync.lock`) are removed too.
 
     Args:
         boxyard_data_path: Path to the boxyard data directory.
-        max_age_hours: Maximum age of lock files in hours before they're considered stale.
+        max_age_hours: Box lock files without a registry entry are only removed once they are
+            older than this (a holder adds its entry just after creating the file).
 
     Returns:
         List of paths to removed lock files.
     """
-    import time
-
-    locks_path = Path(boxyard_data_path) / "locks"
-    if not locks_path.exists():
+    lock_manager = BoxyardLockManager(boxyard_data_path)
+    if fcntl is None or not lock_manager.locks_path.exists():
         return []
 
     removed = []
-    max_age_seconds = max_age_hours * 3600
-    current_time = time.time()
+    box_locks_path = lock_manager.box_locks_path
 
-    for lock_file in locks_path.rglob("*.lock"):
+    def _remove_if_not_held(lock_path: Path, remove_file: bool) -> bool:
+        """Remove `lock_path` if it is not held. Returns whether it was not held."""
+        if not lock_path.exists():
+            return True
+        lock = BoxyardFileLock(lock_path, "cleanup", remove_on_release=remove_file)
         try:
-            file_age = current_time - lock_file.stat().st_mtime
-            if file_age > max_age_seconds:
-                # Try to acquire the lock with zero timeout to check if it's held
-                test_lock = FileLock(lock_file, timeout=0)
-                try:
-                    test_lock.acquire()
-                    # We got the lock, so no one else is holding it - safe to delete
-                    test_lock.release()
-                    lock_file.unlink()
-                    removed.append(lock_file)
-                except Timeout:
-                    # Lock is currently held by another process - don't delete
-                    pass
-        except (OSError, FileNotFoundError):
-            # File may have been removed by another process
-            pass
+            lock.acquire()
+        except (Timeout, FileNotFoundError):
+            return False
+        lock.release()
+        if remove_file:
+            removed.append(lock_path)
+        return True
+
+    # Registry entries of locks that are not held
+    holders = lock_manager.registry.get_holders()
+    for token, holder in holders.items():
+        lock_path = Path(holder.lock_path)
+        if _remove_if_not_held(lock_path, remove_file=lock_path.parent == box_locks_path):
+            lock_manager.registry.remove(token)
+
+    # Box lock files that have no registry entry
+    if box_locks_path.exists():
+        registered_paths = {holder.lock_path for holder in holders.values()}
+        max_age_seconds = max_age_hours * 3600
+        current_time = time.time()
+        for entry in os.scandir(box_locks_path):
+            path = Path(entry.path)
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    # The old layout, with a folder per box
+                    if _remove_if_not_held(path / "sync.lock", remove_file=True):
+                        path.rmdir()
+                elif entry.path not in registered_paths and current_time - entry.stat().st_mtime > max_age_seconds:
+                    _remove_if_not_held(path, remove_file=True)
+            except OSError:
+                # May have been removed by another process, or have unexpected contents
+                pass
 
     return removed
 
@@ -293,33 +496,219 @@ def auto_cleanup_stale_locks(
             print(f"  - {path}")
     return removed
 
-# %% pts/mod/_utils/04_locking.pct.py 15
-LOCK_POLL_INTERVAL = 0.1  # seconds between lock acquisition attempts
+# %% pts/mod/_utils/04_locking.pct.py 19
+LOCK_POLL_INTERVAL = 0.1  # seconds between lock acquisition attempts, if `fcntl` is not available
+
+# %% pts/mod/_utils/04_locking.pct.py 20
+class _LockReleaseWatcher:
+    """
+    Calls `on_free` once no one holds the flock of `lock_path` (or, if `shared`, once no one
+    holds it exclusively), unless it is cancelled first.
+    """
+
+    def __init__(self, lock_path: Path, on_free: Callable[[], None], shared: bool = False):
+        self._on_free = on_free
+        self._cancelled = False
+        self._state_lock = threading.Lock()  # Guards `_cancelled` and `_fd`
+        try:
+            # Not created if missing: a lock file that was removed is not held
+            self._fd = os.open(lock_path, os.O_RDWR)
+        except OSError:
+            self._fd = None
+            on_free()  # Let the waiter try to acquire the lock itself
+            return
+        threading.Thread(
+            target=self._run,
+            args=(self._fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX),
+            name=f"lock-watcher:{lock_path.name}",
+            daemon=True,
+        ).start()
+
+    def _run(self, fd: int, operation: int) -> None:
+        try:
+            fcntl.flock(fd, operation)
+        except OSError:
+            pass  # Let the waiter try to acquire the lock itself
+        with self._state_lock:
+            # Closing the file also releases the flock
+            os.close(fd)
+            self._fd = None
+            if not self._cancelled:
+                self._on_free()
+
+    def cancel(self) -> None:
+        """Stop watching, without waiting for the thread. `on_free` is not called afterwards."""
+        with self._state_lock:
+            self._cancelled = True
+            if self._fd is not None:
+                # Drop the thread's reference to the lock file, but keep the descriptor number
+                # valid until the thread closes it
+                devnull_fd = os.open(os.devnull, os.O_RDONLY)
+                try:
+                    os.dup2(devnull_fd, self._fd)
+                finally:
+                    os.close(devnull_fd)
+
+# %% pts/mod/_utils/04_locking.pct.py 22
+@dataclass
+class LockWaitStats:
+    num_acquisitions: int = 0
+    num_contended: int = 0  # Acquisitions that had to wait
+    num_timeouts: int = 0
+    total_wait: float = 0.0  # seconds
+    max_wait: float = 0.0  # seconds
+
+    def record(self, wait: float, contended: bool, timed_out: bool = False) -> None:
+        if timed_out:
+            self.num_timeouts += 1
+        else:
+            self.num_acquisitions += 1
+        if contended:
+            self.num_contended += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+
+_lock_wait_stats: dict[str, LockWaitStats] = {}
+_lock_wait_stats_lock = threading.Lock()
+
+
+def _record_lock_wait(lock_type: str, wait: float, contended: bool, timed_out: bool = False) -> None:
+    with _lock_wait_stats_lock:
+        _lock_wait_stats.setdefault(lock_type, LockWaitStats()).record(wait, contended, timed_out)
+
+
+def get_lock_wait_stats() -> dict[str, LockWaitStats]:
+    """The lock wait stats of this process, by lock type."""
+    with _lock_wait_stats_lock:
+        return {lock_type: replace(stats) for lock_type, stats in _lock_wait_stats.items()}
+
+
+def reset_lock_wait_stats() -> None:
+    with _lock_wait_stats_lock:
+        _lock_wait_stats.clear()
+
+# %% pts/mod/_utils/04_locking.pct.py 23
+def _set_future_done(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _is_shared(lock: FileLock | BoxyardFileLock) -> bool:
+    return isinstance(lock, BoxyardFileLock) and lock.shared
+
+
+def _get_holders_message(lock: FileLock | BoxyardFileLock) -> str:
+    """The holders of `lock` according to its registry, as a sentence (or an empty string)."""
+    if not isinstance(lock, BoxyardFileLock) or lock.registry is None:
+        return ""
+    try:
+        holders = lock.registry.get_holders(Path(lock.lock_file)).values()
+    except OSError:
+        return ""
+    return " ".join(
+        f"Held by PID {holder.pid} on {holder.hostname} since "
+        f"{datetime.fromtimestamp(holder.started):%Y-%m-%d %H:%M:%S}."
+        for holder in holders
+    )
+
+
+def _get_timeout_error(
+    lock: FileLock | BoxyardFileLock,
+    lock_type: str,
+    lock_path: Path,
+    timeout: float,
+    message: str | None,
+) -> LockAcquisitionError:
+    error = LockAcquisitionError(lock_type, lock_path, timeout, message=message)
+    holders_message = _get_holders_message(lock)
+    if holders_message:
+        error.args = (f"{error} {holders_message}",)
+    return error
+
+
+def _try_acquire(lock: FileLock | BoxyardFileLock) -> bool:
+    try:
+        lock.acquire(timeout=0)
+        return True
+    except Timeout:
+        return False
+
+
+def acquire_lock(
+    lock: FileLock | BoxyardFileLock,
+    lock_type: str,
+    lock_path: Path,
+    timeout: float,
+    message: str | None = None,
+) -> None:
+    """
+    Acquire a lock, waiting for up to `timeout` seconds for it to be released.
+
+    Raises:
+        LockAcquisitionError: If the lock cannot be acquired within the timeout.
+    """
+    start = time.monotonic()
+    contended = False
+    while not _try_acquire(lock):
+        contended = True
+        remaining = start + timeout - time.monotonic()
+        if remaining <= 0:
+            _record_lock_wait(lock_type, time.monotonic() - start, contended, timed_out=True)
+            raise _get_timeout_error(lock, lock_type, lock_path, timeout, message)
+        if fcntl is None:
+            time.sleep(min(LOCK_POLL_INTERVAL, remaining))
+            continue
+        lock_free = threading.Event()
+        watcher = _LockReleaseWatcher(lock_path, lock_free.set, shared=_is_shared(lock))
+        try:
+            lock_free.wait(remaining)
+        finally:
+            watcher.cancel()
+    _record_lock_wait(lock_type, time.monotonic() - start, contended)
 
 
 async def acquire_lock_async(
-    lock: FileLock,
+    lock: FileLock | BoxyardFileLock,
     lock_type: str,
     lock_path: Path,
-    timeout: float
+    timeout: float,
+    message: str | None = None,
 ) -> None:
     """
-    Acquire a lock asynchronously using polling.
+    Acquire a lock asynchronously, waiting for up to `timeout` seconds for it to be released.
+
+    The lock is acquired in the calling thread. This is cancellation-safe: if the coroutine is
+    cancelled while waiting, the lock is not acquired.
 
-    This approach is cancellation-safe - if the coroutine is cancelled,
-    no lock will be left in an inconsistent state.
+    Raises:
+        LockAcquisitionError: If the lock cannot be acquired within the timeout.
     """
-    import time
-    deadline = time.time() + timeout
+    loop = asyncio.get_running_loop()
+    start = time.monotonic()
+    contended = False
+    while not _try_acquire(lock):
+        contended = True
+        remaining = start + timeout - time.monotonic()
+        if remaining <= 0:
+            _record_lock_wait(lock_type, time.monotonic() - start, contended, timed_out=True)
+            raise _get_timeout_error(lock, lock_type, lock_path, timeout, message)
+        if fcntl is None:
+            # Yield to the event loop - this is where cancellation can happen safely
+            await asyncio.sleep(min(LOCK_POLL_INTERVAL, remaining))
+            continue
+        lock_free = loop.create_future()
 
-    while True:
+        def _on_free(lock_free=lock_free):
+            try:
+                loop.call_soon_threadsafe(_set_future_done, lock_free)
+            except RuntimeError:  # The loop was closed
+                pass
+
+        watcher = _LockReleaseWatcher(lock_path, _on_free, shared=_is_shared(lock))
         try:
-            # Try to acquire with zero timeout (non-blocking)
-            lock.acquire(timeout=0)
-            return  # Successfully acquired
-        except Timeout:
-            # Check if we've exceeded the deadline
-            if time.time() >= deadline:
-                raise LockAcquisitionError(lock_type, lock_path, timeout)
-            # Yield to the event loop - this is where cancellation can happen safely
-            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            await asyncio.wait([lock_free], timeout=remaining)
+        finally:
+            watcher.cancel()
+            lock_free.cancel()
+    _record_lock_wait(lock_type, time.monotonic() - start, contended)
@@ -0,0 +1,166 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: pts/mod/_utils/10_push_lease.pct.py
+
+__all__ = ['PUSH_LEASE_SETTLE_DELAY', 'PUSH_LEASE_TTL', 'PushLease', 'PushLeaseHeld', 'PushLeaseRecord']
+
+# %% pts/mod/_utils/10_push_lease.pct.py 3
+import asyncio
+import sys
+from contextlib import suppress
+from datetime import datetime, timedelta, timezone
+
+from pydantic import ValidationError
+from ulid import ULID
+
+from .. import const
+
+# %% pts/mod/_utils/10_push_lease.pct.py 5
+# Generous, as the expiry is compared against the clock of another machine
+PUSH_LEASE_TTL = 300  # seconds
+# The time given to a concurrent writer of the lease to land its write before reading it back
+PUSH_LEASE_SETTLE_DELAY = 1.0  # seconds
+
+# %% pts/mod/_utils/10_push_lease.pct.py 7
+class PushLeaseRecord(const.StrictModel):
+    token: str
+    holder_hostname: str
+    expires_utc: datetime
+
+    def is_expired(self) -> bool:
+        return self.expires_utc <= datetime.now(timezone.utc)
+
+
+class PushLeaseHeld(Exception):
+    def __init__(self, record: PushLeaseRecord | None):
+        self.record = record
+        if record is None:
+            message = "Lost the push lease to a concurrent push from another machine."
+        else:
+            message = (
+                f"The box is being pushed by '{record.holder_hostname}' "
+                f"(lease expires {record.expires_utc.isoformat(timespec='seconds')}). "
+                "Use --sync-setting force to override."
+            )
+        super().__init__(message)
+
+
+class PushLease:
+    """
+    The push lease of a box on a remote. Acquiring is idempotent, so the lease can be acquired
+    by every push of a box sync, and released once at the end.
+    """
+
+    def __init__(
+        self,
+        rclone_config_path: str,
+        remote: str,
+        lease_path: str,
+        holder_hostname: str | None = None,
+        ttl: float = PUSH_LEASE_TTL,
+        settle_delay: float = PUSH_LEASE_SETTLE_DELAY,
+    ):
+        from .._utils import get_hostname
+
+        self.rclone_config_path = rclone_config_path
+        self.remote = remote
+        self.lease_path = lease_path
+        self.holder_hostname = holder_hostname or get_hostname()
+        self.ttl = ttl
+        self.settle_delay = settle_delay
+        self.token = str(ULID())
+        self._heartbeat_task: asyncio.Task | None = None
+
+    @property
+    def is_held(self) -> bool:
+        return self._heartbeat_task is not None
+
+    async def read(self) -> PushLeaseRecord | None:
+        from .._utils import rclone_cat
+
+        exists, content = await rclone_cat(
+            rclone_config_path=self.rclone_config_path,
+            source=self.remote,
+            source_path=self.lease_path,
+        )
+        if not exists:
+            return None
+        try:
+            return PushLeaseRecord.model_validate_json(content)
+        except ValidationError:
+            return None  # A garbled lease does not hold the remote
+
+    async def _write(self) -> bool:
+        from .._utils import rclone_write
+
+        record = PushLeaseRecord(
+            token=self.token,
+            holder_hostname=self.holder_hostname,
+            expires_utc=datetime.now(timezone.utc) + timedelta(seconds=self.ttl),
+        )
+        return await rclone_write(
+            rclone_config_path=self.rclone_config_path,
+            dest=self.remote,
+            dest_path=self.lease_path,
+            content=record.model_dump_json(),
+        )
+
+    async def acquire(self, force: bool = False) -> None:
+        """
+        Acquire the lease, or raise `PushLeaseHeld` if another machine holds it. If `force` is
+        set, the lease is taken over regardless.
+        """
+        if self.is_held:
+            return
+
+        record = await self.read()
+        if not force and record is not None and record.token != self.token and not record.is_expired():
+            raise PushLeaseHeld(record)
+
+        if not await self._write():
+            raise Exception(f"Failed to write the push lease '{self.remote}:{self.lease_path}'.")
+
+        if not force:
+            await asyncio.sleep(self.settle_delay)
+            record = await self.read()
+            if record is None or record.token != self.token:
+                raise PushLeaseHeld(record)
+
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+
+    def _warn(self, action: str, error: Exception | None = None) -> None:
+        message = f"Warning: Failed to {action} the push lease '{self.remote}:{self.lease_path}'"
+        print(f"{message}: {error}" if error is not None else f"{message}.", file=sys.stderr)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                record = await self.read()
+                if record is not None and record.token != self.token:
+                    return  # Taken over by another machine, e.g. with a forced push
+                if not await self._write():
+                    self._warn("renew")
+            except Exception as e:
+                self._warn("renew", e)  # Retried at the next beat
+
+    async def release(self) -> None:
+        """Stop the heartbeat, and delete the lease if it is still ours. Never raises on failure."""
+        from .._utils import rclone_delete
+
+        if not self.is_held:
+            return
+        heartbeat_task, self._heartbeat_task = self._heartbeat_task, None
+        heartbeat_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await heartbeat_task
+
+        try:
+            record = await self.read()
+            if record is not None and record.token == self.token:
+                if not await rclone_delete(
+                    rclone_config_path=self.rclone_config_path,
+                    dest=self.remote,
+                    dest_path=self.lease_path,
+                ):
+                    self._warn("delete")
+        except Exception as e:
+            self._warn("delete", e)  # The lease expires
@@ -1,12 +1,18 @@
 # AUTOGENERATED! DO NOT EDIT!
 
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
 import textwrap
 from .._utils import check_interrupted, SoftInterruption
 from .._enums import SyncSetting, SyncDirection
 
 from .. import const
 
+if TYPE_CHECKING:
+    from .._utils.backup_purge_queue import BackupPurgeQueue
+    from .._utils.push_lease import PushLease
+    from .._utils.sync_progress import RcloneStats
+
 from .._models import SyncStatus
 
 class SyncFailed(Exception):
@@ -40,6 +46,11 @@ async def sync_helper(
     verbose: bool = False,
     show_rclone_progress: bool = False,
     allow_missing_source: bool = False,
+    transfer_journals_path: Path | None = None,
+    progress_callback: Callable[["RcloneStats"], Any] | None = None,
+    push_lease: "PushLease | None" = None,
+    backup_purge_queue: "BackupPurgeQueue | None" = None,
+    backup_label: str | None = None,
 ) -> tuple[SyncStatus, bool]:
     """
     Helper to execute the standard routine for syncing a local and remote folder.
@@ -178,7 +189,22 @@ async def sync_helper(
             if verbose:
                 print(f"Source does not exist and allow_missing_source=True. Skipping sync.")
             return sync_status, False
-    from boxyard._utils import rclone_sync, BisyncResult, rclone_mkdir, rclone_purge
+    import inspect
+    
+    from boxyard._utils import rclone_sync, BisyncResult, rclone_purge
+    from boxyard._utils.transfer_journal import TransferJournal, write_resume_filters_file
+    from boxyard._utils.sync_progress import parse_rclone_stats_line, RCLONE_STATS_INTERVAL
+    
+    
+    async def _handle_rclone_log_line(line: str, journal: "TransferJournal | None"):
+        if journal is not None:
+            journal.handle_rclone_log_line(line, local_path)
+        if progress_callback is not None:
+            stats = parse_rclone_stats_line(line)
+            if stats is not None:
+                result = progress_callback(stats)
+                if inspect.isawaitable(result):
+                    await result
     
     
     async def _sync(
@@ -190,6 +216,7 @@ async def sync_helper(
         backup_remote: str,
         backup_path: str,
         return_command: bool = False,
+        journal: "TransferJournal | None" = None,
     ) -> BisyncResult:
         if not sync_path_is_dir:
             dest_path = (
@@ -203,45 +230,97 @@ async def sync_helper(
                 f"Syncing {source}:{source_path} to {dest}:{dest_path}.  Backup path: {backup_remote}:{backup_path}"
             )
     
-        # Create backup store directory if it doesn't already exist
-        await rclone_mkdir(
-            rclone_config_path=rclone_config_path,
-            source=backup_remote,
-            source_path=backup_path,
-        )
+        filter_kwargs = {
+            "include": include or [],
+            "exclude": exclude or [],
+            "filter": filter or [],
+            "include_file": include_path,
+            "exclude_file": exclude_path,
+            "filters_file": filters_path,
+        }
     
-        return await rclone_sync(
-            rclone_config_path=rclone_config_path,
-            source=source,
-            source_path=source_path,
-            dest=dest,
-            dest_path=dest_path,
-            include=include or [],
-            exclude=exclude or [],
-            filter=filter or [],
-            include_file=include_path,
-            exclude_file=exclude_path,
-            filters_file=filters_path,
-            backup_path=f"{backup_remote}:{backup_path}" if backup_remote else backup_path,
-            dry_run=dry_run,
-            return_command=return_command,
-            verbose=False,
-            progress=show_rclone_progress,
-        )
+        # Skip the files that a previous attempt of this sync session already transferred. The
+        # resume rules must come before all other filter rules, so everything is merged into a
+        # single filters file.
+        resume_filters_path = None
+        if journal is not None:
+            resume_rules = journal.get_resume_filter_rules(local_path)
+            if resume_rules:
+                if verbose:
+                    print(f"Resuming sync. Skipping {len(resume_rules)} already transferred files.")
+                resume_filters_path = write_resume_filters_file(
+                    resume_rules,
+                    filters_path,
+                    include=include,
+                    include_path=include_path,
+                    exclude=exclude,
+                    exclude_path=exclude_path,
+                    filter=filter,
+                )
+                filter_kwargs = {
+                    "include": [],
+                    "exclude": [],
+                    "filter": [],
+                    "include_file": None,
+                    "exclude_file": None,
+                    "filters_file": resume_filters_path,
+                }
+    
+        try:
+            return await rclone_sync(
+                rclone_config_path=rclone_config_path,
+                source=source,
+                source_path=source_path,
+                dest=dest,
+                dest_path=dest_path,
+                **filter_kwargs,
+                backup_path=f"{backup_remote}:{backup_path}" if backup_remote else backup_path,
+                dry_run=dry_run,
+                return_command=return_command,
+                verbose=False,
+                progress=show_rclone_progress,
+                log_line_callback=(
+                    (lambda line: _handle_rclone_log_line(line, journal))
+                    if journal is not None or progress_callback is not None
+                    else None
+                ),
+                stats_interval=RCLONE_STATS_INTERVAL if progress_callback is not None else None,
+            )
+        finally:
+            if resume_filters_path is not None:
+                resume_filters_path.unlink(missing_ok=True)
     from boxyard._models import SyncRecord
     
     if check_interrupted():
         raise SoftInterruption()
     
-    rec = SyncRecord.create(syncer_hostname=syncer_hostname, sync_complete=False)
-    backup_name = str(rec.ulid)
+    if _can_safely_retry_incomplete(sync_condition, sync_direction, local_sync_record, remote_sync_record):
+        # Retrying an interrupted sync: continue the same sync session (same ULID, backup dir and journal)
+        rec = local_sync_record
+    else:
+        rec = SyncRecord.create(syncer_hostname=syncer_hostname, sync_complete=False)
+    backup_name = f"{rec.ulid}__{backup_label}" if backup_label else str(rec.ulid)
+    
+    journal = None
+    if transfer_journals_path is not None and sync_path_is_dir:
+        journal = TransferJournal.open(
+            journals_path=transfer_journals_path,
+            ulid=str(rec.ulid),
+            sync_direction=sync_direction,
+            remote_sync_record_ulid=(
+                str(remote_sync_record.ulid)
+                if sync_direction == SyncDirection.PULL and remote_sync_record is not None
+                else None
+            ),
+        )
     
     if sync_direction == SyncDirection.PULL:
         # Save the sync record on local to signify an ongoing sync
         await rec.rclone_save(rclone_config_path, "", local_sync_record_path)
     
         backup_remote = ""
-        backup_path = Path(local_sync_backups_path) / backup_name
+        backups_path = Path(local_sync_backups_path)
+        backup_path = backups_path / backup_name
     
         res, stdout, stderr = await _sync(
             dry_run=False,
@@ -251,6 +330,7 @@ async def sync_helper(
             dest_path=local_path,
             backup_remote=backup_remote,
             backup_path=backup_path,
+            journal=journal,
         )
     
         if res:
@@ -261,6 +341,10 @@ async def sync_helper(
             await rec.rclone_save(rclone_config_path, "", local_sync_record_path)
     
     elif sync_direction == SyncDirection.PUSH:
+        # Back off before touching the remote if another machine is pushing
+        if push_lease is not None:
+            await push_lease.acquire(force=sync_setting == SyncSetting.FORCE)
+    
         # Save the incomplete sync record on BOTH local and remote to signify an ongoing sync
         # This creates a "sync session" marker - if interrupted, both sides have the same incomplete ULID,
         # proving this machine owns the interrupted sync and can safely retry
@@ -268,7 +352,8 @@ async def sync_helper(
         await rec.rclone_save(rclone_config_path, "", local_sync_record_path)
     
         backup_remote = remote
-        backup_path = Path(remote_sync_backups_path) / backup_name
+        backups_path = Path(remote_sync_backups_path)
+        backup_path = backups_path / backup_name
     
         res, stdout, stderr = await _sync(
             dry_run=False,
@@ -278,6 +363,7 @@ async def sync_helper(
             dest_path=remote_path,
             backup_remote=backup_remote,
             backup_path=backup_path,
+            journal=journal,
         )
     
         if res:
@@ -290,12 +376,19 @@ async def sync_helper(
         raise ValueError(f"Unknown sync direction: {sync_direction}")
     
     if not res:
+        # The journal is kept so that a retry of this sync session can resume from it
         raise SyncFailed(f"Sync failed. Rclone output:\n{stdout}\n{stderr}")
     
+    if journal is not None:
+        journal.discard()
+    
     if res and delete_backup:
-        await rclone_purge(
-            rclone_config_path=rclone_config_path,
-            source=backup_remote,
-            source_path=backup_path,
-        )
+        if backup_purge_queue is not None:
+            backup_purge_queue.add(backup_remote, backups_path, backup_name)
+        else:
+            await rclone_purge(
+                rclone_config_path=rclone_config_path,
+                source=backup_remote,
+                source_path=backup_path,
+            )
     return sync_status, True
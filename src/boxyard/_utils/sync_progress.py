@@ -0,0 +1,206 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: pts/mod/_utils/06_sync_progress.pct.py
+
+__all__ = ['BoxProgressSummary', 'RCLONE_STATS_INTERVAL', 'RcloneStats', 'SYNC_PROGRESS_STALL_TIMEOUT', 'SyncProgressEvent', 'SyncProgressTracker', 'parse_rclone_stats_line']
+
+# %% pts/mod/_utils/06_sync_progress.pct.py 3
+import json
+import time
+from typing import NamedTuple
+
+from .._enums import BoxPart
+
+# %% pts/mod/_utils/06_sync_progress.pct.py 5
+# How often rclone reports its stats when progress is being tracked
+RCLONE_STATS_INTERVAL = "1s"
+
+# A sync that has not made any progress for this many seconds is considered stalled
+SYNC_PROGRESS_STALL_TIMEOUT = 60.0
+
+# %% pts/mod/_utils/06_sync_progress.pct.py 7
+class RcloneStats(NamedTuple):
+    """A snapshot of the stats of a running rclone command."""
+
+    bytes: int
+    total_bytes: int
+    transfers: int
+    total_transfers: int
+    checks: int
+    total_checks: int
+    speed: float  # bytes/s
+    eta: float | None  # seconds
+    elapsed_time: float  # seconds
+    errors: int
+
+    @property
+    def is_done(self) -> bool:
+        return (
+            self.bytes >= self.total_bytes
+            and self.transfers >= self.total_transfers
+            and self.checks >= self.total_checks
+        )
+
+
+class SyncProgressEvent(NamedTuple):
+    """The stats of the sync of one part of a box."""
+
+    box_index_name: str
+    box_part: BoxPart
+    stats: RcloneStats
+
+# %% pts/mod/_utils/06_sync_progress.pct.py 9
+def parse_rclone_stats_line(line: str) -> RcloneStats | None:
+    """
+    Parse a stats line of rclone's `--use-json-log` output.
+
+    Returns `None` if the line is not a stats line.
+    """
+    if not line.startswith("{") or '"stats"' not in line:
+        return None
+    try:
+        stats = json.loads(line).get("stats")
+    except (json.JSONDecodeError, AttributeError):
+        return None
+    if not isinstance(stats, dict):
+        return None
+    return RcloneStats(
+        bytes=stats.get("bytes", 0),
+        total_bytes=stats.get("totalBytes", 0),
+        transfers=stats.get("transfers", 0),
+        total_transfers=stats.get("totalTransfers", 0),
+        checks=stats.get("checks", 0),
+        total_checks=stats.get("totalChecks", 0),
+        speed=stats.get("speed", 0.0),
+        eta=stats.get("eta"),
+        elapsed_time=stats.get("elapsedTime", 0.0),
+        errors=stats.get("errors", 0),
+    )
+
+# %% pts/mod/_utils/06_sync_progress.pct.py 12
+class _BoxProgress:
+    def __init__(self, now: float):
+        self.stats_by_part: dict[BoxPart, RcloneStats] = {}
+        self.current_part: BoxPart | None = None
+        self.last_progress_at = now
+        self.finished = False
+
+
+class BoxProgressSummary(NamedTuple):
+    box_part: BoxPart | None
+    bytes: int
+    total_bytes: int
+    transfers: int
+    total_transfers: int
+    speed: float
+    eta: float | None
+    stalled: bool
+
+
+class SyncProgressTracker:
+    """
+    Keeps track of the progress of concurrent box syncs.
+
+    Pass `tracker.update` as the `progress_callback` of `sync_box`, and call `tracker.finish`
+    once the sync of a box has ended. Call `tracker.discard` once the summary of a finished box
+    is no longer needed, to only keep its totals in the aggregate summary.
+    """
+
+    def __init__(self, stall_timeout: float = SYNC_PROGRESS_STALL_TIMEOUT):
+        self.stall_timeout = stall_timeout
+        self._boxes: dict[str, _BoxProgress] = {}
+        self._num_discarded = 0
+        self._discarded_totals = (0, 0, 0, 0)  # bytes, total_bytes, transfers, total_transfers
+
+    def update(self, event: SyncProgressEvent) -> None:
+        now = time.monotonic()
+        box = self._boxes.get(event.box_index_name)
+        if box is None:
+            box = self._boxes[event.box_index_name] = _BoxProgress(now)
+
+        prev = box.stats_by_part.get(event.box_part)
+        if (
+            prev is None
+            or event.box_part != box.current_part
+            or (event.stats.bytes, event.stats.transfers, event.stats.checks)
+            != (prev.bytes, prev.transfers, prev.checks)
+        ):
+            box.last_progress_at = now
+        box.stats_by_part[event.box_part] = event.stats
+        box.current_part = event.box_part
+
+    def finish(self, box_index_name: str) -> None:
+        if box_index_name in self._boxes:
+            self._boxes[box_index_name].finished = True
+
+    def discard(self, box_index_name: str) -> None:
+        """Forget a finished box, keeping only its totals for the aggregate summary."""
+        if box_index_name not in self._boxes:
+            return
+        summary = self.get_box_summary(box_index_name)
+        del self._boxes[box_index_name]
+        self._num_discarded += 1
+        self._discarded_totals = tuple(
+            a + b
+            for a, b in zip(
+                self._discarded_totals,
+                (summary.bytes, summary.total_bytes, summary.transfers, summary.total_transfers),
+                strict=True,
+            )
+        )
+
+    def get_box_summary(self, box_index_name: str) -> BoxProgressSummary | None:
+        """Summary of the progress of a box over all of its synced parts."""
+        box = self._boxes.get(box_index_name)
+        if box is None:
+            return None
+        all_stats = box.stats_by_part.values()
+        current = box.stats_by_part[box.current_part]
+        stalled = (
+            not box.finished
+            and not current.is_done
+            and time.monotonic() - box.last_progress_at > self.stall_timeout
+        )
+        return BoxProgressSummary(
+            box_part=box.current_part,
+            bytes=sum(s.bytes for s in all_stats),
+            total_bytes=sum(s.total_bytes for s in all_stats),
+            transfers=sum(s.transfers for s in all_stats),
+            total_transfers=sum(s.total_transfers for s in all_stats),
+            speed=0.0 if box.finished else current.speed,
+            eta=None if box.finished else current.eta,
+            stalled=stalled,
+        )
+
+    def get_aggregate_summary(self) -> BoxProgressSummary:
+        """Summary of the progress of all tracked (and discarded) boxes."""
+        summaries = [self.get_box_summary(name) for name in self._boxes]
+        etas = [s.eta for s in summaries if s.eta is not None and s.speed > 0]
+        discarded_bytes, discarded_total_bytes, discarded_transfers, discarded_total_transfers = (
+            self._discarded_totals
+        )
+        return BoxProgressSummary(
+            box_part=None,
+            bytes=discarded_bytes + sum(s.bytes for s in summaries),
+            total_bytes=discarded_total_bytes + sum(s.total_bytes for s in summaries),
+            transfers=discarded_transfers + sum(s.transfers for s in summaries),
+            total_transfers=discarded_total_transfers + sum(s.total_transfers for s in summaries),
+            speed=sum(s.speed for s in summaries),
+            eta=max(etas) if etas else None,
+            stalled=any(s.stalled for s in summaries),
+        )
+
+    @property
+    def tracked_boxes(self) -> list[str]:
+        return list(self._boxes)
+
+    @property
+    def has_progress(self) -> bool:
+        """Whether any progress has been reported (including by discarded boxes)."""
+        return bool(self._boxes) or self._num_discarded > 0
+
+    @property
+    def stalled_boxes(self) -> list[str]:
+        return [
+            name
+            for name in self._boxes
+            if self.get_box_summary(name).stalled
+        ]
@@ -16,6 +16,7 @@ def __getattr__(name):
         "sync_box": "._sync_box",
         "sync_missing_boxmetas": "._sync_missing_boxmetas",
         "sync_name": "._sync_name",
+        "watch_boxes": "._watch_boxes",
     }
     if name in _name_to_module:
         mod = importlib.import_module(_name_to_module[name], __name__)
@@ -30,8 +30,7 @@ async def include_box(
     
     _lock_manager = BoxyardLockManager(config.boxyard_data_path)
     _lock_path = _lock_manager.box_sync_lock_path(box_index_name)
-    _lock_manager._ensure_lock_dir(_lock_path)
-    _sync_lock = __import__('filelock').FileLock(_lock_path, timeout=0)
+    _sync_lock = _lock_manager.get_box_sync_lock(box_index_name)
     await acquire_lock_async(
         _sync_lock,
         f"box sync ({box_index_name})",
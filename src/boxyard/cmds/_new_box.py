@@ -6,8 +6,7 @@ import re
 from datetime import datetime
 import asyncio
 
-from .._utils.locking import BoxyardLockManager, LockAcquisitionError, GLOBAL_LOCK_TIMEOUT
-from filelock import Timeout
+from .._utils.locking import BoxyardLockManager, GLOBAL_LOCK_TIMEOUT, acquire_lock
 from .._models import generate_unique_box_id
 
 def _extract_box_name_from_git_url(url: str) -> str:
@@ -125,49 +124,56 @@ def new_box(
             raise ValueError(
                 f"'{from_path}' is already a boxyard box. Use `copy_from_path=True` to copy the contents of this box into a new box."
             )
+    from boxyard._models import BoxMeta
+    
     _lock_manager = BoxyardLockManager(config.boxyard_data_path)
     _lock_path = _lock_manager.global_lock_path
-    _lock_manager._ensure_lock_dir(_lock_path)
-    _global_lock = __import__('filelock').FileLock(_lock_path, timeout=GLOBAL_LOCK_TIMEOUT)
-    try:
-        _global_lock.acquire()
-    except Timeout:
-        raise LockAcquisitionError(
-            "global",
-            _lock_path,
-            GLOBAL_LOCK_TIMEOUT,
-            message=(
-                f"Could not acquire global lock within {GLOBAL_LOCK_TIMEOUT}s. "
-                f"Another boxyard operation may be in progress."
-            )
+    _global_lock = _lock_manager.get_global_lock()
+    acquire_lock(
+        _global_lock,
+        "global",
+        _lock_path,
+        GLOBAL_LOCK_TIMEOUT,
+        message=(
+            f"Could not acquire global lock within {GLOBAL_LOCK_TIMEOUT}s. "
+            f"Another boxyard operation may be in progress."
         )
-    from boxyard._models import BoxMeta
-    
-    # Collect all existing box IDs to prevent collisions
-    existing_ids = {rm.box_id for rm in boxyard_meta.box_metas}
-    
-    # Generate unique timestamp and subid
-    creation_timestamp, box_subid = generate_unique_box_id(config, existing_ids)
-    
-    # If user provided a timestamp, use it (but still use the unique subid)
-    if creation_timestamp_utc is not None:
-        from boxyard.config import BoxTimestampFormat
-        from boxyard import const
-        if config.box_timestamp_format == BoxTimestampFormat.DATE_AND_TIME:
-            creation_timestamp = creation_timestamp_utc.strftime(const.BOX_TIMESTAMP_FORMAT)
-        else:
-            creation_timestamp = creation_timestamp_utc.strftime(const.BOX_TIMESTAMP_FORMAT_DATE_ONLY)
-    
-    box_meta = BoxMeta(
-        creation_timestamp_utc=creation_timestamp,
-        box_subid=box_subid,
-        name=box_name,
-        storage_location=storage_location,
-        creator_hostname=creator_hostname,
-        groups=config.default_box_groups,
     )
+    try:
+        # Collect all existing box IDs to prevent collisions, including those of boxes that are not
+        # yet in the boxyard meta
+        existing_ids = {rm.box_id for rm in boxyard_meta.box_metas}
+        for _sl_name in config.storage_locations:
+            _sl_path = config.local_store_path / _sl_name
+            if _sl_path.is_dir():
+                existing_ids.update(
+                    p.name.split("__", 1)[0] for p in _sl_path.iterdir() if "__" in p.name
+                )
+    
+        # Generate unique timestamp and subid
+        creation_timestamp, box_subid = generate_unique_box_id(config, existing_ids)
+    
+        # If user provided a timestamp, use it (but still use the unique subid)
+        if creation_timestamp_utc is not None:
+            from boxyard.config import BoxTimestampFormat
+            from boxyard import const
+            if config.box_timestamp_format == BoxTimestampFormat.DATE_AND_TIME:
+                creation_timestamp = creation_timestamp_utc.strftime(const.BOX_TIMESTAMP_FORMAT)
+            else:
+                creation_timestamp = creation_timestamp_utc.strftime(const.BOX_TIMESTAMP_FORMAT_DATE_ONLY)
+    
+        box_meta = BoxMeta(
+            creation_timestamp_utc=creation_timestamp,
+            box_subid=box_subid,
+            name=box_name,
+            storage_location=storage_location,
+            creator_hostname=creator_hostname,
+            groups=config.default_box_groups,
+        )
     
-    box_meta.save(config)
+        box_meta.save(config)
+    finally:
+        _global_lock.release()
     from boxyard._models import BoxPart
     
     box_path = box_meta.get_local_path(config)
@@ -214,7 +220,5 @@ def new_box(
                 print("Warning: Failed to initialise git box")
     from boxyard._models import refresh_boxyard_meta
     
-    refresh_boxyard_meta(config, _skip_lock=True)
-    if _global_lock.is_locked:
-        _global_lock.release()
+    refresh_boxyard_meta(config)
     return box_meta.index_name
@@ -1,7 +1,9 @@
 # AUTOGENERATED! DO NOT EDIT!
 
 from pathlib import Path
+from typing import Any, Callable
 import asyncio
+import time
 
 from .._utils.sync_helper import sync_helper, SyncSetting, SyncDirection
 from .._models import SyncStatus, BoxPart, BoxMeta, SyncCondition
@@ -15,6 +17,10 @@ from .._utils.locking import BoxyardLockManager, LockAcquisitionError, BOX_SYNC_
 from .. import const
 from .._tombstones import is_tombstoned, get_tombstone
 from .._remote_index import find_remote_box_by_id, update_remote_index_cache
+from .._utils.sync_progress import SyncProgressEvent
+from .._utils.concurrency import current_limiter, get_storage_location_limiter
+from .._utils.push_lease import PushLease
+from .._utils.backup_purge_queue import BackupPurgeQueue
 
 async def sync_box(
     config_path: Path,
@@ -25,6 +31,8 @@ async def sync_box(
     verbose: bool = False,
     show_rclone_progress: bool = False,
     soft_interruption_enabled: bool = True,
+    progress_callback: Callable[[SyncProgressEvent], Any] | None = None,
+    defer_backup_purge: bool = False,
     _skip_lock: bool = False,
 ) -> dict[BoxPart, tuple[SyncStatus, bool]]:
     """
@@ -39,6 +47,11 @@ async def sync_box(
         force: Force syncing, possibly overwriting changes.
         verbose: Print verbose output during sync.
         show_rclone_progress: Show rclone progress during sync.
+        progress_callback: Called with a `SyncProgressEvent` every time rclone reports its
+            transfer stats. May be a coroutine function.
+        defer_backup_purge: Leave the backups of the synced parts in the purge queue, for the
+            caller to drain once for a whole batch of syncs. Otherwise the queue is drained
+            before returning.
     """
     config = get_config(config_path)
     if sync_choices is None:
@@ -115,12 +128,15 @@ async def sync_box(
             / idx_name
             / f"{part.value}.rec"
         )
+    def _get_part_progress_callback(part: BoxPart):
+        if progress_callback is None:
+            return None
+        return lambda stats: progress_callback(SyncProgressEvent(box_index_name, part, stats))
     _sync_lock = None
     if not _skip_lock:
         _lock_manager = BoxyardLockManager(config.boxyard_data_path)
         _lock_path = _lock_manager.box_sync_lock_path(box_index_name)
-        _lock_manager._ensure_lock_dir(_lock_path)
-        _sync_lock = __import__('filelock').FileLock(_lock_path, timeout=0)
+        _sync_lock = _lock_manager.get_box_sync_lock(box_index_name)
         await acquire_lock_async(
             _sync_lock,
             f"box sync ({box_index_name})",
@@ -128,7 +144,37 @@ async def sync_box(
             BOX_SYNC_LOCK_TIMEOUT,
         )
     
+    # Everything that is set up after the sync lock is acquired is inside the try, so that the lock
+    # is always released
+    _limiter_token = None
+    _push_lease = None
+    _sync_start_time = time.monotonic()
+    _should_record_box_stats = False
     try:
+        # Run the rclone operations of the sync under the adaptive limiter of the storage location
+        _limiter_token = current_limiter.set(
+            get_storage_location_limiter(
+                storage_location,
+                initial_limit=config.get_initial_concurrent_rclone_ops(storage_location),
+                max_limit=config.get_max_concurrent_rclone_ops(storage_location),
+            )
+        )
+    
+        # Held across the pushes of all parts, if the storage location uses push leases
+        if config.storage_locations[storage_location].push_leases:
+            _push_lease = PushLease(
+                rclone_config_path=config.rclone_config_path,
+                remote=storage_location,
+                lease_path=(
+                    config.storage_locations[storage_location].store_path
+                    / const.SYNC_RECORDS_REL_PATH
+                    / remote_index_name
+                    / "push.lease"
+                ).as_posix(),
+            )
+    
+        _backup_purge_queue = BackupPurgeQueue(config.sync_backup_purge_queue_path)
+    
         # Prints
         if verbose:
             print(f"Syncing box {box_index_name} at {box_meta.storage_location}.")
@@ -163,6 +209,10 @@ async def sync_box(
                 remote_sync_backups_path=remote_sync_backups_path,
                 verbose=verbose,
                 show_rclone_progress=show_rclone_progress,
+                progress_callback=_get_part_progress_callback(sync_part),
+                push_lease=_push_lease,
+                backup_purge_queue=_backup_purge_queue,
+                backup_label=box_id,
             )
     
         # Sync the boxconf
@@ -189,6 +239,10 @@ async def sync_box(
                 verbose=verbose,
                 show_rclone_progress=show_rclone_progress,
                 allow_missing_source=True,  # CONF is optional - may not exist on either side
+                progress_callback=_get_part_progress_callback(sync_part),
+                push_lease=_push_lease,
+                backup_purge_queue=_backup_purge_queue,
+                backup_label=box_id,
             )
     
         # Get the now locally synced conf files for the sync of the box data
@@ -236,17 +290,47 @@ async def sync_box(
                 filters_path=_rclone_filters_path,
                 verbose=verbose,
                 show_rclone_progress=show_rclone_progress,
+                transfer_journals_path=config.transfer_journals_path,
+                progress_callback=_get_part_progress_callback(sync_part),
+                push_lease=_push_lease,
+                backup_purge_queue=_backup_purge_queue,
+                backup_label=box_id,
             )
     
         # Update remote index cache
         update_remote_index_cache(config, storage_location, box_id, remote_index_name)
     
+        # The box stats used to schedule syncs are only re-measured if the data changed. The tree
+        # is walked after the sync lock is released.
+        _sync_duration = time.monotonic() - _sync_start_time
+        if BoxPart.DATA in sync_results and box_meta.get_local_part_path(config, BoxPart.DATA).exists():
+            from boxyard._box_stats import load_box_stats
+    
+            _should_record_box_stats = (
+                sync_results[BoxPart.DATA][1] or load_box_stats(config, box_id) is None
+            )
+    
+        # Purge the backups of the synced parts, with one delete per backups root
+        if not defer_backup_purge and _backup_purge_queue.has_entries():
+            await _backup_purge_queue.drain(config.rclone_config_path)
+    
         # Refresh the boxyard meta file
         if BoxPart.META in sync_choices:
             from boxyard._models import refresh_boxyard_meta
     
             refresh_boxyard_meta(config)
     finally:
-        if _sync_lock is not None:
-            _sync_lock.release()
+        try:
+            if _push_lease is not None:
+                await _push_lease.release()
+        finally:
+            if _limiter_token is not None:
+                current_limiter.reset(_limiter_token)
+            if _sync_lock is not None:
+                _sync_lock.release()
+    
+    if _should_record_box_stats:
+        from boxyard._box_stats import record_box_stats
+    
+        await record_box_stats(config, box_meta, _sync_duration)
     return sync_results
@@ -0,0 +1,169 @@
+# AUTOGENERATED! DO NOT EDIT!
+
+import asyncio
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from ..config import get_config, StorageType
+from .._enums import BoxPart, SyncDirection, SyncSetting
+from .._models import get_boxyard_meta
+from .._utils.base import enable_soft_interruption, check_interrupted
+from .._utils.watch import ChangeDebouncer, InotifyWatcher, PollingWatcher
+from .._utils.backup_purge_queue import BackupPurgeQueue
+
+# How often the watch loop checks for soft interruptions (e.g. Ctrl-C)
+_INTERRUPT_CHECK_INTERVAL = 0.5
+DEFAULT_WATCH_POLL_INTERVAL = 5.0
+
+async def watch_boxes(
+    config_path: Path,
+    box_index_names: list[str] | None = None,
+    quiet_period: float = 5.0,
+    min_push_interval: float = 30.0,
+    sync_setting: SyncSetting = SyncSetting.CAREFUL,
+    sync_choices: list[BoxPart] | None = None,
+    poll_interval: float | None = None,
+    verbose: bool = False,
+    soft_interruption_enabled: bool = True,
+    on_push_finished: Callable[[str, Any], Any] | None = None,
+) -> None:
+    """
+    Watch boxes for local changes, and push them to their remotes. Runs until it is
+    cancelled or (soft) interrupted, after which it waits for the pushes in flight.
+
+    Args:
+        config_path: Path to the boxyard config file.
+        box_index_names: The boxes to watch. If None, all included boxes are watched.
+        quiet_period: Seconds a box must go without changes before it is pushed.
+        min_push_interval: Minimum number of seconds between two batches of pushes to the same
+            storage location.
+        sync_setting: SyncSetting option (SAFE, CAREFUL, FORCE).
+        sync_choices: List of BoxPart specifying what to sync. If None, all parts are synced.
+        poll_interval: If given, poll for changes every `poll_interval` seconds instead of
+            using inotify. Polling is also used if inotify is not available.
+        verbose: Print verbose output.
+        on_push_finished: Called with the index name of the box and the result of `sync_box`
+            (or the exception it raised) after every push.
+    """
+    from boxyard.cmds import sync_box
+    
+    config = get_config(config_path)
+    boxyard_meta = get_boxyard_meta(config)
+    
+    if box_index_names is None:
+        box_metas = [bm for bm in boxyard_meta.box_metas if bm.check_included(config)]
+    else:
+        for _box_index_name in box_index_names:
+            if _box_index_name not in boxyard_meta.by_index_name:
+                raise ValueError(f"Box '{_box_index_name}' not found.")
+        box_metas = [boxyard_meta.by_index_name[name] for name in box_index_names]
+    
+    # Boxes in local storage locations are never synced
+    box_metas = [
+        bm for bm in box_metas
+        if bm.get_storage_location_config(config).storage_type != StorageType.LOCAL
+    ]
+    box_storage_locations = {bm.index_name: bm.storage_location for bm in box_metas}
+    
+    if soft_interruption_enabled:
+        enable_soft_interruption()
+    debouncer = ChangeDebouncer(quiet_period=quiet_period, min_interval=min_push_interval)
+    wakeup = asyncio.Event()
+    
+    def _on_change(changed_box_index_name: str) -> None:
+        if not boxyard_meta.by_index_name[changed_box_index_name].check_included(config):
+            watcher.remove(changed_box_index_name)
+            debouncer.discard(changed_box_index_name)
+            if verbose:
+                print(f"Box '{changed_box_index_name}' was removed. No longer watching it.")
+            return
+        debouncer.record_change(
+            changed_box_index_name,
+            box_storage_locations[changed_box_index_name],
+            time.monotonic(),
+        )
+        wakeup.set()
+    
+    def _add_watches(watcher) -> None:
+        for bm in box_metas:
+            for watch_path in [bm.get_local_part_path(config, BoxPart.DATA), bm.get_local_path(config)]:
+                if watch_path.exists():
+                    watcher.add(bm.index_name, watch_path)
+    
+    watcher = None
+    if poll_interval is None:
+        try:
+            watcher = InotifyWatcher(_on_change)
+            _add_watches(watcher)
+        except OSError as e:
+            if watcher is not None:
+                watcher.close()
+                watcher = None
+            if verbose:
+                print(f"Could not watch with inotify ({e}). Polling for changes instead.")
+    if watcher is None:
+        watcher = PollingWatcher(_on_change, poll_interval=poll_interval or DEFAULT_WATCH_POLL_INTERVAL)
+        _add_watches(watcher)
+    watcher.start()
+    
+    if verbose:
+        print(f"Watching {len(box_metas)} boxes for changes.")
+    async def _push(box_index_name: str) -> None:
+        try:
+            result = await sync_box(
+                config_path=config_path,
+                box_index_name=box_index_name,
+                sync_direction=SyncDirection.PUSH,
+                sync_setting=sync_setting,
+                sync_choices=sync_choices,
+                verbose=verbose,
+                soft_interruption_enabled=False,  # Already handled by the watch loop
+                defer_backup_purge=True,
+            )
+        except Exception as e:
+            result = e
+        finally:
+            debouncer.finish(box_index_name)
+            wakeup.set()
+        if on_push_finished is not None:
+            on_push_finished(box_index_name, result)
+    
+    push_tasks: set[asyncio.Task] = set()
+    # The backups of the pushes are purged in the background whenever no pushes are in flight
+    backup_purge_queue = BackupPurgeQueue(config.sync_backup_purge_queue_path)
+    purge_pending = False
+    purge_task: asyncio.Task | None = None
+    try:
+        while not check_interrupted():
+            for _storage_location, ready_box_index_names in debouncer.pop_ready(time.monotonic()).items():
+                if verbose:
+                    print(f"Pushing {len(ready_box_index_names)} changed boxes to '{_storage_location}'.")
+                for ready_box_index_name in ready_box_index_names:
+                    task = asyncio.create_task(_push(ready_box_index_name))
+                    push_tasks.add(task)
+                    task.add_done_callback(push_tasks.discard)
+    
+            if push_tasks:
+                purge_pending = True
+            elif purge_pending and (purge_task is None or purge_task.done()):
+                purge_pending = False
+                purge_task = asyncio.create_task(backup_purge_queue.drain(config.rclone_config_path))
+    
+            timeout = _INTERRUPT_CHECK_INTERVAL
+            next_ready_time = debouncer.get_next_ready_time()
+            if next_ready_time is not None:
+                timeout = min(timeout, max(0.0, next_ready_time - time.monotonic()))
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout)
+            except TimeoutError:
+                pass
+            wakeup.clear()
+    finally:
+        watcher.close()
+        if push_tasks:
+            await asyncio.gather(*push_tasks, return_exceptions=True)
+        if purge_task is not None:
+            await asyncio.gather(purge_task, return_exceptions=True)
+        if backup_purge_queue.has_entries():
+            await backup_purge_queue.drain(config.rclone_config_path)
@@ -0,0 +1,63 @@
+# AUTOGENERATED! DO NOT EDIT!
+
+import json
+import asyncio
+import subprocess
+import pytest
+
+from boxyard.cmds import new_box, sync_box
+from boxyard._models import get_boxyard_meta, BoxPart
+
+from ...integration.conftest import create_boxyards, run_cmd
+
+@pytest.mark.integration
+def test_yard_status():
+    """Test the output of `boxyard yard-status`."""
+    asyncio.run(_test_yard_status())
+
+async def _test_yard_status():
+    remote_name, remote_rclone_path, config, config_path, data_path = create_boxyards()
+    synced_box = new_box(config_path=config_path, box_name="synced", storage_location=remote_name)
+    unsynced_box = new_box(config_path=config_path, box_name="unsynced", storage_location=remote_name)
+    await sync_box(config_path=config_path, box_index_name=synced_box)
+    
+    
+    def yard_status(*args) -> str:
+        return run_cmd(f"boxyard --config {config_path} yard-status {' '.join(args)}")
+    lines = [json.loads(line) for line in yard_status("-o ndjson").splitlines()]
+    *box_lines, summary = lines
+    assert summary == {"type": "summary", "num_boxes": 2, "num_shown": 2, "num_errors": 0}
+    statuses = {line["box_index_name"]: line for line in box_lines}
+    assert set(statuses) == {synced_box, unsynced_box}
+    assert all(line["type"] == "box" and line["storage_location"] == remote_name for line in box_lines)
+    assert statuses[synced_box]["status"]["data"]["sync_condition"] == "synced"
+    assert statuses[unsynced_box]["status"]["data"]["sync_condition"] == "needs_push"
+    
+    # Every line has the same format as the statuses of `-o json`
+    json_output = json.loads(yard_status("-o json"))
+    assert json_output[remote_name][unsynced_box] == statuses[unsynced_box]["status"]
+    *box_lines, summary = [
+        json.loads(line) for line in yard_status("-o ndjson --only-changed").splitlines()
+    ]
+    assert [line["box_index_name"] for line in box_lines] == [unsynced_box]
+    assert summary == {"type": "summary", "num_boxes": 2, "num_shown": 1, "num_errors": 0}
+    
+    assert list(json.loads(yard_status("-o json --only-changed"))[remote_name]) == [unsynced_box]
+    
+    text_output = yard_status("--only-changed")
+    assert unsynced_box in text_output and synced_box not in text_output
+    box_meta = get_boxyard_meta(config).by_index_name[synced_box]
+    box_meta.get_local_sync_record_path(config, BoxPart.DATA).write_text("{not json")
+    
+    res = subprocess.run(
+        ["boxyard", "--config", config_path.as_posix(), "yard-status", "-o", "ndjson"],
+        capture_output=True,
+        text=True,
+    )
+    assert res.returncode == 1
+    *box_lines, summary = [json.loads(line) for line in res.stdout.splitlines()]
+    assert {line["box_index_name"]: line["type"] for line in box_lines} == {
+        synced_box: "error",
+        unsynced_box: "box",
+    }
+    assert summary == {"type": "summary", "num_boxes": 2, "num_shown": 2, "num_errors": 1}
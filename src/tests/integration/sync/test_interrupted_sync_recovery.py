@@ -1,8 +1,10 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: pts/tests/integration/sync/test_interrupted_sync_recovery.pct.py
 
-__all__ = ['test_both_incomplete_different_ulids_is_error', 'test_interrupted_pull_retry_same_machine', 'test_interrupted_push_blocked_from_other_machine', 'test_interrupted_push_retry_same_machine', 'test_push_creates_incomplete_on_both_sides']
+__all__ = ['test_both_incomplete_different_ulids_is_error', 'test_interrupted_pull_retry_same_machine', 'test_interrupted_push_blocked_from_other_machine', 'test_interrupted_push_retry_resumes_from_transfer_journal', 'test_interrupted_push_retry_same_machine', 'test_push_creates_incomplete_on_both_sides']
 
 # %% pts/tests/integration/sync/test_interrupted_sync_recovery.pct.py 2
+import os
+import time
 import pytest
 import asyncio
 from pathlib import Path
@@ -397,3 +399,96 @@ async def _test_push_creates_incomplete_on_both_sides():
 
     # ULIDs should match (proves they came from the same sync operation)
     assert local_record.ulid == remote_record.ulid
+
+
+# ============================================================================
+# Test: Retried push resumes from the transfer journal
+# ============================================================================
+
+# %% pts/tests/integration/sync/test_interrupted_sync_recovery.pct.py 8
+@pytest.mark.integration
+def test_interrupted_push_retry_resumes_from_transfer_journal():
+    """
+    Test that retrying an interrupted push continues the same sync session.
+
+    The files recorded in the transfer journal of the interrupted sync are skipped (also
+    when the box has include rules), the remaining files are pushed, and the journal is
+    discarded once the sync completes.
+    """
+    asyncio.run(_test_interrupted_push_retry_resumes_from_transfer_journal())
+
+
+async def _test_interrupted_push_retry_resumes_from_transfer_journal():
+    from boxyard._utils import rclone_path_exists, rclone_cat, rclone_write
+    from boxyard._utils.transfer_journal import TransferJournal
+
+    # Set up boxyard
+    sl_name, sl_rclone_path, config, config_path, data_path = create_boxyards()
+
+    # Create a box and sync it
+    box_index_name = new_box(
+        config_path=config_path,
+        box_name="test_box",
+        storage_location=sl_name,
+    )
+    boxyard_meta = get_boxyard_meta(config)
+    box_meta = boxyard_meta.by_index_name[box_index_name]
+    local_data_path = box_meta.get_local_part_path(config, BoxPart.DATA)
+    (local_data_path / "transferred.txt").write_text("already pushed")
+    _past = time.time() - 60
+    os.utime(local_data_path / "transferred.txt", (_past, _past))
+    # Include rules are applied by rclone before any other filters file
+    (box_meta.get_local_part_path(config, BoxPart.CONF) / ".rclone_include").write_text("**\n")
+    await sync_box(config_path=config_path, box_index_name=box_index_name)
+
+    # Simulate a push that was interrupted after transferring one of the files
+    (local_data_path / "pending.txt").write_text("not yet pushed")
+    incomplete_record = SyncRecord.create(sync_complete=False, syncer_hostname="test_host")
+
+    local_sync_record_path = box_meta.get_local_sync_record_path(config, BoxPart.DATA)
+    remote_sync_record_path = box_meta.get_remote_sync_record_path(config, BoxPart.DATA)
+    local_sync_record_path.write_text(incomplete_record.model_dump_json())
+    await incomplete_record.rclone_save(
+        config.rclone_config_path,
+        sl_name,
+        remote_sync_record_path.as_posix(),
+    )
+
+    journal = TransferJournal.open(
+        config.transfer_journals_path, str(incomplete_record.ulid), SyncDirection.PUSH
+    )
+    journal.record(
+        "transferred.txt",
+        len("already pushed"),
+        (local_data_path / "transferred.txt").stat().st_mtime_ns,
+    )
+    assert journal.get_resume_filter_rules(local_data_path) == ["- /transferred.txt"]
+
+    # Mark the remote copy of the transferred file, to detect if it is transferred again
+    remote_data_path = box_meta.get_remote_part_path(config, BoxPart.DATA)
+    remote_transferred_path = (remote_data_path / "transferred.txt").as_posix()
+    await rclone_write(config.rclone_config_path, sl_name, remote_transferred_path, "remote copy")
+
+    # Retry the sync
+    await sync_box(config_path=config_path, box_index_name=box_index_name)
+
+    # The remaining file was pushed, the transferred file was skipped, and the journal was
+    # discarded
+    _, content = await rclone_cat(config.rclone_config_path, sl_name, remote_transferred_path)
+    assert content == "remote copy"
+    for name in ["transferred.txt", "pending.txt"]:
+        exists, _ = await rclone_path_exists(
+            config.rclone_config_path, sl_name, (remote_data_path / name).as_posix()
+        )
+        assert exists
+    assert not journal.path.exists()
+
+    sync_status = await get_sync_status(
+        rclone_config_path=config.rclone_config_path,
+        local_path=local_data_path,
+        local_sync_record_path=local_sync_record_path,
+        remote=sl_name,
+        remote_path=remote_data_path,
+        remote_sync_record_path=remote_sync_record_path,
+    )
+    assert sync_status.sync_condition == SyncCondition.SYNCED
@@ -1,6 +1,6 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: pts/tests/unit/_cli/test_cli_helpers.pct.py
 
-__all__ = ['TestBoxPathInference', 'TestGetFilteredBoxMetas', 'TestIsSubsequenceMatch', 'TestNameMatchMode', 'TestTimestampParsing']
+__all__ = ['TestBoxPathInference', 'TestGetFilteredBoxMetas', 'TestIsSubsequenceMatch', 'TestNameMatchMode', 'TestTimestampParsing', 'TestYardStatusHelpers']
 
 # %% pts/tests/unit/_cli/test_cli_helpers.pct.py 2
 import pytest
@@ -477,3 +477,48 @@ class TestBoxPathInference:
 
         result = get_box_index_name_from_sub_path(mock_config, deep_dir)
         assert result == "20251116_123456_abc12__mybox"
+
+
+# ============================================================================
+# Tests for yard-status helpers
+# ============================================================================
+
+# %% pts/tests/unit/_cli/test_cli_helpers.pct.py 9
+from boxyard._cli.main import _is_box_sync_status_changed, _format_box_sync_status
+from boxyard._models import SyncCondition, SyncStatus, BoxPart
+
+
+def _sync_status(**conditions: SyncCondition) -> dict:
+    return {
+        BoxPart(part): SyncStatus(
+            sync_condition=condition,
+            local_path_exists=True,
+            remote_path_exists=True,
+            local_sync_record=None,
+            remote_sync_record=None,
+            is_dir=part == "data",
+        )
+        for part, condition in conditions.items()
+    }
+
+
+class TestYardStatusHelpers:
+    """Tests for the helpers of the yard-status command."""
+
+    def test_synced_and_excluded_are_unchanged(self):
+        """A box whose parts are all synced or excluded is unchanged."""
+        sync_status = _sync_status(data=SyncCondition.SYNCED, meta=SyncCondition.EXCLUDED)
+        assert not _is_box_sync_status_changed(sync_status)
+
+    def test_any_out_of_sync_part_is_changed(self):
+        """A box with any part that is not in sync is changed."""
+        sync_status = _sync_status(data=SyncCondition.SYNCED, meta=SyncCondition.NEEDS_PULL)
+        assert _is_box_sync_status_changed(sync_status)
+
+    def test_format_is_json_serialisable(self):
+        """The formatted status uses plain values keyed by part name."""
+        import json
+
+        formatted = _format_box_sync_status(_sync_status(data=SyncCondition.NEEDS_PUSH))
+        assert formatted["data"]["sync_condition"] == "needs_push"
+        assert json.loads(json.dumps(formatted)) == formatted
@@ -0,0 +1,173 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: pts/tests/unit/_cli/test_path_tui.pct.py
+
+__all__ = ['TestBoxPathSelector', 'TestBoxTreeModel', 'box_metas']
+
+# %% pts/tests/unit/_cli/test_path_tui.pct.py 2
+import asyncio
+import pytest
+
+from boxyard._cli.path_tui import BoxPathSelector, BoxTreeModel
+from boxyard._models import BoxMeta
+
+
+def _make_box_meta(subid: str, name: str, groups=(), parents=()) -> BoxMeta:
+    return BoxMeta(
+        creation_timestamp_utc="20251122_143022",
+        box_subid=subid,
+        name=name,
+        storage_location="default",
+        creator_hostname="host",
+        groups=list(groups),
+        parents=list(parents),
+    )
+
+
+@pytest.fixture
+def box_metas():
+    """alpha -> beta -> gamma, and delta on its own."""
+    alpha = _make_box_meta("aaaaa", "alpha", groups=["work"])
+    beta = _make_box_meta("bbbbb", "beta", groups=["work", "play"], parents=[alpha.box_id])
+    gamma = _make_box_meta("ccccc", "gamma", parents=[beta.box_id])
+    delta = _make_box_meta("ddddd", "delta")
+    return [alpha, beta, gamma, delta]
+
+
+def _get_labels(node, depth=0) -> list[str]:
+    """The labels of the nodes under `node` that are shown, indented by depth."""
+    labels = []
+    for child in node.children:
+        labels.append("  " * depth + str(child.label))
+        if child.is_expanded:
+            labels.extend(_get_labels(child, depth + 1))
+    return labels
+
+
+# ============================================================================
+# Tests for BoxTreeModel
+# ============================================================================
+
+# %% pts/tests/unit/_cli/test_path_tui.pct.py 3
+class TestBoxTreeModel:
+    """Tests for the prebuilt tree model."""
+
+    def test_groups(self, box_metas):
+        model = BoxTreeModel(box_metas, mode="groups")
+        assert model.get_children(None) == [("group", "play"), ("group", "work"), ("group", None)]
+        assert model.get_children(("group", "work")) == [("box", 0), ("box", 1)]
+        assert model.get_children(("group", None)) == [("box", 3), ("box", 2)]
+
+    def test_tree(self, box_metas):
+        model = BoxTreeModel(box_metas, mode="tree")
+        assert model.get_children(None) == [("box", 0), ("box", 3)]
+        assert model.get_children(("box", 1)) == [("box", 2)]
+        assert model.has_children(("box", 0)) and not model.has_children(("box", 2))
+
+    def test_visible_groups(self, box_metas):
+        model = BoxTreeModel(box_metas, mode="groups")
+        visible = model.get_visible([1])
+        assert model.get_children(None, visible) == [("group", "play"), ("group", "work")]
+        assert model.get_children(("group", "work"), visible) == [("box", 1)]
+
+    def test_visible_tree_includes_ancestors(self, box_metas):
+        model = BoxTreeModel(box_metas, mode="tree")
+        visible = model.get_visible([2])
+        assert model.get_children(None, visible) == [("box", 0)]
+        assert model.get_children(("box", 0), visible) == [("box", 1)]
+        assert not model.has_children(("box", 3), visible)
+
+    def test_cycle(self):
+        a = _make_box_meta("aaaaa", "a", parents=["20251122_143022_bbbbb"])
+        b = _make_box_meta("bbbbb", "b", parents=[a.box_id])
+        model = BoxTreeModel([a, b], mode="tree")
+        assert model.get_children(None) == []
+        assert model.get_visible([0]) == {("box", 0), ("box", 1)}
+
+
+# ============================================================================
+# Tests for the app
+# ============================================================================
+
+# %% pts/tests/unit/_cli/test_path_tui.pct.py 4
+async def _filter_tree(app, pilot, text: str) -> None:
+    app.query_one("#filter-input").value = text
+    await pilot.pause(0.3)
+    await app.workers.wait_for_complete()
+    await pilot.pause()
+
+
+class TestBoxPathSelector:
+    """Tests for the tree shown by the running app."""
+
+    def test_initial_tree(self, box_metas):
+        async def _run():
+            app = BoxPathSelector(box_metas, config=None, mode="tree")
+            async with app.run_test() as pilot:
+                from textual.widgets import Tree
+
+                assert _get_labels(app.query_one(Tree).root) == [
+                    "alpha (20251122_143022_aaaaa)",
+                    "  beta (20251122_143022_bbbbb)",
+                    "    gamma (20251122_143022_ccccc)",
+                    "delta (20251122_143022_ddddd)",
+                ]
+
+        asyncio.run(_run())
+
+    def test_filter_updates_nodes_in_place(self, box_metas):
+        async def _run():
+            app = BoxPathSelector(box_metas, config=None, mode="groups")
+            async with app.run_test() as pilot:
+                from textual.widgets import Tree
+
+                root = app.query_one(Tree).root
+                work_node = root.children[1]
+                await _filter_tree(app, pilot, "bet")
+                assert _get_labels(root) == [
+                    "play",
+                    "  beta (20251122_143022_bbbbb)",
+                    "work",
+                    "  beta (20251122_143022_bbbbb)",
+                ]
+                # The group node is kept, and only its children changed
+                assert root.children[1] is work_node
+
+                await _filter_tree(app, pilot, "")
+                assert len(_get_labels(root)) == 8
+                assert root.children[1] is work_node
+
+        asyncio.run(_run())
+
+    def test_filter_keeps_ancestors_in_tree_mode(self, box_metas):
+        async def _run():
+            app = BoxPathSelector(box_metas, config=None, mode="tree")
+            async with app.run_test() as pilot:
+                from textual.widgets import Tree
+
+                await _filter_tree(app, pilot, "gam")
+                assert _get_labels(app.query_one(Tree).root) == [
+                    "alpha (20251122_143022_aaaaa)",
+                    "  beta (20251122_143022_bbbbb)",
+                    "    gamma (20251122_143022_ccccc)",
+                ]
+
+        asyncio.run(_run())
+
+    def test_large_trees_are_filled_in_lazily(self, monkeypatch):
+        import boxyard._cli.path_tui as path_tui
+
+        monkeypatch.setattr(path_tui, "_AUTO_EXPAND_LIMIT", 2)
+        box_metas = [_make_box_meta(f"{i:05d}", f"box{i}", groups=["g"]) for i in range(5)]
+
+        async def _run():
+            app = BoxPathSelector(box_metas, config=None, mode="groups")
+            async with app.run_test() as pilot:
+                from textual.widgets import Tree
+
+                root = app.query_one(Tree).root
+                group_node = root.children[0]
+                assert group_node.allow_expand and not group_node.children
+                group_node.expand()
+                await pilot.pause()
+                assert len(group_node.children) == 5
+
+        asyncio.run(_run())
@@ -0,0 +1,154 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: pts/tests/unit/_utils/test_backup_purge_queue.pct.py
+
+__all__ = ['TestBackupPurgeQueue', 'TestSyncHelperBackups', 'queue', 'remote']
+
+# %% pts/tests/unit/_utils/test_backup_purge_queue.pct.py 2
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from boxyard._utils.backup_purge_queue import BackupPurgeQueue, PurgeQueueEntry
+from boxyard._utils.sync_helper import sync_helper, SyncSetting, SyncDirection
+
+
+@pytest.fixture
+def remote(tmp_path):
+    """A local-directory remote. Returns the rclone config path and the directory of the remote."""
+    remote_path = tmp_path / "my_remote"
+    remote_path.mkdir()
+    rclone_config_path = tmp_path / "rclone.conf"
+    rclone_config_path.write_text(f"[my_remote]\ntype = alias\nremote = {remote_path}\n")
+    return rclone_config_path.as_posix(), remote_path
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return BackupPurgeQueue(tmp_path / "data" / "purge_queue.jsonl")
+
+
+def _make_backup(root, name: str) -> None:
+    (root / name / "sub").mkdir(parents=True)
+    (root / name / "sub" / "file.txt").write_text("backup")
+
+
+# ============================================================================
+# Tests for BackupPurgeQueue
+# ============================================================================
+
+# %% pts/tests/unit/_utils/test_backup_purge_queue.pct.py 3
+class TestBackupPurgeQueue:
+    """Tests for adding to and draining the purge queue."""
+
+    def test_add_and_get_entries(self, queue):
+        assert not queue.has_entries()
+        queue.add("my_remote", "store/sync_backups", "01AAA")
+        queue.add("", "/data/sync_backups", "01BBB")
+        assert queue.has_entries()
+        assert queue.get_entries() == [
+            PurgeQueueEntry("my_remote", "store/sync_backups", "01AAA"),
+            PurgeQueueEntry("", "/data/sync_backups", "01BBB"),
+        ]
+
+    def test_torn_lines_are_skipped(self, queue):
+        queue.add("my_remote", "sync_backups", "01AAA")
+        with queue.path.open("a") as f:
+            f.write('{"remote": "my_rem')
+        assert queue.get_entries() == [PurgeQueueEntry("my_remote", "sync_backups", "01AAA")]
+
+    def test_drain_purges_only_queued_backups(self, queue, remote, tmp_path):
+        rclone_config_path, remote_path = remote
+        local_backups_path = tmp_path / "local_backups"
+        for name in ["a", "b", "kept"]:
+            _make_backup(remote_path / "sync_backups", name)
+        _make_backup(local_backups_path, "c")
+
+        queue.add("my_remote", "sync_backups", "a")
+        queue.add("my_remote", "sync_backups", "b")
+        queue.add("", local_backups_path, "c")
+        assert asyncio.run(queue.drain(rclone_config_path)) == 3
+        assert [p.name for p in (remote_path / "sync_backups").iterdir()] == ["kept"]
+        assert list(local_backups_path.iterdir()) == []
+        assert not queue.has_entries()
+
+    def test_drain_deletes_once_per_backups_root(self, queue):
+        for name in ["a", "b", "a"]:
+            queue.add("my_remote", "sync_backups", name)
+        queue.add("other_remote", "sync_backups", "c")
+
+        with patch("boxyard._utils.rclone_purge_dirs", new=AsyncMock(return_value=True)) as mock_purge:
+            assert asyncio.run(queue.drain("rclone.conf")) == 3
+        assert sorted(
+            (call.kwargs["source"], call.kwargs["dir_names"]) for call in mock_purge.call_args_list
+        ) == [("my_remote", ["a", "b"]), ("other_remote", ["c"])]
+
+    def test_failed_purges_are_requeued(self, queue):
+        queue.add("my_remote", "sync_backups", "a")
+        queue.add("other_remote", "sync_backups", "b")
+
+        async def _purge(source, **kwargs):
+            return source == "my_remote"
+
+        with patch("boxyard._utils.rclone_purge_dirs", new=AsyncMock(side_effect=_purge)):
+            assert asyncio.run(queue.drain("rclone.conf")) == 1
+        assert queue.get_entries() == [PurgeQueueEntry("other_remote", "sync_backups", "b")]
+        assert not queue.draining_path.exists()
+
+
+    def test_entries_of_a_crashed_drain_are_picked_up(self, queue):
+        queue.add("my_remote", "sync_backups", "a")
+
+        with patch("boxyard._utils.rclone_purge_dirs", new=AsyncMock(side_effect=RuntimeError)):
+            with pytest.raises(RuntimeError):
+                asyncio.run(queue.drain("rclone.conf"))
+        assert queue.get_entries() == []
+        assert queue.has_entries()
+
+        with queue.draining_path.open("a") as f:
+            f.write('{"remote": "my_rem')
+        queue.add("my_remote", "sync_backups", "b")
+        with patch("boxyard._utils.rclone_purge_dirs", new=AsyncMock(return_value=True)) as mock_purge:
+            assert asyncio.run(queue.drain("rclone.conf")) == 2
+        assert mock_purge.call_args.kwargs["dir_names"] == ["a", "b"]
+        assert not queue.draining_path.exists()
+        assert not queue.has_entries()
+
+# ============================================================================
+# Tests for the backups of sync_helper
+# ============================================================================
+
+# %% pts/tests/unit/_utils/test_backup_purge_queue.pct.py 4
+class TestSyncHelperBackups:
+    """Tests for the backups created and queued by `sync_helper`."""
+
+    def _push(self, remote, tmp_path, backup_purge_queue):
+        rclone_config_path, _ = remote
+        return sync_helper(
+            rclone_config_path=rclone_config_path,
+            sync_direction=SyncDirection.PUSH,
+            sync_setting=SyncSetting.REPLACE,
+            local_path=tmp_path / "local",
+            local_sync_record_path=tmp_path / "local.rec",
+            remote="my_remote",
+            remote_path="data",
+            remote_sync_record_path="data.rec",
+            local_sync_backups_path=tmp_path / "local_backups",
+            remote_sync_backups_path="sync_backups",
+            backup_purge_queue=backup_purge_queue,
+        )
+
+    def test_backups_are_queued_and_created_lazily(self, remote, tmp_path, queue):
+        rclone_config_path, remote_path = remote
+        (tmp_path / "local").mkdir()
+        (tmp_path / "local" / "file.txt").write_text("v1")
+
+        asyncio.run(self._push(remote, tmp_path, queue))
+        # Nothing was replaced, so no backup dir was created
+        assert not (remote_path / "sync_backups").exists()
+
+        (tmp_path / "local" / "file.txt").write_text("v2")
+        asyncio.run(self._push(remote, tmp_path, queue))
+        [entry] = queue.get_entries()[1:]
+        assert (remote_path / "sync_backups" / entry.backup_name / "file.txt").read_text() == "v1"
+
+        asyncio.run(queue.drain(rclone_config_path))
+        assert list((remote_path / "sync_backups").iterdir()) == []
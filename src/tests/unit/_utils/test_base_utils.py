@@ -1,6 +1,6 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: pts/tests/unit/_utils/test_base_utils.pct.py
 
-__all__ = ['TestAsyncThrottler', 'TestCheckLastTimeModified', 'TestCountFilesInDir', 'TestGetBoxIndexNameFromSubPath', 'TestGetHostname', 'TestIsInEventLoop', 'TestRunCmdAsync', 'TestSoftInterruption', 'TestSoftInterruptionHandling']
+__all__ = ['TestAsyncThrottler', 'TestCheckLastTimeModified', 'TestCountFilesInDir', 'TestGetBoxIndexNameFromSubPath', 'TestGetDirStats', 'TestGetHostname', 'TestIsInEventLoop', 'TestLoadFileCached', 'TestRunCmdAsync', 'TestSoftInterruption', 'TestSoftInterruptionHandling']
 
 # %% pts/tests/unit/_utils/test_base_utils.pct.py 2
 import pytest
@@ -79,6 +79,32 @@ class TestGetBoxIndexNameFromSubPath:
 
         assert result == "20240101_120000_abcde__mybox"
 
+    def test_defaults_to_cwd(self, mock_config, monkeypatch):
+        """Uses the current working directory if no path is given."""
+        sub_path = mock_config.user_boxes_path / "20240101_120000_abcde__mybox" / "src"
+        sub_path.mkdir(parents=True)
+        monkeypatch.chdir(sub_path)
+
+        result = get_box_index_name_from_sub_path(mock_config)
+
+        assert result == "20240101_120000_abcde__mybox"
+
+    def test_symlinked_boxes_path(self, tmp_path, monkeypatch):
+        """Works when user_boxes_path is a symlink to the real boxes folder."""
+        real_boxes_path = tmp_path / "real_boxes"
+        box_path = real_boxes_path / "20240101_120000_abcde__mybox"
+        box_path.mkdir(parents=True)
+        config = MagicMock()
+        config.user_boxes_path = tmp_path / "boxes"
+        config.user_boxes_path.symlink_to(real_boxes_path)
+
+        assert get_box_index_name_from_sub_path(config, str(box_path)) == box_path.name
+        assert get_box_index_name_from_sub_path(
+            config, str(config.user_boxes_path / box_path.name)
+        ) == box_path.name
+        monkeypatch.chdir(config.user_boxes_path / box_path.name)
+        assert get_box_index_name_from_sub_path(config) == box_path.name
+
 
 # ============================================================================
 # Tests for get_hostname
@@ -213,10 +239,48 @@ class TestCheckLastTimeModified:
 
 
 # ============================================================================
-# Tests for run_cmd_async
+# Tests for get_dir_stats
 # ============================================================================
 
 # %% pts/tests/unit/_utils/test_base_utils.pct.py 6
+from boxyard._utils import get_dir_stats
+
+
+class TestGetDirStats:
+    """Tests for get_dir_stats function."""
+
+    def test_nested_directory(self, tmp_path):
+        """Counts the sizes and files of the whole tree."""
+        (tmp_path / "a.txt").write_text("12345")
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "b.txt").write_text("123")
+
+        result = get_dir_stats(tmp_path)
+
+        assert result.size == 8
+        assert result.num_files == 2
+        assert result.last_modified == max(
+            (tmp_path / "a.txt").stat().st_mtime, (tmp_path / "sub" / "b.txt").stat().st_mtime
+        )
+
+    def test_empty_directory(self, tmp_path):
+        """An empty directory has no size and no last modification."""
+        result = get_dir_stats(tmp_path)
+
+        assert result == (0, 0, None)
+
+    def test_nonexistent_path(self, tmp_path):
+        """A nonexistent path is treated as empty."""
+        result = get_dir_stats(tmp_path / "nonexistent")
+
+        assert result.num_files == 0
+
+
+# ============================================================================
+# Tests for run_cmd_async
+# ============================================================================
+
+# %% pts/tests/unit/_utils/test_base_utils.pct.py 7
 from boxyard._utils import run_cmd_async
 
 
@@ -266,12 +330,27 @@ class TestRunCmdAsync:
 
         asyncio.run(_test())
 
+    def test_stderr_line_callback(self):
+        """Streams stderr lines to the callback and still returns the full output."""
+        async def _test():
+            lines = []
+            returncode, stdout, stderr = await run_cmd_async(
+                ["python", "-c", "import sys; print('out'); sys.stderr.write('a\\nb\\n')"],
+                stderr_line_callback=lines.append,
+            )
+            assert returncode == 0
+            assert lines == ["a", "b"]
+            assert stderr == "a\nb\n"
+            assert "out" in stdout
+
+        asyncio.run(_test())
+
 
 # ============================================================================
 # Tests for async_throttler
 # ============================================================================
 
-# %% pts/tests/unit/_utils/test_base_utils.pct.py 7
+# %% pts/tests/unit/_utils/test_base_utils.pct.py 8
 from boxyard._utils import async_throttler
 
 
@@ -350,7 +429,7 @@ class TestAsyncThrottler:
 # Tests for is_in_event_loop
 # ============================================================================
 
-# %% pts/tests/unit/_utils/test_base_utils.pct.py 8
+# %% pts/tests/unit/_utils/test_base_utils.pct.py 9
 from boxyard._utils import is_in_event_loop
 
 
@@ -377,7 +456,7 @@ class TestIsInEventLoop:
 # Tests for count_files_in_dir
 # ============================================================================
 
-# %% pts/tests/unit/_utils/test_base_utils.pct.py 9
+# %% pts/tests/unit/_utils/test_base_utils.pct.py 10
 from boxyard._utils import count_files_in_dir
 
 
@@ -430,7 +509,7 @@ class TestCountFilesInDir:
 # Tests for SoftInterruption
 # ============================================================================
 
-# %% pts/tests/unit/_utils/test_base_utils.pct.py 10
+# %% pts/tests/unit/_utils/test_base_utils.pct.py 11
 from boxyard._utils import SoftInterruption
 
 
@@ -456,7 +535,7 @@ class TestSoftInterruption:
 # Tests for enable_soft_interruption and check_interrupted
 # ============================================================================
 
-# %% pts/tests/unit/_utils/test_base_utils.pct.py 11
+# %% pts/tests/unit/_utils/test_base_utils.pct.py 12
 from boxyard._utils import enable_soft_interruption, check_interrupted
 import boxyard._utils.base as base_module
 
@@ -484,3 +563,62 @@ class TestSoftInterruptionHandling:
 
         # Cleanup
         base_module._interrupted = False
+
+
+# ============================================================================
+# Tests for load_file_cached
+# ============================================================================
+
+# %% pts/tests/unit/_utils/test_base_utils.pct.py 13
+from boxyard._utils import load_file_cached
+
+
+class TestLoadFileCached:
+    """Tests for the mtime-validated file cache."""
+
+    @pytest.fixture
+    def file_cache(self, monkeypatch):
+        monkeypatch.setattr(base_module, "_file_cache", {})
+
+    @staticmethod
+    def _make_loader():
+        calls = []
+
+        def loader(path):
+            calls.append(path)
+            return path.read_text()
+
+        return loader, calls
+
+    def test_disabled_by_default(self, tmp_path, monkeypatch):
+        """Without the cache enabled, the loader is called every time."""
+        monkeypatch.setattr(base_module, "_file_cache", None)
+        path = tmp_path / "file.txt"
+        path.write_text("a")
+        loader, calls = self._make_loader()
+
+        load_file_cached(path, loader)
+        load_file_cached(path, loader)
+
+        assert len(calls) == 2
+
+    def test_reuses_unchanged_file(self, tmp_path, file_cache):
+        path = tmp_path / "file.txt"
+        path.write_text("a")
+        loader, calls = self._make_loader()
+
+        assert load_file_cached(path, loader) == "a"
+        assert load_file_cached(path, loader) == "a"
+        assert len(calls) == 1
+
+    def test_reloads_changed_file(self, tmp_path, file_cache):
+        """A change of the size or modification time of the file invalidates the cache."""
+        path = tmp_path / "file.txt"
+        path.write_text("a")
+        loader, calls = self._make_loader()
+
+        load_file_cached(path, loader)
+        path.write_text("bb")
+
+        assert load_file_cached(path, loader) == "bb"
+        assert len(calls) == 2
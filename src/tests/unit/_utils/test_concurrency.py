@@ -0,0 +1,219 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: pts/tests/unit/_utils/test_concurrency.pct.py
+
+__all__ = ['TestAdaptiveLimiter', 'TestRunCmdAsyncWithLimiter', 'TestThrottlingDetection']
+
+# %% pts/tests/unit/_utils/test_concurrency.pct.py 2
+import asyncio
+import pytest
+
+from boxyard._utils.concurrency import (
+    AdaptiveLimiter,
+    OpOutcome,
+    current_limiter,
+    get_op_outcome,
+    is_throttling_error,
+)
+from boxyard._utils import run_cmd_async
+
+
+# ============================================================================
+# Tests for throttling detection
+# ============================================================================
+
+# %% pts/tests/unit/_utils/test_concurrency.pct.py 3
+class TestThrottlingDetection:
+    """Tests for is_throttling_error and get_op_outcome."""
+
+    @pytest.mark.parametrize(
+        "stderr",
+        [
+            "Failed to copy: HTTP error 429 (429 Too Many Requests)",
+            "SlowDown: Please reduce your request rate.",
+            "googleapi: Error 403: Rate Limit Exceeded, rateLimitExceeded",
+            "status code: 503, request id: abc",
+            "ssh: rejected: administratively prohibited (open failed)",
+        ],
+    )
+    def test_throttling_errors(self, stderr):
+        """Throttling errors of common backends are detected."""
+        assert is_throttling_error(stderr)
+
+    @pytest.mark.parametrize(
+        "stderr",
+        [
+            "",
+            "directory not found",
+            '{"level":"info","msg":"Copied (new)","object":"logs/503.txt"}',
+            '{"level":"info","msg":"Copied (new)","object":"slowdown/throttling.py"}',
+        ],
+    )
+    def test_non_throttling_output(self, stderr):
+        """Ordinary output and file names are not mistaken for throttling."""
+        assert not is_throttling_error(stderr)
+
+    def test_op_outcome(self):
+        """Throttling takes precedence over the return code."""
+        assert get_op_outcome(0, "") == OpOutcome.SUCCESS
+        assert get_op_outcome(1, "not found") == OpOutcome.FAILED
+        assert get_op_outcome(0, "HTTP error 429") == OpOutcome.THROTTLED
+        assert get_op_outcome(1, "HTTP error 429") == OpOutcome.THROTTLED
+
+
+# ============================================================================
+# Tests for AdaptiveLimiter
+# ============================================================================
+
+# %% pts/tests/unit/_utils/test_concurrency.pct.py 4
+class TestAdaptiveLimiter:
+    """Tests for the AdaptiveLimiter class."""
+
+    def test_initial_limit_is_clamped(self):
+        """The initial limit is clamped to the min and max limits."""
+        assert AdaptiveLimiter("sl", initial_limit=0).limit == 1
+        assert AdaptiveLimiter("sl", initial_limit=100, max_limit=8).limit == 8
+
+    def test_invalid_limits(self):
+        """Invalid min/max limits raise."""
+        with pytest.raises(ValueError):
+            AdaptiveLimiter("sl", initial_limit=1, min_limit=0)
+        with pytest.raises(ValueError):
+            AdaptiveLimiter("sl", initial_limit=1, min_limit=4, max_limit=2)
+
+    def test_slow_start_then_additive_increase(self):
+        """The limit grows by one per success until the first back-off, and by about one per round after."""
+        async def _test():
+            limiter = AdaptiveLimiter("sl", initial_limit=2, max_limit=10, backoff_cooldown=0)
+            for _ in range(2):
+                await limiter.acquire()
+                limiter.release(OpOutcome.SUCCESS)
+            assert limiter.limit == 4
+            await limiter.acquire()
+            limiter.release(OpOutcome.THROTTLED)
+            assert limiter.limit == 2
+            for _ in range(2):
+                await limiter.acquire()
+                limiter.release(OpOutcome.SUCCESS)
+            assert limiter.limit == 2  # 2 + 1/2 + 1/2.5
+            for _ in range(50):
+                await limiter.acquire()
+                limiter.release(OpOutcome.SUCCESS)
+            assert limiter.limit == 10  # Capped at max_limit
+
+        asyncio.run(_test())
+
+    def test_rising_latency_backs_off(self):
+        """The limit is halved once the median duration rises above twice its minimum."""
+        async def _test():
+            limiter = AdaptiveLimiter("sl", initial_limit=8, max_limit=8, backoff_cooldown=0, latency_window=4)
+            for duration in [1.0, 1.2, 0.8, 1.0, 1.1, 0.9]:
+                await limiter.acquire()
+                limiter.release(OpOutcome.SUCCESS, duration)
+            assert limiter.limit == 8 and limiter.num_latency_backoffs == 0
+            for duration in [3.0, 3.0, 3.0]:
+                await limiter.acquire()
+                limiter.release(OpOutcome.SUCCESS, duration)
+            assert limiter.limit == 4 and limiter.num_latency_backoffs == 1
+            # The durations at the new limit are judged against a fresh baseline
+            for duration in [3.0, 3.0, 3.0]:
+                await limiter.acquire()
+                limiter.release(OpOutcome.SUCCESS, duration)
+            assert limiter.num_latency_backoffs == 1
+            for duration in [7.0, 7.0, 7.0]:
+                await limiter.acquire()
+                limiter.release(OpOutcome.SUCCESS, duration)
+            assert limiter.limit == 2 and limiter.num_latency_backoffs == 2
+
+        asyncio.run(_test())
+
+    def test_multiplicative_decrease_with_cooldown(self):
+        """Throttling halves the limit, at most once per cooldown window."""
+        async def _test():
+            limiter = AdaptiveLimiter("sl", initial_limit=8, backoff_cooldown=60)
+            for _ in range(3):
+                await limiter.acquire()
+                limiter.release(OpOutcome.THROTTLED)
+            assert limiter.limit == 4
+            assert limiter.num_throttled == 3
+
+            limiter = AdaptiveLimiter("sl", initial_limit=8, backoff_cooldown=0)
+            for _ in range(5):
+                await limiter.acquire()
+                limiter.release(OpOutcome.THROTTLED)
+            assert limiter.limit == 1  # Never below min_limit
+
+        asyncio.run(_test())
+
+    def test_failures_do_not_change_limit(self):
+        """Non-throttling failures and cancellations leave the limit unchanged."""
+        async def _test():
+            limiter = AdaptiveLimiter("sl", initial_limit=4)
+            for outcome in [OpOutcome.FAILED, OpOutcome.CANCELLED]:
+                await limiter.acquire()
+                limiter.release(outcome)
+            assert limiter.limit == 4
+            assert limiter.in_flight == 0
+
+        asyncio.run(_test())
+
+    def test_limits_in_flight(self):
+        """No more than `limit` operations are in flight at once."""
+        async def _test():
+            limiter = AdaptiveLimiter("sl", initial_limit=3, max_limit=3)
+            max_in_flight = 0
+
+            async def _op():
+                nonlocal max_in_flight
+                await limiter.acquire()
+                max_in_flight = max(max_in_flight, limiter.in_flight)
+                await asyncio.sleep(0.01)
+                limiter.release(OpOutcome.SUCCESS)
+
+            await asyncio.gather(*[_op() for _ in range(12)])
+            assert max_in_flight == 3
+            assert limiter.in_flight == 0
+
+        asyncio.run(_test())
+
+    def test_cancelled_waiter_does_not_leak_slot(self):
+        """Cancelling a waiting acquire does not take or lose a slot."""
+        async def _test():
+            limiter = AdaptiveLimiter("sl", initial_limit=1, max_limit=1)
+            await limiter.acquire()
+            waiter = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            limiter.release(OpOutcome.SUCCESS)
+            await asyncio.wait_for(limiter.acquire(), timeout=1)
+            assert limiter.in_flight == 1
+
+        asyncio.run(_test())
+
+
+# ============================================================================
+# Tests for run_cmd_async with a limiter
+# ============================================================================
+
+# %% pts/tests/unit/_utils/test_concurrency.pct.py 5
+class TestRunCmdAsyncWithLimiter:
+    """Tests for run_cmd_async under the current limiter."""
+
+    def test_reports_outcome_to_current_limiter(self):
+        """Commands run under the current limiter and report their outcome."""
+        async def _test():
+            limiter = AdaptiveLimiter("sl", initial_limit=4, backoff_cooldown=0)
+            token = current_limiter.set(limiter)
+            try:
+                await run_cmd_async(
+                    ["python", "-c", "import sys; sys.stderr.write('HTTP error 429')"]
+                )
+                assert limiter.limit == 2
+                assert limiter.num_throttled == 1
+                await run_cmd_async(["python", "-c", "print('ok')"])
+                assert limiter._limit == 2.5
+                assert limiter.in_flight == 0
+            finally:
+                current_limiter.reset(token)
+
+        asyncio.run(_test())
@@ -0,0 +1,285 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: pts/tests/unit/_utils/test_locking.pct.py
+
+__all__ = ['TestAcquireLock', 'TestCleanupStaleLocks', 'TestLockRegistry', 'TestSharedLocks', 'lock_path']
+
+# %% pts/tests/unit/_utils/test_locking.pct.py 2
+import asyncio
+import threading
+import time
+import pytest
+from filelock import FileLock
+
+import boxyard._utils.locking as locking
+from boxyard._utils.locking import (
+    LockAcquisitionError,
+    acquire_lock,
+    acquire_lock_async,
+    get_lock_wait_stats,
+    reset_lock_wait_stats,
+)
+
+
+@pytest.fixture(autouse=True)
+def _reset_stats():
+    reset_lock_wait_stats()
+    yield
+    reset_lock_wait_stats()
+
+
+@pytest.fixture
+def lock_path(tmp_path):
+    return tmp_path / "test.lock"
+
+
+def _hold_lock(lock_path, duration: float) -> tuple[threading.Thread, list[float]]:
+    """Hold the lock in another thread for `duration` seconds. Returns the thread, and the time of release."""
+    acquired = threading.Event()
+    released_at = []
+
+    def _hold():
+        lock = FileLock(lock_path)
+        lock.acquire()
+        acquired.set()
+        time.sleep(duration)
+        released_at.append(time.monotonic())
+        lock.release()
+
+    thread = threading.Thread(target=_hold)
+    thread.start()
+    acquired.wait()
+    return thread, released_at
+
+
+# ============================================================================
+# Tests for acquire_lock and acquire_lock_async
+# ============================================================================
+
+# %% pts/tests/unit/_utils/test_locking.pct.py 3
+class TestAcquireLock:
+    """Tests for acquiring locks that are held by someone else."""
+
+    def test_uncontended(self, lock_path):
+        lock = FileLock(lock_path)
+        acquire_lock(lock, "test", lock_path, timeout=1)
+        assert lock.is_locked
+        lock.release()
+        stats = get_lock_wait_stats()["test"]
+        assert stats.num_acquisitions == 1 and stats.num_contended == 0
+
+    def test_waits_for_release(self, lock_path):
+        thread, released_at = _hold_lock(lock_path, 0.3)
+        lock = FileLock(lock_path)
+        acquire_lock(lock, "test", lock_path, timeout=5)
+        acquired_at = time.monotonic()
+        lock.release()
+        thread.join()
+        assert acquired_at - released_at[0] < 0.05
+        stats = get_lock_wait_stats()["test"]
+        assert stats.num_contended == 1 and stats.max_wait >= 0.2
+
+    def test_async_handoff(self, lock_path):
+        async def _run():
+            thread, released_at = _hold_lock(lock_path, 0.3)
+            lock = FileLock(lock_path)
+            await acquire_lock_async(lock, "test", lock_path, timeout=5)
+            acquired_at = time.monotonic()
+            lock.release()
+            thread.join()
+            return acquired_at - released_at[0]
+
+        assert asyncio.run(_run()) < 0.05
+
+    def test_timeout(self, lock_path):
+        thread, _ = _hold_lock(lock_path, 0.5)
+        with pytest.raises(LockAcquisitionError, match="within 0.1s"):
+            asyncio.run(acquire_lock_async(FileLock(lock_path), "test", lock_path, timeout=0.1))
+        thread.join()
+        assert get_lock_wait_stats()["test"].num_timeouts == 1
+
+    def test_watcher_threads_exit_after_timeout(self, lock_path):
+        """Timing out does not wait for the watcher thread, which exits once the lock is free."""
+        def _watcher_threads():
+            return [t for t in threading.enumerate() if t.name.startswith("lock-watcher:")]
+
+        thread, _ = _hold_lock(lock_path, 0.5)
+        start = time.monotonic()
+        with pytest.raises(LockAcquisitionError):
+            acquire_lock(FileLock(lock_path), "test", lock_path, timeout=0.1)
+        with pytest.raises(LockAcquisitionError):
+            asyncio.run(acquire_lock_async(FileLock(lock_path), "test", lock_path, timeout=0.1))
+        assert time.monotonic() - start < 0.4
+        thread.join()
+        # The cancelled watchers do not keep the lock once they get it
+        lock = FileLock(lock_path)
+        acquire_lock(lock, "test", lock_path, timeout=1)
+        lock.release()
+        deadline = time.monotonic() + 1
+        while _watcher_threads() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert _watcher_threads() == []
+
+    def test_cancellation_does_not_acquire(self, lock_path):
+        async def _run():
+            thread, _ = _hold_lock(lock_path, 0.3)
+            lock = FileLock(lock_path)
+            task = asyncio.create_task(acquire_lock_async(lock, "test", lock_path, timeout=5))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            assert not lock.is_locked
+            await asyncio.to_thread(thread.join)
+            # The lock is free for the next waiter
+            other_lock = FileLock(lock_path)
+            await acquire_lock_async(other_lock, "test", lock_path, timeout=0.5)
+            other_lock.release()
+
+        asyncio.run(_run())
+
+    def test_polls_without_fcntl(self, lock_path, monkeypatch):
+        monkeypatch.setattr(locking, "fcntl", None)
+        thread, _ = _hold_lock(lock_path, 0.2)
+        lock = FileLock(lock_path)
+        asyncio.run(acquire_lock_async(lock, "test", lock_path, timeout=5))
+        lock.release()
+        thread.join()
+        assert get_lock_wait_stats()["test"].num_contended == 1
+
+
+# ============================================================================
+# Tests for shared locks
+# ============================================================================
+
+# %% pts/tests/unit/_utils/test_locking.pct.py 4
+class TestSharedLocks:
+    """Tests for taking the global lock shared or exclusive."""
+
+    def test_shared_locks_coexist(self, tmp_path):
+        lock_manager = locking.BoxyardLockManager(tmp_path)
+        with lock_manager.global_lock(shared=True):
+            with lock_manager.global_lock(shared=True, timeout=0.1):
+                pass
+
+    def test_exclusive_waits_for_shared(self, tmp_path):
+        lock_manager = locking.BoxyardLockManager(tmp_path)
+        with lock_manager.global_lock(shared=True):
+            with pytest.raises(LockAcquisitionError):
+                with lock_manager.global_lock(timeout=0.1):
+                    pass
+        with lock_manager.global_lock(timeout=0.1):
+            pass
+
+    def test_shared_waits_for_exclusive(self, tmp_path):
+        lock_manager = locking.BoxyardLockManager(tmp_path)
+        lock_manager._ensure_lock_dir(lock_manager.global_lock_path)
+        thread, released_at = _hold_lock(lock_manager.global_lock_path, 0.3)
+
+        async def _run():
+            async with locking.async_global_lock(lock_manager, timeout=5, shared=True):
+                return time.monotonic()
+
+        acquired_at = asyncio.run(_run())
+        thread.join()
+        assert acquired_at - released_at[0] < 0.05
+        assert get_lock_wait_stats()["shared global"].num_contended == 1
+
+
+# ============================================================================
+# Tests for the lock registry
+# ============================================================================
+
+# %% pts/tests/unit/_utils/test_locking.pct.py 5
+class TestLockRegistry:
+    """Tests for recording lock holders, and for removing box lock files."""
+
+    def test_holders_are_recorded_while_held(self, tmp_path):
+        import os
+
+        lock_manager = locking.BoxyardLockManager(tmp_path)
+        lock_path = lock_manager.box_sync_lock_path("box")
+        with lock_manager.box_sync_lock("box"):
+            holders = list(lock_manager.registry.get_holders(lock_path).values())
+            assert [(h.pid, h.lock_type) for h in holders] == [(os.getpid(), "box sync (box)")]
+        assert lock_manager.registry.get_holders() == {}
+
+    def test_box_lock_files_are_removed_on_release(self, tmp_path):
+        lock_manager = locking.BoxyardLockManager(tmp_path)
+        with lock_manager.box_sync_lock("box"):
+            assert lock_manager.box_sync_lock_path("box").exists()
+        assert list(lock_manager.box_locks_path.iterdir()) == []
+
+    def test_waiter_gets_lock_after_file_is_removed(self, tmp_path):
+        lock_manager = locking.BoxyardLockManager(tmp_path)
+        holder = lock_manager.get_box_sync_lock("box")
+        holder.acquire()
+        threading.Timer(0.2, holder.release).start()
+
+        async def _run():
+            async with locking.async_box_sync_lock(lock_manager, "box", timeout=5):
+                assert lock_manager.box_sync_lock_path("box").exists()
+                # No one else can take the lock in the meantime
+                with pytest.raises(LockAcquisitionError):
+                    with lock_manager.box_sync_lock("box", timeout=0.1):
+                        pass
+
+        asyncio.run(_run())
+
+    def test_timeout_error_names_the_holder(self, tmp_path):
+        lock_manager = locking.BoxyardLockManager(tmp_path)
+        with lock_manager.global_lock():
+            thread_errors = []
+
+            def _wait():
+                try:
+                    with lock_manager.global_lock(timeout=0.1):
+                        pass
+                except LockAcquisitionError as e:
+                    thread_errors.append(str(e))
+
+            thread = threading.Thread(target=_wait)
+            thread.start()
+            thread.join()
+        import os
+        assert f"Held by PID {os.getpid()}" in thread_errors[0]
+
+
+# ============================================================================
+# Tests for cleanup_stale_locks
+# ============================================================================
+
+# %% pts/tests/unit/_utils/test_locking.pct.py 6
+class TestCleanupStaleLocks:
+    """Tests for removing the leftovers of crashed lock holders."""
+
+    def test_removes_entries_of_locks_that_are_not_held(self, tmp_path):
+        lock_manager = locking.BoxyardLockManager(tmp_path)
+        lock_path = lock_manager.box_sync_lock_path("crashed")
+        lock_manager._ensure_lock_dir(lock_path)
+        lock_path.touch()
+        lock_manager.registry.add(lock_path, "box sync (crashed)")
+
+        with lock_manager.box_sync_lock("running"):
+            assert locking.cleanup_stale_locks(tmp_path) == [lock_path]
+            assert [h.lock_type for h in lock_manager.registry.get_holders().values()] == ["box sync (running)"]
+            assert lock_manager.box_sync_lock_path("running").exists()
+
+    def test_removes_old_unregistered_lock_files(self, tmp_path):
+        import os
+
+        lock_manager = locking.BoxyardLockManager(tmp_path)
+        old_path = lock_manager.box_sync_lock_path("old")
+        new_path = lock_manager.box_sync_lock_path("new")
+        lock_manager._ensure_lock_dir(old_path)
+        old_path.touch()
+        new_path.touch()
+        os.utime(old_path, (time.time() - 7200, time.time() - 7200))
+        assert locking.cleanup_stale_locks(tmp_path, max_age_hours=1) == [old_path]
+        assert new_path.exists()
+
+    def test_removes_lock_folders_of_the_old_layout(self, tmp_path):
+        lock_manager = locking.BoxyardLockManager(tmp_path)
+        legacy_lock_path = lock_manager.box_locks_path / "box" / "sync.lock"
+        legacy_lock_path.parent.mkdir(parents=True)
+        legacy_lock_path.touch()
+        assert locking.cleanup_stale_locks(tmp_path) == [legacy_lock_path]
+        assert not legacy_lock_path.parent.exists()
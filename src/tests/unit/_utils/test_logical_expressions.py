@@ -1,10 +1,14 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: pts/tests/unit/_utils/test_logical_expressions.pct.py
 
-__all__ = ['test_and_both_missing', 'test_and_both_present', 'test_and_chained', 'test_and_left_missing', 'test_and_right_missing', 'test_case_sensitive_group_names', 'test_complex_expression_with_all_operators', 'test_complex_group_names', 'test_deeply_nested_parens', 'test_double_and_raises', 'test_double_not', 'test_double_or_raises', 'test_empty_expression_raises', 'test_empty_parens_raises', 'test_extra_spaces_between_tokens', 'test_filter_func_does_not_modify_input', 'test_filter_func_is_reusable', 'test_group_name_resembling_and', 'test_group_name_resembling_not', 'test_group_name_resembling_or', 'test_groups_not_in_expression', 'test_hyphenated_names', 'test_invalid_character_raises', 'test_leading_and_raises', 'test_leading_or_raises', 'test_leading_trailing_spaces', 'test_lowercase_and', 'test_lowercase_not', 'test_lowercase_or', 'test_mixed_case_operators', 'test_nested_parens', 'test_no_spaces_around_parens', 'test_not_empty_groups', 'test_not_group_absent', 'test_not_group_present', 'test_numeric_group_names', 'test_or_both_present', 'test_or_chained', 'test_or_left_only', 'test_or_neither_present', 'test_or_right_only', 'test_parens_override_precedence', 'test_parens_with_not', 'test_pipe_character_raises', 'test_precedence_and_binds_tighter_than_or', 'test_precedence_complex', 'test_precedence_not_binds_tighter_than_and', 'test_precedence_not_binds_tighter_than_or', 'test_scenario_backend_not_deprecated', 'test_scenario_complex_project_filter', 'test_scenario_hierarchical_groups', 'test_scenario_multiple_environments', 'test_simple_alphanumeric_names', 'test_single_char_names', 'test_single_group_empty_groups', 'test_single_group_match', 'test_single_group_no_match', 'test_single_group_with_set_input', 'test_slashed_names', 'test_spaces_around_parens', 'test_trailing_and_raises', 'test_trailing_or_raises', 'test_underscored_names', 'test_unmatched_close_paren_raises', 'test_unmatched_open_paren_raises', 'test_whitespace_only_expression_raises']
+__all__ = ['test_and_both_missing', 'test_and_both_present', 'test_and_chained', 'test_and_left_missing', 'test_and_right_missing', 'test_case_sensitive_group_names', 'test_compiled_expression_is_reused', 'test_complex_expression_with_all_operators', 'test_complex_group_names', 'test_deeply_nested_parens', 'test_double_and_raises', 'test_double_not', 'test_double_or_raises', 'test_empty_expression_raises', 'test_empty_parens_raises', 'test_extra_spaces_between_tokens', 'test_filter_func_does_not_modify_input', 'test_filter_func_is_reusable', 'test_group_bitsets', 'test_group_name_resembling_and', 'test_group_name_resembling_not', 'test_group_name_resembling_or', 'test_groups_not_in_expression', 'test_hyphenated_names', 'test_invalid_character_raises', 'test_invalid_expression_raises_when_compiled', 'test_leading_and_raises', 'test_leading_or_raises', 'test_leading_trailing_spaces', 'test_lowercase_and', 'test_lowercase_not', 'test_lowercase_or', 'test_mixed_case_operators', 'test_nested_parens', 'test_no_spaces_around_parens', 'test_not_empty_groups', 'test_not_group_absent', 'test_not_group_present', 'test_numeric_group_names', 'test_or_both_present', 'test_or_chained', 'test_or_left_only', 'test_or_neither_present', 'test_or_right_only', 'test_parens_override_precedence', 'test_parens_with_not', 'test_pipe_character_raises', 'test_precedence_and_binds_tighter_than_or', 'test_precedence_complex', 'test_precedence_not_binds_tighter_than_and', 'test_precedence_not_binds_tighter_than_or', 'test_scenario_backend_not_deprecated', 'test_scenario_complex_project_filter', 'test_scenario_hierarchical_groups', 'test_scenario_multiple_environments', 'test_select_matches_per_item_evaluation', 'test_simple_alphanumeric_names', 'test_single_char_names', 'test_single_group_empty_groups', 'test_single_group_match', 'test_single_group_no_match', 'test_single_group_with_set_input', 'test_slashed_names', 'test_spaces_around_parens', 'test_trailing_and_raises', 'test_trailing_or_raises', 'test_underscored_names', 'test_unmatched_close_paren_raises', 'test_unmatched_open_paren_raises', 'test_whitespace_only_expression_raises']
 
 # %% pts/tests/unit/_utils/test_logical_expressions.pct.py 2
 import pytest
-from boxyard._utils.logical_expressions import get_group_filter_func
+from boxyard._utils.logical_expressions import (
+    GroupBitsets,
+    compile_group_expression,
+    get_group_filter_func,
+)
 
 # %% pts/tests/unit/_utils/test_logical_expressions.pct.py 4
 def test_single_group_match():
@@ -515,3 +519,46 @@ def test_scenario_complex_project_filter():
     assert filter_func(["backend", "prod", "deprecated"]) == False
     # Should not match - archived
     assert filter_func(["frontend", "staging", "archived"]) == False
+
+# %% pts/tests/unit/_utils/test_logical_expressions.pct.py 82
+def test_invalid_expression_raises_when_compiled():
+    """Syntax errors are reported when the expression is compiled, before any evaluation."""
+    with pytest.raises(ValueError, match="[Uu]nmatched"):
+        get_group_filter_func("(a AND b")
+
+# %% pts/tests/unit/_utils/test_logical_expressions.pct.py 83
+def test_compiled_expression_is_reused():
+    """Compiling the same expression twice returns the same compiled expression."""
+    assert compile_group_expression("a OR b") is compile_group_expression("a OR b")
+
+# %% pts/tests/unit/_utils/test_logical_expressions.pct.py 84
+def test_group_bitsets():
+    """Every group maps to the bitset of the items in it."""
+    bitsets = GroupBitsets([["a"], ["a", "b"], [], ["b"]])
+    assert bitsets.get("a") == 0b0011
+    assert bitsets.get("b") == 0b1010
+    assert bitsets.get("missing") == 0
+    assert GroupBitsets.get_indices(bitsets.get("b")) == [1, 3]
+    assert GroupBitsets([["a"], ["b"]], groups=["b"]).bitsets == {"b": 0b10}
+
+# %% pts/tests/unit/_utils/test_logical_expressions.pct.py 85
+@pytest.mark.parametrize("expr", [
+    "a",
+    "NOT a",
+    "a AND b",
+    "a OR NOT b",
+    "(a OR b) AND NOT (c OR d)",
+    "NOT (a AND (b OR NOT c)) OR d",
+    "missing OR NOT missing",
+])
+def test_select_matches_per_item_evaluation(expr):
+    """Evaluating over the group bitsets of all items gives the same result as per item."""
+    import itertools
+
+    groups_per_item = [
+        [g for g, included in zip("abcd", flags) if included]
+        for flags in itertools.product([False, True], repeat=4)
+    ] * 20
+    expression = compile_group_expression(expr)
+    expected = [i for i, groups in enumerate(groups_per_item) if expression(groups)]
+    assert expression.select(groups_per_item) == expected
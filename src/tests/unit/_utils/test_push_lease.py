@@ -0,0 +1,227 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: pts/tests/unit/_utils/test_push_lease.pct.py
+
+__all__ = ['TestPushLease', 'TestSyncHelperPushLease', 'remote']
+
+# %% pts/tests/unit/_utils/test_push_lease.pct.py 2
+import asyncio
+import json
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from boxyard._utils.push_lease import PushLease, PushLeaseHeld, PushLeaseRecord
+from boxyard._utils.sync_helper import sync_helper, SyncSetting, SyncDirection
+
+
+@pytest.fixture
+def remote(tmp_path):
+    """A local-directory remote. Returns the rclone config path and the directory of the remote."""
+    remote_path = tmp_path / "my_remote"
+    remote_path.mkdir()
+    rclone_config_path = tmp_path / "rclone.conf"
+    rclone_config_path.write_text(f"[my_remote]\ntype = alias\nremote = {remote_path}\n")
+    return rclone_config_path.as_posix(), remote_path
+
+
+def _make_lease(remote, hostname: str, **kwargs) -> PushLease:
+    rclone_config_path, _ = remote
+    kwargs.setdefault("settle_delay", 0)
+    return PushLease(rclone_config_path, "my_remote", "records/box/push.lease", hostname, **kwargs)
+
+
+def _write_record(remote, hostname: str, expires_in: float) -> None:
+    _, remote_path = remote
+    lease_path = remote_path / "records" / "box" / "push.lease"
+    lease_path.parent.mkdir(parents=True, exist_ok=True)
+    record = PushLeaseRecord(
+        token="other",
+        holder_hostname=hostname,
+        expires_utc=datetime.now(timezone.utc) + timedelta(seconds=expires_in),
+    )
+    lease_path.write_text(record.model_dump_json())
+
+
+# ============================================================================
+# Tests for PushLease
+# ============================================================================
+
+# %% pts/tests/unit/_utils/test_push_lease.pct.py 3
+class TestPushLease:
+    """Tests for acquiring and releasing push leases."""
+
+    def test_acquire_and_release(self, remote):
+        _, remote_path = remote
+        lease_file = remote_path / "records" / "box" / "push.lease"
+
+        async def _run():
+            lease = _make_lease(remote, "host_a")
+            await lease.acquire()
+            assert json.loads(lease_file.read_text())["holder_hostname"] == "host_a"
+            # Acquiring again is a no-op
+            await lease.acquire()
+            await lease.release()
+            assert not lease_file.exists()
+            assert not lease.is_held
+
+        asyncio.run(_run())
+
+    def test_held_lease_backs_off(self, remote):
+        async def _run():
+            lease_a = _make_lease(remote, "host_a")
+            lease_b = _make_lease(remote, "host_b")
+            await lease_a.acquire()
+            with pytest.raises(PushLeaseHeld, match="being pushed by 'host_a'"):
+                await lease_b.acquire()
+            await lease_a.release()
+            await lease_b.acquire()
+            await lease_b.release()
+
+        asyncio.run(_run())
+
+    def test_expired_lease_is_taken_over(self, remote):
+        _write_record(remote, "crashed_host", expires_in=-1)
+
+        async def _run():
+            lease = _make_lease(remote, "host_a")
+            await lease.acquire()
+            assert (await lease.read()).token == lease.token
+            await lease.release()
+
+        asyncio.run(_run())
+
+    def test_force_takes_over(self, remote):
+        _write_record(remote, "host_b", expires_in=60)
+
+        async def _run():
+            lease = _make_lease(remote, "host_a")
+            await lease.acquire(force=True)
+            assert (await lease.read()).holder_hostname == "host_a"
+            await lease.release()
+
+        asyncio.run(_run())
+
+    def test_losing_the_race_backs_off(self, remote, monkeypatch):
+        async def _run():
+            lease = _make_lease(remote, "host_a")
+            _write = lease._write
+
+            async def _write_then_overwritten():
+                await _write()
+                _write_record(remote, "host_b", expires_in=60)
+                return True
+
+            monkeypatch.setattr(lease, "_write", _write_then_overwritten)
+            with pytest.raises(PushLeaseHeld, match="host_b"):
+                await lease.acquire()
+            assert not lease.is_held
+
+        asyncio.run(_run())
+
+    def test_heartbeat_renews(self, remote):
+        async def _run():
+            lease = _make_lease(remote, "host_a", ttl=0.6)
+            await lease.acquire()
+            expires = (await lease.read()).expires_utc
+            await asyncio.sleep(0.5)
+            assert (await lease.read()).expires_utc > expires
+            await lease.release()
+
+        asyncio.run(_run())
+
+    def test_heartbeat_survives_failures(self, remote, monkeypatch, capsys):
+        async def _run():
+            lease = _make_lease(remote, "host_a", ttl=0.3)
+            await lease.acquire()
+            read = lease.read
+            num_failures = 0
+
+            async def _failing_read():
+                nonlocal num_failures
+                if num_failures < 2:
+                    num_failures += 1
+                    raise Exception("rclone failed")
+                return await read()
+
+            monkeypatch.setattr(lease, "read", _failing_read)
+            expires = (await read()).expires_utc
+            await asyncio.sleep(0.5)
+            assert num_failures == 2
+            assert not lease._heartbeat_task.done()
+            assert (await read()).expires_utc > expires
+            await lease.release()
+
+        asyncio.run(_run())
+        assert "Failed to renew the push lease" in capsys.readouterr().err
+
+    def test_release_swallows_failures(self, remote, monkeypatch, capsys):
+        async def _run():
+            lease = _make_lease(remote, "host_a")
+            await lease.acquire()
+
+            async def _failing_read():
+                raise Exception("rclone failed")
+
+            monkeypatch.setattr(lease, "read", _failing_read)
+            await lease.release()
+            assert not lease.is_held
+
+        asyncio.run(_run())
+        assert "Failed to delete the push lease" in capsys.readouterr().err
+
+    def test_release_keeps_lease_of_others(self, remote):
+        async def _run():
+            lease = _make_lease(remote, "host_a")
+            await lease.acquire()
+            _write_record(remote, "host_b", expires_in=60)
+            await lease.release()
+            assert (await lease.read()).holder_hostname == "host_b"
+
+        asyncio.run(_run())
+
+
+# ============================================================================
+# Tests for push leases in sync_helper
+# ============================================================================
+
+# %% pts/tests/unit/_utils/test_push_lease.pct.py 4
+class TestSyncHelperPushLease:
+    """Tests for the push lease taken by `sync_helper`."""
+
+    def _sync(self, remote, tmp_path, push_lease):
+        rclone_config_path, _ = remote
+        local_path = tmp_path / "local"
+        local_path.mkdir(exist_ok=True)
+        (local_path / "file.txt").write_text("hello")
+        return sync_helper(
+            rclone_config_path=rclone_config_path,
+            sync_direction=SyncDirection.PUSH,
+            sync_setting=SyncSetting.CAREFUL,
+            local_path=local_path,
+            local_sync_record_path=tmp_path / "local.rec",
+            remote="my_remote",
+            remote_path="data",
+            remote_sync_record_path="records/box/data.rec",
+            local_sync_backups_path=tmp_path / "backups",
+            remote_sync_backups_path="backups",
+            push_lease=push_lease,
+        )
+
+    def test_push_acquires_lease(self, remote, tmp_path):
+        _, remote_path = remote
+
+        async def _run():
+            lease = _make_lease(remote, "host_a")
+            _, synced = await self._sync(remote, tmp_path, lease)
+            assert synced and lease.is_held
+            await lease.release()
+
+        asyncio.run(_run())
+        assert (remote_path / "data" / "file.txt").exists()
+
+    def test_push_backs_off_before_touching_remote(self, remote, tmp_path):
+        _, remote_path = remote
+        _write_record(remote, "host_b", expires_in=60)
+
+        with pytest.raises(PushLeaseHeld):
+            asyncio.run(self._sync(remote, tmp_path, _make_lease(remote, "host_a")))
+        assert not (remote_path / "data").exists()
+        assert not (remote_path / "records" / "box" / "data.rec").exists()
@@ -0,0 +1,473 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: pts/tests/unit/_utils/test_scheduling.pct.py
+
+__all__ = ['TestRoundRobinQueue', 'TestRoundRobinThrottler', 'TestStreamThrottler']
+
+# %% pts/tests/unit/_utils/test_scheduling.pct.py 2
+import asyncio
+import pytest
+
+from boxyard._utils.scheduling import (
+    RoundRobinQueue,
+    round_robin_throttler,
+    stream_round_robin_throttler,
+    stream_throttler,
+)
+
+
+# ============================================================================
+# Tests for RoundRobinQueue
+# ============================================================================
+
+# %% pts/tests/unit/_utils/test_scheduling.pct.py 3
+class TestRoundRobinQueue:
+    """Tests for the RoundRobinQueue class."""
+
+    def test_round_robin_order(self):
+        """Items are popped alternating between keys, FIFO within a key."""
+        q = RoundRobinQueue()
+        for item in ["a1", "a2", "a3"]:
+            q.push("a", item)
+        for item in ["b1"]:
+            q.push("b", item)
+        for item in ["c1", "c2"]:
+            q.push("c", item)
+
+        popped = [q.pop()[1] for _ in range(6)]
+        assert popped == ["a1", "b1", "c1", "a2", "c2", "a3"]
+        assert q.pop() is None
+        assert len(q) == 0
+
+    def test_capacity_skips_full_keys(self):
+        """Keys at capacity are skipped until an item of the key is done."""
+        q = RoundRobinQueue(get_key_capacity=lambda key: {"a": 1, "b": 2}[key])
+        for i in range(3):
+            q.push("a", f"a{i}")
+            q.push("b", f"b{i}")
+
+        assert [q.pop()[1] for _ in range(3)] == ["a0", "b0", "b1"]
+        assert q.pop() is None
+        assert q.in_flight == {"a": 1, "b": 2}
+
+        q.done("b")
+        assert q.pop() == ("b", "b2")
+        q.done("a")
+        assert q.pop() == ("a", "a1")
+
+    def test_priority_within_key(self):
+        """Within a key, items are popped lowest priority first, FIFO for ties."""
+        q = RoundRobinQueue()
+        q.push("a", "a_big", priority=10)
+        q.push("a", "a_small", priority=1)
+        q.push("a", "a_small_2", priority=1)
+        q.push("b", "b", priority=100)
+
+        popped = [q.pop()[1] for _ in range(4)]
+        assert popped == ["a_small", "b", "a_small_2", "a_big"]
+
+    def test_dependencies_block_until_done(self):
+        """An item is held back until the items it depends on are done."""
+        q = RoundRobinQueue()
+        q.push("a", "child", item_id="child", depends_on=["parent1", "parent2"])
+        q.push("a", "parent1", item_id="parent1")
+        q.push("b", "parent2", item_id="parent2")
+        assert len(q) == 3 and q.num_blocked == 1
+
+        assert q.pop() == ("a", "parent1")
+        assert q.pop() == ("b", "parent2")
+        assert q.pop() is None
+        q.done("a", "parent1")
+        assert q.pop() is None
+        q.done("b", "parent2")
+        assert q.pop() == ("a", "child")
+
+    def test_dependencies_on_done_items_do_not_block(self):
+        """Dependencies on items that are already done do not block."""
+        q = RoundRobinQueue()
+        q.push("a", "parent", item_id="parent")
+        q.pop()
+        q.done("a", "parent")
+        q.push("a", "child", item_id="child", depends_on=["parent"])
+        assert q.pop() == ("a", "child")
+
+    def test_release_blocked(self):
+        """release_blocked releases items whose dependencies form a cycle."""
+        q = RoundRobinQueue()
+        q.push("a", "x", item_id="x", depends_on=["y"])
+        q.push("a", "y", item_id="y", depends_on=["x"])
+        assert q.pop() is None
+        q.release_blocked()
+        assert {q.pop()[1], q.pop()[1]} == {"x", "y"}
+
+    def test_dependencies_require_item_id(self):
+        """Pushing an item with dependencies but without an id raises."""
+        with pytest.raises(ValueError):
+            RoundRobinQueue().push("a", "x", depends_on=["y"])
+
+
+# ============================================================================
+# Tests for stream_throttler
+# ============================================================================
+
+# %% pts/tests/unit/_utils/test_scheduling.pct.py 4
+class TestStreamThrottler:
+    """Tests for stream_throttler function."""
+
+    def test_yields_results_as_they_finish(self):
+        """Results are yielded in the order the workers finish."""
+        async def _test():
+            async def _worker(item):
+                await asyncio.sleep(0.01 * (3 - item))
+                return item * 2
+
+            res = [pair async for pair in stream_throttler(range(3), _worker, 3)]
+            assert res == [(2, 4), (1, 2), (0, 0)]
+
+        asyncio.run(_test())
+
+    def test_ordered(self):
+        """With ordered=True, results are yielded in the order of the items."""
+        async def _test():
+            async def _worker(item):
+                await asyncio.sleep(0.01 * (3 - item % 3))
+                return item
+
+            res = [r async for _, r in stream_throttler(range(7), _worker, 3, ordered=True)]
+            assert res == list(range(7))
+
+        asyncio.run(_test())
+
+    def test_pulls_items_lazily(self):
+        """Items are only pulled from the iterator once a slot is free."""
+        async def _test():
+            pulled = []
+
+            def _items():
+                for i in range(100):
+                    pulled.append(i)
+                    yield i
+
+            async def _worker(item):
+                await asyncio.sleep(0.001)
+
+            for ordered in [False, True]:
+                pulled.clear()
+                stream = stream_throttler(_items(), _worker, 4, ordered=ordered)
+                await stream.__anext__()
+                assert len(pulled) <= 5
+                await stream.aclose()
+
+        asyncio.run(_test())
+
+    def test_respects_max_concurrency(self):
+        """At most max_concurrency workers run at once."""
+        async def _test():
+            running = 0
+            max_running = 0
+
+            async def _worker(item):
+                nonlocal running, max_running
+                running += 1
+                max_running = max(max_running, running)
+                await asyncio.sleep(0.005)
+                running -= 1
+
+            async for _ in stream_throttler(range(20), _worker, 3):
+                pass
+            assert max_running == 3
+
+        asyncio.run(_test())
+
+    def test_exceptions_are_yielded(self):
+        """Exceptions raised by a worker are yielded as its result."""
+        async def _test():
+            async def _worker(item):
+                if item == 1:
+                    raise ValueError("boom")
+                return item
+
+            res = dict([pair async for pair in stream_throttler(range(3), _worker, 2)])
+            assert res[0] == 0 and res[2] == 2
+            assert isinstance(res[1], ValueError)
+
+        asyncio.run(_test())
+
+    def test_closing_cancels_running_workers(self):
+        """Workers still running when the stream is closed are cancelled."""
+        async def _test():
+            cancelled = []
+
+            async def _worker(item):
+                try:
+                    await asyncio.sleep(0 if item == 0 else 10)
+                except asyncio.CancelledError:
+                    cancelled.append(item)
+                    raise
+
+            stream = stream_throttler(range(3), _worker, 3)
+            assert (await stream.__anext__())[0] == 0
+            await stream.aclose()
+            await asyncio.sleep(0)
+            assert sorted(cancelled) == [1, 2]
+
+        asyncio.run(_test())
+
+    def test_invalid_max_concurrency(self):
+        """A max_concurrency below 1 raises."""
+        async def _test():
+            async def _worker(item):
+                return item
+
+            with pytest.raises(ValueError):
+                async for _ in stream_throttler(range(3), _worker, 0):
+                    pass
+
+        asyncio.run(_test())
+
+
+# ============================================================================
+# Tests for round_robin_throttler
+# ============================================================================
+
+# %% pts/tests/unit/_utils/test_scheduling.pct.py 5
+class TestRoundRobinThrottler:
+    """Tests for round_robin_throttler function."""
+
+    def test_returns_results_in_input_order(self):
+        """Results are returned in the order of the items."""
+        async def _test():
+            async def _worker(item):
+                await asyncio.sleep(0.01 * (5 - item))
+                return item * 2
+
+            res = await round_robin_throttler(
+                range(5), get_key=lambda i: i % 2, worker=_worker, max_concurrency=3
+            )
+            assert res == [0, 2, 4, 6, 8]
+
+        asyncio.run(_test())
+
+    def test_respects_global_and_key_limits(self):
+        """At most max_concurrency in total and the key capacity per key run at once."""
+        async def _test():
+            running = {"a": 0, "b": 0}
+            max_running = {"a": 0, "b": 0, "total": 0}
+
+            async def _worker(key):
+                running[key] += 1
+                max_running[key] = max(max_running[key], running[key])
+                max_running["total"] = max(max_running["total"], sum(running.values()))
+                await asyncio.sleep(0.01)
+                running[key] -= 1
+
+            await round_robin_throttler(
+                ["a"] * 10 + ["b"] * 10,
+                get_key=lambda key: key,
+                worker=_worker,
+                max_concurrency=4,
+                get_key_capacity=lambda key: {"a": 1, "b": 4}[key],
+            )
+            assert max_running == {"a": 1, "b": 3, "total": 4}
+
+        asyncio.run(_test())
+
+    def test_slow_key_does_not_starve_others(self):
+        """A capped slow key leaves the other slots to the jobs of a fast key."""
+        async def _test():
+            started = []
+
+            async def _worker(item):
+                started.append(item)
+                await asyncio.sleep(0.05 if item.startswith("slow") else 0.001)
+
+            await round_robin_throttler(
+                [f"slow{i}" for i in range(5)] + [f"fast{i}" for i in range(5)],
+                get_key=lambda item: item.rstrip("0123456789"),
+                worker=_worker,
+                max_concurrency=2,
+                get_key_capacity=lambda key: {"slow": 1, "fast": 2}[key],
+            )
+            assert started.index("fast0") == 1
+            assert started.index("fast4") < started.index("slow2")
+
+        asyncio.run(_test())
+
+    def test_raises_first_exception_after_all_finish(self):
+        """If a worker raises, the exception is raised after all workers finished."""
+        async def _test():
+            finished = []
+
+            async def _worker(item):
+                await asyncio.sleep(0.01)
+                if item == 1:
+                    raise ValueError("boom")
+                finished.append(item)
+
+            with pytest.raises(ValueError, match="boom"):
+                await round_robin_throttler(
+                    range(4), get_key=lambda i: "k", worker=_worker, max_concurrency=2
+                )
+            assert sorted(finished) == [0, 2, 3]
+
+        asyncio.run(_test())
+
+    def test_priority_and_dependencies(self):
+        """Items start in order of priority, but never before their dependencies finished."""
+        async def _test():
+            started = []
+
+            async def _worker(item):
+                started.append(item[0])
+                await asyncio.sleep(0.005)
+
+            items = [("child", 1, ["parent"]), ("big", 100, []), ("parent", 10, [])]
+            await round_robin_throttler(
+                items,
+                get_key=lambda item: "k",
+                worker=_worker,
+                max_concurrency=1,
+                get_priority=lambda item: item[1],
+                get_id=lambda item: item[0],
+                get_dependencies=lambda item: item[2],
+            )
+            assert started == ["parent", "child", "big"]
+
+        asyncio.run(_test())
+
+    def test_unknown_dependencies_are_ignored(self):
+        """Dependencies on ids that are not among the items do not block."""
+        async def _test():
+            async def _worker(item):
+                return item
+
+            res = await round_robin_throttler(
+                ["x"],
+                get_key=lambda item: "k",
+                worker=_worker,
+                max_concurrency=1,
+                get_id=lambda item: item,
+                get_dependencies=lambda item: ["not_synced"],
+            )
+            assert res == ["x"]
+
+        asyncio.run(_test())
+
+    def test_dependency_cycle_does_not_deadlock(self):
+        """Items in a dependency cycle are still run."""
+        async def _test():
+            async def _worker(item):
+                return item
+
+            res = await round_robin_throttler(
+                ["x", "y"],
+                get_key=lambda item: "k",
+                worker=_worker,
+                max_concurrency=2,
+                get_id=lambda item: item,
+                get_dependencies=lambda item: ["y" if item == "x" else "x"],
+            )
+            assert res == ["x", "y"]
+
+        asyncio.run(_test())
+
+    def test_stream_yields_as_finished(self):
+        """The streaming variant yields (item, result) pairs as the workers finish."""
+        async def _test():
+            async def _worker(item):
+                await asyncio.sleep(0.01 * (3 - item))
+                if item == 0:
+                    raise ValueError("boom")
+                return item * 2
+
+            res = [
+                pair
+                async for pair in stream_round_robin_throttler(
+                    range(3), get_key=lambda i: "k", worker=_worker, max_concurrency=3
+                )
+            ]
+            assert res[:2] == [(2, 4), (1, 2)]
+            assert res[2][0] == 0 and isinstance(res[2][1], ValueError)
+
+        asyncio.run(_test())
+
+    def test_stream_pulls_items_lazily(self):
+        """The streaming variant queues at most `lookahead` items, and prioritises when pulling."""
+        async def _test():
+            pulled = []
+            prioritised = []
+
+            def _items():
+                for i in range(100):
+                    pulled.append(i)
+                    yield i
+
+            def _get_priority(item):
+                prioritised.append(item)
+                return -item
+
+            async def _worker(item):
+                await asyncio.sleep(0.001)
+
+            stream = stream_round_robin_throttler(
+                _items(),
+                get_key=lambda i: i % 2,
+                worker=_worker,
+                max_concurrency=2,
+                get_priority=_get_priority,
+                lookahead=5,
+            )
+            await stream.__anext__()
+            assert len(pulled) <= 2 + 5 + 1
+            assert prioritised == pulled
+            await stream.aclose()
+
+            with pytest.raises(ValueError):
+                await stream_round_robin_throttler(
+                    [], get_key=lambda i: i, worker=_worker, max_concurrency=1, lookahead=0
+                ).__anext__()
+
+        asyncio.run(_test())
+
+    def test_stream_dependencies_on_earlier_items(self):
+        """The streaming variant waits for dependencies pulled before an item."""
+        async def _test():
+            finished = []
+
+            async def _worker(item):
+                await asyncio.sleep(0.02 if item == "parent" else 0)
+                finished.append(item)
+
+            parents = {"child": ["parent"], "parent": []}
+            async for _ in stream_round_robin_throttler(
+                ["parent", "child"],
+                get_key=lambda i: i,
+                worker=_worker,
+                max_concurrency=2,
+                get_id=lambda i: i,
+                get_dependencies=parents.__getitem__,
+                lookahead=1,
+            ):
+                pass
+            assert finished == ["parent", "child"]
+
+        asyncio.run(_test())
+
+    def test_duplicate_items(self):
+        """Equal items each get their own result."""
+        async def _test():
+            async def _worker(item):
+                return item
+
+            res = await round_robin_throttler(["a", "a", "b"], lambda i: i, _worker, 2)
+            assert res == ["a", "a", "b"]
+
+        asyncio.run(_test())
+
+    def test_empty(self):
+        """No items returns an empty list."""
+        async def _test():
+            async def _worker(item):
+                return item
+
+            assert await round_robin_throttler([], lambda i: i, _worker, 2) == []
+
+        asyncio.run(_test())
@@ -0,0 +1,202 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: pts/tests/unit/_utils/test_transfer_journal.pct.py
+
+__all__ = ['TestResumeFilterHelpers', 'TestTransferJournal']
+
+# %% pts/tests/unit/_utils/test_transfer_journal.pct.py 2
+import os
+import json
+import time
+import pytest
+
+from boxyard._enums import SyncDirection
+from boxyard._utils.transfer_journal import (
+    TransferJournal,
+    escape_rclone_filter_pattern,
+    write_resume_filters_file,
+)
+
+
+# ============================================================================
+# Tests for TransferJournal
+# ============================================================================
+
+# %% pts/tests/unit/_utils/test_transfer_journal.pct.py 3
+def _copied_line(path: str, size: int) -> str:
+    return json.dumps(
+        {"level": "info", "msg": "Copied (new)", "size": size, "object": path}
+    )
+
+
+class TestTransferJournal:
+    """Tests for the TransferJournal class."""
+
+    def test_open_creates_journal_file(self, tmp_path):
+        """Opening a new journal writes its header."""
+        journal = TransferJournal.open(tmp_path, "ULID1", SyncDirection.PUSH)
+        assert journal.path == tmp_path / "ULID1.jsonl"
+        assert journal.path.exists()
+        assert journal.entries == {}
+
+    def test_records_copied_lines(self, tmp_path):
+        """Only rclone 'Copied' log lines are recorded."""
+        journal = TransferJournal.open(tmp_path, "ULID1", SyncDirection.PUSH)
+        journal.handle_rclone_log_line(_copied_line("a/b.txt", 3))
+        journal.handle_rclone_log_line(
+            json.dumps({"level": "info", "msg": "Moved into backup dir", "object": "c.txt"})
+        )
+        journal.handle_rclone_log_line("Transferred: 3 B / 3 B")
+        journal.handle_rclone_log_line("{not json")
+        assert list(journal.entries) == ["a/b.txt"]
+        assert journal.entries["a/b.txt"].size == 3
+
+    def test_reopen_loads_entries(self, tmp_path):
+        """Entries survive reopening the journal of the same session."""
+        journal = TransferJournal.open(tmp_path, "ULID1", SyncDirection.PULL, "REMOTE1")
+        journal.handle_rclone_log_line(_copied_line("a.txt", 1))
+
+        reopened = TransferJournal.open(tmp_path, "ULID1", SyncDirection.PULL, "REMOTE1")
+        assert list(reopened.entries) == ["a.txt"]
+
+    def test_reopen_ignores_truncated_last_line(self, tmp_path):
+        """A partially written entry from an interrupted process is ignored."""
+        journal = TransferJournal.open(tmp_path, "ULID1", SyncDirection.PUSH)
+        journal.handle_rclone_log_line(_copied_line("a.txt", 1))
+        with journal.path.open("a") as f:
+            f.write('{"path": "b.t')
+
+        reopened = TransferJournal.open(tmp_path, "ULID1", SyncDirection.PUSH)
+        assert list(reopened.entries) == ["a.txt"]
+
+    def test_reopen_with_different_session_resets(self, tmp_path):
+        """A journal from a different session (e.g. the remote has changed) is discarded."""
+        journal = TransferJournal.open(tmp_path, "ULID1", SyncDirection.PULL, "REMOTE1")
+        journal.handle_rclone_log_line(_copied_line("a.txt", 1))
+
+        reopened = TransferJournal.open(tmp_path, "ULID1", SyncDirection.PULL, "REMOTE2")
+        assert reopened.entries == {}
+        reopened = TransferJournal.open(tmp_path, "ULID1", SyncDirection.PULL, "REMOTE1")
+        assert reopened.entries == {}
+
+    def test_resumable_paths_require_unchanged_local_file(self, tmp_path):
+        """Only files that still exist locally with the journaled size and mtime are resumable."""
+        local = tmp_path / "local"
+        local.mkdir()
+        past = time.time() - 60
+        for name in ["same.txt", "resized.txt", "modified.txt"]:
+            (local / name).write_text("abc")
+            os.utime(local / name, (past, past))
+
+        journal = TransferJournal.open(tmp_path / "journals", "ULID1", SyncDirection.PUSH)
+        for name in ["same.txt", "resized.txt", "modified.txt", "deleted.txt"]:
+            journal.handle_rclone_log_line(_copied_line(name, 3), local)
+
+        (local / "resized.txt").write_text("abcdef")
+        os.utime(local / "resized.txt", (past, past))
+        # A modification to an mtime that is still before the transfer was recorded
+        os.utime(local / "modified.txt", (past + 1, past + 1))
+
+        assert journal.get_resumable_paths(local) == ["same.txt"]
+
+    def test_recently_modified_files_are_not_resumable(self, tmp_path):
+        """A file modified around the time its transfer was recorded is transferred again."""
+        local = tmp_path / "local"
+        local.mkdir()
+        (local / "a.txt").write_text("abc")
+
+        journal = TransferJournal.open(tmp_path / "journals", "ULID1", SyncDirection.PUSH)
+        journal.handle_rclone_log_line(_copied_line("a.txt", 3), local)
+        # E.g. rewritten with the same size, in the same tick of the filesystem clock
+        assert journal.get_resumable_paths(local) == []
+
+    def test_resume_rules_are_anchored_and_escaped(self, tmp_path):
+        """Resume rules exclude the literal paths relative to the sync root."""
+        local = tmp_path / "local"
+        (local / "we[i]rd").mkdir(parents=True)
+        (local / "we[i]rd" / "f*1.txt").write_text("x")
+
+        journal = TransferJournal.open(tmp_path / "journals", "ULID1", SyncDirection.PUSH)
+        past = time.time() - 60
+        os.utime(local / "we[i]rd" / "f*1.txt", (past, past))
+        journal.handle_rclone_log_line(_copied_line("we[i]rd/f*1.txt", 1), local)
+
+        assert journal.get_resume_filter_rules(local) == ["- /we\\[i\\]rd/f\\*1.txt"]
+
+    def test_discard(self, tmp_path):
+        """Discarding deletes the journal file."""
+        journal = TransferJournal.open(tmp_path, "ULID1", SyncDirection.PUSH)
+        journal.discard()
+        assert not journal.path.exists()
+        journal.discard()  # Idempotent
+
+
+# ============================================================================
+# Tests for filter helpers
+# ============================================================================
+
+# %% pts/tests/unit/_utils/test_transfer_journal.pct.py 4
+class TestResumeFilterHelpers:
+    """Tests for the rclone filter helpers."""
+
+    @pytest.mark.parametrize(
+        "path,expected",
+        [
+            ("a/b.txt", "a/b.txt"),
+            ("a?.txt", "a\\?.txt"),
+            ("{a,b}", "\\{a,b\\}"),
+            ("back\\slash", "back\\\\slash"),
+        ],
+    )
+    def test_escape_rclone_filter_pattern(self, path, expected):
+        """Glob characters are escaped."""
+        assert escape_rclone_filter_pattern(path) == expected
+
+    def test_write_resume_filters_file_prepends_rules(self, tmp_path):
+        """Resume rules come before the existing filter rules."""
+        filters_path = tmp_path / ".rclone_filters"
+        filters_path.write_text("- *.log\n")
+
+        path = write_resume_filters_file(["- /a.txt"], filters_path)
+        try:
+            assert path.read_text() == "- /a.txt\n- *.log\n"
+        finally:
+            path.unlink()
+
+    def test_write_resume_filters_file_without_existing(self, tmp_path):
+        """Works without an existing filters file."""
+        path = write_resume_filters_file(["- /a.txt"], None)
+        try:
+            assert path.read_text() == "- /a.txt\n"
+        finally:
+            path.unlink()
+
+    def test_write_resume_filters_file_merges_all_rules(self, tmp_path):
+        """All filter rules are merged, in the order that rclone applies them."""
+        include_path = tmp_path / ".rclone_include"
+        include_path.write_text("# comment\n\n*.txt\n")
+        exclude_path = tmp_path / ".rclone_exclude"
+        exclude_path.write_text("tmp/**\n")
+        filters_path = tmp_path / ".rclone_filters"
+        filters_path.write_text("- *.log\n")
+
+        path = write_resume_filters_file(
+            ["- /a.txt"],
+            filters_path,
+            include=["*.md"],
+            include_path=include_path,
+            exclude=["*.bak"],
+            exclude_path=exclude_path,
+            filter=["+ keep/**"],
+        )
+        try:
+            assert path.read_text().splitlines() == [
+                "- /a.txt",
+                "+ *.md",
+                "+ *.txt",
+                "- *.bak",
+                "- tmp/**",
+                "+ keep/**",
+                "- *.log",
+                "- /**",
+            ]
+        finally:
+            path.unlink()
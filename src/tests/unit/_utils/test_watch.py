@@ -0,0 +1,164 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: pts/tests/unit/_utils/test_watch.pct.py
+
+__all__ = ['TestChangeDebouncer', 'TestWatchers']
+
+# %% pts/tests/unit/_utils/test_watch.pct.py 2
+import asyncio
+import pytest
+
+from boxyard._utils.watch import (
+    ChangeDebouncer,
+    InotifyWatcher,
+    PollingWatcher,
+    is_inotify_available,
+)
+
+
+# ============================================================================
+# Tests for ChangeDebouncer
+# ============================================================================
+
+# %% pts/tests/unit/_utils/test_watch.pct.py 3
+class TestChangeDebouncer:
+    """Tests for the ChangeDebouncer class."""
+
+    def test_waits_for_quiet_period(self):
+        """A key is only ready once it has been quiet for the quiet period."""
+        debouncer = ChangeDebouncer(quiet_period=2)
+        debouncer.record_change("a", "sl", now=0)
+        debouncer.record_change("a", "sl", now=1)
+
+        assert debouncer.pop_ready(now=2.5) == {}
+        assert debouncer.get_next_ready_time() == 3
+        assert debouncer.pop_ready(now=3) == {"sl": ["a"]}
+        assert debouncer.get_next_ready_time() is None
+
+    def test_coalesces_per_group(self):
+        """The ready keys of a group are popped together."""
+        debouncer = ChangeDebouncer(quiet_period=1)
+        debouncer.record_change("a", "sl1", now=0)
+        debouncer.record_change("b", "sl1", now=0.5)
+        debouncer.record_change("c", "sl2", now=0.5)
+
+        assert debouncer.pop_ready(now=2) == {"sl1": ["a", "b"], "sl2": ["c"]}
+
+    def test_rate_limits_per_group(self):
+        """A group is popped from at most once every min_interval, other groups are not affected."""
+        debouncer = ChangeDebouncer(quiet_period=1, min_interval=10)
+        debouncer.record_change("a", "sl1", now=0)
+        assert debouncer.pop_ready(now=1) == {"sl1": ["a"]}
+        debouncer.finish("a")
+
+        debouncer.record_change("b", "sl1", now=2)
+        debouncer.record_change("c", "sl2", now=2)
+
+        assert debouncer.pop_ready(now=3) == {"sl2": ["c"]}
+        assert debouncer.get_next_ready_time() == 11
+        assert debouncer.pop_ready(now=11) == {"sl1": ["b"]}
+
+    def test_in_flight_keys_are_held_back(self):
+        """Changes made while a key is in flight make it ready again after it finished."""
+        debouncer = ChangeDebouncer(quiet_period=1)
+        debouncer.record_change("a", "sl", now=0)
+        assert debouncer.pop_ready(now=1) == {"sl": ["a"]}
+
+        debouncer.record_change("a", "sl", now=1.5)
+        assert debouncer.pop_ready(now=5) == {}
+        assert debouncer.get_next_ready_time() is None
+        assert debouncer.num_pending == 1
+
+        debouncer.finish("a")
+        assert debouncer.pop_ready(now=5) == {"sl": ["a"]}
+
+    def test_discard(self):
+        """A discarded key is never ready."""
+        debouncer = ChangeDebouncer(quiet_period=1)
+        debouncer.record_change("a", "sl", now=0)
+        debouncer.record_change("b", "sl", now=0)
+        debouncer.discard("a")
+        debouncer.discard("c")  # Not pending
+
+        assert debouncer.pop_ready(now=1) == {"sl": ["b"]}
+
+
+# ============================================================================
+# Tests for the watchers
+# ============================================================================
+
+# %% pts/tests/unit/_utils/test_watch.pct.py 4
+async def _watch_and_modify(watcher_cls, tmp_path, **kwargs):
+    """Watch two boxes, and modify one of them in a directory created after the watch started."""
+    changes = []
+    (tmp_path / "box_a").mkdir()
+    (tmp_path / "box_b").mkdir()
+    watcher = watcher_cls(changes.append, **kwargs)
+    watcher.add("a", tmp_path / "box_a")
+    watcher.add("b", tmp_path / "box_b")
+    watcher.start()
+    try:
+        await asyncio.sleep(0.1)
+        (tmp_path / "box_a" / "new_dir").mkdir()
+        await asyncio.sleep(0.2)
+        changes.clear()
+        (tmp_path / "box_a" / "new_dir" / "file.txt").write_text("hello")
+        await asyncio.sleep(0.3)
+    finally:
+        watcher.close()
+    return changes
+
+
+class TestWatchers:
+    """Tests for InotifyWatcher and PollingWatcher."""
+
+    @pytest.mark.skipif(not is_inotify_available(), reason="inotify is not available")
+    def test_inotify_watcher(self, tmp_path):
+        """Changes in directories created after the watch started are reported."""
+        changes = asyncio.run(_watch_and_modify(InotifyWatcher, tmp_path))
+        assert set(changes) == {"a"}
+
+    def test_polling_watcher(self, tmp_path):
+        changes = asyncio.run(_watch_and_modify(PollingWatcher, tmp_path, poll_interval=0.05))
+        assert set(changes) == {"a"}
+
+    @pytest.mark.parametrize(
+        "watcher_cls,kwargs",
+        [
+            pytest.param(
+                InotifyWatcher, {},
+                marks=pytest.mark.skipif(not is_inotify_available(), reason="inotify is not available"),
+            ),
+            (PollingWatcher, {"poll_interval": 0.05}),
+        ],
+    )
+    def test_removed_key_is_not_reported(self, tmp_path, watcher_cls, kwargs):
+        async def _test():
+            changes = []
+            (tmp_path / "box_a").mkdir()
+            (tmp_path / "box_b").mkdir()
+            watcher = watcher_cls(changes.append, **kwargs)
+            watcher.add("a", tmp_path / "box_a")
+            watcher.add("b", tmp_path / "box_b")
+            watcher.start()
+            try:
+                watcher.remove("a")
+                await asyncio.sleep(0.1)
+                (tmp_path / "box_a" / "file.txt").write_text("hello")
+                (tmp_path / "box_b" / "file.txt").write_text("hello")
+                await asyncio.sleep(0.3)
+            finally:
+                watcher.close()
+            return changes
+
+        assert set(asyncio.run(_test())) == {"b"}
+
+    def test_polling_watcher_no_changes(self, tmp_path):
+        async def _test():
+            changes = []
+            watcher = PollingWatcher(changes.append, poll_interval=0.05)
+            watcher.add("a", tmp_path)
+            watcher.start()
+            await asyncio.sleep(0.2)
+            watcher.close()
+            return changes
+
+        assert asyncio.run(_test()) == []
@@ -3,11 +3,13 @@
 __all__ = ['TestDefaultStorageLocationValidation', 'TestGroupNameValidation', 'TestMultipleStorageLocations', 'TestRequiredFields', 'TestStorageLocationNameValidation', 'TestStorageLocationsRequired', 'TestStrictMode', 'valid_config_dict']
 
 # %% pts/tests/unit/config/test_config_validation.pct.py 2
+import asyncio
 import pytest
 from pathlib import Path
 from pydantic import ValidationError
 
 from boxyard.config import Config, StorageConfig, StorageType
+from boxyard._utils.concurrency import ADAPTIVE_LIMIT_MAX, OpOutcome, get_storage_location_limiter
 
 
 # ============================================================================
@@ -308,3 +310,59 @@ class TestMultipleStorageLocations:
         assert config.storage_locations["default"].storage_type == StorageType.LOCAL
         assert config.storage_locations["backup"].storage_type == StorageType.RCLONE
         assert config.storage_locations["archive"].storage_type == StorageType.LOCAL
+
+    def test_storage_location_concurrency_cap(self, valid_config_dict):
+        """Storage locations can cap their concurrent operations."""
+        valid_config_dict["storage_locations"]["default"]["max_concurrent_ops"] = 2
+        config = Config(**valid_config_dict)
+        assert config.storage_locations["default"].max_concurrent_ops == 2
+
+    def test_storage_location_concurrency_cap_defaults_to_none(self, valid_config_dict):
+        """Without a cap, the adaptive limit starts at `max_concurrent_rclone_ops` and grows up to `ADAPTIVE_LIMIT_MAX`."""
+        config = Config(**valid_config_dict)
+        assert config.storage_locations["default"].max_concurrent_ops is None
+        assert config.get_initial_concurrent_rclone_ops("default") == 3
+        assert config.get_max_concurrent_rclone_ops("default") is None
+
+        async def _test():
+            limiter = get_storage_location_limiter(
+                "uncapped",
+                initial_limit=config.get_initial_concurrent_rclone_ops("default"),
+                max_limit=config.get_max_concurrent_rclone_ops("default"),
+            )
+            assert limiter.limit == 3
+            for _ in range(100):
+                await limiter.acquire()
+                limiter.release(OpOutcome.SUCCESS)
+            assert limiter.limit == ADAPTIVE_LIMIT_MAX
+
+        asyncio.run(_test())
+
+    @pytest.mark.parametrize("sl_cap,initial,expected", [(2, 2, 2), (5, 3, 5)])
+    def test_storage_location_cap_bounds_adaptive_limit(self, valid_config_dict, sl_cap, initial, expected):
+        """The adaptive limit of a storage location grows up to its cap, and never beyond."""
+        valid_config_dict["storage_locations"]["default"]["max_concurrent_ops"] = sl_cap
+        config = Config(**valid_config_dict)
+        assert config.get_initial_concurrent_rclone_ops("default") == initial
+        assert config.get_max_concurrent_rclone_ops("default") == sl_cap
+
+        async def _test():
+            limiter = get_storage_location_limiter(
+                f"capped_{sl_cap}",
+                initial_limit=config.get_initial_concurrent_rclone_ops("default"),
+                max_limit=config.get_max_concurrent_rclone_ops("default"),
+            )
+            assert limiter.limit == initial
+            for _ in range(50):
+                await limiter.acquire()
+                limiter.release(OpOutcome.SUCCESS)
+                assert limiter.limit <= expected
+            assert limiter.limit == expected
+
+        asyncio.run(_test())
+
+    def test_invalid_storage_location_concurrency_cap(self, valid_config_dict):
+        """A cap below 1 raises."""
+        valid_config_dict["storage_locations"]["default"]["max_concurrent_ops"] = 0
+        with pytest.raises(ValidationError, match="max_concurrent_ops"):
+            Config(**valid_config_dict)
@@ -0,0 +1,230 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: pts/tests/unit/models/test_box_table.pct.py
+
+__all__ = ['TestBitsetIndices', 'TestCreatedBetween', 'TestFilter', 'TestGetTimestampKey', 'TestHierarchy', 'TestSelect', 'box_metas', 'table']
+
+# %% pts/tests/unit/models/test_box_table.pct.py 2
+import random
+import pytest
+from datetime import datetime
+
+from boxyard._box_table import BoxTable, get_timestamp_key
+from boxyard._enums import BoxSortKey
+from boxyard._models import BoxMeta, BoxyardMeta
+from boxyard._utils.logical_expressions import GroupBitsets, get_group_filter_func
+
+
+def _make_box_meta(
+    subid: str,
+    name: str,
+    timestamp: str,
+    storage_location: str = "default",
+    groups: list[str] | None = None,
+    parents: list[str] | None = None,
+) -> BoxMeta:
+    return BoxMeta(
+        creation_timestamp_utc=timestamp,
+        box_subid=subid,
+        name=name,
+        storage_location=storage_location,
+        creator_hostname="host",
+        groups=groups or [],
+        parents=parents or [],
+    )
+
+
+# ============================================================================
+# Fixtures
+# ============================================================================
+
+# %% pts/tests/unit/models/test_box_table.pct.py 3
+@pytest.fixture
+def box_metas():
+    """A small hierarchy: alpha -> beta -> gamma, and delta with a parent that is not in the yard."""
+    alpha = _make_box_meta("aaaaa", "alpha", "20251120_100000", groups=["backend"])
+    beta = _make_box_meta("bbbbb", "beta", "20251118", storage_location="backup", groups=["frontend"], parents=[alpha.box_id])
+    gamma = _make_box_meta("ccccc", "gamma", "20251122_120000", groups=["backend", "archive"], parents=[beta.box_id])
+    delta = _make_box_meta("ddddd", "delta", "20251121_080000", parents=["20200101_000000_zzzzz"])
+    return [alpha, beta, gamma, delta]
+
+
+@pytest.fixture
+def table(box_metas):
+    return BoxTable(box_metas)
+
+
+# ============================================================================
+# Tests for get_timestamp_key
+# ============================================================================
+
+# %% pts/tests/unit/models/test_box_table.pct.py 4
+class TestGetTimestampKey:
+    """Tests for converting timestamps to sortable integers."""
+
+    def test_box_timestamp_formats(self):
+        assert get_timestamp_key("20251122_143022") == 20251122143022
+        assert get_timestamp_key("20251122") == 20251122000000
+
+    def test_iso_and_datetime(self):
+        assert get_timestamp_key("2025-11-22") == 20251122000000
+        assert get_timestamp_key("2025-11-22 14:30:22") == 20251122143022
+        assert get_timestamp_key(datetime(2025, 11, 22, 14, 30, 22)) == 20251122143022
+
+    def test_orders_like_datetimes(self):
+        timestamps = ["20251122_143022", "20251122", "20240101_000001", "20251121_235959"]
+        by_key = sorted(timestamps, key=get_timestamp_key)
+        by_datetime = sorted(timestamps, key=lambda t: _make_box_meta("a", "a", t).creation_timestamp_datetime)
+        assert by_key == by_datetime
+
+    def test_invalid_timestamp(self):
+        with pytest.raises(ValueError, match="Invalid timestamp"):
+            get_timestamp_key("yesterday")
+
+
+# ============================================================================
+# Tests for filters
+# ============================================================================
+
+# %% pts/tests/unit/models/test_box_table.pct.py 5
+class TestFilter:
+    """Tests for BoxTable.filter."""
+
+    def test_no_filters_selects_all(self, table, box_metas):
+        assert table.select(table.filter()) == box_metas
+
+    def test_storage_locations(self, table, box_metas):
+        assert table.select(table.filter(storage_locations=["backup"])) == [box_metas[1]]
+        assert table.select(table.filter(storage_locations=[])) == []
+
+    def test_include_and_exclude_groups(self, table, box_metas):
+        selection = table.filter(include_groups=["backend", "frontend"], exclude_groups=["archive"])
+        assert table.select(selection) == [box_metas[0], box_metas[1]]
+
+    def test_group_filter(self, table, box_metas):
+        selection = table.filter(storage_locations=["default"], group_filter="backend AND NOT archive")
+        assert table.select(selection) == [box_metas[0]]
+
+    def test_group_filter_matches_per_box_evaluation(self):
+        rng = random.Random(0)
+        groups = ["a", "b", "c", "d"]
+        metas = [
+            _make_box_meta(f"{i:05d}", f"box{i}", "20250101", groups=rng.sample(groups, rng.randint(0, 3)))
+            for i in range(200)
+        ]
+        table = BoxTable(metas)
+        expression = "(a OR b) AND NOT (c AND d)"
+        func = get_group_filter_func(expression)
+        assert table.select(table.filter(group_filter=expression)) == [bm for bm in metas if func(bm.groups)]
+
+
+# ============================================================================
+# Tests for creation date ranges
+# ============================================================================
+
+# %% pts/tests/unit/models/test_box_table.pct.py 6
+class TestCreatedBetween:
+    """Tests for BoxTable.created_between."""
+
+    def test_after_is_inclusive(self, table, box_metas):
+        selection = table.created_between(after="20251121_080000")
+        assert table.select(selection) == [box_metas[2], box_metas[3]]
+
+    def test_before_is_exclusive(self, table, box_metas):
+        selection = table.created_between(before="20251120_100000")
+        assert table.select(selection) == [box_metas[1]]
+
+    def test_range(self, table, box_metas):
+        selection = table.created_between(after="2025-11-19", before="2025-11-22")
+        assert table.select(selection) == [box_metas[0], box_metas[3]]
+
+    def test_empty_range(self, table):
+        assert table.created_between(after="20251122", before="20251120") == 0
+
+
+# ============================================================================
+# Tests for hierarchy filters
+# ============================================================================
+
+# %% pts/tests/unit/models/test_box_table.pct.py 7
+class TestHierarchy:
+    """Tests for the parent/child filters of BoxTable."""
+
+    def test_children_and_parents(self, table, box_metas):
+        alpha, beta, gamma, delta = box_metas
+        assert table.select(table.children_of(alpha.box_id)) == [beta]
+        assert table.select(table.parents_of(gamma.box_id)) == [beta]
+        assert table.parents_of(delta.box_id) == 0
+
+    def test_descendants_and_ancestors(self, table, box_metas):
+        alpha, beta, gamma, delta = box_metas
+        assert table.select(table.descendants_of(alpha.box_id)) == [beta, gamma]
+        assert table.select(table.ancestors_of(gamma.box_id)) == [alpha, beta]
+
+    def test_unknown_box(self, table):
+        assert table.children_of("unknown") == 0
+        assert table.descendants_of("unknown") == 0
+        assert table.ancestors_of("unknown") == 0
+
+    def test_roots_and_leaves_match_boxyard_meta(self, box_metas):
+        meta = BoxyardMeta(box_metas=box_metas)
+        assert meta.table.select(meta.table.roots) == meta.roots()
+        assert meta.table.select(meta.table.leaves) == meta.leaves()
+
+    def test_matches_boxyard_meta_on_random_dag(self):
+        rng = random.Random(1)
+        metas = []
+        for i in range(100):
+            parents = [metas[j].box_id for j in rng.sample(range(i), min(i, rng.randint(0, 2)))]
+            metas.append(_make_box_meta(f"{i:05d}", f"box{i}", "20250101", parents=parents))
+        meta = BoxyardMeta(box_metas=metas)
+        table = meta.table
+        for bm in metas:
+            assert {b.box_id for b in table.select(table.descendants_of(bm.box_id))} == {
+                b.box_id for b in meta.descendants_of(bm.box_id)
+            }
+            assert {b.box_id for b in table.select(table.ancestors_of(bm.box_id))} == {
+                b.box_id for b in meta.ancestors_of(bm.box_id)
+            }
+
+
+# ============================================================================
+# Tests for sorting
+# ============================================================================
+
+# %% pts/tests/unit/models/test_box_table.pct.py 8
+class TestSelect:
+    """Tests for BoxTable.get_rows and BoxTable.select."""
+
+    def test_sort_by_created(self, table, box_metas):
+        alpha, beta, gamma, delta = box_metas
+        assert table.select(table.all_rows, sort_by=BoxSortKey.CREATED) == [beta, alpha, delta, gamma]
+
+    def test_sort_by_name(self, table, box_metas):
+        alpha, beta, gamma, delta = box_metas
+        assert table.select(table.all_rows, sort_by="name") == [alpha, beta, delta, gamma]
+
+    def test_sort_by_index_name(self, table, box_metas):
+        expected = sorted(box_metas, key=lambda bm: bm.index_name)
+        assert table.select(table.all_rows, sort_by=BoxSortKey.INDEX_NAME) == expected
+
+    def test_table_is_cached(self, box_metas):
+        meta = BoxyardMeta(box_metas=box_metas)
+        assert meta.table is meta.table
+
+
+# ============================================================================
+# Tests for GroupBitsets helpers
+# ============================================================================
+
+# %% pts/tests/unit/models/test_box_table.pct.py 9
+class TestBitsetIndices:
+    """Tests for converting between bitsets and row indices."""
+
+    def test_round_trip(self):
+        rng = random.Random(2)
+        indices = sorted(rng.sample(range(1000), 100))
+        bitset = GroupBitsets.from_indices(indices, 1000)
+        assert GroupBitsets.get_indices(bitset) == indices
+
+    def test_empty(self):
+        assert GroupBitsets.get_indices(0) == []
+        assert GroupBitsets.from_indices([], 0) == 0
@@ -225,6 +225,14 @@ class TestByIndexName:
         # Results should be equal (same content)
         assert first_call == second_call
 
+    def test_by_index_name_is_built_once(self, sample_box_metas):
+        """by_index_name is cached, so lookups do not rebuild the index."""
+        meta = BoxyardMeta(box_metas=sample_box_metas)
+
+        assert meta.by_index_name is meta.by_index_name
+        assert meta.by_id is meta.by_id
+        assert meta.by_storage_location is meta.by_storage_location
+
 
 # ============================================================================
 # Tests for index consistency
@@ -0,0 +1,230 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: pts/tests/unit/models/test_status_snapshots.pct.py
+
+__all__ = ['TestGetBoxSyncStatusWithSnapshot', 'TestGetFreshBoxStatusSnapshot', 'TestLocalFingerprint', 'TestSnapshotStore', 'box']
+
+# %% pts/tests/unit/models/test_status_snapshots.pct.py 2
+import asyncio
+import pytest
+from datetime import datetime, timezone, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import boxyard._status_snapshots as status_snapshots_module
+from boxyard._status_snapshots import (
+    get_box_status_snapshot_path,
+    load_box_status_snapshot,
+    save_box_status_snapshot,
+    get_local_part_fingerprint,
+    get_local_fingerprints,
+    get_fresh_box_status_snapshot,
+    get_box_sync_status_with_snapshot,
+)
+from boxyard._models import BoxMeta, BoxPart, SyncCondition, SyncRecord, SyncStatus
+
+
+def _make_config(tmp_path):
+    config = MagicMock()
+    config.status_snapshots_path = tmp_path / "status_snapshots"
+    config.boxyard_data_path = tmp_path / "data"
+    config.user_boxes_path = tmp_path / "boxes"
+    config.local_store_path = tmp_path / "data" / "local_store"
+    return config
+
+
+def _make_box_meta() -> BoxMeta:
+    return BoxMeta(
+        creation_timestamp_utc="20251122_143022",
+        box_subid="a7kx9",
+        name="myproject",
+        storage_location="default",
+        creator_hostname="myhost",
+        groups=[],
+    )
+
+
+def _make_sync_status(sync_record: SyncRecord | None = None) -> dict:
+    return {
+        box_part: SyncStatus(
+            sync_condition=SyncCondition.SYNCED if sync_record else SyncCondition.NEEDS_PUSH,
+            local_path_exists=True,
+            remote_path_exists=sync_record is not None,
+            local_sync_record=sync_record,
+            remote_sync_record=sync_record,
+            is_dir=box_part == BoxPart.DATA,
+        )
+        for box_part in BoxPart
+    }
+
+
+@pytest.fixture
+def box(tmp_path):
+    config = _make_config(tmp_path)
+    box_meta = _make_box_meta()
+    data_path = box_meta.get_local_part_path(config, BoxPart.DATA)
+    data_path.mkdir(parents=True)
+    (data_path / "file.txt").write_text("content")
+    return config, box_meta
+
+
+def _snapshot(config, box_meta, sync_status, age: float = 0.0):
+    return save_box_status_snapshot(
+        config,
+        box_meta,
+        sync_status,
+        get_local_fingerprints(config, box_meta),
+        taken_at_utc=datetime.now(timezone.utc) - timedelta(seconds=age),
+    )
+
+
+# ============================================================================
+# Tests for the snapshot store
+# ============================================================================
+
+# %% pts/tests/unit/models/test_status_snapshots.pct.py 3
+class TestSnapshotStore:
+    """Tests for saving and loading status snapshots."""
+
+    def test_path(self, tmp_path):
+        """Snapshots are stored by box_id."""
+        config = _make_config(tmp_path)
+        assert get_box_status_snapshot_path(config, "abc") == (
+            tmp_path / "status_snapshots" / "abc.json"
+        )
+
+    def test_round_trip(self, box):
+        """The sync status (including the sync records) round-trips through the store."""
+        config, box_meta = box
+        sync_status = _make_sync_status(SyncRecord.create(sync_complete=True, syncer_hostname="h"))
+
+        _snapshot(config, box_meta, sync_status)
+        snapshot = load_box_status_snapshot(config, box_meta.box_id)
+
+        assert snapshot.to_sync_status() == sync_status
+
+    def test_load_missing(self, tmp_path):
+        """Loading a snapshot that was never saved returns None."""
+        assert load_box_status_snapshot(_make_config(tmp_path), "abc") is None
+
+    def test_save_leaves_no_temporary_files(self, box):
+        """Snapshots are written atomically through a uniquely named temporary file."""
+        config, box_meta = box
+        _snapshot(config, box_meta, _make_sync_status())
+        _snapshot(config, box_meta, _make_sync_status())
+
+        assert [p.name for p in config.status_snapshots_path.iterdir()] == [
+            f"{box_meta.box_id}.json"
+        ]
+
+
+# ============================================================================
+# Tests for local fingerprints
+# ============================================================================
+
+# %% pts/tests/unit/models/test_status_snapshots.pct.py 4
+class TestLocalFingerprint:
+    """Tests for get_local_part_fingerprint."""
+
+    def test_changes_on_modification(self, box):
+        """Adding a file changes the fingerprint of the data part."""
+        config, box_meta = box
+        before = get_local_part_fingerprint(config, box_meta, BoxPart.DATA)
+        (box_meta.get_local_part_path(config, BoxPart.DATA) / "new.txt").write_text("new")
+
+        assert get_local_part_fingerprint(config, box_meta, BoxPart.DATA) != before
+
+    def test_changes_on_deletion(self, box):
+        """Removing a file changes the fingerprint of the data part."""
+        config, box_meta = box
+        before = get_local_part_fingerprint(config, box_meta, BoxPart.DATA)
+        (box_meta.get_local_part_path(config, BoxPart.DATA) / "file.txt").unlink()
+
+        assert get_local_part_fingerprint(config, box_meta, BoxPart.DATA) != before
+
+    def test_changes_on_new_sync_record(self, box):
+        """A new local sync record changes the fingerprint."""
+        config, box_meta = box
+        before = get_local_part_fingerprint(config, box_meta, BoxPart.DATA)
+        sync_record_path = box_meta.get_local_sync_record_path(config, BoxPart.DATA)
+        sync_record_path.parent.mkdir(parents=True)
+        sync_record_path.write_text(
+            SyncRecord.create(sync_complete=True, syncer_hostname="h").model_dump_json()
+        )
+
+        assert get_local_part_fingerprint(config, box_meta, BoxPart.DATA) != before
+
+    def test_missing_part(self, box):
+        """A part that does not exist locally has a stable fingerprint."""
+        config, box_meta = box
+        assert get_local_part_fingerprint(config, box_meta, BoxPart.CONF) == [None, None]
+
+
+# ============================================================================
+# Tests for get_fresh_box_status_snapshot
+# ============================================================================
+
+# %% pts/tests/unit/models/test_status_snapshots.pct.py 5
+class TestGetFreshBoxStatusSnapshot:
+    """Tests for get_fresh_box_status_snapshot."""
+
+    def test_fresh_snapshot_is_returned(self, box):
+        config, box_meta = box
+        _snapshot(config, box_meta, _make_sync_status())
+
+        assert get_fresh_box_status_snapshot(config, box_meta, max_age=60) is not None
+
+    def test_old_snapshot_is_ignored(self, box):
+        """Snapshots older than max_age are not returned."""
+        config, box_meta = box
+        _snapshot(config, box_meta, _make_sync_status(), age=120)
+
+        assert get_fresh_box_status_snapshot(config, box_meta, max_age=60) is None
+
+    def test_local_change_invalidates(self, box):
+        """Snapshots of boxes that changed locally are not returned."""
+        config, box_meta = box
+        _snapshot(config, box_meta, _make_sync_status())
+        (box_meta.get_local_part_path(config, BoxPart.DATA) / "file.txt").write_text("changed!")
+
+        assert get_fresh_box_status_snapshot(config, box_meta, max_age=60) is None
+
+    def test_no_snapshot(self, box):
+        config, box_meta = box
+        assert get_fresh_box_status_snapshot(config, box_meta, max_age=60) is None
+
+
+# ============================================================================
+# Tests for get_box_sync_status_with_snapshot
+# ============================================================================
+
+# %% pts/tests/unit/models/test_status_snapshots.pct.py 6
+class TestGetBoxSyncStatusWithSnapshot:
+    """Tests for get_box_sync_status_with_snapshot."""
+
+    def _get(self, config, box_meta, max_age):
+        with patch(
+            "boxyard.cmds.get_box_sync_status",
+            new=AsyncMock(return_value=_make_sync_status()),
+        ) as mock_get_status:
+            result = asyncio.run(get_box_sync_status_with_snapshot(config, box_meta, max_age))
+        return result, mock_get_status.call_count
+
+    def test_without_max_age_no_snapshot_is_used(self, box, monkeypatch):
+        """Without max_age, the local state is not fingerprinted and no snapshot is saved."""
+        config, box_meta = box
+        monkeypatch.setattr(
+            status_snapshots_module,
+            "get_local_part_fingerprint",
+            MagicMock(side_effect=AssertionError("fingerprinted")),
+        )
+
+        (_, from_snapshot), num_probes = self._get(config, box_meta, max_age=None)
+        assert not from_snapshot and num_probes == 1
+        assert not get_box_status_snapshot_path(config, box_meta.box_id).exists()
+
+    def test_with_max_age_snapshot_is_reused(self, box):
+        """With max_age, the probed status is saved and then reused."""
+        config, box_meta = box
+
+        (_, from_snapshot), num_probes = self._get(config, box_meta, max_age=60)
+        assert not from_snapshot and num_probes == 1
+        (_, from_snapshot), num_probes = self._get(config, box_meta, max_age=60)
+        assert from_snapshot and num_probes == 0
@@ -0,0 +1,175 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: pts/tests/unit/test_daemon_client.pct.py
+
+__all__ = ['TestGetForwardableRequest', 'TestMainFallback', 'TestSendDaemonRequest', 'TestSplitCliArgs']
+
+# %% pts/tests/unit/test_daemon_client.pct.py 2
+import json
+import socket
+import sys
+import threading
+import pytest
+from pathlib import Path
+
+import boxyard._daemon_client as daemon_client
+from boxyard._daemon_client import (
+    split_cli_args,
+    get_daemon_socket_path,
+    get_forwardable_request,
+    send_daemon_request,
+)
+
+
+# ============================================================================
+# Tests for parsing the command line
+# ============================================================================
+
+# %% pts/tests/unit/test_daemon_client.pct.py 3
+class TestSplitCliArgs:
+    """Tests for split_cli_args."""
+
+    def test_no_config(self):
+        assert split_cli_args(["list", "-o", "json"]) == (None, "list", ["-o", "json"])
+
+    def test_config_option(self):
+        """The value of --config is not taken for the command name."""
+        assert split_cli_args(["--config", "c.toml", "path", "-r", "x"]) == (
+            Path("c.toml"), "path", ["-r", "x"]
+        )
+
+    def test_config_option_with_equals(self):
+        assert split_cli_args(["--config=c.toml", "list"]) == (Path("c.toml"), "list", [])
+
+    def test_no_command(self):
+        assert split_cli_args(["--help"]) == (None, None, [])
+
+
+# ============================================================================
+# Tests for get_forwardable_request
+# ============================================================================
+
+# %% pts/tests/unit/test_daemon_client.pct.py 4
+class TestGetForwardableRequest:
+    """Tests for get_forwardable_request."""
+
+    def test_forwarded_command(self, tmp_path):
+        """The config path is made absolute, and the socket is next to the config."""
+        socket_path, request = get_forwardable_request(
+            ["--config", "conf/config.toml", "list"], tmp_path.as_posix()
+        )
+
+        assert socket_path == tmp_path / "conf" / "boxyard_daemon.sock"
+        assert request == {
+            "type": "run",
+            "argv": ["--config", (tmp_path / "conf" / "config.toml").as_posix(), "list"],
+            "cwd": tmp_path.as_posix(),
+        }
+
+    def test_default_config(self, tmp_path):
+        socket_path, _ = get_forwardable_request(["which"], tmp_path.as_posix())
+        assert socket_path == get_daemon_socket_path()
+        assert socket_path.is_absolute()
+
+    def test_command_not_forwarded(self, tmp_path):
+        """Commands that modify the yard are not forwarded."""
+        assert get_forwardable_request(["sync", "-r", "x"], tmp_path.as_posix()) is None
+        assert get_forwardable_request(["--help"], tmp_path.as_posix()) is None
+
+    def test_interactive_not_forwarded(self, tmp_path):
+        """Interactive commands need the terminal, and are not forwarded."""
+        assert get_forwardable_request(["path", "--interactive"], tmp_path.as_posix()) is None
+        assert get_forwardable_request(["path", "-I"], tmp_path.as_posix()) is None
+        assert get_forwardable_request(["path", "-i", "x"], tmp_path.as_posix()) is not None
+
+
+# ============================================================================
+# Tests for send_daemon_request
+# ============================================================================
+
+# %% pts/tests/unit/test_daemon_client.pct.py 5
+class TestSendDaemonRequest:
+    """Tests for send_daemon_request without a running daemon."""
+
+    def test_no_socket(self, tmp_path):
+        assert send_daemon_request(tmp_path / "missing.sock", {"type": "ping"}) is None
+
+    def test_stale_socket(self, tmp_path):
+        """A socket left behind by a daemon that is no longer running is ignored."""
+        socket_path = tmp_path / "stale.sock"
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(socket_path.as_posix())
+        sock.close()
+
+        assert socket_path.exists()
+        assert send_daemon_request(socket_path, {"type": "ping"}) is None
+
+
+# ============================================================================
+# Tests for falling back to running commands locally
+# ============================================================================
+
+# %% pts/tests/unit/test_daemon_client.pct.py 6
+class TestMainFallback:
+    """Tests for `main` running a command locally when the daemon does not run it."""
+
+    @pytest.fixture
+    def daemon(self, tmp_path):
+        """A fake daemon for the config at `tmp_path`, replying with `daemon.response`."""
+        config_path = tmp_path / "config.toml"
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(get_daemon_socket_path(config_path).as_posix())
+        server.listen()
+        stop = threading.Event()
+
+        class _Daemon:
+            response = None
+
+        def _serve():
+            while True:
+                conn, _ = server.accept()
+                with conn:
+                    if stop.is_set():
+                        return
+                    conn.makefile("rb").readline()
+                    if _Daemon.response is not None:
+                        conn.sendall((json.dumps(_Daemon.response) + "\n").encode())
+                    else:
+                        stop.wait()  # Busy
+
+        thread = threading.Thread(target=_serve, daemon=True)
+        thread.start()
+        yield config_path, _Daemon
+        stop.set()
+        # Wake up the server thread, so that it does not outlive its socket
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(get_daemon_socket_path(config_path).as_posix())
+        thread.join(timeout=5)
+        server.close()
+
+    def _run_main(self, config_path, monkeypatch, capsys) -> str:
+        monkeypatch.setattr(sys, "argv", ["boxyard", "--config", str(config_path), "path", "-n", "a"])
+        monkeypatch.delenv(daemon_client.NO_DAEMON_ENV_VAR, raising=False)
+        monkeypatch.delenv(daemon_client.NO_FAST_PATH_ENV_VAR, raising=False)
+        monkeypatch.setattr(
+            "boxyard._fast_cli.run_fast_command", lambda argv: (0, "local\n", "")
+        )
+        with pytest.raises(SystemExit) as exc_info:
+            daemon_client.main()
+        assert exc_info.value.code == 0
+        return capsys.readouterr().out
+
+    def test_forwarded(self, daemon, monkeypatch, capsys):
+        config_path, fake_daemon = daemon
+        fake_daemon.response = {"exit_code": 0, "stdout": "daemon\n", "stderr": ""}
+        assert self._run_main(config_path, monkeypatch, capsys) == "daemon\n"
+
+    def test_needs_terminal_runs_locally(self, daemon, monkeypatch, capsys):
+        """Commands that need to prompt the user are run locally."""
+        config_path, fake_daemon = daemon
+        fake_daemon.response = {"needs_terminal": True}
+        assert self._run_main(config_path, monkeypatch, capsys) == "local\n"
+
+    def test_busy_daemon_times_out(self, daemon, monkeypatch, capsys):
+        """A daemon that does not answer in time is given up on."""
+        config_path, _ = daemon
+        monkeypatch.setattr(daemon_client, "DAEMON_REQUEST_TIMEOUT", 0.2)
+        assert self._run_main(config_path, monkeypatch, capsys) == "local\n"
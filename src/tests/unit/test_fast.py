@@ -1,15 +1,22 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: pts/tests/unit/test_fast.pct.py
 
-__all__ = ['TestDAG', 'TestFromFile', 'TestGroupFilter', 'TestGroupQueries', 'TestNoBoxyardImports', 'TestParentChildMethods', 'diamond_data', 'simple_data']
+__all__ = ['TestDAG', 'TestFromFile', 'TestGroupFilter', 'TestGroupQueries', 'TestMetaSnapshot', 'TestNameSearchIndex', 'TestNoBoxyardImports', 'TestParentChildMethods', 'TestReachabilityIndex', 'TestWhich', 'diamond_data', 'simple_data']
 
 # %% pts/tests/unit/test_fast.pct.py 2
-import pytest
-import json
 import inspect
-from pathlib import Path
+import json
+import mmap
 
-from boxyard._fast import BoxyardFast
+import pytest
 
+from boxyard._fast import (
+    META_SNAPSHOT_FILENAME,
+    BoxyardFast,
+    NameSearchIndex,
+    ReachabilityIndex,
+    get_topological_ranks,
+    write_meta_snapshot,
+)
 
 # ============================================================================
 # Fixtures
@@ -72,7 +79,7 @@ class TestFromFile:
         meta_path = tmp_path / "boxyard_meta.json"
         meta_path.write_text(json.dumps(simple_data))
         fast = BoxyardFast.from_file(meta_path)
-        assert len(fast._boxes) == 3
+        assert len(fast) == 3
 
     def test_backwards_compat_no_parents(self, tmp_path):
         """JSON without parents key still works."""
@@ -257,3 +264,254 @@ class TestDAG:
         nested = fast.get_dag_nested(root_id="20251122_bbbbb")
         assert "20251122_bbbbb" in nested
         assert "20251122_aaaaa" not in nested
+
+
+# ============================================================================
+# Tests: path-based queries
+# ============================================================================
+
+# %% pts/tests/unit/test_fast.pct.py 10
+class TestWhich:
+
+    @pytest.fixture
+    def boxes_path(self, tmp_path):
+        boxes_path = tmp_path / "boxes"
+        (boxes_path / "20251122_aaaaa__box_a" / "src").mkdir(parents=True)
+        return boxes_path
+
+    def test_which_inside_box(self, simple_data, boxes_path):
+        fast = BoxyardFast(simple_data, user_boxes_path=boxes_path.as_posix())
+        result = fast.which(boxes_path / "20251122_aaaaa__box_a" / "src")
+        assert result["box_id"] == "20251122_aaaaa"
+        assert fast.index_name_at(boxes_path / "20251122_aaaaa__box_a") == "20251122_aaaaa__box_a"
+
+    def test_which_outside_or_unknown(self, simple_data, boxes_path, tmp_path):
+        fast = BoxyardFast(simple_data, user_boxes_path=boxes_path.as_posix())
+        assert fast.which(tmp_path) is None
+        assert fast.which(boxes_path) is None
+        (boxes_path / "20251122_zzzzz__unknown").mkdir()
+        assert fast.which(boxes_path / "20251122_zzzzz__unknown") is None
+        assert fast.index_name_at(boxes_path / "20251122_zzzzz__unknown") == "20251122_zzzzz__unknown"
+
+    def test_which_defaults_to_cwd(self, simple_data, boxes_path, monkeypatch):
+        fast = BoxyardFast(simple_data, user_boxes_path=boxes_path.as_posix())
+        monkeypatch.chdir(boxes_path / "20251122_aaaaa__box_a" / "src")
+        assert fast.which()["name"] == "box_a"
+
+    def test_which_symlinked_boxes_path(self, simple_data, boxes_path, tmp_path, monkeypatch):
+        link_path = tmp_path / "boxes_link"
+        link_path.symlink_to(boxes_path)
+        fast = BoxyardFast(simple_data, user_boxes_path=link_path.as_posix())
+        assert fast.which(link_path / "20251122_aaaaa__box_a")["name"] == "box_a"
+        monkeypatch.chdir(link_path / "20251122_aaaaa__box_a")
+        assert fast.which()["name"] == "box_a"
+
+
+# ============================================================================
+# Tests: compact snapshot
+# ============================================================================
+
+# %% pts/tests/unit/test_fast.pct.py 11
+def _write_meta(tmp_path, data, snapshot=True):
+    meta_path = tmp_path / "boxyard_meta.json"
+    meta_path.write_text(json.dumps(data))
+    if snapshot:
+        write_meta_snapshot(data["box_metas"], tmp_path / META_SNAPSHOT_FILENAME, source_path=meta_path)
+    return meta_path
+
+
+def _uses_snapshot_file(fast):
+    return isinstance(fast._snapshot._buffer, mmap.mmap)
+
+
+class TestMetaSnapshot:
+
+    def test_from_file_uses_snapshot(self, tmp_path, diamond_data):
+        meta_path = _write_meta(tmp_path, diamond_data)
+        fast = BoxyardFast.from_file(meta_path)
+        assert _uses_snapshot_file(fast)
+        assert not _uses_snapshot_file(BoxyardFast.from_file(meta_path, use_snapshot=False))
+
+    def test_same_results_as_json(self, tmp_path, diamond_data):
+        meta_path = _write_meta(tmp_path, diamond_data)
+        from_snapshot = BoxyardFast.from_file(meta_path)
+        from_json = BoxyardFast.from_file(meta_path, use_snapshot=False)
+
+        assert from_snapshot.get_dag() == from_json.get_dag()
+        assert from_snapshot.get_dag_nested() == from_json.get_dag_nested()
+        assert from_snapshot.roots() == from_json.roots()
+        assert from_snapshot.leaves(groups={"g2"}) == from_json.leaves(groups={"g2"})
+        assert from_snapshot.descendants_of("20251122_aaaaa", groups={"g1"}) == from_json.descendants_of("20251122_aaaaa", groups={"g1"})
+        assert from_snapshot.ancestors_of("20251122_ddddd") == from_json.ancestors_of("20251122_ddddd")
+        assert from_snapshot.all_boxes_with_groups() == from_json.all_boxes_with_groups()
+        assert from_snapshot.all_groups() == ["g1", "g2"]
+
+    def test_preserves_group_order_and_unicode(self, tmp_path):
+        data = {"box_metas": [_make_meta_dict("20251122", "aaaaa", "bäx ✓", groups=["zeta", "alpha"])]}
+        fast = BoxyardFast.from_file(_write_meta(tmp_path, data))
+        assert _uses_snapshot_file(fast)
+        assert fast.groups_of("20251122_aaaaa") == ["zeta", "alpha"]
+        assert fast.get_box("20251122_aaaaa__bäx ✓")["name"] == "bäx ✓"
+
+    def test_stale_snapshot_is_ignored(self, tmp_path, simple_data, diamond_data):
+        meta_path = _write_meta(tmp_path, simple_data)
+        meta_path.write_text(json.dumps(diamond_data))
+        fast = BoxyardFast.from_file(meta_path)
+        assert not _uses_snapshot_file(fast)
+        assert len(fast) == 4
+
+    def test_corrupt_snapshot_is_ignored(self, tmp_path, simple_data):
+        meta_path = _write_meta(tmp_path, simple_data)
+        snapshot_path = tmp_path / META_SNAPSHOT_FILENAME
+        snapshot_path.write_bytes(snapshot_path.read_bytes()[:40])
+        fast = BoxyardFast.from_file(meta_path)
+        assert not _uses_snapshot_file(fast)
+        assert len(fast) == 3
+
+    def test_parent_missing_from_meta(self, tmp_path):
+        """Boxes can list parents that are not in the metadata."""
+        data = {"box_metas": [
+            _make_meta_dict("20251122", "bbbbb", "box_b", parents=["20251122_zzzzz"]),
+            _make_meta_dict("20251122", "ccccc", "box_c", parents=["20251122_bbbbb"]),
+        ]}
+        fast = BoxyardFast.from_file(_write_meta(tmp_path, data))
+        assert fast.parents_of("20251122_bbbbb") == []
+        assert fast.get_box("20251122_bbbbb__box_b")["parents"] == ["20251122_zzzzz"]
+        assert [c["name"] for c in fast.children_of("20251122_zzzzz")] == ["box_b"]
+        assert [d["name"] for d in fast.descendants_of("20251122_zzzzz")] == ["box_b", "box_c"]
+        assert [r["name"] for r in fast.roots()] == []
+
+
+# ============================================================================
+# Tests: reachability index
+# ============================================================================
+
+# %% pts/tests/unit/test_fast.pct.py 12
+def _brute_force_ancestors(parents, node):
+    ancestors, stack = set(), [node]
+    while stack:
+        for parent in parents[stack.pop()]:
+            if parent not in ancestors:
+                ancestors.add(parent)
+                stack.append(parent)
+    return ancestors
+
+
+class TestReachabilityIndex:
+
+    def test_topological_ranks(self):
+        ranks = get_topological_ranks([[1], [], [0, 1]])
+        assert ranks[1] < ranks[0] < ranks[2]
+        assert get_topological_ranks([[1], [0]]) is None
+
+    def test_cycle(self):
+        index = ReachabilityIndex(3, [[2], [0], [1]].__getitem__)
+        assert index.has_cycle()
+        assert index.is_ancestor(0, 0)
+        assert index.is_ancestor(0, 1)
+
+    def test_incremental_updates_match_brute_force(self):
+        """set_parents keeps the memoized ancestors right, including around cycles."""
+        import random
+
+        rng = random.Random(0)
+        num_nodes = 12
+        parents = [[p for p in range(node) if rng.random() < 0.2] for node in range(num_nodes)]
+        index = ReachabilityIndex(num_nodes, lambda node: list(parents[node]))
+        for _ in range(200):
+            node = rng.randrange(num_nodes)
+            new_parents = [p for p in range(num_nodes) if p != node and rng.random() < 0.15]
+            index.set_parents(node, new_parents)
+            parents[node] = new_parents
+            for _ in range(5):
+                a, b = rng.randrange(num_nodes), rng.randrange(num_nodes)
+                assert index.is_ancestor(a, b) == (b in _brute_force_ancestors(parents, a))
+            assert index.has_cycle() == (get_topological_ranks(parents) is None)
+
+    def test_fast_uses_snapshot_ranks(self, tmp_path, diamond_data):
+        fast = BoxyardFast.from_file(_write_meta(tmp_path, diamond_data))
+        assert fast._snapshot.topo_ranks is not None
+        assert fast.is_ancestor("20251122_ddddd", "20251122_aaaaa") is True
+        assert fast.would_create_cycle("20251122_aaaaa", "20251122_ddddd") is True
+        # Ruled out by the topological order, without computing any ancestors
+        assert fast.is_ancestor("20251122_aaaaa", "20251122_ddddd") is False
+        assert set(fast._reachability._ancestors) == {fast._snapshot.find_row("20251122_ddddd")}
+
+
+# ============================================================================
+# Tests: name search index
+# ============================================================================
+
+# %% pts/tests/unit/test_fast.pct.py 13
+def _brute_force_name_matches(names, term, mode, match_case):
+    def _is_subsequence(t, n):
+        it = iter(n)
+        return all(ch in it for ch in t)
+
+    rows = []
+    for row, name in enumerate(names):
+        if not match_case:
+            name, t = name.casefold(), term.casefold()
+        else:
+            t = term
+        if (mode == "exact" and name == t) or (mode == "contains" and t in name) or (
+            mode == "subsequence" and _is_subsequence(t, name)
+        ):
+            rows.append(row)
+    return rows
+
+
+class TestNameSearchIndex:
+
+    def test_match_modes(self):
+        index = NameSearchIndex.from_names(["my-project", "Project", "prj", "other"])
+        assert index.find("project") == [0, 1]
+        assert index.find("Project", match_case=True) == [1]
+        assert index.find("project", mode="exact") == [1]
+        assert index.find("prj", mode="subsequence") == [0, 1, 2]
+        assert index.find("") == [0, 1, 2, 3]
+        assert index.find("xyz") == []
+
+    def test_invalid_mode(self):
+        with pytest.raises(ValueError):
+            NameSearchIndex.from_names(["a"]).find("a", mode="regex")
+
+    def test_ranking(self):
+        names = ["sub-notes", "notes", "mynotes", "n-o-t-e-s", "notes-2024"]
+        index = NameSearchIndex.from_names(names)
+        ranked = [names[row] for row in index.search("notes", mode="subsequence")]
+        assert ranked == ["notes", "notes-2024", "sub-notes", "mynotes", "n-o-t-e-s"]
+
+    def test_ties_broken_by_key(self):
+        index = NameSearchIndex.from_names(["box", "box"])
+        assert index.search("box", tie_key=lambda row: -row) == [1, 0]
+
+    def test_matches_brute_force(self):
+        import random
+
+        rng = random.Random(0)
+        names = ["".join(rng.choice("abcAB-_ ") for _ in range(rng.randint(0, 10))) for _ in range(300)]
+        index = NameSearchIndex.from_names(names)
+        for _ in range(300):
+            term = "".join(rng.choice("abcAB-") for _ in range(rng.randint(0, 4)))
+            mode = rng.choice(["exact", "contains", "subsequence"])
+            match_case = rng.random() < 0.5
+            assert index.find(term, mode, match_case) == _brute_force_name_matches(names, term, mode, match_case)
+
+    def test_snapshot_index_matches_in_memory_index(self, tmp_path):
+        names = ["alpha", "alphabet", "beta", "gamma-ray", "Ällö wörld"]
+        data = {"box_metas": [_make_meta_dict("20251122", f"{i:05d}", name) for i, name in enumerate(names)]}
+        fast = BoxyardFast.from_file(_write_meta(tmp_path, data))
+        assert _uses_snapshot_file(fast)
+        in_memory = NameSearchIndex.from_names(names)
+        for term in ["alp", "a", "ray", "ällö", "ÄLLÖ W", "zzz", "amr"]:
+            for mode in ["exact", "contains", "subsequence"]:
+                assert fast._snapshot.name_index.find(term, mode) == in_memory.find(term, mode)
+
+    def test_search_names(self, diamond_data):
+        fast = BoxyardFast(diamond_data)
+        assert fast.search_names("box_b") == ["20251122_bbbbb__box_b"]
+        assert fast.search_names("bxd", mode="subsequence") == ["20251122_ddddd__box_d"]
+        assert fast.search_names("box_") == [
+            "20251122_aaaaa__box_a", "20251122_bbbbb__box_b", "20251122_ccccc__box_c", "20251122_ddddd__box_d",
+        ]
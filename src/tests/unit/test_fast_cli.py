@@ -0,0 +1,277 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: pts/tests/unit/test_fast_cli.pct.py
+
+__all__ = ['TestCopiedConstants', 'TestImportTime', 'TestParity', 'yard']
+
+# %% pts/tests/unit/test_fast_cli.pct.py 2
+import json
+import subprocess
+import sys
+
+import pytest
+import toml
+
+from boxyard import const
+from boxyard._daemon_client import _DEFAULT_CONFIG_PATH
+from boxyard._fast import META_SNAPSHOT_FILENAME, write_meta_snapshot
+from boxyard._fast_cli import (
+    _BOX_CONF_REL_PATH,
+    _BOX_METAFILE_REL_PATH,
+    _SYNC_RECORDS_REL_PATH,
+    _FastYard,
+    run_fast_command,
+)
+from boxyard._models import BoxMeta
+from boxyard.config import _get_default_config_dict, get_config
+
+# ============================================================================
+# Fixtures
+# ============================================================================
+
+# %% pts/tests/unit/test_fast_cli.pct.py 3
+def _make_meta_dict(timestamp, subid, name, groups=None, parents=None):
+    return {
+        "creation_timestamp_utc": timestamp,
+        "box_subid": subid,
+        "name": name,
+        "storage_location": "fake",
+        "creator_hostname": "testhost",
+        "groups": groups or [],
+        "parents": parents or [],
+    }
+
+
+@pytest.fixture
+def yard(tmp_path):
+    """A yard with three boxes, of which two are included."""
+    config_path = tmp_path / "config" / "config.toml"
+    data_path = tmp_path / "data"
+    config_dict = _get_default_config_dict(config_path=config_path, data_path=data_path)
+    config_dict["user_boxes_path"] = (tmp_path / "boxes").as_posix()
+    config_path.parent.mkdir(parents=True)
+    config_path.write_text(toml.dumps(config_dict))
+
+    box_metas = [
+        _make_meta_dict("20251122", "aaaaa", "alpha-one", groups=["g1"]),
+        _make_meta_dict("20251122", "bbbbb", "Alpha-Two", parents=["20251122_aaaaa"]),
+        _make_meta_dict("20251122", "ccccc", "beta"),
+    ]
+    data_path.mkdir()
+    (data_path / "boxyard_meta.json").write_text(json.dumps({"box_metas": box_metas}))
+    for index_name in ["20251122_aaaaa__alpha-one", "20251122_bbbbb__Alpha-Two"]:
+        (tmp_path / "boxes" / index_name / "sub").mkdir(parents=True)
+    return config_path, tmp_path / "boxes"
+
+
+def _run_regular_cli(argv):
+    from boxyard._daemon import run_cli_command
+
+    return run_cli_command(argv)
+
+
+# ============================================================================
+# Tests: the fast path gives the same output as the regular CLI
+# ============================================================================
+
+# %% pts/tests/unit/test_fast_cli.pct.py 4
+# Invocations handled by the fast path. `{boxes}` is replaced by the user boxes path of the yard.
+# Together, they use every option of every command of the fast path (see
+# `test_cases_cover_all_options`).
+_PARITY_ARGS = [
+    ["list"],
+    ["list", "-o", "json"],
+    ["list", "--output-format", "json"],
+    ["list", "--storage-location", "fake"],
+    ["list", "-s", "fake", "-s", "fake"],
+    ["list", "-s", "nope"],
+    ["tree", "-o", "json"],
+    ["tree", "--output-format", "json"],
+    ["path", "-r", "20251122_aaaaa__alpha-one"],
+    ["path", "--box", "20251122_aaaaa__alpha-one"],
+    ["path", "-r", "20251122_xxxxx__nope"],
+    ["path", "-i", "20251122_bbbbb"],
+    ["path", "--box-id", "20251122_bbbbb"],
+    ["path", "-i", "20251122_ccccc"],  # Not included
+    ["path", "-i", "20251122_ccccc", "-o"],
+    ["path", "-i", "20251122_bbbbb", "--only-included"],
+    ["path", "-n", "two"],
+    ["path", "--box-name", "two"],
+    ["path", "-n", "alpha", "-1"],
+    ["path", "-n", "alpha", "--pick-first"],
+    ["path", "-n", "ALPHA-ONE", "-m", "exact"],
+    ["path", "-n", "ALPHA-ONE", "-m", "exact", "-c"],
+    ["path", "-n", "Alpha", "--name-match-mode", "subsequence", "--name-match-case"],
+    ["path", "-n", "zzz"],
+    ["path", "-r", "20251122_aaaaa__alpha-one", "-p", "meta"],
+    ["path", "-r", "20251122_aaaaa__alpha-one", "--path-option=sync-record-conf"],
+    ["path", "-r", "20251122_aaaaa__alpha-one", "--path-option", "root"],
+    ["which", "-p", "{boxes}/20251122_aaaaa__alpha-one/sub"],
+    ["which", "--path", "{boxes}/20251122_aaaaa__alpha-one/sub"],
+    ["which", "-p", "{boxes}/20251122_aaaaa__alpha-one", "--json"],
+    ["which", "-p", "{boxes}/20251122_aaaaa__alpha-one", "-j"],
+    ["which", "-p", "{boxes}/20251122_aaaaa__alpha-one", "-i"],
+    ["which", "-p", "{boxes}/20251122_aaaaa__alpha-one", "--index-name"],
+    ["which", "-p", "{boxes}/20251122_xxxxx__nope"],
+    ["which", "-p", "{boxes}/."],
+]
+
+
+def _format_args(args, boxes_path):
+    return [arg.replace("{boxes}", boxes_path.as_posix()) for arg in args]
+
+
+class TestParity:
+
+    def test_cases_cover_all_options(self):
+        """Every option that the fast path parses is compared against the regular CLI."""
+        from boxyard._fast_cli import _FAST_COMMANDS
+
+        used_options = {
+            (args[0], arg.split("=", 1)[0])
+            for args in _PARITY_ARGS
+            for arg in args[1:]
+            if arg.startswith("-")
+        }
+        for command_name, (_, options) in _FAST_COMMANDS.items():
+            for option in options:
+                assert (command_name, option) in used_options, f"{command_name} {option}"
+
+    @pytest.mark.parametrize("args", _PARITY_ARGS)
+    def test_same_output(self, yard, args):
+        config_path, boxes_path = yard
+        argv = ["--config", config_path.as_posix(), *_format_args(args, boxes_path)]
+
+        result = run_fast_command(argv)
+
+        assert result is not None
+        assert result == _run_regular_cli(argv)
+
+    def test_config_option_with_equals(self, yard):
+        config_path, _ = yard
+        argv = [f"--config={config_path.as_posix()}", "list"]
+
+        result = run_fast_command(argv)
+
+        assert result is not None
+        assert result == _run_regular_cli(argv)
+
+    @pytest.mark.parametrize("args", [
+        ["tree", "-o", "json"],
+        ["which", "-p", "20251122_aaaaa__alpha-one/sub", "--json"],
+        ["which", "-p", "20251122_ccccc__beta"],
+    ])
+    def test_same_output_with_snapshot(self, yard, args):
+        """The commands that read the compact snapshot of the meta give the same output."""
+        config_path, boxes_path = yard
+        meta_path = config_path.parent.parent / "data" / "boxyard_meta.json"
+        write_meta_snapshot(
+            json.loads(meta_path.read_text())["box_metas"],
+            meta_path.parent / META_SNAPSHOT_FILENAME,
+            source_path=meta_path,
+        )
+        if args[0] == "which":
+            args = [*args[:2], (boxes_path / args[2]).as_posix(), *args[3:]]
+        argv = ["--config", config_path.as_posix(), *args]
+
+        result = run_fast_command(argv)
+
+        assert result is not None
+        assert result == _run_regular_cli(argv)
+
+    @pytest.mark.parametrize("args", [
+        ["tree"],  # Rendered with rich
+        ["list", "-g", "g1"],  # Group filters
+        ["path", "-n", "alpha"],  # Ambiguous, needs fzf
+        ["path"],  # Interactive search
+        ["path", "-I"],
+        ["which", "--help"],
+        ["sync", "-r", "20251122_aaaaa__alpha-one"],
+    ])
+    def test_falls_back(self, yard, args):
+        config_path, _ = yard
+        assert run_fast_command(["--config", config_path.as_posix(), *args]) is None
+
+    def test_falls_back_without_meta_file(self, yard):
+        """The regular CLI creates the meta file if it is missing."""
+        config_path, _ = yard
+        (config_path.parent.parent / "data" / "boxyard_meta.json").unlink()
+        assert run_fast_command(["--config", config_path.as_posix(), "list"]) is None
+
+
+# ============================================================================
+# Tests: the copies of the constants and paths of the regular CLI
+# ============================================================================
+
+# %% pts/tests/unit/test_fast_cli.pct.py 5
+class TestCopiedConstants:
+    """`_fast_cli` cannot import `const`, `config` or `_models`, so it keeps copies."""
+
+    def test_constants(self):
+        assert _SYNC_RECORDS_REL_PATH == const.SYNC_RECORDS_REL_PATH
+        assert _BOX_METAFILE_REL_PATH == const.BOX_METAFILE_REL_PATH
+        assert _BOX_CONF_REL_PATH == const.BOX_CONF_REL_PATH
+        assert _DEFAULT_CONFIG_PATH == const.DEFAULT_CONFIG_PATH
+
+    def test_paths_and_box_ids(self, yard):
+        config_path, _ = yard
+        config = get_config(config_path)
+        fast_yard = _FastYard(config_path)
+
+        assert fast_yard.meta_path == config.boxyard_meta_path
+        assert fast_yard.meta_path.parent / META_SNAPSHOT_FILENAME == config.boxyard_meta_snapshot_path
+        assert fast_yard.box_metas
+        for bm in fast_yard.box_metas:
+            box_meta = BoxMeta(**{k: v for k, v in bm.items() if not k.startswith("_")})
+            assert bm["_box_id"] == box_meta.box_id
+            assert bm["_index_name"] == box_meta.index_name
+            assert fast_yard.get_local_path(bm) == box_meta.get_local_path(config)
+
+
+# ============================================================================
+# Tests: import time
+# ============================================================================
+
+# %% pts/tests/unit/test_fast_cli.pct.py 6
+# Modules that the fast path must not import
+_HEAVY_MODULES = ["typer", "pydantic", "rich", "boxyard.config", "boxyard._models", "boxyard._cli"]
+
+# A generous budget for the imports of the fast path, as measured by `python -X importtime`
+# (about 0.05s when this was written)
+_FAST_PATH_IMPORT_BUDGET = 0.5  # Seconds
+
+class TestImportTime:
+
+    def test_fast_path_imports(self, yard):
+        """Running a fast command does not import any heavy module."""
+        config_path, boxes_path = yard
+        code = (
+            "import sys\n"
+            "from boxyard._fast_cli import run_fast_command\n"
+            f"assert run_fast_command(['--config', {config_path.as_posix()!r}, 'which', '-p', "
+            f"{(boxes_path / '20251122_aaaaa__alpha-one').as_posix()!r}]) is not None\n"
+            "print(' '.join(sys.modules))\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        modules = result.stdout.split()
+
+        for heavy_module in _HEAVY_MODULES:
+            assert not any(
+                m == heavy_module or m.startswith(f"{heavy_module}.") for m in modules
+            ), heavy_module
+
+    def test_fast_path_import_time(self):
+        """Importing the fast path stays within `_FAST_PATH_IMPORT_BUDGET`."""
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import boxyard._fast_cli"],
+            capture_output=True, text=True, check=True,
+        )
+        total_us = 0
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:"):
+                continue
+            _, cumulative_us, module_name = line.split("|")
+            # Only count the top-level imports, since the cumulative times include the nested ones
+            if cumulative_us.strip().isdigit() and not module_name.startswith("  "):
+                total_us += int(cumulative_us)
+
+        assert total_us > 0
+        assert total_us / 1e6 < _FAST_PATH_IMPORT_BUDGET